@@ -429,28 +429,36 @@ def process_raw_data(source_filter: Optional[str] = None, incremental: bool = Tr
 
 
 @celery_app.task(
+    bind=True,
     name="generate_embeddings",
     soft_time_limit=2700,
     time_limit=3000
 )
-def generate_embeddings(processed_file: Optional[str] = None):
+def generate_embeddings(self, processed_file: Optional[str] = None, batch_size: Optional[int] = None):
     """
     Generate embeddings for processed chunks
     
     This task is typically called as part of the processing pipeline,
     but can also be run standalone to regenerate embeddings.
     
+    Chunks are streamed in bounded batches and each batch is committed to the
+    file's embedding store (data/embeddings/), so an interrupted run resumes
+    where it stopped. Progress is reported as PROGRESS task state.
+    
     Args:
         processed_file: Optional specific file to process (None = all processed files)
+        batch_size: Chunks per embedding batch (default EMBEDDING_JOB_BATCH_SIZE)
     
     Returns:
         Dictionary with embedding generation results
     """
     logger.info(f"[Celery] Generating embeddings (file={processed_file})")
+    job = None
     
     try:
         from Module2_NiruParser.pipeline import ProcessingPipeline
         from Module2_NiruParser.config import Config
+        from .embedding_job import EmbeddingJob
         
         config = Config()
         pipeline = ProcessingPipeline(config)
@@ -463,55 +471,31 @@ def generate_embeddings(processed_file: Optional[str] = None):
         else:
             files_to_process = list(processed_path.rglob("*_processed.jsonl"))
         
-        total_embedded = 0
+        def report_progress(progress: Dict):
+            # Called directly (e.g. from run_full_pipeline) there is no task state
+            if not self.request.called_directly:
+                self.update_state(state="PROGRESS", meta=progress)
         
-        for jsonl_file in files_to_process:
-            if not jsonl_file.exists():
-                continue
-                
-            logger.info(f"Processing embeddings for: {jsonl_file.name}")
-            
-            # Load chunks
-            chunks = []
-            with open(jsonl_file, "r", encoding="utf-8") as f:
-                for line in f:
-                    if line.strip():
-                        chunk = json.loads(line)
-                        # Only process chunks without embeddings
-                        if "embedding" not in chunk or chunk.get("embedding") is None:
-                            chunks.append(chunk)
-            
-            if chunks:
-                # Generate embeddings
-                embedded_chunks = pipeline.embedder.embed_chunks(chunks)
-                
-                # Update the file with embeddings
-                all_chunks = []
-                with open(jsonl_file, "r", encoding="utf-8") as f:
-                    for line in f:
-                        if line.strip():
-                            all_chunks.append(json.loads(line))
-                
-                # Merge embedded chunks back
-                embedded_by_id = {c.get("chunk_id"): c for c in embedded_chunks}
-                for i, chunk in enumerate(all_chunks):
-                    if chunk.get("chunk_id") in embedded_by_id:
-                        all_chunks[i] = embedded_by_id[chunk.get("chunk_id")]
-                
-                # Save updated chunks
-                with open(jsonl_file, "w", encoding="utf-8") as f:
-                    for chunk in all_chunks:
-                        f.write(json.dumps(chunk, ensure_ascii=False, default=str) + "\n")
-                
-                total_embedded += len(embedded_chunks)
-                logger.info(f"Generated {len(embedded_chunks)} embeddings for {jsonl_file.name}")
+        job = EmbeddingJob(pipeline.embedder, batch_size=batch_size, progress_callback=report_progress)
+        progress = job.run(files_to_process)
         
         return {
             "status": "completed",
-            "total_embedded": total_embedded,
+            "total_embedded": progress["embedded"],
+            "progress": progress,
             "timestamp": datetime.utcnow().isoformat()
         }
         
+    except SoftTimeLimitExceeded:
+        # Committed batches are kept; the next run picks up from there
+        progress = job.progress.to_dict() if job else {}
+        logger.warning(f"[Celery] Embedding generation hit its time limit after {progress.get('embedded', 0)} embeddings")
+        return {
+            "status": "interrupted",
+            "total_embedded": progress.get("embedded", 0),
+            "progress": progress,
+            "timestamp": datetime.utcnow().isoformat()
+        }
     except Exception as e:
         logger.error(f"[Celery] Embedding generation error: {e}")
         return {"status": "failed", "error": str(e)}
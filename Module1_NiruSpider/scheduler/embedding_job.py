@@ -0,0 +1,187 @@
+"""
+Embedding Job - Streaming, restartable embedding generation for processed files
+
+Reads each *_processed.jsonl file line by line and embeds chunks that have no
+embedding in bounded batches. Results go to the file's EmbeddingStore
+(Module3_NiruDB.embedding_store), an append-only log committed batch by
+batch, instead of being merged back into the processed file. Memory use
+depends on the batch size, not the file size.
+
+Chunks whose embedding is already committed for the same text are skipped,
+so a run that was killed or hit its time limit resumes where it stopped.
+Progress (files, bytes read, chunks embedded/skipped) is reported through a
+callback, which the Celery task forwards as task state.
+"""
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Generator, List, Optional
+
+import numpy as np
+from loguru import logger
+
+from Module3_NiruDB.embedding_store import EmbeddingStore, text_digest
+
+EMBEDDING_JOB_BATCH_SIZE = int(os.getenv("EMBEDDING_JOB_BATCH_SIZE", "256"))
+
+
+@dataclass
+class EmbeddingJobProgress:
+    """Counters reported while the job runs"""
+
+    files_total: int = 0
+    files_done: int = 0
+    current_file: str = ""
+    bytes_total: int = 0
+    bytes_done: int = 0
+    embedded: int = 0
+    skipped: int = 0
+    failed: int = 0
+    batches: int = 0
+
+    @property
+    def percent(self) -> float:
+        """Share of input bytes read"""
+        return 100.0 * self.bytes_done / self.bytes_total if self.bytes_total else 100.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["percent"] = round(self.percent, 1)
+        return data
+
+
+class EmbeddingJob:
+    """Embed chunks missing embeddings across processed JSONL files"""
+
+    def __init__(
+        self,
+        embedder: Any,
+        batch_size: Optional[int] = None,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        progress_interval: float = 2.0,
+        store_root: Optional[Path] = None
+    ):
+        """
+        Args:
+            embedder: Object with embed_batch(texts) -> array (TextEmbedder)
+            batch_size: Chunks per embedding call and per commit
+                (env EMBEDDING_JOB_BATCH_SIZE, default 256)
+            progress_callback: Called with EmbeddingJobProgress.to_dict()
+            progress_interval: Minimum seconds between progress callbacks
+            store_root: Embeddings directory (default data/embeddings)
+        """
+        self.embedder = embedder
+        self.batch_size = batch_size or EMBEDDING_JOB_BATCH_SIZE
+        self.progress_callback = progress_callback
+        self.progress_interval = progress_interval
+        self.store_root = store_root
+        self.progress = EmbeddingJobProgress()
+        self._last_report = 0.0
+
+    def run(self, files: List[Path]) -> Dict[str, Any]:
+        """
+        Embed every file in turn
+
+        Args:
+            files: Processed JSONL files
+
+        Returns:
+            progress: Final counters (EmbeddingJobProgress.to_dict())
+        """
+        files = [Path(f) for f in files if Path(f).exists()]
+        self.progress = EmbeddingJobProgress(
+            files_total=len(files),
+            bytes_total=sum(f.stat().st_size for f in files)
+        )
+        self._report(force=True)
+
+        for jsonl_file in files:
+            self.progress.current_file = jsonl_file.name
+            embedded_before = self.progress.embedded
+            self.embed_file(jsonl_file)
+            self.progress.files_done += 1
+            logger.info(
+                f"Embeddings for {jsonl_file.name}: {self.progress.embedded - embedded_before} generated"
+            )
+            self._report(force=True)
+
+        return self.progress.to_dict()
+
+    def embed_file(self, jsonl_file: Path):
+        """Embed one file's missing chunks, committing each batch"""
+        with EmbeddingStore.for_file(jsonl_file, root=self.store_root) as store:
+            for batch in self._pending_batches(jsonl_file, store):
+                texts = [chunk.get("text", "") for chunk in batch]
+                vectors = np.asarray(self.embedder.embed_batch(texts))
+
+                # embed_batch returns zero rows on failure; leave those for the next run
+                ok = np.any(vectors != 0, axis=1) if vectors.ndim == 2 and len(vectors) == len(batch) \
+                    else np.zeros(len(batch), dtype=bool)
+                records = [
+                    (str(chunk["chunk_id"]), text_digest(text), vector)
+                    for chunk, text, vector, good in zip(batch, texts, vectors, ok) if good
+                ]
+                self.progress.embedded += store.append(records)
+                self.progress.failed += len(batch) - len(records)
+                self.progress.batches += 1
+                self._report()
+
+    def _pending_batches(self, jsonl_file: Path, store: EmbeddingStore) -> Generator[List[Dict], None, None]:
+        """Stream batches of chunks that need an embedding"""
+        batch: List[Dict] = []
+        candidates: List[Dict] = []
+
+        def take_candidates():
+            done = store.embedded_ids(candidates)
+            for chunk in candidates:
+                if str(chunk["chunk_id"]) in done:
+                    self.progress.skipped += 1
+                else:
+                    batch.append(chunk)
+            candidates.clear()
+
+        with open(jsonl_file, "rb") as f:
+            for line in f:
+                self.progress.bytes_done += len(line)
+                if not line.strip():
+                    continue
+                try:
+                    chunk = json.loads(line)
+                except json.JSONDecodeError as e:
+                    logger.warning(f"Skipping invalid JSON line in {jsonl_file.name}: {e}")
+                    continue
+
+                if chunk.get("embedding") is not None:
+                    self.progress.skipped += 1
+                    continue
+                if chunk.get("chunk_id") is None:
+                    self.progress.failed += 1
+                    continue
+
+                candidates.append(chunk)
+                if len(candidates) >= self.batch_size:
+                    take_candidates()
+                if len(batch) >= self.batch_size:
+                    yield batch[:self.batch_size]
+                    del batch[:self.batch_size]
+                else:
+                    self._report()
+
+        take_candidates()
+        while batch:
+            yield batch[:self.batch_size]
+            del batch[:self.batch_size]
+
+    def _report(self, force: bool = False):
+        if self.progress_callback is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_report < self.progress_interval:
+            return
+        self._last_report = now
+        try:
+            self.progress_callback(self.progress.to_dict())
+        except Exception as e:
+            logger.debug(f"Embedding progress callback failed: {e}")
@@ -589,41 +589,17 @@ class APSchedulerBackend:
             # Use the processing pipeline's embedder
             from Module2_NiruParser.pipeline import ProcessingPipeline
             from Module2_NiruParser.config import Config
+            from .embedding_job import EmbeddingJob
             
             config = Config()
             pipeline = ProcessingPipeline(config)
             
             processed_path = project_root / "data" / "processed"
-            total_embedded = 0
             
-            for jsonl_file in processed_path.rglob("*_processed.jsonl"):
-                chunks = []
-                with open(jsonl_file, "r", encoding="utf-8") as f:
-                    for line in f:
-                        if line.strip():
-                            chunk = json.loads(line)
-                            if "embedding" not in chunk or chunk.get("embedding") is None:
-                                chunks.append(chunk)
-                
-                if chunks:
-                    embedded_chunks = pipeline.embedder.embed_chunks(chunks)
-                    total_embedded += len(embedded_chunks)
-                    
-                    # Update file with embeddings
-                    all_chunks = []
-                    with open(jsonl_file, "r", encoding="utf-8") as f:
-                        for line in f:
-                            if line.strip():
-                                all_chunks.append(json.loads(line))
-                    
-                    embedded_by_id = {c.get("chunk_id"): c for c in embedded_chunks}
-                    for i, chunk in enumerate(all_chunks):
-                        if chunk.get("chunk_id") in embedded_by_id:
-                            all_chunks[i] = embedded_by_id[chunk.get("chunk_id")]
-                    
-                    with open(jsonl_file, "w", encoding="utf-8") as f:
-                        for chunk in all_chunks:
-                            f.write(json.dumps(chunk, ensure_ascii=False, default=str) + "\n")
+            # Streams each file in batches; committed batches survive restarts
+            job = EmbeddingJob(pipeline.embedder)
+            progress = job.run(list(processed_path.rglob("*_processed.jsonl")))
+            total_embedded = progress["embedded"]
             
             logger.info(f"Embedding generation completed: {total_embedded} embeddings generated")
             return True
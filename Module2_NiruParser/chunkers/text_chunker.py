@@ -1,7 +1,7 @@
 """
 Text Chunker using LangChain's RecursiveCharacterTextSplitter
 """
-from typing import List, Dict
+from typing import List, Dict, Iterable, Optional
 from loguru import logger
 import hashlib
 
@@ -76,33 +76,88 @@ class TextChunker:
         try:
             # Split text
             chunks = self.splitter.split_text(text)
+            return self._to_chunk_dicts(chunks, metadata)
             
-            # Create chunk dictionaries with metadata
-            chunk_dicts = []
-            for i, chunk_text in enumerate(chunks):
-                # Generate unique chunk ID
-                chunk_id = self._generate_chunk_id(
-                    metadata.get("url", "unknown"),
-                    i
-                )
-                
-                chunk_dict = {
-                    "text": chunk_text,
-                    "chunk_id": chunk_id,
-                    "chunk_index": i,
-                    "total_chunks": len(chunks),
-                    **metadata,  # Include all original metadata
-                }
-                
-                chunk_dicts.append(chunk_dict)
+        except Exception as e:
+            logger.error(f"Error chunking text: {e}")
+            return []
+    
+    def chunk_stream(
+        self,
+        texts: Iterable[str],
+        metadata: Dict = None,
+        max_chunks: Optional[int] = None,
+        separator: str = "\n\n",
+    ) -> List[Dict]:
+        """
+        Chunk a document that arrives in pieces (e.g. PDF pages) without
+        joining it first
+        
+        Each piece is split together with the unfinished last chunk of the
+        previous one, so chunks still run across piece boundaries.
+        
+        Args:
+            texts: Document pieces in order
+            metadata: Metadata to attach to each chunk
+            max_chunks: Stop consuming `texts` once this many chunks exist
+            separator: Joins a piece to the carried-over text
+        
+        Returns:
+            List of chunks with metadata
+        """
+        if metadata is None:
+            metadata = {}
+        
+        try:
+            chunks = []
+            carry = ""
+            for text in texts:
+                if not text:
+                    continue
+                pieces = self.splitter.split_text(f"{carry}{separator}{text}" if carry else text)
+                if not pieces:
+                    continue
+                chunks.extend(pieces[:-1])
+                carry = pieces[-1]
+                if max_chunks and len(chunks) >= max_chunks:
+                    break
+            if carry:
+                chunks.append(carry)
+            if max_chunks:
+                chunks = chunks[:max_chunks]
             
-            logger.info(f"Created {len(chunk_dicts)} chunks from document")
-            return chunk_dicts
+            if not chunks:
+                logger.warning("Empty text provided to chunker")
+                return []
+            return self._to_chunk_dicts(chunks, metadata)
             
         except Exception as e:
-            logger.error(f"Error chunking text: {e}")
+            logger.error(f"Error chunking text stream: {e}")
             return []
     
+    def _to_chunk_dicts(self, chunks: List[str], metadata: Dict) -> List[Dict]:
+        """Create chunk dictionaries with metadata"""
+        chunk_dicts = []
+        for i, chunk_text in enumerate(chunks):
+            # Generate unique chunk ID
+            chunk_id = self._generate_chunk_id(
+                metadata.get("url", "unknown"),
+                i
+            )
+            
+            chunk_dict = {
+                "text": chunk_text,
+                "chunk_id": chunk_id,
+                "chunk_index": i,
+                "total_chunks": len(chunks),
+                **metadata,  # Include all original metadata
+            }
+            
+            chunk_dicts.append(chunk_dict)
+        
+        logger.info(f"Created {len(chunk_dicts)} chunks from document")
+        return chunk_dicts
+    
     def _generate_chunk_id(self, url: str, chunk_index: int) -> str:
         """Generate unique chunk ID"""
         # Create hash of URL for shorter ID
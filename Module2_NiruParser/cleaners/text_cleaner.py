@@ -1,14 +1,63 @@
 """
 Text Cleaner - Clean and normalize extracted text
+
+Rules are compiled once at import time and the common cases stay in C:
+- clean: NFKC only on lines that are not pure ASCII (line breaks are
+  normalization boundaries), entity removal only when the text has a '&',
+  and whitespace collapse via str.split/join instead of a regex pass
+- remove_boilerplate: phrases are looked up in the lowercased text and only
+  the ones present run their case-insensitive pattern; text without
+  boilerplate (the common case) costs one lowercase pass
+- fix_encoding: one alternation over the mojibake table, resolved with a
+  dict lookup per match instead of one str.replace pass per entry
+
+Output is identical to the previous rule-by-rule implementation.
 """
 import re
 import unicodedata
+from typing import List, Tuple
+
 from loguru import logger
 
 
+_HTML_ENTITY = re.compile(r'&[a-zA-Z]+;')
+
+# Common phrases to remove, in the order they are applied
+BOILERPLATE_PHRASES = [
+    r'Cookie Policy',
+    r'Privacy Policy',
+    r'Terms of Service',
+    r'Subscribe to our newsletter',
+    r'Share this article',
+    r'Follow us on',
+    r'Advertisement',
+]
+_BOILERPLATE_LOWER = [phrase.lower() for phrase in BOILERPLATE_PHRASES]
+_BOILERPLATE_EACH = [re.compile(phrase, re.IGNORECASE) for phrase in BOILERPLATE_PHRASES]
+# Non-ASCII characters that re.IGNORECASE matches against ASCII letters
+# (İ, ı, ſ and the Kelvin sign); str.lower() does not map them to the phrase
+_CASELESS_ASCII_LOOKALIKES = ('\u0130', '\u0131', '\u017f', '\u212a')
+
+# Common encoding fixes, in the order they are applied. 'â€' comes before any
+# longer key starting with it, so dash sequences ('â€"') become '""'.
+MOJIBAKE_REPLACEMENTS: List[Tuple[str, str]] = [
+    ('â€™', "'"),
+    ('â€œ', '"'),
+    ('â€', '"'),
+    ('Ã©', 'é'),
+    ('Ã¨', 'è'),
+    ('Ã¡', 'á'),
+]
+_MOJIBAKE_MAP = dict(MOJIBAKE_REPLACEMENTS)
+# Alternation order matches application order, and no replacement can form a
+# new key, so one left-to-right pass equals the sequential replaces
+_MOJIBAKE = re.compile('|'.join(re.escape(wrong) for wrong, _ in MOJIBAKE_REPLACEMENTS))
+_MOJIBAKE_LEADS = tuple({wrong[0] for wrong, _ in MOJIBAKE_REPLACEMENTS})
+
+
 class TextCleaner:
     """Clean and normalize text"""
-    
+
     def __init__(self):
         # Patterns to clean
         self.patterns = {
@@ -17,99 +66,92 @@ class TextCleaner:
             # Multiple newlines
             "newlines": re.compile(r'\n{3,}'),
             # HTML entities
-            "html_entities": re.compile(r'&[a-zA-Z]+;'),
+            "html_entities": _HTML_ENTITY,
             # URLs (optional - keep for context)
             # "urls": re.compile(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+'),
             # Email addresses (optional - keep for context)
             # "emails": re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'),
         }
-    
+
     def clean(self, text: str, aggressive: bool = False) -> str:
         """
         Clean and normalize text
-        
+
         Args:
             text: Raw text
             aggressive: If True, apply more aggressive cleaning
-        
+
         Returns:
             Cleaned text
         """
         if not text:
             return ""
-        
+
         try:
             # Normalize Unicode
-            text = unicodedata.normalize('NFKC', text)
-            
+            text = self._normalize_unicode(text)
+
             # Remove HTML entities
-            text = self.patterns["html_entities"].sub(' ', text)
-            
-            # Remove excessive newlines (keep paragraph breaks)
-            text = self.patterns["newlines"].sub('\n\n', text)
-            
-            # Normalize whitespace
-            text = self.patterns["whitespace"].sub(' ', text)
-            
-            # Remove leading/trailing whitespace from each line
-            lines = [line.strip() for line in text.split('\n')]
-            text = '\n'.join(line for line in lines if line)
-            
+            if '&' in text:
+                text = _HTML_ENTITY.sub(' ', text)
+
+            # Normalize whitespace; every run, newlines included, becomes one
+            # space and the ends are stripped
+            text = ' '.join(text.split())
+
             if aggressive:
-                # Remove very short lines (likely artifacts)
-                lines = [line for line in text.split('\n') if len(line) > 20]
-                text = '\n'.join(lines)
-                
-                # Remove lines that are mostly numbers/special chars
                 lines = []
                 for line in text.split('\n'):
-                    alpha_ratio = sum(c.isalpha() for c in line) / max(len(line), 1)
+                    # Remove very short lines (likely artifacts)
+                    if len(line) <= 20:
+                        continue
+                    # Remove lines that are mostly numbers/special chars
+                    alpha_ratio = sum(map(str.isalpha, line)) / len(line)
                     if alpha_ratio > 0.5:  # At least 50% alphabetic
                         lines.append(line)
                 text = '\n'.join(lines)
-            
-            # Final cleanup
-            text = text.strip()
-            
+
             return text
-            
+
         except Exception as e:
             logger.error(f"Error cleaning text: {e}")
             return text
-    
+
+    @staticmethod
+    def _normalize_unicode(text: str) -> str:
+        """
+        NFKC, skipping pure-ASCII lines.
+
+        A newline never composes or reorders with its neighbours, so
+        normalizing line by line gives the same result as the whole text.
+        """
+        if text.isascii():
+            return text
+        lines = text.split('\n')
+        for i, line in enumerate(lines):
+            if not line.isascii() and not unicodedata.is_normalized('NFKC', line):
+                lines[i] = unicodedata.normalize('NFKC', line)
+        return '\n'.join(lines)
+
     def remove_boilerplate(self, text: str) -> str:
         """Remove common boilerplate text"""
-        # Common phrases to remove
-        boilerplate_phrases = [
-            r'Cookie Policy',
-            r'Privacy Policy',
-            r'Terms of Service',
-            r'Subscribe to our newsletter',
-            r'Share this article',
-            r'Follow us on',
-            r'Advertisement',
-        ]
-        
-        for phrase in boilerplate_phrases:
-            text = re.sub(phrase, '', text, flags=re.IGNORECASE)
-        
+        lowered = text.lower()
+        lookalikes = not text.isascii() and any(ch in text for ch in _CASELESS_ASCII_LOOKALIKES)
+
+        # Phrases apply one at a time (a removal can join text into a later
+        # phrase), but only phrases present in the current text are run
+        for phrase, pattern in zip(_BOILERPLATE_LOWER, _BOILERPLATE_EACH):
+            if not lookalikes and phrase not in lowered:
+                continue
+            cleaned = pattern.sub('', text)
+            if len(cleaned) != len(text):
+                text = cleaned
+                lowered = text.lower()
+
         return text
-    
+
     def fix_encoding(self, text: str) -> str:
         """Fix common encoding issues"""
-        # Common encoding fixes
-        replacements = {
-            'â€™': "'",
-            'â€œ': '"',
-            'â€': '"',
-            'â€"': '—',
-            'â€"': '–',
-            'Ã©': 'é',
-            'Ã¨': 'è',
-            'Ã¡': 'á',
-        }
-        
-        for wrong, right in replacements.items():
-            text = text.replace(wrong, right)
-        
-        return text
+        if not any(lead in text for lead in _MOJIBAKE_LEADS):
+            return text
+        return _MOJIBAKE.sub(lambda match: _MOJIBAKE_MAP[match.group()], text)
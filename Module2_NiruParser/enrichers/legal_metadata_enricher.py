@@ -1,29 +1,179 @@
 """
 Legal Metadata Enricher - Extract granular legal document metadata
 Specialized for Constitution articles, Bills, and Acts
+
+All patterns are compiled once at import time. Reference patterns are
+case-insensitive, which stops the regex engine from skipping ahead to its
+literal prefix, so scans jump between occurrences of that literal in the
+lowercased chunk text and only run the pattern there. Subject labels come
+from a keyword index that checks each distinct keyword at most once and
+skips keywords whose subjects are already matched. Each chunk is lowercased
+once and shared by every scan.
 """
 from typing import Dict, List, Optional
 from loguru import logger
 import re
 
 
+# =============================================================================
+# COMPILED PATTERNS
+# =============================================================================
+
+# Patterns for Constitution
+ARTICLE_PATTERN = re.compile(r'Article\s+(\d+[A-Z]?)', re.IGNORECASE)
+CLAUSE_PATTERN = re.compile(r'\((\d+[a-z]?)\)')
+SECTION_PATTERN = re.compile(r'Section\s+(\d+)', re.IGNORECASE)
+
+# Patterns for Bills/Acts
+BILL_CLAUSE_PATTERN = re.compile(r'Clause\s+(\d+)', re.IGNORECASE)
+PART_PATTERN = re.compile(r'PART\s+([IVX]+|[0-9]+)', re.IGNORECASE)
+
+# Case-insensitive reference patterns and the literal every match starts with
+REFERENCE_PATTERNS = {
+    "article": (ARTICLE_PATTERN, "article"),
+    "section": (SECTION_PATTERN, "section"),
+    "bill_clause": (BILL_CLAUSE_PATTERN, "clause"),
+    "part": (PART_PATTERN, "part"),
+}
+
+# Rest of "Article X - <title>", matched from the end of an article reference
+_ARTICLE_TITLE_TAIL = re.compile(r'\s*[-–—]\s*([^\n\r]+)', re.IGNORECASE)
+
+_YEAR_PATTERN = re.compile(r'(20\d{2})')
+_HEADING_PATTERN = re.compile(r'^[A-Z][^.!?]*$')
+_SPEAKER_PATTERN = re.compile(r'^([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s*:', re.MULTILINE)
+
+# Non-ASCII characters that re.IGNORECASE matches against ASCII letters
+# (İ, ı, ſ and the Kelvin sign); str.lower() does not map them to the literal
+_CASELESS_ASCII_LOOKALIKES = ('\u0130', '\u0131', '\u017f', '\u212a')
+
+
+class ChunkText:
+    """Chunk text with its lowercase form, for literal-anchored reference scans"""
+
+    __slots__ = ("text", "lower", "anchored")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.lower = text.lower()
+        # Without lookalikes every match starts at an occurrence of the
+        # literal in `lower`, at the same index as in `text`
+        self.anchored = text.isascii() or not any(ch in text for ch in _CASELESS_ASCII_LOOKALIKES)
+
+    def search(self, kind: str, pos: int = 0) -> Optional[re.Match]:
+        """Same match as REFERENCE_PATTERNS[kind].search(text, pos)"""
+        pattern, literal = REFERENCE_PATTERNS[kind]
+        if not self.anchored:
+            return pattern.search(self.text, pos)
+        pos = self.lower.find(literal, pos)
+        while pos >= 0:
+            match = pattern.match(self.text, pos)
+            if match:
+                return match
+            pos = self.lower.find(literal, pos + 1)
+        return None
+
+    def first(self, kind: str) -> Optional[str]:
+        """First captured reference of this kind, or None"""
+        match = self.search(kind)
+        return match.group(1) if match else None
+
+    def article(self) -> tuple:
+        """(first article number, title after the first "Article X -"), None when absent"""
+        match = self.search("article")
+        if match is None:
+            return None, None
+        number = match.group(1)
+        # A reference can swallow the first letter of the next one
+        # ("Article 5Article 6 - ..."), so candidates restart one character in
+        while match is not None:
+            title_match = _ARTICLE_TITLE_TAIL.match(self.text, match.end())
+            if title_match:
+                return number, title_match.group(1).strip()
+            match = self.search("article", match.start() + 1)
+        return number, None
+
+
+class KeywordIndex:
+    """
+    Subject classification by substring keywords.
+
+    A keyword shared by several subjects is checked once, and keywords whose
+    subjects have all matched already are skipped.
+    """
+
+    def __init__(self, subject_keywords: Dict[str, List[str]]):
+        self.subjects = list(subject_keywords)
+        masks: Dict[str, int] = {}
+        for bit, keywords in enumerate(subject_keywords.values()):
+            for keyword in keywords:
+                masks[keyword] = masks.get(keyword, 0) | (1 << bit)
+        self._keywords = list(masks.items())
+        self._all = (1 << len(self.subjects)) - 1
+
+    def match(self, text_lower: str) -> List[str]:
+        """Subjects with at least one keyword in (lowercased) text, in definition order"""
+        found = 0
+        for keyword, mask in self._keywords:
+            if mask & ~found and keyword in text_lower:
+                found |= mask
+                if found == self._all:
+                    break
+        return [subject for bit, subject in enumerate(self.subjects) if found >> bit & 1]
+
+
+# Constitutional subject areas
+CONSTITUTIONAL_SUBJECTS = KeywordIndex({
+    "rights": ["right", "rights", "freedom", "liberty"],
+    "economic_rights": ["property", "housing", "economic", "social"],
+    "governance": ["government", "parliament", "executive", "judiciary"],
+    "taxation": ["tax", "levy", "revenue", "finance"],
+    "land": ["land", "property", "ownership"],
+    "citizenship": ["citizen", "citizenship", "nationality"],
+    "devolution": ["county", "devolution", "local government"],
+    "bill_of_rights": ["bill of rights", "fundamental rights"],
+    "elections": ["election", "electoral", "vote", "voting"],
+    "public_finance": ["public finance", "budget", "appropriation"],
+})
+
+# Common bill subjects
+BILL_SUBJECTS = KeywordIndex({
+    "taxation": ["tax", "levy", "duty", "revenue"],
+    "finance": ["finance", "budget", "appropriation", "expenditure"],
+    "housing": ["housing", "shelter", "residential"],
+    "health": ["health", "medical", "healthcare"],
+    "education": ["education", "school", "university"],
+    "agriculture": ["agriculture", "farming", "crop"],
+    "trade": ["trade", "commerce", "business"],
+    "security": ["security", "police", "defense"],
+    "energy": ["energy", "power", "electricity"],
+    "environment": ["environment", "conservation", "climate"],
+})
+
+DEBATE_TOPICS = [
+    "budget", "finance", "health", "education", "security",
+    "agriculture", "infrastructure", "corruption", "revenue",
+    "county", "devolution", "parliament", "bill", "motion"
+]
+
+
 class LegalMetadataEnricher:
     """Extract structured metadata from legal documents"""
-    
+
     def __init__(self):
         # Patterns for Constitution
-        self.article_pattern = re.compile(r'Article\s+(\d+[A-Z]?)', re.IGNORECASE)
-        self.clause_pattern = re.compile(r'\((\d+[a-z]?)\)')
-        self.section_pattern = re.compile(r'Section\s+(\d+)', re.IGNORECASE)
-        
+        self.article_pattern = ARTICLE_PATTERN
+        self.clause_pattern = CLAUSE_PATTERN
+        self.section_pattern = SECTION_PATTERN
+
         # Patterns for Bills/Acts
-        self.bill_clause_pattern = re.compile(r'Clause\s+(\d+)', re.IGNORECASE)
-        self.part_pattern = re.compile(r'PART\s+([IVX]+|[0-9]+)', re.IGNORECASE)
-        
+        self.bill_clause_pattern = BILL_CLAUSE_PATTERN
+        self.part_pattern = PART_PATTERN
+
     def enrich_constitution(self, chunk: Dict) -> Dict:
         """
         Enrich Constitution chunks with granular metadata
-        
+
         Extracts:
         - article_number (e.g., "43", "43A")
         - article_title (e.g., "Economic and social rights")
@@ -32,29 +182,25 @@ class LegalMetadataEnricher:
         """
         text = chunk.get("text", "")
         title = chunk.get("title", "")
-        
+        scan = ChunkText(text)
+        article_number, article_title = scan.article()
+
         # Extract article number
-        article_match = self.article_pattern.search(text)
-        if article_match:
-            chunk["article_number"] = article_match.group(1)
+        if article_number is not None:
+            chunk["article_number"] = article_number
         else:
             # Try from title or metadata
             title_match = self.article_pattern.search(title)
             if title_match:
                 chunk["article_number"] = title_match.group(1)
-        
+
         # Extract article title (usually after "Article X - ")
-        article_title_pattern = re.compile(
-            r'Article\s+\d+[A-Z]?\s*[-–—]\s*([^\n\r]+)',
-            re.IGNORECASE
-        )
-        title_match = article_title_pattern.search(text)
-        if title_match:
-            chunk["article_title"] = title_match.group(1).strip()
+        if article_title is not None:
+            chunk["article_title"] = article_title
         elif "article_title" not in chunk:
             # Try to infer from context
             chunk["article_title"] = self._extract_section_heading(text)
-        
+
         # Extract clause numbers
         clause_matches = self.clause_pattern.findall(text)
         if clause_matches:
@@ -62,26 +208,26 @@ class LegalMetadataEnricher:
             chunk["clause"] = clause_matches[0]
             # Store all clause references for searching
             chunk["all_clauses"] = clause_matches
-        
+
         # Extract section if present
-        section_match = self.section_pattern.search(text)
-        if section_match:
-            chunk["section"] = section_match.group(1)
-        
+        section = scan.first("section")
+        if section is not None:
+            chunk["section"] = section
+
         # Categorize by subject matter (for better retrieval)
-        chunk["legal_subjects"] = self._identify_constitutional_subjects(text, title)
-        
+        chunk["legal_subjects"] = CONSTITUTIONAL_SUBJECTS.match(scan.lower + " " + title.lower())
+
         # Mark as Constitution
         chunk["category"] = "Constitution"
         chunk["document_type"] = "Constitution"
-        
-        logger.debug(f"Enriched Constitution chunk: Article {chunk.get('article_number', 'N/A')}")
+
+        logger.debug("Enriched Constitution chunk: Article {}", chunk.get("article_number", "N/A"))
         return chunk
-    
+
     def enrich_bill(self, chunk: Dict) -> Dict:
         """
         Enrich Bill/Act chunks with granular metadata
-        
+
         Extracts:
         - clause_number (e.g., "16")
         - subject (e.g., "Housing Levy")
@@ -90,191 +236,143 @@ class LegalMetadataEnricher:
         """
         text = chunk.get("text", "")
         title = chunk.get("title", "")
-        
+        title_lower = title.lower()
+        scan = ChunkText(text)
+
         # Extract clause number
-        clause_match = self.bill_clause_pattern.search(text)
-        if clause_match:
-            chunk["clause_number"] = clause_match.group(1)
-        
+        clause_number = scan.first("bill_clause")
+        if clause_number is not None:
+            chunk["clause_number"] = clause_number
+
         # Extract Part number
-        part_match = self.part_pattern.search(text)
-        if part_match:
-            chunk["part"] = part_match.group(1)
-        
+        part = scan.first("part")
+        if part is not None:
+            chunk["part"] = part
+
         # Extract subject/topic from heading
         subject = self._extract_section_heading(text)
         if subject:
             chunk["subject"] = subject
-        
+
         # Store bill title
-        if "bill" in title.lower() or "act" in title.lower():
+        if "bill" in title_lower or "act" in title_lower:
             chunk["bill_title"] = title
-        
+
         # Identify if it's a Bill or Act
-        if "bill" in title.lower():
+        if "bill" in title_lower:
             chunk["category"] = "Bill"
             chunk["document_type"] = "Bill"
-        elif "act" in title.lower():
+        elif "act" in title_lower:
             chunk["category"] = "Act"
             chunk["document_type"] = "Act"
         else:
             chunk["category"] = "Legislation"
             chunk["document_type"] = "Legislation"
-        
+
         # Extract year if present
-        year_match = re.search(r'(20\d{2})', title)
+        year_match = _YEAR_PATTERN.search(title)
         if year_match:
             chunk["year"] = year_match.group(1)
-        
+
         # Identify legal subjects
-        chunk["legal_subjects"] = self._identify_bill_subjects(text, title)
-        
-        logger.debug(f"Enriched Bill chunk: Clause {chunk.get('clause_number', 'N/A')}")
+        chunk["legal_subjects"] = BILL_SUBJECTS.match(scan.lower + " " + title_lower)
+
+        logger.debug("Enriched Bill chunk: Clause {}", chunk.get("clause_number", "N/A"))
         return chunk
-    
+
     def enrich_parliament(self, chunk: Dict) -> Dict:
         """Enrich Parliamentary proceedings"""
         text = chunk.get("text", "")
-        
+
         # Extract speaker information
-        speaker_pattern = re.compile(r'^([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\s*:', re.MULTILINE)
-        speakers = speaker_pattern.findall(text)
+        speakers = _SPEAKER_PATTERN.findall(text)
         if speakers:
             chunk["speakers"] = list(set(speakers))
             chunk["primary_speaker"] = speakers[0] if speakers else None
-        
+
         # Extract debate topics
         chunk["subjects"] = self._extract_debate_topics(text)
-        
+
         chunk["category"] = "Parliament"
         chunk["document_type"] = "Parliamentary Proceeding"
-        
+
         return chunk
-    
+
     def auto_enrich(self, chunk: Dict) -> Dict:
         """
         Automatically detect document type and apply appropriate enrichment
         """
         title = chunk.get("title", "").lower()
-        text = chunk.get("text", "")
         source_url = chunk.get("source_url", "").lower()
-        
+
         # Detect Constitution
         if "constitution" in title or "constitution" in source_url:
             return self.enrich_constitution(chunk)
-        
+
         # Detect Bills/Acts
         elif "bill" in title or "act" in title:
             return self.enrich_bill(chunk)
-        
+
         # Detect Parliament
-        elif "parliament" in source_url or "hansard" in title.lower():
+        elif "parliament" in source_url or "hansard" in title:
             return self.enrich_parliament(chunk)
-        
+
         # Default: basic enrichment
         else:
             chunk.setdefault("category", "General")
             return chunk
-    
+
+    def enrich_batch(self, chunks: List[Dict]) -> List[Dict]:
+        """Auto-enrich multiple chunks"""
+        return [self.auto_enrich(chunk) for chunk in chunks]
+
     def _extract_section_heading(self, text: str) -> Optional[str]:
         """
         Extract section/clause heading (usually bold or uppercase)
         """
-        lines = text.split('\n')
-        for line in lines[:5]:  # Check first few lines
+        lines = text.split('\n', 5)[:5]
+        for line in lines:  # Check first few lines
             line = line.strip()
+            if not 5 < len(line) < 100:
+                continue
             # Look for short, capitalized lines (likely headings)
-            if line.isupper() and 5 < len(line) < 100:
+            if line.isupper():
                 return line.title()
             # Look for lines ending with specific patterns
-            if re.match(r'^[A-Z][^.!?]*$', line) and 5 < len(line) < 100:
+            if _HEADING_PATTERN.match(line):
                 return line
         return None
-    
+
     def _identify_constitutional_subjects(self, text: str, title: str) -> List[str]:
         """
         Identify constitutional subject areas for better retrieval
         """
-        subjects = []
-        text_lower = (text + " " + title).lower()
-        
-        # Define constitutional subject areas
-        subject_keywords = {
-            "rights": ["right", "rights", "freedom", "liberty"],
-            "economic_rights": ["property", "housing", "economic", "social"],
-            "governance": ["government", "parliament", "executive", "judiciary"],
-            "taxation": ["tax", "levy", "revenue", "finance"],
-            "land": ["land", "property", "ownership"],
-            "citizenship": ["citizen", "citizenship", "nationality"],
-            "devolution": ["county", "devolution", "local government"],
-            "bill_of_rights": ["bill of rights", "fundamental rights"],
-            "elections": ["election", "electoral", "vote", "voting"],
-            "public_finance": ["public finance", "budget", "appropriation"],
-        }
-        
-        for subject, keywords in subject_keywords.items():
-            if any(keyword in text_lower for keyword in keywords):
-                subjects.append(subject)
-        
-        return subjects
-    
+        return CONSTITUTIONAL_SUBJECTS.match((text + " " + title).lower())
+
     def _identify_bill_subjects(self, text: str, title: str) -> List[str]:
         """
         Identify bill subject areas
         """
-        subjects = []
-        text_lower = (text + " " + title).lower()
-        
-        # Common bill subjects
-        subject_keywords = {
-            "taxation": ["tax", "levy", "duty", "revenue"],
-            "finance": ["finance", "budget", "appropriation", "expenditure"],
-            "housing": ["housing", "shelter", "residential"],
-            "health": ["health", "medical", "healthcare"],
-            "education": ["education", "school", "university"],
-            "agriculture": ["agriculture", "farming", "crop"],
-            "trade": ["trade", "commerce", "business"],
-            "security": ["security", "police", "defense"],
-            "energy": ["energy", "power", "electricity"],
-            "environment": ["environment", "conservation", "climate"],
-        }
-        
-        for subject, keywords in subject_keywords.items():
-            if any(keyword in text_lower for keyword in keywords):
-                subjects.append(subject)
-        
-        return subjects
-    
+        return BILL_SUBJECTS.match((text + " " + title).lower())
+
     def _extract_debate_topics(self, text: str) -> List[str]:
         """Extract topics from parliamentary debate"""
         # Simple keyword extraction
-        topics = []
         text_lower = text.lower()
-        
-        common_topics = [
-            "budget", "finance", "health", "education", "security",
-            "agriculture", "infrastructure", "corruption", "revenue",
-            "county", "devolution", "parliament", "bill", "motion"
-        ]
-        
-        for topic in common_topics:
-            if topic in text_lower:
-                topics.append(topic)
-        
-        return topics
-    
+        return [topic for topic in DEBATE_TOPICS if topic in text_lower]
+
     def validate_legal_metadata(self, chunk: Dict) -> bool:
         """
         Validate that legal document has required metadata
         """
         doc_type = chunk.get("document_type", "")
-        
+
         if doc_type == "Constitution":
             # Constitution should have article_number
             return "article_number" in chunk or "article_title" in chunk
-        
+
         elif doc_type in ["Bill", "Act"]:
             # Bills should have clause_number or subject
             return "clause_number" in chunk or "subject" in chunk
-        
+
         return True  # Other types always valid
@@ -1,59 +1,286 @@
 """
-PDF Text Extractor using pdfplumber
+PDF Text Extractor - page-parallel, resumable
+
+Pages are read with the PDFium text layer (pypdfium2) and only layout-heavy
+pages (ruled tables, or no text layer output) go through pdfplumber. Large
+documents are split into page ranges that run in a process pool. Finished
+pages are appended to a per-file cache keyed by (file hash, page number), so
+a re-run or a run that died partway only extracts the missing pages.
+
+Environment:
+    PDF_WORKERS             process pool size (default: CPU count, max 8)
+    PDF_PAGES_PER_SHARD     pages per pool task (default 16)
+    PDF_PARALLEL_MIN_PAGES  smaller documents are extracted in-process (default 24)
+    PDF_LAYOUT_PATH_OBJECTS vector path objects that mark a page as a table (default 24)
+    PDF_PAGE_CACHE_DIR      page cache directory (default data/cache/pdf_pages, "" disables)
 """
-import pdfplumber
-from typing import Dict, List
+import os
+import json
+import hashlib
+import concurrent.futures
+from dataclasses import dataclass, asdict
+from typing import Dict, Iterator, List, Optional, Tuple
 from pathlib import Path
+
+import pdfplumber
 from loguru import logger
 
+try:
+    import pypdfium2 as pdfium
+    import pypdfium2.raw as pdfium_c
+    PDFIUM_AVAILABLE = True
+except ImportError:
+    PDFIUM_AVAILABLE = False
+
+# Bump when extraction output changes so cached pages are not reused
+EXTRACTOR_VERSION = "2"
+
+DEFAULT_CACHE_DIR = Path(__file__).parent.parent.parent / "data" / "cache" / "pdf_pages"
+
+
+@dataclass
+class PageText:
+    """Text of one PDF page"""
+    page_number: int  # 1-based
+    text: str
+    method: str  # "text_layer", "layout" or "failed"
+
+
+# =============================================================================
+# PAGE EXTRACTION (runs in worker processes)
+# =============================================================================
+
+def _is_layout_heavy(page, text: str, path_threshold: int) -> bool:
+    """Pages without text layer output, or with ruled tables, need pdfplumber"""
+    if not text.strip():
+        return True
+    paths = 0
+    for _ in page.get_objects(filter=[pdfium_c.FPDF_PAGEOBJ_PATH], max_depth=2):
+        paths += 1
+        if paths >= path_threshold:
+            return True
+    return False
+
+
+def _extract_page_range(pdf_path: str, first: int, last: int, settings: Dict, path_threshold: int) -> List[PageText]:
+    """
+    Extract pages first..last (0-based, inclusive).
+
+    Module-level so it can be shipped to a process pool.
+    """
+    results = []
+    plumber = None
+    document = pdfium.PdfDocument(pdf_path) if PDFIUM_AVAILABLE else None
+    try:
+        for index in range(first, last + 1):
+            try:
+                text = ""
+                if document is not None:
+                    page = document[index]
+                    textpage = page.get_textpage()
+                    text = textpage.get_text_range().replace("\r\n", "\n").replace("\r", "\n")
+                    layout_heavy = _is_layout_heavy(page, text, path_threshold)
+                    textpage.close()
+                    page.close()
+                    if not layout_heavy:
+                        results.append(PageText(index + 1, text, "text_layer"))
+                        continue
+
+                if plumber is None:
+                    plumber = pdfplumber.open(pdf_path)
+                layout_text = plumber.pages[index].extract_text(**settings) or ""
+                # Keep the text layer output if pdfplumber found nothing better
+                results.append(PageText(index + 1, layout_text or text, "layout"))
+                plumber.pages[index].flush_cache()
+            except Exception as e:
+                logger.warning(f"Failed to extract page {index + 1}: {e}")
+                results.append(PageText(index + 1, "", "failed"))
+    finally:
+        if plumber is not None:
+            plumber.close()
+        if document is not None:
+            document.close()
+    return results
+
+
+# =============================================================================
+# PAGE CACHE
+# =============================================================================
+
+class PageCache:
+    """Append-only JSONL page cache, one file per (PDF content, extractor version)"""
+
+    def __init__(self, cache_dir: Path, file_hash: str):
+        self.path = cache_dir / f"{file_hash}.v{EXTRACTOR_VERSION}.jsonl"
+
+    def load(self) -> Dict[int, PageText]:
+        pages = {}
+        if not self.path.exists():
+            return pages
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    page = PageText(**json.loads(line))
+                except (ValueError, TypeError):
+                    continue  # Truncated line from an interrupted run
+                if page.method != "failed":
+                    pages[page.page_number] = page
+        return pages
+
+    def append(self, pages: List[PageText]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            for page in pages:
+                f.write(json.dumps(asdict(page), ensure_ascii=False) + "\n")
+            f.flush()
+
+
+def file_hash(path: str, block_size: int = 1 << 20) -> str:
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# =============================================================================
+# EXTRACTOR
+# =============================================================================
 
 class PDFExtractor:
     """Extract text from PDF files"""
-    
-    def __init__(self):
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        pages_per_shard: Optional[int] = None,
+        parallel_min_pages: Optional[int] = None,
+        cache_dir: Optional[str] = None,
+    ):
         self.extraction_settings = {
             "x_tolerance": 3,
             "y_tolerance": 3,
         }
-    
+        self.workers = workers or int(os.getenv("PDF_WORKERS", str(min(os.cpu_count() or 1, 8))))
+        self.pages_per_shard = pages_per_shard or int(os.getenv("PDF_PAGES_PER_SHARD", "16"))
+        self.parallel_min_pages = parallel_min_pages or int(os.getenv("PDF_PARALLEL_MIN_PAGES", "24"))
+        self.layout_path_threshold = int(os.getenv("PDF_LAYOUT_PATH_OBJECTS", "24"))
+
+        if cache_dir is None:
+            cache_dir = os.getenv("PDF_PAGE_CACHE_DIR", str(DEFAULT_CACHE_DIR))
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+
+        if not PDFIUM_AVAILABLE:
+            logger.info("pypdfium2 not installed, extracting every PDF page with pdfplumber")
+
+    def get_metadata(self, pdf_path: str) -> Dict[str, any]:
+        """Document info and page count without extracting text"""
+        with pdfplumber.open(pdf_path) as pdf:
+            metadata = pdf.metadata or {}
+            return {
+                "title": metadata.get("Title", ""),
+                "author": metadata.get("Author", ""),
+                "creation_date": metadata.get("CreationDate", ""),
+                "subject": metadata.get("Subject", ""),
+                "num_pages": len(pdf.pages),
+            }
+
+    def _page_count(self, pdf_path: str) -> int:
+        if PDFIUM_AVAILABLE:
+            document = pdfium.PdfDocument(pdf_path)
+            try:
+                return len(document)
+            finally:
+                document.close()
+        with pdfplumber.open(pdf_path) as pdf:
+            return len(pdf.pages)
+
+    def iter_pages(self, pdf_path: str) -> Iterator[PageText]:
+        """
+        Yield page texts in page order as they become available.
+
+        Cached pages are yielded without re-extraction. Missing pages are
+        extracted in page-range shards (in a process pool for large
+        documents) and cached as each shard finishes. Closing the iterator
+        early cancels shards that have not started.
+        """
+        pdf_path = str(pdf_path)
+        num_pages = self._page_count(pdf_path)
+
+        cache = PageCache(self.cache_dir, file_hash(pdf_path)) if self.cache_dir else None
+        cached = cache.load() if cache else {}
+        if cached:
+            logger.info(f"Resuming {Path(pdf_path).name}: {len(cached)}/{num_pages} pages cached")
+
+        shards = self._plan_shards(num_pages, cached)
+        if not shards:
+            for number in range(1, num_pages + 1):
+                yield cached[number]
+            return
+
+        args = (self.extraction_settings, self.layout_path_threshold)
+        if num_pages < self.parallel_min_pages or self.workers <= 1 or len(shards) == 1:
+            results = ((shard, _extract_page_range(pdf_path, *shard, *args)) for shard in shards)
+            yield from self._merge(num_pages, cached, results, cache)
+            return
+
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=min(self.workers, len(shards)))
+        try:
+            futures = {executor.submit(_extract_page_range, pdf_path, *shard, *args): shard for shard in shards}
+            results = ((futures[f], f.result()) for f in concurrent.futures.as_completed(futures))
+            yield from self._merge(num_pages, cached, results, cache)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _plan_shards(self, num_pages: int, cached: Dict[int, PageText]) -> List[Tuple[int, int]]:
+        """Contiguous 0-based ranges of uncached pages, at most pages_per_shard long"""
+        shards = []
+        for index in range(num_pages):
+            if (index + 1) in cached:
+                continue
+            if shards and shards[-1][1] == index - 1 and index - shards[-1][0] < self.pages_per_shard:
+                shards[-1] = (shards[-1][0], index)
+            else:
+                shards.append((index, index))
+        return shards
+
+    def _merge(self, num_pages: int, cached: Dict[int, PageText], results, cache: Optional[PageCache]) -> Iterator[PageText]:
+        """Cache shards as they finish and release pages in order"""
+        ready = dict(cached)
+        next_page = 1
+        for _, pages in results:
+            if cache:
+                cache.append(pages)
+            for page in pages:
+                ready[page.page_number] = page
+            while next_page in ready:
+                yield ready.pop(next_page)
+                next_page += 1
+        while next_page <= num_pages:
+            yield ready.pop(next_page, PageText(next_page, "", "failed"))
+            next_page += 1
+
     def extract(self, pdf_path: str) -> Dict[str, any]:
         """
         Extract text from PDF file
-        
+
         Args:
             pdf_path: Path to PDF file
-        
+
         Returns:
             Dictionary with text and metadata
         """
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                # Extract metadata
-                metadata = pdf.metadata or {}
-                
-                # Extract text from all pages
-                pages_text = []
-                for i, page in enumerate(pdf.pages):
-                    try:
-                        text = page.extract_text(**self.extraction_settings)
-                        if text:
-                            pages_text.append(text)
-                    except Exception as e:
-                        logger.warning(f"Failed to extract page {i+1}: {e}")
-                        continue
-                
+            metadata = self.get_metadata(pdf_path)
+            pages_text = [page.text for page in self.iter_pages(pdf_path) if page.text]
+
+            return {
                 # Combine all pages
-                full_text = "\n\n".join(pages_text)
-                
-                return {
-                    "text": full_text,
-                    "title": metadata.get("Title", ""),
-                    "author": metadata.get("Author", ""),
-                    "creation_date": metadata.get("CreationDate", ""),
-                    "subject": metadata.get("Subject", ""),
-                    "num_pages": len(pdf.pages),
-                }
-                
+                "text": "\n\n".join(pages_text),
+                **metadata,
+            }
+
         except Exception as e:
             logger.error(f"Error extracting PDF {pdf_path}: {e}")
             return {
@@ -63,19 +290,19 @@ class PDFExtractor:
                 "creation_date": "",
                 "num_pages": 0,
             }
-    
+
     def extract_with_layout(self, pdf_path: str) -> List[Dict]:
         """Extract text while preserving layout information"""
         try:
             with pdfplumber.open(pdf_path) as pdf:
                 pages_data = []
-                
+
                 for i, page in enumerate(pdf.pages):
                     try:
                         # Extract words with positions
                         words = page.extract_words(**self.extraction_settings)
                         text = page.extract_text(**self.extraction_settings)
-                        
+
                         pages_data.append({
                             "page_number": i + 1,
                             "text": text,
@@ -86,9 +313,9 @@ class PDFExtractor:
                     except Exception as e:
                         logger.warning(f"Failed to extract page {i+1} with layout: {e}")
                         continue
-                
+
                 return pages_data
-                
+
         except Exception as e:
             logger.error(f"Error extracting PDF with layout {pdf_path}: {e}")
             return []
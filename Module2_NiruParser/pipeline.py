@@ -70,12 +70,7 @@ class ProcessingPipeline:
             if content_type == "pdf":
                 pdf_path = raw_doc.get("pdf_path")
                 if pdf_path:
-                    result = self.pdf_extractor.extract(pdf_path)
-                    text = result["text"]
-                    extracted_meta = {
-                        "author": result.get("author"),
-                        "creation_date": result.get("creation_date"),
-                    }
+                    return self._process_pdf(raw_doc, pdf_path)
             elif content_type == "html":
                 html = raw_doc.get("raw_html", "")
                 result = self.html_extractor.extract(
@@ -105,20 +100,7 @@ class ProcessingPipeline:
             text = self.cleaner.fix_encoding(text)
             
             # 3. Prepare metadata
-            metadata = {
-                "url": raw_doc.get("url", ""),
-                "source_url": raw_doc.get("url", ""),
-                "title": raw_doc.get("title", "Untitled"),
-                "category": raw_doc.get("category", "Unknown"),
-                "source_name": raw_doc.get("source_name", "Unknown"),
-                "author": raw_doc.get("author") or extracted_meta.get("author"),
-                "publication_date": (
-                    raw_doc.get("publication_date") or
-                    extracted_meta.get("date") or
-                    extracted_meta.get("creation_date")
-                ),
-                "crawl_date": raw_doc.get("crawl_date"),
-            }
+            metadata = self._build_metadata(raw_doc, extracted_meta)
             
             # 4. Chunk text
             chunks = self.chunker.chunk(text, metadata)
@@ -132,18 +114,81 @@ class ProcessingPipeline:
                 logger.info(f"Limiting to {self.config.MAX_CHUNKS_PER_DOC} chunks")
                 chunks = chunks[:self.config.MAX_CHUNKS_PER_DOC]
             
-            # 5. Enrich chunks with metadata
-            chunks = self.enricher.enrich_batch(chunks)
-            
-            # 6. Generate embeddings
-            chunks = self.embedder.embed_chunks(chunks)
-            
-            logger.info(f"Pipeline completed: {len(chunks)} chunks created")
-            return chunks
+            return self._enrich_and_embed(chunks)
         except Exception as e:
             logger.error(f"Error processing document: {e}")
             return []
     
+    def _process_pdf(self, raw_doc: Dict, pdf_path: str) -> List[Dict]:
+        """
+        Stream cleaned PDF pages into the chunker
+        
+        Extraction stops as soon as MAX_CHUNKS_PER_DOC chunks or
+        MAX_TEXT_LENGTH characters are reached, so only the pages that end
+        up in the index are extracted.
+        """
+        result = self.pdf_extractor.get_metadata(pdf_path)
+        extracted_meta = {
+            "author": result.get("author"),
+            "creation_date": result.get("creation_date"),
+        }
+        metadata = self._build_metadata(raw_doc, extracted_meta)
+        
+        total_chars = 0
+        
+        def cleaned_pages():
+            nonlocal total_chars
+            for page in self.pdf_extractor.iter_pages(pdf_path):
+                text = self.cleaner.fix_encoding(self.cleaner.clean(page.text, aggressive=False))
+                if total_chars + len(text) > self.config.MAX_TEXT_LENGTH:
+                    logger.warning(f"Text too long (>{self.config.MAX_TEXT_LENGTH} chars), truncating")
+                    yield text[:self.config.MAX_TEXT_LENGTH - total_chars]
+                    total_chars = self.config.MAX_TEXT_LENGTH
+                    return
+                total_chars += len(text)
+                yield text
+        
+        # The cleaner collapses whitespace, so pages join with a space
+        chunks = self.chunker.chunk_stream(
+            cleaned_pages(), metadata, max_chunks=self.config.MAX_CHUNKS_PER_DOC, separator=" "
+        )
+        
+        if total_chars < self.config.MIN_TEXT_LENGTH:
+            logger.warning(f"Text too short ({total_chars} chars), skipping")
+            return []
+        if not chunks:
+            logger.warning("No chunks created")
+            return []
+        
+        return self._enrich_and_embed(chunks)
+    
+    def _build_metadata(self, raw_doc: Dict, extracted_meta: Dict) -> Dict:
+        """Chunk metadata from the raw document and extracted fields"""
+        return {
+            "url": raw_doc.get("url", ""),
+            "source_url": raw_doc.get("url", ""),
+            "title": raw_doc.get("title", "Untitled"),
+            "category": raw_doc.get("category", "Unknown"),
+            "source_name": raw_doc.get("source_name", "Unknown"),
+            "author": raw_doc.get("author") or extracted_meta.get("author"),
+            "publication_date": (
+                raw_doc.get("publication_date") or
+                extracted_meta.get("date") or
+                extracted_meta.get("creation_date")
+            ),
+            "crawl_date": raw_doc.get("crawl_date"),
+        }
+    
+    def _enrich_and_embed(self, chunks: List[Dict]) -> List[Dict]:
+        # 5. Enrich chunks with metadata
+        chunks = self.enricher.enrich_batch(chunks)
+        
+        # 6. Generate embeddings
+        chunks = self.embedder.embed_chunks(chunks)
+        
+        logger.info(f"Pipeline completed: {len(chunks)} chunks created")
+        return chunks
+    
     def process_batch(self, raw_docs: List[Dict]) -> List[Dict]:
         """Process multiple documents"""
         all_chunks = []
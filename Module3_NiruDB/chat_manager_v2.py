@@ -28,7 +28,7 @@ except ImportError:
     logger.warning("Async SQLAlchemy not available, using sync mode only")
 
 from Module3_NiruDB.chat_models import (
-    ChatSession, ChatMessage, UserFeedback, Base,
+    ChatSession, ChatMessage, UserFeedback, ChatAttachmentRecord, Base,
     ChatSessionResponse, ChatMessageResponse, FeedbackResponse
 )
 
@@ -248,6 +248,8 @@ class ChatDatabaseManagerV2:
         # Initialize caches
         self._session_cache = TTLCache(maxsize=cache_size, ttl_seconds=cache_ttl)
         self._message_count_cache = TTLCache(maxsize=cache_size * 2, ttl_seconds=60)
+        # Sessions whose messages were already scanned for legacy attachments
+        self._attachment_scan_cache = TTLCache(maxsize=cache_size, ttl_seconds=cache_ttl)
         
         # Ensure tables and indexes exist
         self._ensure_schema()
@@ -486,8 +488,8 @@ class ChatDatabaseManagerV2:
         with self._get_db_session() as db:
             return db.query(ChatSession).filter(ChatSession.id == session_id).first()
     
-    def update_session_title(self, session_id: str, title: str):
-        """Update session title"""
+    def update_session_title(self, session_id: str, title: str) -> Optional[ChatSessionResponse]:
+        """Update session title and return the updated session"""
         with self._get_db_session() as db:
             db.query(ChatSession).filter(ChatSession.id == session_id).update(
                 {"title": title, "updated_at": datetime.utcnow()},
@@ -500,6 +502,8 @@ class ChatDatabaseManagerV2:
             cached["title"] = title
             cached["updated_at"] = datetime.utcnow()
             self._session_cache.set(session_id, cached)
+        
+        return self.get_session(session_id)
     
     def list_sessions(
         self,
@@ -555,7 +559,8 @@ class ChatDatabaseManagerV2:
     def delete_session(self, session_id: str):
         """Delete a chat session and all its messages"""
         with self._get_db_session() as db:
-            # Delete messages first (cascade should handle this, but being explicit)
+            # Delete attachments and messages first (cascade should handle this, but being explicit)
+            db.query(ChatAttachmentRecord).filter(ChatAttachmentRecord.session_id == session_id).delete()
             db.query(ChatMessage).filter(ChatMessage.session_id == session_id).delete()
             db.query(ChatSession).filter(ChatSession.id == session_id).delete()
         
@@ -580,6 +585,26 @@ class ChatDatabaseManagerV2:
         attachments: Optional[List[Dict]] = None
     ) -> str:
         """Add a message to a chat session - optimized"""
+        return self.add_message_record(
+            session_id, content, role, token_count, model_used, sources, attachments
+        ).id
+    
+    def add_message_record(
+        self,
+        session_id: str,
+        content: str,
+        role: str,
+        token_count: Optional[int] = None,
+        model_used: Optional[str] = None,
+        sources: Optional[List[Dict]] = None,
+        attachments: Optional[List[Dict]] = None
+    ) -> ChatMessageResponse:
+        """
+        Add a message and return the persisted row.
+        
+        Saves callers a read-back query to build their response. Attachments
+        sent with the message are linked to it in the same transaction.
+        """
         message_id = str(uuid.uuid4())
         now = datetime.utcnow()
         
@@ -596,6 +621,12 @@ class ChatDatabaseManagerV2:
                 attachments=attachments
             )
             db.add(message)
+            db.flush()
+            
+            if attachments:
+                db.query(ChatAttachmentRecord).filter(
+                    ChatAttachmentRecord.id.in_([att.get("id") for att in attachments])
+                ).update({"message_id": message_id}, synchronize_session=False)
             
             # Update session timestamp
             db.query(ChatSession).filter(ChatSession.id == session_id).update(
@@ -614,7 +645,18 @@ class ChatDatabaseManagerV2:
             self._session_cache.set(session_id, cached_session)
         
         logger.debug(f"Added {role} message {message_id} to session {session_id}")
-        return message_id
+        return ChatMessageResponse(
+            id=message_id,
+            session_id=session_id,
+            role=role,
+            content=content,
+            created_at=now,
+            token_count=token_count,
+            model_used=model_used,
+            sources=sources,
+            attachments=attachments,
+            feedback_type=None
+        )
     
     def add_messages_batch(
         self,
@@ -711,6 +753,90 @@ class ChatDatabaseManagerV2:
                 feedback_type=message.feedback_type
             )]
     
+    def get_recent_messages(self, session_id: str, limit: int = 5) -> List[ChatMessageResponse]:
+        """Get the last `limit` messages of a session in chronological order"""
+        with self._get_db_session() as db:
+            messages = db.query(ChatMessage).filter(
+                ChatMessage.session_id == session_id
+            ).order_by(ChatMessage.created_at.desc()).limit(limit).all()
+            
+            return [ChatMessageResponse(
+                id=msg.id,
+                session_id=msg.session_id,
+                role=msg.role,
+                content=msg.content,
+                created_at=msg.created_at,
+                token_count=msg.token_count,
+                model_used=msg.model_used,
+                sources=msg.sources,
+                attachments=msg.attachments,
+                feedback_type=msg.feedback_type
+            ) for msg in reversed(messages)]
+    
+    # =========================================================================
+    # ATTACHMENT OPERATIONS
+    # =========================================================================
+    
+    def save_attachment(self, session_id: str, attachment: Dict[str, Any]) -> Dict[str, Any]:
+        """Store uploaded attachment metadata (keyed by its ID)"""
+        with self._get_db_session() as db:
+            db.merge(ChatAttachmentRecord(
+                id=attachment["id"],
+                session_id=session_id,
+                filename=attachment.get("filename"),
+                file_type=attachment.get("file_type"),
+                file_size=attachment.get("file_size"),
+                attachment_metadata=attachment,
+                created_at=datetime.utcnow()
+            ))
+        return attachment
+    
+    def get_attachments(self, session_id: str, attachment_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Resolve attachment IDs to their metadata with a primary-key lookup.
+        
+        Attachments uploaded before the attachment table existed are only
+        recorded on the messages that referenced them; those are looked up in
+        the session's messages once and indexed for next time. A session is
+        scanned at most once per cache TTL, so unknown IDs do not trigger a
+        full scan on every call.
+        
+        Returns:
+            Attachment metadata in the order requested (unknown IDs are skipped)
+        """
+        if not attachment_ids:
+            return []
+        
+        with self._get_db_session() as db:
+            rows = db.query(ChatAttachmentRecord).filter(
+                ChatAttachmentRecord.id.in_(attachment_ids),
+                ChatAttachmentRecord.session_id == session_id
+            ).all()
+            found = {row.id: row.attachment_metadata for row in rows}
+            
+            missing = set(attachment_ids) - found.keys()
+            if missing and not self._attachment_scan_cache.get(session_id):
+                stored = db.query(ChatMessage.attachments).filter(
+                    ChatMessage.session_id == session_id
+                ).all()
+                for (attachments,) in stored:
+                    for att in attachments or []:
+                        att_id = att.get("id")
+                        if att_id in missing and att_id not in found:
+                            found[att_id] = att
+                            db.merge(ChatAttachmentRecord(
+                                id=att_id,
+                                session_id=session_id,
+                                filename=att.get("filename"),
+                                file_type=att.get("file_type"),
+                                file_size=att.get("file_size"),
+                                attachment_metadata=att,
+                                created_at=datetime.utcnow()
+                            ))
+                self._attachment_scan_cache.set(session_id, True)
+        
+        return [found[att_id] for att_id in attachment_ids if att_id in found]
+    
     def generate_session_title(self, session_id: str) -> str:
         """Generate a title from the first user message"""
         with self._get_db_session() as db:
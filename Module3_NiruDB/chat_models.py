@@ -61,6 +61,19 @@ class UserFeedback(Base):
     feedback_metadata = Column(JSON, nullable=True)  # Additional metadata
     created_at = Column(DateTime, default=datetime.utcnow)
 
+class ChatAttachmentRecord(Base):
+    """Uploaded chat attachment, indexed by ID so messages resolve it without scanning history"""
+    __tablename__ = "chat_attachments"
+
+    id = Column(String, primary_key=True)
+    session_id = Column(String, ForeignKey("chat_sessions.id", ondelete="CASCADE"), nullable=False, index=True)
+    message_id = Column(String, ForeignKey("chat_messages.id", ondelete="SET NULL"), nullable=True, index=True)  # Set once sent with a message
+    filename = Column(String, nullable=True)
+    file_type = Column(String, nullable=True)
+    file_size = Column(Integer, nullable=True)
+    attachment_metadata = Column(JSON, nullable=False)  # Full metadata as returned on upload
+    created_at = Column(DateTime, default=datetime.utcnow)
+
 class TaskCluster(Base):
     """Task cluster model for grouping similar user queries"""
     __tablename__ = "task_clusters"
@@ -3,15 +3,21 @@ Database Storage - Store raw and processed data in PostgreSQL
 """
 import os
 import json
+import threading
+from collections import Counter
 from typing import List, Dict, Optional
 from datetime import datetime
 from pathlib import Path
 from loguru import logger
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, JSON, Boolean, LargeBinary
+from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, JSON, Boolean, LargeBinary, UniqueConstraint, text
 from sqlalchemy.orm import sessionmaker, Session, declarative_base
 
 Base = declarative_base()
 
+# Full-text search document for raw_documents (PostgreSQL). Queries must use
+# this exact expression for the planner to pick the GIN index.
+RAW_DOCUMENT_SEARCH_VECTOR = "to_tsvector('english', coalesce(title, '') || ' ' || coalesce(raw_content, ''))"
+
 
 class RawDocument(Base):
     """Raw document storage"""
@@ -58,9 +64,45 @@ class ProcessedChunk(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
+class MetadataFacet(Base):
+    """Materialized document counts per (scope, namespace, facet, value)"""
+    __tablename__ = "metadata_facets"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    scope = Column(String(20), nullable=False, index=True)  # vector, processed
+    namespace = Column(String(100), nullable=False)
+    facet = Column(String(20), nullable=False)  # total, category, source, date
+    value = Column(String(200), nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("scope", "namespace", "facet", "value", name="uq_metadata_facet"),
+    )
+
+
+class FacetedChunk(Base):
+    """Chunks already counted in a facet scope (vector upserts are idempotent)"""
+    __tablename__ = "metadata_facet_chunks"
+
+    scope = Column(String(20), primary_key=True)
+    chunk_id = Column(String(100), primary_key=True)
+    namespace = Column(String(100))
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+# Arbitrary key for the PostgreSQL advisory lock that serialises index builds
+# across workers
+SEARCH_INDEX_LOCK_KEY = 0x616D6E71
+
+
 class DatabaseStorage:
     """Database storage for raw and processed data"""
 
+    # Database URLs whose search indexes this process has already scheduled
+    _indexes_scheduled: set = set()
+    _indexes_lock = threading.Lock()
+
     def __init__(self, database_url: Optional[str] = None):
         """Initialize database connection"""
         if database_url is None:
@@ -90,8 +132,92 @@ class DatabaseStorage:
 
         # Create tables
         Base.metadata.create_all(bind=self.engine)
+        self._schedule_search_indexes()
         logger.info("Database storage initialized")
 
+    def _schedule_search_indexes(self):
+        """
+        Build the search indexes once per process. On PostgreSQL the
+        concurrent builds can take minutes on a large table, so they run in a
+        background thread instead of holding up startup.
+        """
+        with DatabaseStorage._indexes_lock:
+            if self.database_url in DatabaseStorage._indexes_scheduled:
+                return
+            DatabaseStorage._indexes_scheduled.add(self.database_url)
+
+        if self.engine.dialect.name != "postgresql":
+            self._ensure_search_indexes()
+            return
+        threading.Thread(
+            target=self._ensure_search_indexes, name="raw-document-indexes", daemon=True
+        ).start()
+
+    def _ensure_search_indexes(self):
+        """
+        Indexes for news listing and search that create_all does not add to
+        existing tables: (publication_date, id) in the listing's newest-first
+        order for keyset pagination and, on PostgreSQL, a GIN full-text index
+        over title and content.
+
+        On PostgreSQL a failed concurrent build leaves an INVALID index that
+        IF NOT EXISTS would skip forever, so invalid ones are dropped and
+        rebuilt. An advisory lock keeps other workers from dropping a build
+        that is still in progress.
+        """
+        # Matches ORDER BY publication_date DESC NULLS LAST, id DESC so the
+        # listing is an index scan; SQLite indexes cannot declare NULLS LAST
+        # (its DESC order already puts NULLs last)
+        nulls_last = " NULLS LAST" if self.engine.dialect.name == "postgresql" else ""
+        statements = [
+            # Replaced by the descending index below
+            "DROP INDEX IF EXISTS ix_raw_documents_pub_date_id",
+            "CREATE INDEX IF NOT EXISTS ix_raw_documents_pub_date_desc_id "
+            f"ON raw_documents (publication_date DESC{nulls_last}, id DESC)",
+        ]
+        if self.engine.dialect.name == "postgresql":
+            statements = [
+                stmt.replace("CREATE INDEX", "CREATE INDEX CONCURRENTLY").replace("DROP INDEX", "DROP INDEX CONCURRENTLY")
+                for stmt in statements
+            ]
+            statements.append(
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_raw_documents_search "
+                f"ON raw_documents USING gin ({RAW_DOCUMENT_SEARCH_VECTOR})"
+            )
+
+        try:
+            # CONCURRENTLY cannot run inside a transaction block
+            with self.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                if self.engine.dialect.name != "postgresql":
+                    for statement in statements:
+                        conn.execute(text(statement))
+                    return
+
+                locked = conn.execute(
+                    text("SELECT pg_try_advisory_lock(:key)"), {"key": SEARCH_INDEX_LOCK_KEY}
+                ).scalar()
+                if not locked:
+                    logger.info("Raw document search indexes are being built by another worker")
+                    return
+                try:
+                    invalid = conn.execute(text(
+                        "SELECT c.relname FROM pg_index i "
+                        "JOIN pg_class c ON c.oid = i.indexrelid "
+                        "WHERE i.indrelid = 'raw_documents'::regclass AND NOT i.indisvalid"
+                    )).scalars().all()
+                    for name in invalid:
+                        if name not in ("ix_raw_documents_pub_date_desc_id", "ix_raw_documents_search"):
+                            continue
+                        logger.warning(f"Rebuilding invalid index {name}")
+                        conn.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"'))
+                    for statement in statements:
+                        conn.execute(text(statement))
+                    logger.info("Raw document search indexes ready")
+                finally:
+                    conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": SEARCH_INDEX_LOCK_KEY})
+        except Exception as e:
+            logger.warning(f"Could not create raw document search indexes: {e}")
+
     def get_db_session(self) -> Session:
         """Get database session"""
         return self.SessionLocal()
@@ -172,6 +298,8 @@ class DatabaseStorage:
 
     def save_processed_chunks(self, chunks: List[Dict]) -> int:
         """Save processed chunks to database with retry logic for connection issues"""
+        from .metadata_facets import facet_deltas, apply_facet_deltas
+
         saved_count = 0
         max_retries = 3
         retry_delay = 1
@@ -179,6 +307,8 @@ class DatabaseStorage:
         for attempt in range(max_retries):
             try:
                 db = self.get_db_session()
+                saved_count = 0
+                new_chunks = []
                 try:
                     for chunk in chunks:
                         # Check if chunk already exists
@@ -207,8 +337,12 @@ class DatabaseStorage:
                         )
 
                         db.add(processed_chunk)
+                        new_chunks.append(chunk)
                         saved_count += 1
 
+                    # Facet counts commit in the same transaction as the chunks
+                    apply_facet_deltas(db, "processed", facet_deltas(new_chunks))
+
                     db.commit()
                     logger.info(f"Saved {saved_count} processed chunks to database")
                     return saved_count
@@ -322,11 +456,18 @@ class DatabaseStorage:
                 return []
 
     def get_stats(self) -> Dict:
-        """Get database statistics"""
+        """
+        Get database statistics
+
+        Processed chunk counts come from the "processed" facet scope once
+        rebuild_processed_facets has backfilled it, instead of counting
+        processed_chunks on every call.
+        """
+        from .metadata_facets import BACKFILLED
+
         with self.get_db_session() as db:
             try:
                 raw_count = db.query(RawDocument).count()
-                processed_count = db.query(ProcessedChunk).count()
                 processed_docs = db.query(RawDocument).filter_by(processed=True).count()
 
                 # Get category breakdown
@@ -336,10 +477,23 @@ class DatabaseStorage:
                     func.count(RawDocument.id).label('count')
                 ).group_by(RawDocument.category).all()
 
-                processed_categories = db.query(
-                    ProcessedChunk.category,
-                    func.count(ProcessedChunk.id).label('count')
-                ).group_by(ProcessedChunk.category).all()
+                facet_rows = db.query(MetadataFacet.facet, MetadataFacet.value, MetadataFacet.count).filter(
+                    MetadataFacet.scope == "processed",
+                    MetadataFacet.facet.in_(("total", "category", BACKFILLED)),
+                ).all()
+                if any(facet == BACKFILLED for facet, _, _ in facet_rows):
+                    processed_count = sum(count for facet, _, count in facet_rows if facet == "total")
+                    processed_categories = Counter()
+                    for facet, value, count in facet_rows:
+                        if facet == "category" and count > 0:
+                            processed_categories[value] += count
+                    processed_categories = processed_categories.most_common()
+                else:
+                    processed_count = db.query(ProcessedChunk).count()
+                    processed_categories = db.query(
+                        ProcessedChunk.category,
+                        func.count(ProcessedChunk.id).label('count')
+                    ).group_by(ProcessedChunk.category).all()
 
                 return {
                     "raw_documents": {
@@ -361,6 +515,48 @@ class DatabaseStorage:
                     "processed_chunks": {"total": 0, "categories": {}}
                 }
 
+    def rebuild_processed_facets(self) -> int:
+        """
+        Recompute the "processed" facet scope from processed_chunks.
+
+        Used once to backfill facets for chunks saved before they were
+        maintained incrementally; the "backfilled" marker it leaves lets
+        get_stats read the counts.
+
+        Returns:
+            Number of processed chunks counted
+        """
+        from .metadata_facets import BACKFILLED, DEFAULT_NAMESPACE, facet_deltas, apply_facet_deltas
+
+        with self.get_db_session() as db:
+            try:
+                deltas = Counter()
+                rows = db.query(
+                    ProcessedChunk.category,
+                    ProcessedChunk.source_name,
+                    ProcessedChunk.publication_date,
+                ).yield_per(5000)
+                for category, source_name, publication_date in rows:
+                    deltas.update(facet_deltas([{
+                        "category": category,
+                        "source_name": source_name,
+                        "publication_date": publication_date,
+                    }]))
+
+                db.query(MetadataFacet).filter(MetadataFacet.scope == "processed").delete()
+                apply_facet_deltas(db, "processed", deltas)
+                db.add(MetadataFacet(scope="processed", namespace=DEFAULT_NAMESPACE, facet=BACKFILLED, value="", count=1))
+                db.commit()
+
+                total = sum(count for (_, facet, _), count in deltas.items() if facet == "total")
+                logger.info(f"Rebuilt processed metadata facets from {total} chunks")
+                return total
+
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Error rebuilding processed facets: {e}")
+                raise
+
     def _parse_date(self, date_str: Optional[str]) -> Optional[datetime]:
         """Parse date string to datetime object"""
         if not date_str:
@@ -0,0 +1,330 @@
+"""
+Embedding Store - Append-only, restartable storage for chunk embeddings
+
+Embeddings generated for a processed JSONL file are kept beside it under
+data/embeddings/ (same category directory) instead of being merged back into
+the file:
+
+- <stem>.embeddings.jsonl: append-only log. Each batch is written as one
+  record per chunk followed by a commit marker, then fsynced. A batch cut
+  short by a crash has no marker; it is ignored and truncated away when the
+  store is next opened for writing.
+- <stem>.embeddings.db: SQLite index of committed records (chunk ID, text
+  digest, byte offset and length in the log). Jobs use it to skip chunks
+  that already have an embedding for the same text, and readers fetch
+  embeddings for a batch of chunks without loading the log.
+
+The log is the source of truth. The index stores how many bytes of the log
+it covers, and opening for writing replays committed batches past that
+point, so a worker killed between the two writes loses nothing.
+
+Usage:
+    with EmbeddingStore.for_file(processed_file) as store:
+        done = store.embedded_ids(chunks)
+        store.append([(chunk_id, text_digest(text), embedding), ...])
+
+    store = EmbeddingStore.for_file(processed_file, readonly=True)  # None if absent
+    store.attach(chunks)  # fills chunk["embedding"] where stored
+"""
+import hashlib
+import json
+import os
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from loguru import logger
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    fcntl = None
+    FCNTL_AVAILABLE = False
+
+PROJECT_ROOT = Path(__file__).parent.parent
+PROCESSED_ROOT = PROJECT_ROOT / "data" / "processed"
+EMBEDDINGS_ROOT = PROJECT_ROOT / "data" / "embeddings"
+
+# Bound parameters per IN (...) lookup (SQLite's default limit is 999)
+_LOOKUP_BATCH = 500
+
+# (chunk_id, text digest, embedding)
+EmbeddingRecord = Tuple[str, str, Sequence[float]]
+
+
+def text_digest(text: str) -> str:
+    """Short digest of a chunk's text; a stored embedding is reused only if it matches"""
+    return hashlib.blake2b((text or "").encode("utf-8"), digest_size=8).hexdigest()
+
+
+class EmbeddingStore:
+    """Append-only embedding log with commit markers and a SQLite chunk index"""
+
+    def __init__(self, log_path: Path, index_path: Path, readonly: bool = False):
+        """
+        Args:
+            log_path: Append-only JSONL log
+            index_path: SQLite index of committed records
+            readonly: Read committed embeddings only (no recovery, no lock);
+                safe while a writer is appending
+        """
+        self.log_path = Path(log_path)
+        self.index_path = Path(index_path)
+        self.readonly = readonly
+        self._log = None
+        self._reader = None
+
+        self._conn = sqlite3.connect(str(self.index_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "chunk_id TEXT PRIMARY KEY, digest TEXT NOT NULL, "
+            "offset INTEGER NOT NULL, length INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._conn.commit()
+
+        if not readonly:
+            self._log = open(self.log_path, "ab")
+            self._lock()
+            self._recover()
+
+    @classmethod
+    def for_file(
+        cls,
+        processed_file: Path,
+        readonly: bool = False,
+        root: Optional[Path] = None
+    ) -> Optional["EmbeddingStore"]:
+        """
+        Store for a processed JSONL file
+
+        Args:
+            processed_file: data/processed/<category>/<name>_processed.jsonl
+            readonly: Open for reading; returns None if no store exists yet
+            root: Embeddings directory (default data/embeddings)
+
+        Returns:
+            store: EmbeddingStore, or None (readonly and nothing stored)
+        """
+        processed_file = Path(processed_file)
+        try:
+            relative = processed_file.resolve().parent.relative_to(PROCESSED_ROOT.resolve())
+        except ValueError:
+            relative = Path(processed_file.parent.name)
+
+        directory = Path(root or EMBEDDINGS_ROOT) / relative
+        log_path = directory / f"{processed_file.stem}.embeddings.jsonl"
+        index_path = directory / f"{processed_file.stem}.embeddings.db"
+        if readonly and not index_path.exists():
+            return None
+        directory.mkdir(parents=True, exist_ok=True)
+        return cls(log_path, index_path, readonly=readonly)
+
+    # ------------------------------------------------------------------
+    # Recovery
+    # ------------------------------------------------------------------
+
+    def _lock(self):
+        """One writer per store; a second job on the same file fails fast"""
+        if not FCNTL_AVAILABLE:
+            return
+        try:
+            fcntl.flock(self._log.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self._log.close()
+            self._conn.close()
+            raise RuntimeError(f"Embedding store {self.log_path} is locked by another job")
+
+    def _get_state(self, key: str, default: int = 0) -> int:
+        row = self._conn.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _commit_index(self, rows: List[Tuple[str, str, int, int]], log_offset: int, batches: int):
+        """Index one committed batch and advance the covered log offset, atomically"""
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (chunk_id, digest, offset, length) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)",
+                [("log_offset", log_offset), ("batches", batches)]
+            )
+
+    def _recover(self):
+        """Index committed batches past the covered offset and drop an uncommitted tail"""
+        covered = self._get_state("log_offset")
+        batches = self._get_state("batches")
+        size = self.log_path.stat().st_size
+
+        if covered > size:
+            # Log replaced or truncated outside the store: rebuild the index
+            logger.warning(f"Embedding log {self.log_path.name} shorter than its index; reindexing")
+            with self._conn:
+                self._conn.execute("DELETE FROM embeddings")
+            covered, batches = 0, 0
+
+        replayed = 0
+        if size > covered:
+            with open(self.log_path, "rb") as f:
+                f.seek(covered)
+                offset, pending = covered, []
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    if "commit" in record:
+                        if record.get("records") != len(pending):
+                            break
+                        batches = max(batches, int(record["commit"]))
+                        self._commit_index(pending, offset + len(line), batches)
+                        covered, pending = offset + len(line), []
+                        replayed += 1
+                    else:
+                        pending.append((str(record["chunk_id"]), record["digest"], offset, len(line)))
+                    offset += len(line)
+
+        if size > covered:
+            logger.warning(
+                f"Discarding {size - covered} bytes of uncommitted embeddings from {self.log_path.name}"
+            )
+            self._log.truncate(covered)
+        if replayed:
+            logger.info(f"Indexed {replayed} committed batches from {self.log_path.name}")
+        self._batches = batches
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def append(self, records: List[EmbeddingRecord]) -> int:
+        """
+        Write one batch and commit it
+
+        Args:
+            records: (chunk_id, text digest, embedding) per chunk
+
+        Returns:
+            count: Records committed
+        """
+        if self.readonly:
+            raise RuntimeError("Embedding store opened read-only")
+        if not records:
+            return 0
+
+        offset = self._log.seek(0, os.SEEK_END)
+        buffer = bytearray()
+        rows = []
+        for chunk_id, digest, embedding in records:
+            if hasattr(embedding, "tolist"):
+                embedding = embedding.tolist()
+            line = json.dumps(
+                {"chunk_id": chunk_id, "digest": digest, "embedding": embedding},
+                separators=(",", ":")
+            ).encode("utf-8") + b"\n"
+            rows.append((str(chunk_id), digest, offset + len(buffer), len(line)))
+            buffer += line
+
+        batch = self._batches + 1
+        buffer += json.dumps(
+            {"commit": batch, "records": len(records), "at": datetime.utcnow().isoformat()}
+        ).encode("utf-8") + b"\n"
+
+        # The marker lands with the records; fsync before the index points at them
+        self._log.write(buffer)
+        self._log.flush()
+        os.fsync(self._log.fileno())
+        self._commit_index(rows, offset + len(buffer), batch)
+        self._batches = batch
+        return len(records)
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def _lookup(self, chunk_ids: Iterable[str]) -> Dict[str, Tuple[str, int, int]]:
+        """chunk_id -> (digest, offset, length) for committed chunks"""
+        ids = list(dict.fromkeys(str(chunk_id) for chunk_id in chunk_ids))
+        found = {}
+        for i in range(0, len(ids), _LOOKUP_BATCH):
+            part = ids[i:i + _LOOKUP_BATCH]
+            rows = self._conn.execute(
+                f"SELECT chunk_id, digest, offset, length FROM embeddings "
+                f"WHERE chunk_id IN ({','.join('?' * len(part))})",
+                part
+            )
+            for chunk_id, digest, offset, length in rows:
+                found[chunk_id] = (digest, offset, length)
+        return found
+
+    def embedded_ids(self, chunks: List[Dict[str, Any]]) -> Set[str]:
+        """Chunk IDs with a committed embedding for their current text"""
+        stored = self._lookup(chunk["chunk_id"] for chunk in chunks if chunk.get("chunk_id") is not None)
+        return {
+            str(chunk["chunk_id"]) for chunk in chunks
+            if chunk.get("chunk_id") is not None
+            and stored.get(str(chunk["chunk_id"]), ("",))[0] == text_digest(chunk.get("text", ""))
+        }
+
+    def get(self, chunks: List[Dict[str, Any]]) -> Dict[str, List[float]]:
+        """Committed embeddings for chunks whose text is unchanged, by chunk ID"""
+        stored = self._lookup(chunk["chunk_id"] for chunk in chunks if chunk.get("chunk_id") is not None)
+        wanted = sorted(
+            (stored[str(chunk["chunk_id"])][1:], str(chunk["chunk_id"])) for chunk in chunks
+            if chunk.get("chunk_id") is not None and str(chunk["chunk_id"]) in stored
+            and stored[str(chunk["chunk_id"])][0] == text_digest(chunk.get("text", ""))
+        )
+        if not wanted:
+            return {}
+
+        if self._reader is None:
+            self._reader = open(self.log_path, "rb")
+        embeddings = {}
+        # Offset order keeps reads sequential
+        for (offset, length), chunk_id in wanted:
+            self._reader.seek(offset)
+            embeddings[chunk_id] = json.loads(self._reader.read(length))["embedding"]
+        return embeddings
+
+    def attach(self, chunks: List[Dict[str, Any]]) -> int:
+        """
+        Fill chunk["embedding"] from the store where it is missing
+
+        Returns:
+            count: Chunks that received a stored embedding
+        """
+        missing = [chunk for chunk in chunks if chunk.get("embedding") is None]
+        embeddings = self.get(missing)
+        for chunk in missing:
+            embedding = embeddings.get(str(chunk.get("chunk_id")))
+            if embedding is not None:
+                chunk["embedding"] = embedding
+        return sum(1 for chunk in missing if chunk.get("embedding") is not None)
+
+    def count(self) -> int:
+        """Committed embeddings"""
+        return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def close(self):
+        """Close the log, reader and index (releases the writer lock)"""
+        for handle in (self._log, self._reader):
+            if handle is not None:
+                handle.close()
+        self._log = self._reader = None
+        self._conn.close()
+
+    def __enter__(self) -> "EmbeddingStore":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,339 @@
+"""
+Generation Cache - LLM answers keyed by the evidence they were generated from
+
+The key combines:
+- the prompt template and the normalized question
+- the retrieved chunks (sorted IDs plus a hash of each chunk's text)
+- the model and a temperature bucket
+
+Retrieval that resolves to the same evidence for the same question reuses
+the earlier generation even when the query string differs in casing,
+punctuation or spacing. Word order is kept, so questions that differ only
+in who does what to whom get separate entries.
+
+Entries live in an in-process LRU in front of Redis. Each chunk keeps a Redis
+set of the entries it contributed to, so re-indexing a chunk
+(VectorStore.add_documents) drops every answer built from it. Changed chunk
+text changes the key anyway. The LRU has a short TTL so other processes pick
+up invalidations quickly.
+
+Environment:
+    GENERATION_CACHE_ENABLED      "true" (default) / "false"
+    GENERATION_CACHE_REDIS_URL    falls back to REDIS_URL, then local Redis
+    GENERATION_CACHE_TTL_SECONDS  Redis TTL (default 24h)
+    GENERATION_CACHE_LRU_SIZE     in-process entries (default 1024)
+    GENERATION_CACHE_LRU_TTL      in-process TTL seconds (default 300)
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+from .request_tracing import span
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+
+KEY_PREFIX = "amq:gen"
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize_question(question: str) -> str:
+    """Casefolded words of a question, in order, without punctuation"""
+    return " ".join(_WORD_RE.findall(question.casefold()))
+
+
+def temperature_bucket(temperature: Optional[float]) -> str:
+    """Temperatures within 0.1 of each other share cached answers"""
+    if temperature is None:
+        return "default"
+    return f"{round(float(temperature), 1):.1f}"
+
+
+def chunk_fingerprint(doc: Dict[str, Any]) -> Tuple[str, str]:
+    """(chunk ID, content version) for a retrieved document"""
+    text = doc.get("text") or doc.get("content") or ""
+    if not isinstance(text, str):
+        text = json.dumps(text, sort_keys=True, default=str)
+    version = hashlib.sha1(text.encode("utf-8", "ignore")).hexdigest()[:16]
+    metadata = doc.get("metadata") or {}
+    chunk_id = metadata.get("chunk_id") or doc.get("chunk_id") or doc.get("id")
+    return (str(chunk_id) if chunk_id not in (None, "") else f"h:{version}", version)
+
+
+class GenerationCache:
+    """
+    Two-level (LRU + Redis) cache of generated answers keyed by evidence.
+
+    `use_redis=False` keeps entries in the in-process LRU only (benchmarks).
+    """
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        ttl_seconds: Optional[int] = None,
+        lru_size: Optional[int] = None,
+        lru_ttl_seconds: Optional[float] = None,
+        enabled: Optional[bool] = None,
+        use_redis: bool = True,
+    ):
+        self.enabled = enabled if enabled is not None else (
+            os.getenv("GENERATION_CACHE_ENABLED", "true").lower() == "true"
+        )
+        self.redis_url = redis_url or os.getenv("GENERATION_CACHE_REDIS_URL") or os.getenv("REDIS_URL", "redis://localhost:6379/0")
+        self.ttl_seconds = ttl_seconds or int(os.getenv("GENERATION_CACHE_TTL_SECONDS", str(24 * 3600)))
+        self.lru_size = lru_size or int(os.getenv("GENERATION_CACHE_LRU_SIZE", "1024"))
+        self.lru_ttl_seconds = lru_ttl_seconds if lru_ttl_seconds is not None else float(os.getenv("GENERATION_CACHE_LRU_TTL", "300"))
+
+        self._lru: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._chunk_keys: Dict[str, set] = {}
+        self._key_chunks: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+        self._redis = None
+        self._redis_checked = not use_redis
+
+        self.stats = {"hits_local": 0, "hits_redis": 0, "misses": 0, "sets": 0, "invalidated": 0}
+
+    # ------------------------------------------------------------------
+    # Redis
+    # ------------------------------------------------------------------
+
+    def _get_redis(self):
+        """Connect on first use; None (local LRU only) if Redis is unreachable"""
+        if self._redis_checked:
+            return self._redis
+        with self._lock:
+            if self._redis_checked:
+                return self._redis
+            self._redis_checked = True
+            if not REDIS_AVAILABLE:
+                logger.info("redis not installed, generation cache is in-process only")
+                return None
+            try:
+                client = redis.Redis.from_url(
+                    self.redis_url,
+                    decode_responses=True,
+                    socket_timeout=1.0,
+                    socket_connect_timeout=1.0,
+                )
+                client.ping()
+                self._redis = client
+                logger.info("Generation cache using Redis")
+            except Exception as e:
+                logger.warning(f"Generation cache Redis unavailable, using in-process LRU only: {e}")
+                self._redis = None
+        return self._redis
+
+    # ------------------------------------------------------------------
+    # Keys
+    # ------------------------------------------------------------------
+
+    def make_key(
+        self,
+        question: str,
+        evidence: Iterable[Dict[str, Any]],
+        model: str,
+        temperature: Optional[float] = None,
+        template: str = "",
+    ) -> Optional[Tuple[str, List[str]]]:
+        """
+        Build the cache key for a generation.
+
+        Args:
+            question: User question (normalized before hashing)
+            evidence: Retrieved documents the answer is generated from
+            model: Model name
+            temperature: Sampling temperature (bucketed)
+            template: Prompt template / system prompt (whitespace-normalized)
+
+        Returns:
+            (key, contributing chunk IDs), or None when there is no evidence
+            or the cache is disabled
+        """
+        if not self.enabled:
+            return None
+        fingerprints = sorted({chunk_fingerprint(doc) for doc in evidence if isinstance(doc, dict)})
+        if not fingerprints:
+            return None
+
+        payload = json.dumps({
+            "template": hashlib.sha1(" ".join(template.split()).encode()).hexdigest(),
+            "question": normalize_question(question),
+            "evidence": fingerprints,
+            "model": model,
+            "temperature": temperature_bucket(temperature),
+        }, sort_keys=True)
+        digest = hashlib.sha256(payload.encode()).hexdigest()[:40]
+        return f"{KEY_PREFIX}:entry:{digest}", [chunk_id for chunk_id, _ in fingerprints]
+
+    # ------------------------------------------------------------------
+    # Sync API (RAGPipeline)
+    # ------------------------------------------------------------------
+
+    def get(self, key: str) -> Optional[Any]:
+        """Cached generation for `key`, or None"""
+        with span("cache.generation") as cache_span:
+            with self._lock:
+                entry = self._lru.get(key)
+                if entry is not None:
+                    stored_at, value = entry
+                    if time.time() - stored_at < self.lru_ttl_seconds:
+                        self._lru.move_to_end(key)
+                        self.stats["hits_local"] += 1
+                        cache_span.set_attribute("hit", "local")
+                        return value
+                    self._drop_local(key)
+
+            client = self._get_redis()
+            if client is not None:
+                try:
+                    raw = client.get(key)
+                except Exception as e:
+                    logger.debug(f"Generation cache Redis get failed: {e}")
+                    raw = None
+                if raw is not None:
+                    try:
+                        value = json.loads(raw)
+                    except json.JSONDecodeError:
+                        value = None
+                    if value is not None:
+                        self._store_local(key, value, [])
+                        self.stats["hits_redis"] += 1
+                        cache_span.set_attribute("hit", "redis")
+                        return value
+
+            self.stats["misses"] += 1
+            cache_span.set_attribute("hit", False)
+            return None
+
+    def set(self, key: str, value: Any, chunk_ids: List[str]) -> None:
+        """Store a generation and index it under each contributing chunk"""
+        self._store_local(key, value, chunk_ids)
+        self.stats["sets"] += 1
+
+        client = self._get_redis()
+        if client is None:
+            return
+        try:
+            pipe = client.pipeline(transaction=False)
+            pipe.setex(key, self.ttl_seconds, json.dumps(value, default=str))
+            for chunk_id in chunk_ids:
+                index_key = f"{KEY_PREFIX}:chunk:{chunk_id}"
+                pipe.sadd(index_key, key)
+                pipe.expire(index_key, self.ttl_seconds)
+            pipe.execute()
+        except Exception as e:
+            logger.debug(f"Generation cache Redis set failed: {e}")
+
+    def invalidate_chunks(self, chunk_ids: Iterable[str]) -> int:
+        """
+        Drop every cached generation that used any of these chunks.
+
+        Returns:
+            Number of entries removed
+        """
+        chunk_ids = [str(c) for c in chunk_ids if c not in (None, "")]
+        if not chunk_ids:
+            return 0
+
+        keys = set()
+        with self._lock:
+            for chunk_id in chunk_ids:
+                keys.update(self._chunk_keys.get(chunk_id, ()))
+
+        client = self._get_redis()
+        if client is not None:
+            try:
+                index_keys = [f"{KEY_PREFIX}:chunk:{chunk_id}" for chunk_id in chunk_ids]
+                pipe = client.pipeline(transaction=False)
+                for index_key in index_keys:
+                    pipe.smembers(index_key)
+                for members in pipe.execute():
+                    keys.update(members or ())
+                client.delete(*keys, *index_keys)
+            except Exception as e:
+                logger.warning(f"Generation cache invalidation failed in Redis: {e}")
+
+        # Includes entries copied into the LRU after a Redis hit
+        with self._lock:
+            for key in keys:
+                self._drop_local(key)
+
+        self.stats["invalidated"] += len(keys)
+        if keys:
+            logger.info(f"Generation cache: invalidated {len(keys)} entries for {len(chunk_ids)} re-indexed chunks")
+        return len(keys)
+
+    def _store_local(self, key: str, value: Any, chunk_ids: List[str]) -> None:
+        with self._lock:
+            self._drop_local(key)
+            self._lru[key] = (time.time(), value)
+            self._key_chunks[key] = list(chunk_ids)
+            for chunk_id in chunk_ids:
+                self._chunk_keys.setdefault(chunk_id, set()).add(key)
+            while len(self._lru) > self.lru_size:
+                self._drop_local(next(iter(self._lru)))
+
+    def _drop_local(self, key: str) -> None:
+        """Remove an LRU entry and its chunk index entries (caller holds the lock)"""
+        self._lru.pop(key, None)
+        for chunk_id in self._key_chunks.pop(key, ()):
+            keys = self._chunk_keys.get(chunk_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._chunk_keys[chunk_id]
+
+    def clear(self) -> None:
+        """Drop every in-process entry (Redis entries are left to expire)"""
+        with self._lock:
+            self._lru.clear()
+            self._chunk_keys.clear()
+            self._key_chunks.clear()
+
+    # ------------------------------------------------------------------
+    # Async API (agent responder)
+    # ------------------------------------------------------------------
+
+    async def aget(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._lru.get(key)
+        if entry is not None and time.time() - entry[0] < self.lru_ttl_seconds:
+            return self.get(key)
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value: Any, chunk_ids: List[str]) -> None:
+        await asyncio.to_thread(self.set, key, value, chunk_ids)
+
+    def get_stats(self) -> Dict[str, Any]:
+        hits = self.stats["hits_local"] + self.stats["hits_redis"]
+        lookups = hits + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "local_entries": len(self._lru),
+            "redis": self._redis is not None,
+        }
+
+
+_generation_cache: Optional[GenerationCache] = None
+
+
+def get_generation_cache() -> GenerationCache:
+    """Get the global generation cache"""
+    global _generation_cache
+    if _generation_cache is None:
+        _generation_cache = GenerationCache()
+    return _generation_cache
@@ -0,0 +1,483 @@
+"""
+Metadata Facets - Exact document counts maintained as documents are written
+
+Counts live in the metadata_facets table, one row per
+(scope, namespace, facet, value):
+- scope "vector": chunks upserted through VectorStore.add_documents
+- scope "processed": chunks saved by DatabaseStorage.save_processed_chunks
+  (read by DatabaseStorage.get_stats once rebuild_processed_facets has run)
+- facets: total, category, source, date (publication day, YYYY-MM-DD)
+
+Writers add their deltas in the same pass that stores the chunks, so
+statistics and category/source listings read exact counts from a small
+indexed table instead of sampling the vector store. Vector upserts are
+idempotent, so chunk IDs already counted in a scope are remembered
+(metadata_facet_chunks) and not counted twice.
+
+Documents indexed before the counts were maintained are only covered once a
+namespace has been rebuilt from the store (MetadataManager.rebuild_facets).
+A rebuild leaves a "backfilled" marker row for the namespace, and readers use
+the counts only for backfilled namespaces. Rebuilds hold a "backfilling"
+lease row so concurrent workers do not rebuild the same namespace.
+
+Without a database the store keeps counts in process memory. Those counts
+only cover documents written by the current process, so they are not exact
+(see FacetStore.persistent).
+
+Environment:
+    METADATA_FACETS_ENABLED         "true" (default) / "false"
+    METADATA_FACETS_DATABASE_URL    falls back to DATABASE_URL
+    METADATA_FACETS_BACKFILL_LEASE  seconds before an abandoned rebuild lease
+                                    can be taken over (default 3600)
+"""
+import hashlib
+import os
+import re
+import threading
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from loguru import logger
+from sqlalchemy import create_engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, sessionmaker
+
+from .database_storage import Base, FacetedChunk, MetadataFacet
+
+DEFAULT_NAMESPACE = "default"
+FACETS = ("total", "category", "source", "date")
+
+# Marker rows kept beside the counts (facet names, value "")
+BACKFILLED = "backfilled"
+BACKFILLING = "backfilling"
+BACKFILL_LEASE_SECONDS = int(os.getenv("METADATA_FACETS_BACKFILL_LEASE", "3600"))
+
+# Rows per multi-row upsert (keeps SQLite under its bound-parameter limit)
+_UPSERT_BATCH = 100
+# Width of metadata_facet_chunks.chunk_id
+_CHUNK_KEY_LENGTH = 100
+_DATE_RE = re.compile(r"^(\d{4})[-/](\d{2})[-/](\d{2})")
+
+
+# =============================================================================
+# DELTAS
+# =============================================================================
+
+def date_bucket(value: Any) -> Optional[str]:
+    """Publication day (YYYY-MM-DD) for a date, datetime or date string"""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+
+    text = str(value).strip()
+    match = _DATE_RE.match(text)
+    try:
+        if match:
+            return date(*(int(part) for part in match.groups())).isoformat()
+        return datetime.fromisoformat(text.replace("Z", "+00:00")).date().isoformat()
+    except ValueError:
+        return None
+
+
+def _chunk_key(chunk_id: Any) -> str:
+    """
+    Chunk ID as stored in metadata_facet_chunks. IDs longer than the column
+    keep a prefix plus a hash of the full ID, so two long IDs sharing a
+    prefix are still told apart.
+    """
+    chunk_id = str(chunk_id)
+    if len(chunk_id) <= _CHUNK_KEY_LENGTH:
+        return chunk_id
+    digest = hashlib.blake2b(chunk_id.encode("utf-8"), digest_size=8).hexdigest()
+    return f"{chunk_id[:_CHUNK_KEY_LENGTH - len(digest) - 1]}#{digest}"
+
+
+def _facet_value(value: Any) -> str:
+    value = str(value).strip() if value is not None else ""
+    return value[:200] if value else "Unknown"
+
+
+def facet_deltas(chunks: Iterable[Dict[str, Any]], namespace: Optional[str] = None) -> Counter:
+    """
+    Count increments contributed by a batch of chunks.
+
+    Args:
+        chunks: Chunk dictionaries (category, source_name, publication_date)
+        namespace: Namespace for every chunk; defaults to each chunk's own
+            "namespace" field, then DEFAULT_NAMESPACE
+
+    Returns:
+        Counter keyed by (namespace, facet, value)
+    """
+    deltas = Counter()
+    for chunk in chunks:
+        ns = namespace or chunk.get("namespace") or DEFAULT_NAMESPACE
+        deltas[(ns, "total", "")] += 1
+        deltas[(ns, "category", _facet_value(chunk.get("category")))] += 1
+        deltas[(ns, "source", _facet_value(chunk.get("source_name")))] += 1
+        day = date_bucket(chunk.get("publication_date"))
+        if day:
+            deltas[(ns, "date", day)] += 1
+    return deltas
+
+
+def apply_facet_deltas(session: Session, scope: str, deltas: Counter) -> None:
+    """
+    Add `deltas` to the facet counts in `session` (caller commits).
+
+    PostgreSQL and SQLite use a single INSERT ... ON CONFLICT per batch; other
+    dialects fall back to update-then-insert.
+    """
+    if not deltas:
+        return
+
+    now = datetime.utcnow()
+    rows = [
+        {"scope": scope, "namespace": ns, "facet": facet, "value": value, "count": count, "updated_at": now}
+        for (ns, facet, value), count in deltas.items()
+        if count
+    ]
+
+    dialect = session.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+
+        for i in range(0, len(rows), _UPSERT_BATCH):
+            stmt = insert(MetadataFacet).values(rows[i:i + _UPSERT_BATCH])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["scope", "namespace", "facet", "value"],
+                set_={
+                    "count": MetadataFacet.count + stmt.excluded.count,
+                    "updated_at": stmt.excluded.updated_at,
+                },
+            )
+            session.execute(stmt)
+        return
+
+    for row in rows:
+        updated = session.query(MetadataFacet).filter_by(
+            scope=scope, namespace=row["namespace"], facet=row["facet"], value=row["value"]
+        ).update({MetadataFacet.count: MetadataFacet.count + row["count"], MetadataFacet.updated_at: now})
+        if not updated:
+            session.add(MetadataFacet(**row))
+
+
+# =============================================================================
+# FACET STORE
+# =============================================================================
+
+class FacetStore:
+    """Reads and incrementally maintains materialized metadata facet counts"""
+
+    def __init__(self, database_url: Optional[str] = None, enabled: Optional[bool] = None):
+        self.enabled = enabled if enabled is not None else (
+            os.getenv("METADATA_FACETS_ENABLED", "true").lower() == "true"
+        )
+        self.database_url = database_url or os.getenv("METADATA_FACETS_DATABASE_URL") or os.getenv("DATABASE_URL")
+
+        self._session_factory = None
+        self._checked = False
+        self._lock = threading.Lock()
+
+        # In-process fallback when no database is reachable
+        self._memory: Dict[str, Counter] = {}
+        self._memory_chunks: Dict[str, Dict[str, str]] = {}
+
+    def _get_session_factory(self):
+        """Connect on first use; None (in-process counts) without a database"""
+        if self._checked:
+            return self._session_factory
+        with self._lock:
+            if self._checked:
+                return self._session_factory
+            self._checked = True
+            if not self.database_url:
+                logger.info("No DATABASE_URL, metadata facets are counted in-process only")
+                return None
+            try:
+                engine_kwargs = {"pool_pre_ping": True}
+                if not self.database_url.startswith("sqlite"):
+                    engine_kwargs.update(pool_size=2, max_overflow=3, pool_recycle=300)
+                engine = create_engine(self.database_url, **engine_kwargs)
+                Base.metadata.create_all(bind=engine, tables=[MetadataFacet.__table__, FacetedChunk.__table__])
+                self._session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+                logger.info("Metadata facets stored in database")
+            except Exception as e:
+                logger.warning(f"Metadata facet database unavailable, counting in-process: {e}")
+                self._session_factory = None
+        return self._session_factory
+
+    @property
+    def persistent(self) -> bool:
+        """Counts are shared through the database (exact) rather than per process"""
+        return self._get_session_factory() is not None
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def record_chunks(self, chunks: List[Dict[str, Any]], namespace: Optional[str] = None, scope: str = "vector") -> int:
+        """
+        Count chunks that have not been counted in `scope` before.
+
+        Args:
+            chunks: Chunk dictionaries with chunk_id and metadata fields
+            namespace: Namespace the chunks were written to
+            scope: Facet scope ("vector" or "processed")
+
+        Returns:
+            Number of newly counted chunks
+        """
+        if not self.enabled:
+            return 0
+
+        by_id: Dict[str, Dict[str, Any]] = {}
+        for chunk in chunks:
+            chunk_id = chunk.get("chunk_id")
+            if chunk_id not in (None, ""):
+                by_id.setdefault(_chunk_key(chunk_id), chunk)
+        if not by_id:
+            return 0
+
+        factory = self._get_session_factory()
+        if factory is None:
+            with self._lock:
+                seen = self._memory_chunks.setdefault(scope, {})
+                new_ids = [chunk_id for chunk_id in by_id if chunk_id not in seen]
+                seen.update((chunk_id, namespace or DEFAULT_NAMESPACE) for chunk_id in new_ids)
+                self._memory.setdefault(scope, Counter()).update(facet_deltas((by_id[c] for c in new_ids), namespace))
+            return len(new_ids)
+
+        # A concurrent writer may count some of the same chunks first; the
+        # primary key on metadata_facet_chunks turns that into a retry
+        for attempt in range(2):
+            with factory() as db:
+                try:
+                    known = set()
+                    ids = list(by_id)
+                    for i in range(0, len(ids), 500):
+                        known.update(
+                            row[0] for row in db.query(FacetedChunk.chunk_id).filter(
+                                FacetedChunk.scope == scope,
+                                FacetedChunk.chunk_id.in_(ids[i:i + 500]),
+                            )
+                        )
+                    new_ids = [chunk_id for chunk_id in ids if chunk_id not in known]
+                    if not new_ids:
+                        return 0
+
+                    ns = namespace or DEFAULT_NAMESPACE
+                    db.add_all(FacetedChunk(scope=scope, chunk_id=chunk_id, namespace=ns) for chunk_id in new_ids)
+                    apply_facet_deltas(db, scope, facet_deltas((by_id[c] for c in new_ids), namespace))
+                    db.commit()
+                    return len(new_ids)
+
+                except IntegrityError:
+                    db.rollback()
+                    if attempt == 0:
+                        continue
+                    logger.warning("Metadata facet update lost a race twice, skipping batch")
+                except Exception as e:
+                    db.rollback()
+                    logger.warning(f"Metadata facet update failed: {e}")
+                return 0
+        return 0
+
+    def reset(self, scope: str = "vector", namespace: Optional[str] = None) -> None:
+        """
+        Drop counts (and counted chunk IDs) for a scope, optionally one namespace
+
+        Also drops the backfilled markers, so readers stop using the counts
+        until the namespace is rebuilt. Rebuild leases are kept.
+        """
+        factory = self._get_session_factory()
+        if factory is None:
+            with self._lock:
+                counts = self._memory.get(scope, Counter())
+                for key in [k for k in counts if (namespace is None or k[0] == namespace) and k[1] != BACKFILLING]:
+                    del counts[key]
+                seen = self._memory_chunks.get(scope, {})
+                for chunk_id in [c for c, ns in seen.items() if namespace is None or ns == namespace]:
+                    del seen[chunk_id]
+            return
+
+        with factory() as db:
+            facets = db.query(MetadataFacet).filter(MetadataFacet.scope == scope, MetadataFacet.facet != BACKFILLING)
+            chunks = db.query(FacetedChunk).filter(FacetedChunk.scope == scope)
+            if namespace is not None:
+                facets = facets.filter(MetadataFacet.namespace == namespace)
+                chunks = chunks.filter(FacetedChunk.namespace == namespace)
+            facets.delete(synchronize_session=False)
+            chunks.delete(synchronize_session=False)
+            db.commit()
+
+    # ------------------------------------------------------------------
+    # Backfill markers
+    # ------------------------------------------------------------------
+
+    def mark_backfilled(self, scope: str, namespace: str) -> None:
+        """Record that a namespace's counts were rebuilt from the store"""
+        factory = self._get_session_factory()
+        if factory is None:
+            with self._lock:
+                self._memory.setdefault(scope, Counter())[(namespace, BACKFILLED, "")] = 1
+            return
+
+        with factory() as db:
+            updated = db.query(MetadataFacet).filter_by(
+                scope=scope, namespace=namespace, facet=BACKFILLED, value=""
+            ).update({MetadataFacet.count: 1, MetadataFacet.updated_at: datetime.utcnow()})
+            if not updated:
+                db.add(MetadataFacet(scope=scope, namespace=namespace, facet=BACKFILLED, value="", count=1))
+            db.commit()
+
+    def backfilled_namespaces(self, scope: str = "vector") -> Set[str]:
+        """Namespaces whose counts cover documents indexed before facets were maintained"""
+        if not self.enabled:
+            return set()
+        return {ns for ns, _, _, _ in self._rows(scope, facet=BACKFILLED)}
+
+    def claim_backfill(self, scope: str, namespace: str) -> bool:
+        """
+        Take the rebuild lease for a namespace
+
+        Returns:
+            False while another rebuild holds a lease younger than
+            METADATA_FACETS_BACKFILL_LEASE seconds
+        """
+        factory = self._get_session_factory()
+        if factory is None:
+            with self._lock:
+                counts = self._memory.setdefault(scope, Counter())
+                if counts[(namespace, BACKFILLING, "")] > 0:
+                    return False
+                counts[(namespace, BACKFILLING, "")] = 1
+                return True
+
+        now = datetime.utcnow()
+        with factory() as db:
+            try:
+                db.add(MetadataFacet(scope=scope, namespace=namespace, facet=BACKFILLING, value="", count=1, updated_at=now))
+                db.commit()
+                return True
+            except IntegrityError:
+                db.rollback()
+
+            # Take over a lease left behind by a worker that died mid-rebuild
+            taken = db.query(MetadataFacet).filter(
+                MetadataFacet.scope == scope,
+                MetadataFacet.namespace == namespace,
+                MetadataFacet.facet == BACKFILLING,
+                MetadataFacet.updated_at < now - timedelta(seconds=BACKFILL_LEASE_SECONDS),
+            ).update({MetadataFacet.updated_at: now}, synchronize_session=False)
+            db.commit()
+            return bool(taken)
+
+    def release_backfill(self, scope: str, namespace: str) -> None:
+        """Give up the rebuild lease taken by claim_backfill"""
+        factory = self._get_session_factory()
+        if factory is None:
+            with self._lock:
+                self._memory.get(scope, Counter()).pop((namespace, BACKFILLING, ""), None)
+            return
+
+        with factory() as db:
+            db.query(MetadataFacet).filter_by(
+                scope=scope, namespace=namespace, facet=BACKFILLING, value=""
+            ).delete(synchronize_session=False)
+            db.commit()
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def _rows(self, scope: str, namespace: Optional[str] = None, facet: Optional[str] = None,
+              value: Optional[str] = None) -> List[Tuple[str, str, str, int]]:
+        factory = self._get_session_factory()
+        if factory is None:
+            with self._lock:
+                counts = list(self._memory.get(scope, Counter()).items())
+            return [
+                (ns, f, v, count) for (ns, f, v), count in counts
+                if count > 0
+                and (namespace is None or ns == namespace)
+                and (facet is None or f == facet)
+                and (value is None or v == value)
+            ]
+
+        with factory() as db:
+            query = db.query(
+                MetadataFacet.namespace, MetadataFacet.facet, MetadataFacet.value, MetadataFacet.count
+            ).filter(MetadataFacet.scope == scope, MetadataFacet.count > 0)
+            if namespace is not None:
+                query = query.filter(MetadataFacet.namespace == namespace)
+            if facet is not None:
+                query = query.filter(MetadataFacet.facet == facet)
+            if value is not None:
+                query = query.filter(MetadataFacet.value == value)
+            return [tuple(row) for row in query.all()]
+
+    def get_facets(self, scope: str = "vector", namespace: Optional[str] = None,
+                   namespaces: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Exact counts for a scope, summed over namespaces unless one is given.
+
+        Args:
+            scope: Facet scope
+            namespace: Single namespace to read
+            namespaces: Namespaces to sum over when no single one is given
+                (default: every namespace)
+
+        Returns:
+            {"total", "namespaces", "categories", "sources", "dates"}; category
+            and source counts sorted descending, dates ascending
+        """
+        result = {"total": 0, "namespaces": {}, "categories": Counter(), "sources": Counter(), "dates": Counter()}
+        if not self.enabled:
+            return {**result, "categories": {}, "sources": {}, "dates": {}}
+
+        allowed = set(namespaces) if namespaces is not None and namespace is None else None
+        for ns, facet, value, count in self._rows(scope, namespace):
+            if allowed is not None and ns not in allowed:
+                continue
+            if facet == "total":
+                result["total"] += count
+                result["namespaces"][ns] = result["namespaces"].get(ns, 0) + count
+            elif facet == "category":
+                result["categories"][value] += count
+            elif facet == "source":
+                result["sources"][value] += count
+            elif facet == "date":
+                result["dates"][value] += count
+
+        result["categories"] = dict(result["categories"].most_common())
+        result["sources"] = dict(result["sources"].most_common())
+        result["dates"] = dict(sorted(result["dates"].items()))
+        return result
+
+    def namespace_counts(self, facet: str, value: str, scope: str = "vector") -> Dict[str, int]:
+        """Per-namespace count of documents with facet == value, largest first"""
+        if not self.enabled:
+            return {}
+        counts = Counter()
+        for ns, _, _, count in self._rows(scope, facet=facet, value=value):
+            counts[ns] += count
+        return dict(counts.most_common())
+
+
+_facet_store: Optional[FacetStore] = None
+
+
+def get_facet_store() -> FacetStore:
+    """Get the global facet store"""
+    global _facet_store
+    if _facet_store is None:
+        _facet_store = FacetStore()
+    return _facet_store
@@ -9,11 +9,15 @@ import hashlib
 from functools import lru_cache
 import time
 
+from .metadata_facets import get_facet_store
+
 
 class MetadataManager:
     """Production-ready metadata manager with caching, batch operations, and cross-backend support"""
 
-    def __init__(self, vector_store, redis_client=None, cache_ttl: int = 3600):
+    NAMESPACES = ["kenya_law", "kenya_news", "kenya_parliament", "historical", "global_trends"]
+
+    def __init__(self, vector_store, redis_client=None, cache_ttl: int = 3600, facet_store=None):
         """
         Initialize metadata manager
 
@@ -21,10 +25,12 @@ class MetadataManager:
             vector_store: VectorStore instance
             redis_client: Optional Redis client for caching
             cache_ttl: Cache TTL in seconds (default: 1 hour)
+            facet_store: Materialized facet counts (default: global FacetStore)
         """
         self.vector_store = vector_store
         self.redis_client = redis_client
         self.cache_ttl = cache_ttl
+        self.facet_store = facet_store or get_facet_store()
 
         # Cache keys
         self.CACHE_CATEGORIES = "metadata:categories"
@@ -78,6 +84,60 @@ class MetadataManager:
         except Exception as e:
             logger.warning(f"Cache invalidation error: {e}")
 
+    def _get_facets(self, namespace: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Materialized facet counts, or None until every namespace read has been
+        backfilled (counts recorded incrementally miss older documents)
+        """
+        if not self.facet_store:
+            return None
+        namespaces = [namespace] if namespace else self.NAMESPACES
+        try:
+            if not set(namespaces) <= self.facet_store.backfilled_namespaces(scope="vector"):
+                return None
+            # Only the corpus namespaces that were backfilled (not agent memory)
+            return self.facet_store.get_facets(scope="vector", namespace=namespace, namespaces=namespaces)
+        except Exception as e:
+            logger.warning(f"Facet read error: {e}")
+            return None
+
+    def _filter_by_field(self, field: str, value: str, limit: int, namespace: Optional[str], facet: str) -> List[Dict]:
+        """
+        Documents whose payload `field` equals `value`
+
+        Facet counts route the lookup to namespaces that hold the value;
+        payload-indexed scrolls fetch the documents, falling back to an
+        empty-text query on backends without one.
+        """
+        namespaces = [namespace] if namespace else self.NAMESPACES
+        if not namespace and self.facet_store:
+            try:
+                counts = self.facet_store.namespace_counts(facet, value)
+                # Values missing from the facets (e.g. indexed before they were
+                # maintained) still search every namespace
+                if counts:
+                    namespaces = list(counts)
+            except Exception as e:
+                logger.warning(f"Facet read error: {e}")
+
+        all_results = []
+        for ns in namespaces:
+            remaining = limit - len(all_results)
+            page = self.vector_store.scroll_documents(filter={field: value}, limit=remaining, namespace=ns)
+            if page is not None:
+                results = page[0]
+            else:
+                results = self.vector_store.query(
+                    query_text="",  # Empty query for metadata-only search
+                    n_results=limit,
+                    filter={field: value},
+                    namespace=ns
+                )
+            all_results.extend(results)
+            if len(all_results) >= limit:
+                break
+        return all_results
+
     def filter_by_category(self, category: str, limit: int = 100, namespace: Optional[str] = None) -> List[Dict]:
         """
         Get documents by category with namespace support
@@ -100,20 +160,7 @@ class MetadataManager:
             return cached_result
 
         try:
-            # Use vector store query with filter across all namespaces if none specified
-            namespaces = [namespace] if namespace else ["kenya_law", "kenya_news", "kenya_parliament", "historical", "global_trends"]
-
-            all_results = []
-            for ns in namespaces:
-                results = self.vector_store.query(
-                    query_text="",  # Empty query for metadata-only search
-                    n_results=limit,
-                    filter={"category": category},
-                    namespace=ns
-                )
-                all_results.extend(results)
-                if len(all_results) >= limit:
-                    break
+            all_results = self._filter_by_field("category", category, limit, namespace, facet="category")
 
             # Sort by relevance (if scores available) and limit
             if all_results and "distance" in all_results[0]:
@@ -150,20 +197,7 @@ class MetadataManager:
             return cached_result
 
         try:
-            # Use vector store query with filter across all namespaces if none specified
-            namespaces = [namespace] if namespace else ["kenya_law", "kenya_news", "kenya_parliament", "historical", "global_trends"]
-
-            all_results = []
-            for ns in namespaces:
-                results = self.vector_store.query(
-                    query_text="",  # Empty query for metadata-only search
-                    n_results=limit,
-                    filter={"source_name": source_name},
-                    namespace=ns
-                )
-                all_results.extend(results)
-                if len(all_results) >= limit:
-                    break
+            all_results = self._filter_by_field("source_name", source_name, limit, namespace, facet="source")
 
             # Sort by relevance and limit
             if all_results and "distance" in all_results[0]:
@@ -217,7 +251,7 @@ class MetadataManager:
 
         try:
             # Get sample documents from all relevant namespaces
-            namespaces = [namespace] if namespace else ["kenya_law", "kenya_news", "kenya_parliament", "historical", "global_trends"]
+            namespaces = [namespace] if namespace else self.NAMESPACES
 
             all_docs = []
             for ns in namespaces:
@@ -292,6 +326,10 @@ class MetadataManager:
         Returns:
             Sorted list of unique categories
         """
+        facets = self._get_facets(namespace)
+        if facets:
+            return sorted(c for c in facets["categories"] if c and c != "Unknown")
+
         cache_key = self._get_cache_key("categories", namespace=namespace)
         if not force_refresh:
             cached_result = self._get_cached(cache_key)
@@ -301,7 +339,7 @@ class MetadataManager:
 
         try:
             categories = set()
-            namespaces = [namespace] if namespace else ["kenya_law", "kenya_news", "kenya_parliament", "historical", "global_trends"]
+            namespaces = [namespace] if namespace else self.NAMESPACES
 
             for ns in namespaces:
                 try:
@@ -334,6 +372,10 @@ class MetadataManager:
         Returns:
             Sorted list of unique sources
         """
+        facets = self._get_facets(namespace)
+        if facets:
+            return sorted(src for src in facets["sources"] if src and src != "Unknown")
+
         cache_key = self._get_cache_key("sources", namespace=namespace)
         if not force_refresh:
             cached_result = self._get_cached(cache_key)
@@ -343,7 +385,7 @@ class MetadataManager:
 
         try:
             sources = set()
-            namespaces = [namespace] if namespace else ["kenya_law", "kenya_news", "kenya_parliament", "historical", "global_trends"]
+            namespaces = [namespace] if namespace else self.NAMESPACES
 
             for ns in namespaces:
                 try:
@@ -387,7 +429,7 @@ class MetadataManager:
 
         try:
             # Try different namespaces if none specified
-            namespaces = [namespace] if namespace else ["kenya_law", "kenya_news", "kenya_parliament", "historical", "global_trends"]
+            namespaces = [namespace] if namespace else self.NAMESPACES
 
             for ns in namespaces:
                 try:
@@ -569,6 +611,11 @@ class MetadataManager:
         Returns:
             Statistics dictionary
         """
+        exact = self.get_exact_statistics(namespace)
+        if exact:
+            return exact
+
+        # No materialized counts yet: estimate from sampled documents
         cache_key = self._get_cache_key("stats", namespace=namespace)
         cached_result = self._get_cached(cache_key)
         if cached_result:
@@ -584,10 +631,11 @@ class MetadataManager:
                 "namespaces": {},
                 "backend": self.vector_store.backend,
                 "cached": self.redis_client is not None,
+                "exact": False,
                 "generated_at": datetime.utcnow().isoformat()
             }
 
-            namespaces = [namespace] if namespace else ["kenya_law", "kenya_news", "kenya_parliament", "historical", "global_trends"]
+            namespaces = [namespace] if namespace else self.NAMESPACES
 
             all_dates = []
 
@@ -642,6 +690,112 @@ class MetadataManager:
             logger.error(f"Error generating statistics: {e}")
             return {"error": str(e), "generated_at": datetime.utcnow().isoformat()}
 
+    def get_exact_statistics(self, namespace: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Statistics from materialized facet counts
+
+        Args:
+            namespace: Optional namespace filter
+
+        Returns:
+            Same shape as get_statistics (plus documents_by_month), or None
+            until the namespaces have been backfilled. "exact" is False when
+            the counts are kept in process memory (no facet database).
+        """
+        facets = self._get_facets(namespace)
+        if not facets:
+            return None
+
+        dates = list(facets["dates"])
+        months: Dict[str, int] = {}
+        for day, count in facets["dates"].items():
+            months[day[:7]] = months.get(day[:7], 0) + count
+
+        return {
+            "total_documents": facets["total"],
+            "categories": facets["categories"],
+            "sources": facets["sources"],
+            "date_range": {"oldest": dates[0] if dates else None, "newest": dates[-1] if dates else None},
+            "documents_by_month": months,
+            "namespaces": facets["namespaces"],
+            "backend": self.vector_store.backend,
+            "cached": False,
+            "exact": self.facet_store.persistent,
+            "generated_at": datetime.utcnow().isoformat()
+        }
+
+    def rebuild_facets(self, namespaces: Optional[List[str]] = None, page_size: int = 1000) -> Dict[str, int]:
+        """
+        Recount vector-store facets by scrolling every document
+
+        Backfills documents indexed before facets were maintained
+        incrementally, or repairs counts after collections were changed
+        outside add_documents. A namespace rebuilt to the end is marked
+        backfilled; one being rebuilt by another worker is skipped.
+
+        Args:
+            namespaces: Namespaces to rebuild (default: all)
+            page_size: Documents per scroll page
+
+        Returns:
+            Documents counted per namespace
+        """
+        counted = {}
+        for ns in namespaces or self.NAMESPACES:
+            page = self.vector_store.scroll_documents(limit=page_size, namespace=ns)
+            if page is None:
+                logger.warning(f"Backend {self.vector_store.backend} cannot scroll, facets for {ns} not rebuilt")
+                continue
+
+            if not self.facet_store.claim_backfill("vector", ns):
+                logger.info(f"Metadata facets for {ns} are being rebuilt by another worker, skipping")
+                continue
+
+            try:
+                self.facet_store.reset(scope="vector", namespace=ns)
+                counted[ns] = 0
+                while True:
+                    docs, next_offset = page
+                    chunks = [{**doc.get("metadata", {}), "chunk_id": doc.get("id")} for doc in docs]
+                    counted[ns] += self.facet_store.record_chunks(chunks, namespace=ns)
+                    if next_offset is None or not docs:
+                        self.facet_store.mark_backfilled("vector", ns)
+                        logger.info(f"Rebuilt metadata facets for {ns}: {counted[ns]} documents")
+                        break
+                    page = self.vector_store.scroll_documents(limit=page_size, namespace=ns, offset=next_offset)
+                    if page is None:
+                        logger.warning(f"Scroll of {ns} stopped after {counted[ns]} documents, facets not backfilled")
+                        break
+            finally:
+                self.facet_store.release_backfill("vector", ns)
+
+        self._invalidate_cache()
+        return counted
+
+    def backfill_facets(self, page_size: int = 1000) -> Dict[str, int]:
+        """
+        Rebuild facets for namespaces that have never been backfilled
+
+        Run at API startup. Until a namespace is backfilled its statistics and
+        listings are sampled from the vector store. Skipped without a facet
+        database, where every process would rescan the whole store.
+
+        Returns:
+            Documents counted per rebuilt namespace
+        """
+        try:
+            if not self.facet_store or not self.facet_store.enabled or not self.facet_store.persistent:
+                return {}
+            done = self.facet_store.backfilled_namespaces(scope="vector")
+            missing = [ns for ns in self.NAMESPACES if ns not in done]
+            if not missing:
+                return {}
+            logger.info(f"Backfilling metadata facets for {', '.join(missing)}")
+            return self.rebuild_facets(missing, page_size=page_size)
+        except Exception as e:
+            logger.error(f"Metadata facet backfill failed: {e}")
+            return {}
+
     def batch_get_citations(self, chunk_ids: List[str], namespace: Optional[str] = None) -> Dict[str, Optional[Dict]]:
         """
         Batch get citations for multiple chunk IDs
@@ -678,7 +832,7 @@ class MetadataManager:
             logger.debug(f"Batch citation lookup: {cache_hits} hits, {cache_misses} misses")
 
             # Try different namespaces
-            namespaces = [namespace] if namespace else ["kenya_law", "kenya_news", "kenya_parliament", "historical", "global_trends"]
+            namespaces = [namespace] if namespace else self.NAMESPACES
 
             for ns in namespaces:
                 if not missing_ids:  # All found
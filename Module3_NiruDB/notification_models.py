@@ -28,6 +28,7 @@ class NotificationSubscription(Base):
     # Index for faster lookups
     __table_args__ = (
         Index('idx_phone_active', 'phone_number', 'is_active'),
+        Index('idx_active_schedule', 'is_active', 'schedule_type'),
     )
 
 
@@ -82,6 +83,9 @@ def create_database_engine(database_url: str):
 def create_tables(engine):
     """Create all tables"""
     Base.metadata.create_all(engine)
+    # create_all skips indexes added to tables that already exist
+    for index in NotificationSubscription.__table__.indexes:
+        index.create(engine, checkfirst=True)
 
 
 def get_db_session(engine):
@@ -25,6 +25,7 @@ load_dotenv()
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from Module3_NiruDB.vector_store import VectorStore
+from Module3_NiruDB.embedding_store import EmbeddingStore
 from Module4_NiruAPI.config_manager import ConfigManager
 
 # Batch configuration
@@ -66,6 +67,9 @@ def stream_chunks_from_file(jsonl_file: Path, batch_size: int = DEFAULT_BATCH_SI
     """
     Stream chunks from JSONL file in batches (memory efficient)
     
+    Chunks without an inline embedding get the one committed to the file's
+    embedding store by the generate_embeddings job, if any.
+    
     Args:
         jsonl_file: Path to JSONL file
         batch_size: Number of chunks per batch
@@ -73,24 +77,33 @@ def stream_chunks_from_file(jsonl_file: Path, batch_size: int = DEFAULT_BATCH_SI
     Yields:
         List of chunks (batch)
     """
+    store = EmbeddingStore.for_file(jsonl_file, readonly=True)
     batch = []
-    with open(jsonl_file, "r", encoding="utf-8") as f:
-        for line in f:
-            if line.strip():
-                try:
-                    chunk = json.loads(line)
-                    batch.append(chunk)
-                    
-                    if len(batch) >= batch_size:
-                        yield batch
-                        batch = []
-                except json.JSONDecodeError as e:
-                    logger.warning(f"Skipping invalid JSON line: {e}")
-                    continue
-    
-    # Yield remaining chunks
-    if batch:
-        yield batch
+    try:
+        with open(jsonl_file, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    try:
+                        chunk = json.loads(line)
+                        batch.append(chunk)
+                        
+                        if len(batch) >= batch_size:
+                            if store:
+                                store.attach(batch)
+                            yield batch
+                            batch = []
+                    except json.JSONDecodeError as e:
+                        logger.warning(f"Skipping invalid JSON line: {e}")
+                        continue
+        
+        # Yield remaining chunks
+        if batch:
+            if store:
+                store.attach(batch)
+            yield batch
+    finally:
+        if store:
+            store.close()
 
 
 def add_batch_with_retry(
@@ -0,0 +1,481 @@
+"""
+Request Tracing - In-process spans, per-request waterfalls and stage histograms
+
+One span model for the whole query path (auth, caches, embedding, vector
+backends, reranking, context packing, generation, agent nodes). Spans attach
+to the request trace in the current context; finished traces go to a ring
+buffer and every span's duration feeds a streaming histogram for its stage,
+so latency can be inspected without an external collector.
+
+Usage:
+    from Module3_NiruDB.request_tracing import span, traced
+
+    with span("embed", model="minilm"):
+        vector = model.encode(text)
+
+    @traced("generate")
+    def _generate_answer(...):
+        ...
+
+Threads do not inherit context variables; wrap work submitted to an executor
+with `bind_context` so its spans land in the calling request's trace.
+"""
+import asyncio
+import contextvars
+import functools
+import itertools
+import math
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+TRACING_ENABLED = os.getenv("REQUEST_TRACING_ENABLED", "true").lower() == "true"
+TRACE_BUFFER_SIZE = int(os.getenv("REQUEST_TRACE_BUFFER_SIZE", "500"))
+MAX_SPANS_PER_TRACE = int(os.getenv("REQUEST_TRACE_MAX_SPANS", "256"))
+MAX_STAGE_HISTOGRAMS = int(os.getenv("REQUEST_TRACE_MAX_STAGES", "512"))
+
+# Histogram for new stage names once MAX_STAGE_HISTOGRAMS is reached
+OVERFLOW_STAGE = "(other)"
+
+_span_ids = itertools.count(1)
+
+
+# =============================================================================
+# SPANS AND TRACES
+# =============================================================================
+
+@dataclass
+class Span:
+    """A timed stage within a request"""
+
+    name: str
+    span_id: int
+    parent_id: Optional[int] = None
+    start: float = field(default_factory=time.perf_counter)
+    end: Optional[float] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end if self.end is not None else time.perf_counter()
+        return (end - self.start) * 1000
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+
+@dataclass
+class RequestTrace:
+    """All spans recorded for one request"""
+
+    name: str
+    trace_id: str = field(default_factory=lambda: uuid.uuid4().hex[:16])
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    started_at: datetime = field(default_factory=datetime.utcnow)
+    start: float = field(default_factory=time.perf_counter)
+    end: Optional[float] = None
+    spans: List[Span] = field(default_factory=list)
+    dropped_spans: int = 0
+    status: str = "ok"
+    # Histogram key for the request (default: name); e.g. the route template
+    # so per-ID paths share one histogram
+    stage: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end if self.end is not None else time.perf_counter()
+        return (end - self.start) * 1000
+
+    def add_span(self, span: Span) -> None:
+        if len(self.spans) >= MAX_SPANS_PER_TRACE:
+            self.dropped_spans += 1
+            return
+        self.spans.append(span)
+
+    def stage_totals(self) -> Dict[str, float]:
+        """Total milliseconds per span name (overlapping spans are summed)"""
+        totals: Dict[str, float] = {}
+        for s in self.spans:
+            totals[s.name] = totals.get(s.name, 0.0) + s.duration_ms
+        return {name: round(ms, 3) for name, ms in totals.items()}
+
+    def to_summary(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "span_count": len(self.spans),
+            "attributes": self.attributes,
+            "stages_ms": self.stage_totals(),
+        }
+
+    def to_waterfall(self) -> Dict[str, Any]:
+        """Spans ordered by start with offsets and nesting depth"""
+        depth: Dict[int, int] = {}
+        rows = []
+        for s in sorted(self.spans, key=lambda s: s.start):
+            level = depth.get(s.parent_id, -1) + 1 if s.parent_id is not None else 0
+            depth[s.span_id] = level
+            rows.append({
+                "span_id": s.span_id,
+                "parent_id": s.parent_id,
+                "name": s.name,
+                "depth": level,
+                "offset_ms": round((s.start - self.start) * 1000, 3),
+                "duration_ms": round(s.duration_ms, 3),
+                "attributes": s.attributes,
+                "error": s.error,
+            })
+        summary = self.to_summary()
+        summary["dropped_spans"] = self.dropped_spans
+        summary["spans"] = rows
+        return summary
+
+
+# =============================================================================
+# STREAMING HISTOGRAM
+# =============================================================================
+
+class LatencyHistogram:
+    """
+    Streaming latency histogram with log-spaced buckets (HDR-style).
+
+    Values are bucketed at ~1% relative precision from 1µs up, so memory is
+    bounded by the dynamic range rather than the number of samples.
+    """
+
+    _MIN_MS = 0.001
+    _GROWTH = 1.02
+    _LOG_GROWTH = math.log(_GROWTH)
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def record(self, value_ms: float) -> None:
+        value_ms = max(value_ms, self._MIN_MS)
+        idx = int(math.log(value_ms / self._MIN_MS) / self._LOG_GROWTH)
+        self.buckets[idx] = self.buckets.get(idx, 0) + 1
+        self.count += 1
+        self.total += value_ms
+        self.min = min(self.min, value_ms)
+        self.max = max(self.max, value_ms)
+
+    def _bucket_value(self, idx: int) -> float:
+        # Geometric midpoint of the bucket
+        return self._MIN_MS * self._GROWTH ** (idx + 0.5)
+
+    def percentile(self, p: float) -> float:
+        if not self.count:
+            return 0.0
+        target = max(1, math.ceil(self.count * p / 100))
+        seen = 0
+        for idx in sorted(self.buckets):
+            seen += self.buckets[idx]
+            if seen >= target:
+                return min(max(self._bucket_value(idx), self.min), self.max)
+        return self.max
+
+    def to_dict(self, include_buckets: bool = False) -> Dict[str, Any]:
+        result = {
+            "count": self.count,
+            "mean": round(self.total / self.count, 3) if self.count else 0.0,
+            "min": round(self.min, 3) if self.count else 0.0,
+            "p50": round(self.percentile(50), 3),
+            "p90": round(self.percentile(90), 3),
+            "p95": round(self.percentile(95), 3),
+            "p99": round(self.percentile(99), 3),
+            "max": round(self.max, 3),
+        }
+        if include_buckets:
+            result["buckets"] = [
+                {"le_ms": round(self._MIN_MS * self._GROWTH ** (idx + 1), 3), "count": n}
+                for idx, n in sorted(self.buckets.items())
+            ]
+        return result
+
+
+# =============================================================================
+# STORE
+# =============================================================================
+
+class TraceStore:
+    """Ring buffer of finished traces plus per-stage histograms"""
+
+    def __init__(self, capacity: int = TRACE_BUFFER_SIZE):
+        self._traces: deque = deque(maxlen=capacity)
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+        self.started_at = datetime.utcnow()
+
+    def record_stage(self, name: str, duration_ms: float) -> None:
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                if len(self._histograms) >= MAX_STAGE_HISTOGRAMS:
+                    # Bounded: stage names with unbounded cardinality share one histogram
+                    name = OVERFLOW_STAGE
+                histogram = self._histograms.get(name)
+                if histogram is None:
+                    histogram = self._histograms[name] = LatencyHistogram()
+            histogram.record(duration_ms)
+
+    def add_trace(self, trace: RequestTrace) -> None:
+        with self._lock:
+            self._traces.append(trace)
+
+    def get_trace(self, trace_id: str) -> Optional[RequestTrace]:
+        with self._lock:
+            for trace in reversed(self._traces):
+                if trace.trace_id == trace_id:
+                    return trace
+        return None
+
+    def recent(
+        self,
+        limit: int = 50,
+        name_prefix: Optional[str] = None,
+        min_duration_ms: float = 0.0,
+    ) -> List[RequestTrace]:
+        """Most recent traces first, optionally filtered"""
+        with self._lock:
+            traces = list(self._traces)
+        result = []
+        for trace in reversed(traces):
+            if name_prefix and not trace.name.startswith(name_prefix):
+                continue
+            if trace.duration_ms < min_duration_ms:
+                continue
+            result.append(trace)
+            if len(result) >= limit:
+                break
+        return result
+
+    def stage_summary(self, include_buckets: bool = False) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                name: histogram.to_dict(include_buckets)
+                for name, histogram in sorted(self._histograms.items())
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._traces.clear()
+            self._histograms.clear()
+            self.started_at = datetime.utcnow()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": TRACING_ENABLED,
+                "traces_buffered": len(self._traces),
+                "capacity": self._traces.maxlen,
+                "stages": len(self._histograms),
+                "since": self.started_at.isoformat(),
+            }
+
+
+_store: Optional[TraceStore] = None
+_store_lock = threading.Lock()
+
+
+def get_trace_store() -> TraceStore:
+    """Get the global trace store"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = TraceStore()
+    return _store
+
+
+# =============================================================================
+# INSTRUMENTATION API
+# =============================================================================
+
+_current_trace: contextvars.ContextVar[Optional[RequestTrace]] = contextvars.ContextVar(
+    "amaniquery_trace", default=None
+)
+_current_span: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar(
+    "amaniquery_span", default=None
+)
+
+
+def current_trace() -> Optional[RequestTrace]:
+    """The trace for the request being handled in this context, if any"""
+    return _current_trace.get()
+
+
+@contextmanager
+def trace_request(name: str, trace_id: Optional[str] = None, **attributes) -> Iterator[Optional[RequestTrace]]:
+    """
+    Trace a request: spans opened inside attach to it, and it is stored on exit.
+
+    Args:
+        name: Trace name (e.g. "POST /api/v1/query")
+        trace_id: Optional ID (e.g. from an incoming X-Request-ID header)
+        **attributes: Extra attributes shown with the trace
+    """
+    if not TRACING_ENABLED:
+        yield None
+        return
+
+    trace = RequestTrace(name=name, attributes=attributes)
+    if trace_id:
+        trace.trace_id = trace_id
+    trace_token = _current_trace.set(trace)
+    span_token = _current_span.set(None)
+    try:
+        yield trace
+    except BaseException as e:
+        trace.status = f"error: {type(e).__name__}"
+        raise
+    finally:
+        trace.end = time.perf_counter()
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+        store = get_trace_store()
+        store.record_stage(f"request:{trace.stage or name}", trace.duration_ms)
+        store.add_trace(trace)
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Span]:
+    """
+    Time a stage. Always feeds the stage histogram; attaches to the current
+    request trace (nested under the current span) when there is one.
+    """
+    s = Span(name=name, span_id=next(_span_ids), parent_id=_current_span.get(), attributes=attributes)
+    if not TRACING_ENABLED:
+        yield s
+        return
+
+    trace = _current_trace.get()
+    token = _current_span.set(s.span_id)
+    try:
+        yield s
+    except BaseException as e:
+        s.error = f"{type(e).__name__}: {e}"[:200]
+        raise
+    finally:
+        s.end = time.perf_counter()
+        _current_span.reset(token)
+        get_trace_store().record_stage(name, s.duration_ms)
+        if trace is not None:
+            trace.add_span(s)
+
+
+def record_span(name: str, start: float, end: Optional[float] = None, **attributes) -> None:
+    """
+    Record an already-measured stage (perf_counter timestamps).
+
+    For code that cannot hold a `span` open, such as async generators.
+    """
+    if not TRACING_ENABLED:
+        return
+    s = Span(
+        name=name,
+        span_id=next(_span_ids),
+        parent_id=_current_span.get(),
+        start=start,
+        end=end if end is not None else time.perf_counter(),
+        attributes=attributes,
+    )
+    get_trace_store().record_stage(name, s.duration_ms)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add_span(s)
+
+
+def traced(name: str) -> Callable:
+    """Decorator form of `span` for sync and async functions"""
+    def decorator(fn: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def bind_context(fn: Callable, *args, **kwargs) -> Callable[[], Any]:
+    """
+    Bind `fn` to a copy of the current context, for executors.
+
+    Usage:
+        loop.run_in_executor(None, bind_context(self._retrieve, query))
+    """
+    return functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+# =============================================================================
+# ASGI MIDDLEWARE
+# =============================================================================
+
+class TracingMiddleware:
+    """
+    ASGI middleware that opens a request trace for every HTTP request.
+
+    Add it last so it wraps the other middleware (auth, rate limiting) and
+    their time shows up in the waterfall. The trace ID is returned in the
+    X-Trace-ID response header.
+
+    Traces are named by the raw path, but the request histogram is keyed by
+    the matched route template ("GET /api/v1/chat/sessions/{session_id}");
+    requests that match no route share the "unmatched" histogram.
+    """
+
+    def __init__(self, app, exclude_prefixes: Optional[List[str]] = None):
+        self.app = app
+        self.exclude_prefixes = tuple(exclude_prefixes or ["/health", "/docs", "/openapi.json", "/api/admin/traces"])
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not TRACING_ENABLED or scope.get("path", "").startswith(self.exclude_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for key, value in scope.get("headers", []):
+            if key == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+
+        name = f"{scope.get('method', 'GET')} {scope.get('path', '')}"
+        with trace_request(name, trace_id=request_id) as trace:
+            async def send_with_trace_id(message):
+                if message["type"] == "http.response.start":
+                    trace.attributes["status_code"] = message.get("status")
+                    trace.attributes["headers_sent_ms"] = round(trace.duration_ms, 3)
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-trace-id", trace.trace_id.encode()))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_trace_id)
+            finally:
+                # The router stores the matched route in the scope
+                route = getattr(scope.get("route"), "path", None)
+                trace.stage = f"{scope.get('method', 'GET')} {route}" if route else "unmatched"
+            if trace.attributes.get("status_code", 200) >= 500:
+                trace.status = "error"
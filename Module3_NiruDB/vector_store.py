@@ -22,6 +22,10 @@ import numpy as np
 from dataclasses import dataclass
 from typing import Tuple
 
+from .request_tracing import span, bind_context
+from .generation_cache import get_generation_cache
+from .metadata_facets import get_facet_store
+
 # Load environment variables
 load_dotenv()
 
@@ -42,6 +46,15 @@ class VectorStore:
     _query_cache = {}
     _connection_pools = {}
     _cache_stats = {"hits": 0, "misses": 0, "total_queries": 0}
+    _payload_indexed = set()
+
+    # Payload fields filtered on by metadata listings (keyword indexes in QDrant)
+    PAYLOAD_INDEX_FIELDS = ("category", "source_name", "namespace")
+
+    # Namespaces holding per-user data (agent episodic memory). They may share
+    # the corpus index (Upstash), so searches only return them when asked for
+    # by namespace, and they are left out of the metadata facet counts.
+    PRIVATE_NAMESPACES = frozenset({"agent_episodes"})
     
     def __init__(
         self,
@@ -411,6 +424,23 @@ class VectorStore:
                 collection_name=self.collection_name,
                 vectors_config=models.VectorParams(size=384, distance=models.Distance.COSINE)
             )
+        self._ensure_payload_indexes(self.collection_name)
+
+    def _ensure_payload_indexes(self, collection_name: str, client=None):
+        """Create keyword payload indexes so filtered scrolls skip full scans"""
+        if collection_name in self._payload_indexed:
+            return
+        client = client or self.client
+        for field in self.PAYLOAD_INDEX_FIELDS:
+            try:
+                client.create_payload_index(
+                    collection_name=collection_name,
+                    field_name=field,
+                    field_schema=models.PayloadSchemaType.KEYWORD,
+                )
+            except Exception as e:
+                logger.debug(f"Payload index {field} on {collection_name}: {e}")
+        self._payload_indexed.add(collection_name)
     
     def _init_chromadb(self, persist_directory):
         """Initialize ChromaDB"""
@@ -487,6 +517,9 @@ class VectorStore:
             namespace: Optional namespace for filtering
             batch_size: Number of vectors per batch (Upstash limit is ~1000)
             max_retries: Maximum retry attempts per batch
+        
+        Returns:
+            written_ids: IDs of the chunks actually upserted
         """
         import time
         
@@ -497,6 +530,7 @@ class VectorStore:
         effective_batch_size = min(batch_size, 100)
         total_added = 0
         failed_batches = []
+        written_ids = []
         
         for i in range(0, len(chunks), effective_batch_size):
             batch_chunks = chunks[i:i + effective_batch_size]
@@ -544,6 +578,7 @@ class VectorStore:
                 try:
                     client.upsert(vectors=vectors)
                     total_added += len(vectors)
+                    written_ids.extend(vector["id"] for vector in vectors)
                     logger.info(f"Added batch {batch_num} ({len(vectors)} chunks) to Upstash")
                     break
                 except Exception as e:
@@ -567,6 +602,8 @@ class VectorStore:
         
         if failed_batches:
             logger.warning(f"{len(failed_batches)} batches failed to upload to Upstash")
+        
+        return written_ids
     
     def _add_qdrant(self, chunks: List[Dict], batch_size: int, client=None, max_retries: int = 3):
         """Add to QDrant with robust batch handling and retry logic
@@ -576,6 +613,9 @@ class VectorStore:
             batch_size: Number of chunks per batch
             client: QDrant client (default: self.client)
             max_retries: Maximum retry attempts per batch
+        
+        Returns:
+            written_ids: IDs of the chunks actually upserted
         """
         import time
         
@@ -588,6 +628,7 @@ class VectorStore:
         # Process in batches
         total_added = 0
         failed_batches = []
+        written_ids = []
         
         for i in range(0, len(chunks), effective_batch_size):
             batch_chunks = chunks[i:i + effective_batch_size]
@@ -645,6 +686,7 @@ class VectorStore:
                         wait=True  # Wait for operation to complete
                     )
                     total_added += len(points)
+                    written_ids.extend(point.payload["chunk_id"] for point in points)
                     logger.info(f"Added batch {batch_num} ({len(points)} chunks) to QDrant")
                     break  # Success, exit retry loop
                     
@@ -672,6 +714,8 @@ class VectorStore:
             # Optionally raise if too many failures
             if len(failed_batches) > len(chunks) // effective_batch_size // 2:
                 raise Exception(f"Too many batch failures: {len(failed_batches)} batches failed")
+        
+        return written_ids
     
     def _add_chromadb(self, chunks: List[Dict], batch_size: int, max_retries: int = 3):
         """Add to ChromaDB with batching and retry logic
@@ -680,12 +724,16 @@ class VectorStore:
             chunks: List of chunks to add
             batch_size: Number of chunks per batch
             max_retries: Maximum retry attempts per batch
+        
+        Returns:
+            written_ids: IDs of the chunks actually added or upserted
         """
         import time
         
         effective_batch_size = min(batch_size, 100)
         total_added = 0
         failed_batches = []
+        written_ids = []
         
         for i in range(0, len(chunks), effective_batch_size):
             batch = chunks[i:i + effective_batch_size]
@@ -740,6 +788,7 @@ class VectorStore:
                             metadatas=metadatas
                         )
                         total_added += len(ids)
+                        written_ids.extend(ids)
                         logger.info(f"Added batch {batch_num} ({len(ids)} chunks) to ChromaDB")
                         break
                     except Exception as e:
@@ -754,6 +803,7 @@ class VectorStore:
                                     metadatas=metadatas
                                 )
                                 total_added += len(ids)
+                                written_ids.extend(ids)
                                 logger.info(f"Upserted batch {batch_num} ({len(ids)} chunks) to ChromaDB")
                                 break
                             except Exception as upsert_error:
@@ -787,6 +837,8 @@ class VectorStore:
         
         if failed_batches:
             logger.warning(f"{len(failed_batches)} batches failed to upload to ChromaDB")
+        
+        return written_ids
     
     def add_documents(self, chunks: List[Dict], batch_size: int = 100, namespace: str = None):
         """Add documents to vector store (public method)
@@ -815,6 +867,7 @@ class VectorStore:
                             vectors_config=models.VectorParams(size=384, distance=models.Distance.COSINE)
                         )
                         logger.info(f"Created QDrant collection: {self.collection_name}")
+                    self._ensure_payload_indexes(self.collection_name)
             elif self.backend == "upstash":
                 # Namespace will be used as metadata filter during upsert/query
                 pass
@@ -824,11 +877,11 @@ class VectorStore:
         
         try:
             if self.backend == "upstash":
-                self._add_upstash(chunks, namespace=namespace)
+                written_ids = self._add_upstash(chunks, namespace=namespace)
             elif self.backend == "qdrant":
-                self._add_qdrant(chunks, batch_size)
+                written_ids = self._add_qdrant(chunks, batch_size)
             elif self.backend == "chromadb":
-                self._add_chromadb(chunks, batch_size)
+                written_ids = self._add_chromadb(chunks, batch_size)
             else:
                 logger.error(f"Unsupported backend for add_documents: {self.backend}")
                 raise ValueError(f"Unsupported backend: {self.backend}")
@@ -857,7 +910,7 @@ class VectorStore:
                         self.collection = self.chromadb_collection
                         self.collection_name = original_collection
                     
-                    self._add_chromadb(chunks, batch_size)
+                    written_ids = self._add_chromadb(chunks, batch_size)
                     
                     # Restore original backend
                     self.backend = original_backend
@@ -865,7 +918,7 @@ class VectorStore:
                     self.collection = original_collection
                     # self.collection_name will be restored in finally block
                     
-                    logger.info(f"ChromaDB fallback successfully added {len(chunks)} documents")
+                    logger.info(f"ChromaDB fallback successfully added {len(written_ids)} documents")
                 except Exception as fallback_error:
                     logger.error(f"ChromaDB fallback also failed: {fallback_error}")
                     raise fallback_error
@@ -874,6 +927,25 @@ class VectorStore:
         finally:
             # Restore original collection name
             self.collection_name = original_collection
+        
+        # Cached answers generated from re-indexed chunks are stale
+        try:
+            get_generation_cache().invalidate_chunks(chunk.get("chunk_id") for chunk in chunks)
+        except Exception as e:
+            logger.warning(f"Generation cache invalidation failed: {e}")
+
+        # Exact metadata counts for statistics and category/source listings;
+        # skipped chunks and failed batches were never stored
+        if namespace in self.PRIVATE_NAMESPACES:
+            return
+        try:
+            written = set(written_ids)
+            get_facet_store().record_chunks(
+                [chunk for chunk in chunks if str(chunk.get("chunk_id")) in written],
+                namespace=namespace
+            )
+        except Exception as e:
+            logger.warning(f"Metadata facet update failed: {e}")
     
     def index_document(self, doc_id: str, document: Dict, namespace: str = None):
         """Index document in Elasticsearch"""
@@ -1033,13 +1105,16 @@ class VectorStore:
         formatted = []
         for hit in results:
             metadata = {k: str(v) if not isinstance(v, str) else v for k, v in hit.metadata.items()}
-            formatted.append({
+            result = {
                 "id": hit.id,
                 "text": metadata.get("text", ""),
                 "score": 1.0 - (hit.score if hasattr(hit, 'score') else 0.0),
                 "source": metadata,
                 "metadata": metadata
-            })
+            }
+            if getattr(hit, "vector", None) is not None:
+                result["embedding"] = hit.vector
+            formatted.append(result)
         return formatted
     
     def _format_qdrant_results(self, query_result) -> List[Dict]:
@@ -1055,13 +1130,16 @@ class VectorStore:
         
         for point in points:
             payload = point.payload or {}
-            formatted.append({
+            result = {
                 "id": point.id,
                 "text": payload.get("text", ""),
                 "score": 1.0 - (point.score if hasattr(point, 'score') else 0.0),
                 "source": payload,
                 "metadata": payload
-            })
+            }
+            if getattr(point, "vector", None) is not None:
+                result["embedding"] = point.vector
+            formatted.append(result)
         
         return formatted
     
@@ -1074,13 +1152,16 @@ class VectorStore:
                 metadata = results["metadatas"][0][i] if results.get("metadatas") else {}
                 distance = results["distances"][0][i] if results.get("distances") else 0.0
                 
-                formatted.append({
+                result = {
                     "id": results["ids"][0][i] if results.get("ids") else str(i),
                     "text": doc_text,
                     "score": 1.0 - distance,  # Convert distance to similarity
                     "source": metadata,
                     "metadata": metadata
-                })
+                }
+                if results.get("embeddings") is not None:
+                    result["embedding"] = results["embeddings"][0][i]
+                formatted.append(result)
         
         return formatted
         try:
@@ -1203,6 +1284,74 @@ class VectorStore:
             logger.warning(f"ChromaDB get failed: {e}")
             return []
             
+    def scroll_documents(self, filter: Optional[Dict] = None, limit: int = 100, namespace: str = None,
+                         offset: Any = None) -> Optional[Tuple[List[Dict], Any]]:
+        """
+        Metadata-only page of documents matching an exact-match filter
+
+        Uses QDrant payload-indexed scroll or ChromaDB get, so no embedding is
+        computed and nothing is ranked.
+
+        Args:
+            filter: Payload field -> value to match exactly
+            limit: Page size
+            namespace: Optional namespace (collection suffix)
+            offset: Continuation token from the previous page
+
+        Returns:
+            (documents, next offset or None), or None when the active backend
+            has no filtered scroll (callers fall back to query())
+        """
+        collection_name = f"{self.collection_name}_{namespace}" if namespace else self.collection_name
+        filter = filter or {}
+
+        with span("vector.scroll", backend=self.backend):
+            try:
+                if self.backend == "qdrant":
+                    self._ensure_payload_indexes(collection_name)
+                    scroll_filter = None
+                    if filter:
+                        scroll_filter = models.Filter(must=[
+                            models.FieldCondition(key=k, match=models.MatchValue(value=str(v)))
+                            for k, v in filter.items()
+                        ])
+                    points, next_offset = self.client.scroll(
+                        collection_name=collection_name,
+                        scroll_filter=scroll_filter,
+                        limit=limit,
+                        offset=offset,
+                        with_payload=True,
+                        with_vectors=False,
+                    )
+                    formatted_results = []
+                    for point in points:
+                        metadata = {k: str(v) if not isinstance(v, str) else v for k, v in (point.payload or {}).items()}
+                        formatted_results.append({"id": metadata.get("chunk_id", str(point.id)), "text": metadata.get("text", ""), "metadata": metadata})
+                    return formatted_results, next_offset
+
+                if self.backend == "chromadb":
+                    collection = self.client.get_collection(collection_name) if namespace else self.collection
+                    where = None
+                    if len(filter) == 1:
+                        where = {k: str(v) for k, v in filter.items()}
+                    elif filter:
+                        where = {"$and": [{k: str(v)} for k, v in filter.items()]}
+                    start = offset or 0
+                    results = collection.get(where=where, limit=limit, offset=start, include=["metadatas", "documents"])
+                    formatted_results = []
+                    for i, doc_id in enumerate(results["ids"]):
+                        metadata = results["metadatas"][i] if results["metadatas"] else {}
+                        metadata = {k: str(v) if not isinstance(v, str) else v for k, v in metadata.items()}
+                        formatted_results.append({"id": doc_id, "text": results["documents"][i] if results["documents"] else "", "metadata": metadata})
+                    next_offset = start + len(formatted_results) if len(formatted_results) == limit else None
+                    return formatted_results, next_offset
+
+            except Exception as e:
+                if "not found" in str(e).lower() or "doesn't exist" in str(e).lower():
+                    return [], None
+                logger.warning(f"Filtered scroll failed on {collection_name}: {e}")
+            return None
+
     def query(self, query_text: str, n_results: int = 5, filter: Optional[Dict] = None, namespace: str = None) -> List[Dict]:
         """🚀 Blazing fast query with caching, parallel retrieval, and optimizations"""
         start_time = time.time()
@@ -1210,8 +1359,10 @@ class VectorStore:
         
         # 1. ⚡ Check query cache first
         if self.enable_caching:
-            cache_key = self._generate_cache_key(query_text, n_results, filter, namespace)
-            cached_result = self._get_query_cache(cache_key)
+            with span("cache.vector") as cache_span:
+                cache_key = self._generate_cache_key(query_text, n_results, filter, namespace)
+                cached_result = self._get_query_cache(cache_key)
+                cache_span.set_attribute("hit", cached_result is not None)
             if cached_result is not None:
                 self.query_stats["cache_hits"] += 1
                 logger.info(f"⚡ Query cache hit! Returning {len(cached_result)} results")
@@ -1219,7 +1370,8 @@ class VectorStore:
         
         try:
             # 2. 🚀 Fast embedding with caching
-            query_embedding = self._get_query_embedding(query_text)
+            with span("embed"):
+                query_embedding = self._get_query_embedding(query_text)
             
             # 3. 🏃‍♂️ Parallel backend querying with intelligent fallback
             results = self._parallel_query_backends(query_embedding, n_results, filter, namespace)
@@ -1244,6 +1396,31 @@ class VectorStore:
             # Fallback to basic query
             return self._fallback_query(query_text, n_results, filter, namespace)
     
+    def query_by_vector(self, query_embedding: List[float], n_results: int = 5, filter: Optional[Dict] = None,
+                        namespace: str = None, with_vectors: bool = False) -> List[Dict]:
+        """
+        Query with a precomputed embedding (same space as the stored vectors)
+        
+        Args:
+            query_embedding: Query vector
+            n_results: Number of results
+            filter: Optional metadata filter
+            namespace: Optional namespace
+            with_vectors: Also return each result's stored vector as "embedding"
+        
+        Returns:
+            results: Same format as query()
+        """
+        self.query_stats["total_queries"] += 1
+        if isinstance(query_embedding, np.ndarray):
+            query_embedding = query_embedding.tolist()
+        
+        try:
+            return self._parallel_query_backends(query_embedding, n_results, filter, namespace, with_vectors=with_vectors)
+        except Exception as e:
+            logger.error(f"Vector query failed: {e}")
+            return []
+    
     def _get_query_embedding(self, query_text: str) -> List[float]:
         """🚀 Fast embedding generation with caching"""
         # Use cached embedding if available
@@ -1277,7 +1454,8 @@ class VectorStore:
             else:
                 raise
     
-    def _parallel_query_backends(self, query_embedding: List[float], n_results: int, filter: Optional[Dict], namespace: str) -> List[Dict]:
+    def _parallel_query_backends(self, query_embedding: List[float], n_results: int, filter: Optional[Dict], namespace: str,
+                                 with_vectors: bool = False) -> List[Dict]:
         """🏃‍♂️ Parallel querying across multiple backends for maximum speed"""
         
         # Determine which backends to query
@@ -1301,15 +1479,16 @@ class VectorStore:
         # Submit parallel queries
         query_futures = []
         for backend_name, backend_client in backends_to_query:
-            future = self.query_executor.submit(
+            future = self.query_executor.submit(bind_context(
                 self._query_single_backend,
                 backend_name,
                 backend_client,
                 query_embedding,
                 n_results,
                 filter,
-                namespace
-            )
+                namespace,
+                with_vectors
+            ))
             query_futures.append((backend_name, future))
         
         # Collect results as they complete (race condition for speed)
@@ -1333,6 +1512,13 @@ class VectorStore:
             except Exception as e:
                 logger.warning(f"❌ Query failed for {backend_name}: {e}")
         
+        # Private namespaces share the Upstash index; keep them out of other searches
+        if namespace not in self.PRIVATE_NAMESPACES:
+            all_results = [
+                r for r in all_results
+                if (r.get("metadata") or {}).get("namespace") not in self.PRIVATE_NAMESPACES
+            ]
+        
         # Sort by relevance score and return top results
         all_results.sort(key=lambda x: x.get("score", 0), reverse=True)
         final_results = all_results[:n_results]
@@ -1342,23 +1528,27 @@ class VectorStore:
         return final_results
     
     def _query_single_backend(self, backend_name: str, backend_client, query_embedding: List[float], 
-                             n_results: int, filter: Optional[Dict], namespace: str) -> List[Dict]:
+                             n_results: int, filter: Optional[Dict], namespace: str,
+                             with_vectors: bool = False) -> List[Dict]:
         """Query a single backend with error handling"""
         try:
-            if backend_name == "upstash":
-                return self._query_upstash_fast(backend_client, query_embedding, n_results, filter, namespace)
-            elif backend_name == "qdrant":
-                return self._query_qdrant_fast(backend_client, query_embedding, n_results, filter, namespace)
-            elif backend_name == "chromadb":
-                return self._query_chromadb_fast(backend_client, query_embedding, n_results, filter)
-            else:
-                return []
+            with span(f"vector.{backend_name}", namespace=namespace) as backend_span:
+                if backend_name == "upstash":
+                    results = self._query_upstash_fast(backend_client, query_embedding, n_results, filter, namespace, with_vectors)
+                elif backend_name == "qdrant":
+                    results = self._query_qdrant_fast(backend_client, query_embedding, n_results, filter, namespace, with_vectors)
+                elif backend_name == "chromadb":
+                    results = self._query_chromadb_fast(backend_client, query_embedding, n_results, filter, with_vectors)
+                else:
+                    results = []
+                backend_span.set_attribute("results", len(results or []))
+                return results
         except Exception as e:
             logger.warning(f"Backend {backend_name} query failed: {e}")
             return []
     
     def _query_upstash_fast(self, client, query_embedding: List[float], n_results: int, 
-                           filter: Optional[Dict], namespace: str) -> List[Dict]:
+                           filter: Optional[Dict], namespace: str, with_vectors: bool = False) -> List[Dict]:
         """⚡ Fast Upstash query with optimized filtering"""
         filter_dict = {}
         if namespace:
@@ -1372,27 +1562,30 @@ class VectorStore:
             top_k=n_results,
             filter=filter_dict,
             include_metadata=True,
-            include_data=True
+            include_data=True,
+            include_vectors=with_vectors
         )
         
         return self._format_upstash_results(results)
     
     def _query_qdrant_fast(self, client, query_embedding: List[float], n_results: int,
-                          filter: Optional[Dict], namespace: str) -> List[Dict]:
+                          filter: Optional[Dict], namespace: str, with_vectors: bool = False) -> List[Dict]:
         """⚡ Fast Qdrant query with optimized filtering"""
-        scroll_filter = None
-        if filter or namespace:
-            conditions = []
-            if namespace:
+        conditions = []
+        if namespace:
+            conditions.append(models.FieldCondition(
+                key="namespace", match=models.MatchValue(value=namespace)
+            ))
+        if filter:
+            for k, v in filter.items():
                 conditions.append(models.FieldCondition(
-                    key="namespace", match=models.MatchValue(value=namespace)
+                    key=k, match=models.MatchValue(value=str(v))
                 ))
-            if filter:
-                for k, v in filter.items():
-                    conditions.append(models.FieldCondition(
-                        key=k, match=models.MatchValue(value=str(v))
-                    ))
-            scroll_filter = models.Filter(must=conditions)
+        # Searches without a namespace never see private (per-user) namespaces
+        excluded = [] if namespace else [models.FieldCondition(
+            key="namespace", match=models.MatchAny(any=sorted(self.PRIVATE_NAMESPACES))
+        )]
+        scroll_filter = models.Filter(must=conditions or None, must_not=excluded or None)
         
         query_result = client.query_points(
             collection_name=self.collection_name,
@@ -1400,18 +1593,20 @@ class VectorStore:
             limit=n_results,
             query_filter=scroll_filter,
             with_payload=True,
-            with_vectors=False  # Don't return vectors for speed
+            with_vectors=with_vectors  # Only when the caller rescores on them
         )
         
         return self._format_qdrant_results(query_result)
     
     def _query_chromadb_fast(self, collection, query_embedding: List[float], n_results: int,
-                            filter: Optional[Dict]) -> List[Dict]:
+                            filter: Optional[Dict], with_vectors: bool = False) -> List[Dict]:
         """⚡ Fast ChromaDB query"""
+        kwargs = {"include": ["documents", "metadatas", "distances", "embeddings"]} if with_vectors else {}
         results = collection.query(
             query_embeddings=[query_embedding],
             n_results=n_results,
-            where=filter if filter else None
+            where=filter if filter else None,
+            **kwargs
         )
         
         return self._format_chromadb_results(results)
@@ -1732,10 +1927,22 @@ class VectorStore:
         logger.info(f"ChromaDB query returned {len(formatted_results)} results")
         return formatted_results
     
-    def delete_collection(self):
-        """Delete the entire collection"""
-        self.client.delete_collection(self.collection_name)
-        logger.info(f"Deleted collection: {self.collection_name}")
+    def delete_collection(self, namespace: str = None):
+        """Delete the entire collection, or a namespace's collection
+        
+        Args:
+            namespace: Namespace whose collection to delete (default: the base collection)
+        """
+        collection_name = f"{self.collection_name}_{namespace}" if namespace else self.collection_name
+        self.client.delete_collection(collection_name)
+        logger.info(f"Deleted collection: {collection_name}")
+        
+        # Drop the deleted documents' facet counts; statistics fall back to
+        # sampling until the facets are rebuilt
+        try:
+            get_facet_store().reset(scope="vector", namespace=namespace)
+        except Exception as e:
+            logger.warning(f"Metadata facet reset failed: {e}")
     
     def get_stats(self) -> Dict:
         """Get collection statistics including all backends and namespaces"""
@@ -40,6 +40,7 @@ Date: 2025
 """
 
 import asyncio
+import hashlib
 import os
 import time
 import json
@@ -63,6 +64,12 @@ except ImportError:
     MemorySaver = None
     LANGGRAPH_AVAILABLE = False
 
+# Custom stream events (token streaming to callers of graph.astream)
+try:
+    from langgraph.config import get_stream_writer
+except ImportError:
+    get_stream_writer = None
+
 # OpenAI client for Moonshot
 from openai import OpenAI
 
@@ -89,6 +96,7 @@ from .prompts.responder_prompt import (
     format_tool_data,
     get_responder_config,
     extract_analysis,
+    AnalysisStreamFilter,
 )
 
 from .nodes.tool_executor import (
@@ -134,8 +142,13 @@ from .prefetch import (
     MetricsCollector,
 )
 
+from .user_profiling import get_profile_service
+from .llm_client import AsyncLLMClientPool, StreamStats, chat_completion, stream_chat_completion
+
 from .tools.tool_registry import ToolRegistry
 
+from Module3_NiruDB.generation_cache import get_generation_cache
+
 # ReAct Agent
 from .nodes.react_node import react_reasoning_node, react_tool_node
 from .tools.agentic_tools import initialize_agentic_tools, get_agentic_tools
@@ -233,6 +246,8 @@ class AmaniQState(TypedDict, total=False):
     detected_language: str
     detected_entities: List[str]
     token_usage: Dict[str, int]
+    llm_ttft_ms: Dict[str, Optional[float]]
+    llm_latency_ms: Dict[str, float]
     
     # Quality
     response_confidence: float
@@ -284,6 +299,12 @@ class MoonshotClient:
             logger.info(f"Moonshot client initialized: {cfg.moonshot_base_url}")
         return cls._instance
     
+    @classmethod
+    def get_async_client(cls, config: Optional[AmaniQConfig] = None):
+        """Get the pooled async client for the running event loop (use inside graph nodes)"""
+        cfg = config or AmaniQConfig()
+        return AsyncLLMClientPool.get_client(cfg.moonshot_api_key, cfg.moonshot_base_url)
+    
     @classmethod
     def reset(cls):
         """Reset client (for testing)"""
@@ -297,7 +318,7 @@ class MoonshotClient:
 
 async def entry_node(state: AmaniQState) -> AmaniQState:
     """
-    Entry node - Initialize request tracking and check cache.
+    Entry node - Initialize request tracking, check cache, attach the stored user profile.
     """
     logger.info("=== ENTRY NODE ===")
     
@@ -333,64 +354,7 @@ async def entry_node(state: AmaniQState) -> AmaniQState:
         "user_profile": state.get("user_profile"),
     }
     
-    # Build User Profile if missing
-    user_id = state.get("user_id")
-    if user_id and not updates.get("user_profile"):
-        try:
-            from Module3_NiruDB.chat_manager_v2 import get_chat_manager
-            chat_manager = get_chat_manager()
-            history = chat_manager.get_user_interaction_history(user_id, limit=100)
-            
-            if history:
-                logger.info(f"Building user profile from {len(history)} interactions for {user_id}")
-                config = AmaniQConfig()
-                client = MoonshotClient.get_client(config)
-                
-                # Fetch current task clusters for better classification
-                try:
-                    from Module4_NiruAPI.agents.task_clustering import ClusterAnalyzer
-                    analyzer = ClusterAnalyzer()
-                    clusters = analyzer.get_current_clusters(limit=12)
-                    cluster_names = [c["cluster_name"] for c in clusters]
-                    cluster_descriptions = "\n".join([
-                        f"- {c['cluster_name']}: {c['description']}"
-                        for c in clusters
-                    ])
-                except Exception as e:
-                    logger.warning(f"Could not fetch clusters: {e}")
-                    cluster_names = []
-                    cluster_descriptions = "No clusters available"
-                
-                profile_prompt = f"""
-                Build a user profile from the last {len(history)} interactions of user {user_id}.
-                
-                Return a JSON object with EXACTLY these keys:
-                - "expertise_level": (layperson / lawyer / researcher / journalist)
-                - "task_groups": [list of top 3 task groups from: {cluster_names if cluster_names else 'general legal research, case law lookup, constitutional queries, news tracking'}]
-                - "preferred_answer_style": (concise / detailed / bullet_points / kenya_law_format)
-                - "frequent_topics": [list of frequently tracked bills or topics]
-                
-                Available task clusters:
-                {cluster_descriptions}
-                
-                Interactions:
-                {json.dumps(history[-20:], default=str)}
-                """
-                
-                
-                response = client.chat.completions.create(
-                    model="moonshot-v1-8k",
-                    messages=[{"role": "user", "content": profile_prompt}],
-                    response_format={"type": "json_object"}
-                )
-                
-                user_profile = json.loads(response.choices[0].message.content)
-                updates["user_profile"] = user_profile
-                logger.info(f"Built user profile: {user_profile}")
-        except Exception as e:
-            logger.warning(f"Failed to build user profile: {e}")
-    
-    # Check answer cache
+    # Check answer cache first - a hit needs no profile or routing
     try:
         cache = await get_cache()
         answer_cache = AnswerCache(cache)
@@ -407,6 +371,17 @@ async def entry_node(state: AmaniQState) -> AmaniQState:
     except Exception as e:
         logger.warning(f"Cache check failed: {e}")
     
+    # Load the stored user profile; rebuilds run in the background
+    user_id = state.get("user_id")
+    if user_id and not updates.get("user_profile") and not updates["from_cache"]:
+        try:
+            profile_service = await get_profile_service()
+            user_profile = await profile_service.get_profile(user_id)
+            if user_profile:
+                updates["user_profile"] = user_profile
+        except Exception as e:
+            logger.warning(f"Failed to load user profile: {e}")
+    
     return {**state, **updates}
 
 
@@ -457,11 +432,12 @@ async def supervisor_node(state: AmaniQState) -> AmaniQState:
         
         # Call Moonshot
         config = AmaniQConfig()
-        client = MoonshotClient.get_client(config)
         moonshot_config = get_moonshot_config()
         
         start_time = time.time()
-        response = client.chat.completions.create(
+        response = await chat_completion(
+            config,
+            "supervisor",
             model=moonshot_config["model"],
             messages=supervisor_messages,
             temperature=moonshot_config["temperature"],
@@ -513,6 +489,10 @@ async def supervisor_node(state: AmaniQState) -> AmaniQState:
                 "prompt_tokens": response.usage.prompt_tokens,
                 "completion_tokens": response.usage.completion_tokens,
             },
+            "llm_latency_ms": {
+                **(state.get("llm_latency_ms") or {}),
+                "supervisor": latency_ms,
+            },
         }
         
     except Exception as e:
@@ -677,23 +657,78 @@ async def responder_node(state: AmaniQState) -> AmaniQState:
         user_context=state.get("user_profile")
     )
     
+    # Set once tokens have gone out, so a failure can tell the client to
+    # discard them before the fallback answer
+    streamed = False
     try:
-        # Call Moonshot with large context model
         config = AmaniQConfig()
-        client = MoonshotClient.get_client(config)
         responder_config = get_responder_config()
+        writer = _get_token_writer()
         
-        start_time = time.time()
-        response = client.chat.completions.create(
+        # Same question over the same evidence: reuse the earlier generation
+        generation_cache = get_generation_cache()
+        cache_entry = None
+        evidence = _responder_evidence(tool_results)
+        if config.enable_caching and evidence:
+            profile = state.get("user_profile") or {}
+            cache_entry = generation_cache.make_key(
+                original_question,
+                evidence,
+                responder_config["model"],
+                responder_config["temperature"],
+                template="|".join([
+                    "responder",
+                    str(supervisor_decision.get("intent", "")),
+                    str(profile.get("expertise_level", "")),
+                    str(profile.get("communication_style", "")),
+                    str(responder_config["max_tokens"]),
+                    _history_digest(state.get("messages", [])),
+                ]),
+            )
+        if cache_entry:
+            cached = await generation_cache.aget(cache_entry[0])
+            if cached:
+                logger.info("[Responder] Generation cache hit - skipping LLM call")
+                if writer:
+                    writer({"type": "token", "node": "responder", "content": cached["response"]})
+                tool_success = state.get("tool_success_rate", 1.0)
+                supervisor_confidence = state.get("confidence", 0.8)
+                return {
+                    **state,
+                    "final_response": cached["response"],
+                    "analysis": cached.get("analysis", ""),
+                    "response_confidence": tool_success * 0.4 + supervisor_confidence * 0.6,
+                    "completed_at": datetime.utcnow().isoformat(),
+                }
+        
+        # Stream from Moonshot with large context model; tokens go out as
+        # custom stream events while the full text is assembled for the state
+        visible = AnalysisStreamFilter()
+        stats = StreamStats(node="responder")
+        
+        async for token in stream_chat_completion(
+            config,
+            "responder",
+            stats,
             model=responder_config["model"],
             messages=responder_messages,
             temperature=responder_config["temperature"],
             max_tokens=responder_config["max_tokens"],
-            stream=False,  # For now, non-streaming
-        )
-        latency_ms = (time.time() - start_time) * 1000
+        ):
+            text = visible.feed(token)
+            if writer and text:
+                writer({"type": "token", "node": "responder", "content": text})
+                streamed = True
         
-        response_text = response.choices[0].message.content
+        tail = visible.flush()
+        if writer and tail:
+            writer({"type": "token", "node": "responder", "content": tail})
+        
+        response_text = stats.text
+        if not stats.completion_tokens:
+            stats.completion_tokens = count_tokens(response_text)
+        if not stats.prompt_tokens:
+            stats.prompt_tokens = sum(count_tokens(str(m.get("content", ""))) for m in responder_messages)
         
         # Extract analysis section (internal thinking)
         analysis, user_response = extract_analysis(response_text)
@@ -701,14 +736,24 @@ async def responder_node(state: AmaniQState) -> AmaniQState:
         # Record metrics
         if config.enable_telemetry:
             TelemetryMetrics.record_tokens(
-                response.usage.prompt_tokens,
-                response.usage.completion_tokens,
+                stats.prompt_tokens,
+                stats.completion_tokens,
                 "responder"
             )
         
-        logger.info(f"Responder generated {len(user_response)} chars in {latency_ms:.0f}ms")
+        logger.info(
+            f"Responder generated {len(user_response)} chars in {stats.latency_ms:.0f}ms "
+            f"(TTFT {stats.ttft_ms or 0:.0f}ms)"
+        )
         
         # Cache the answer
+        if cache_entry and user_response.strip():
+            try:
+                await generation_cache.aset(
+                    cache_entry[0], {"response": user_response, "analysis": analysis}, cache_entry[1]
+                )
+            except Exception as e:
+                logger.warning(f"Failed to cache generation: {e}")
         if config.enable_caching:
             try:
                 cache = await get_cache()
@@ -733,14 +778,24 @@ async def responder_node(state: AmaniQState) -> AmaniQState:
             "response_confidence": response_confidence,
             "token_usage": {
                 **state.get("token_usage", {}),
-                "responder_prompt": response.usage.prompt_tokens,
-                "responder_completion": response.usage.completion_tokens,
+                "responder_prompt": stats.prompt_tokens,
+                "responder_completion": stats.completion_tokens,
+            },
+            "llm_ttft_ms": {
+                **(state.get("llm_ttft_ms") or {}),
+                "responder": stats.ttft_ms,
+            },
+            "llm_latency_ms": {
+                **(state.get("llm_latency_ms") or {}),
+                "responder": stats.latency_ms,
             },
             "completed_at": datetime.utcnow().isoformat(),
         }
         
     except Exception as e:
         logger.error(f"Responder error: {e}")
+        if streamed:
+            writer({"type": "reset", "node": "responder", "error": str(e)})
         return {
             **state,
             "final_response": (
@@ -755,6 +810,51 @@ async def responder_node(state: AmaniQState) -> AmaniQState:
         }
 
 
+def _get_token_writer():
+    """Stream writer for the current graph run, or None outside astream"""
+    if get_stream_writer is None:
+        return None
+    try:
+        return get_stream_writer()
+    except Exception:
+        return None
+
+
+def _history_digest(messages: List[Any]) -> str:
+    """Hash of the conversation history the responder prompt includes"""
+    if not messages:
+        return ""
+    payload = json.dumps(
+        [m if isinstance(m, dict) else {"type": type(m).__name__, "content": getattr(m, "content", str(m))} for m in messages],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha1(payload.encode("utf-8", "ignore")).hexdigest()
+
+
+def _responder_evidence(tool_results: List[Dict]) -> Optional[List[Dict]]:
+    """
+    Documents behind the tool results, for the generation cache key.
+    
+    Search results contribute their chunks; other tool output is fingerprinted
+    whole. Returns None if any tool failed, so degraded answers aren't cached.
+    """
+    evidence = []
+    for result in tool_results:
+        if result.get("status") not in (ToolStatus.SUCCESS.value, ToolStatus.CACHED.value):
+            return None
+        data = result.get("data")
+        docs = data.get("results") if isinstance(data, dict) else data
+        if isinstance(docs, list) and docs and all(isinstance(d, dict) and ("text" in d or "content" in d) for d in docs):
+            evidence.extend(docs)
+        else:
+            evidence.append({
+                "id": f"tool:{result.get('tool_name')}:{result.get('query')}",
+                "text": json.dumps(data, sort_keys=True, default=str),
+            })
+    return evidence
+
+
 def _format_fallback_response(tool_results: List[Dict]) -> str:
     """Format fallback response from raw tool results"""
     if not tool_results:
@@ -977,24 +1077,27 @@ def create_amaniq_v2_graph(
     interrupt_nodes.append("react_tool_node")
     
     if enable_persistence:
-        # Try PostgresSaver for production, fall back to MemorySaver
+        # Try PostgresSaver for production, fall back to the bounded SQLite/Redis store
         try:
             from langgraph.checkpoint.postgres import PostgresSaver
-            import os
             
             postgres_uri = os.getenv("POSTGRES_URI") or os.getenv("DATABASE_URL")
             if postgres_uri:
                 checkpointer = PostgresSaver.from_conn_string(postgres_uri)
                 logger.info("Using PostgresSaver for production checkpointing")
             else:
-                checkpointer = MemorySaver()
-                logger.warning("POSTGRES_URI not set - using MemorySaver (state not persisted across restarts)")
+                logger.info("POSTGRES_URI not set - using bounded checkpoint store")
         except ImportError:
-            checkpointer = MemorySaver()
-            logger.warning("langgraph.checkpoint.postgres not available - using MemorySaver")
+            logger.info("langgraph.checkpoint.postgres not available - using bounded checkpoint store")
         except Exception as e:
+            logger.warning(f"PostgresSaver failed to initialize: {e} - using bounded checkpoint store")
+        
+        if checkpointer is None:
+            from .checkpoint_store import create_checkpointer
+            checkpointer = create_checkpointer(cfg.checkpoint_path)
+        if checkpointer is None:
             checkpointer = MemorySaver()
-            logger.warning(f"PostgresSaver failed to initialize: {e} - using MemorySaver")
+            logger.warning("Checkpoint store unavailable - using MemorySaver (state not persisted across restarts)")
     
     if checkpointer:
         # Compile with interrupt support
@@ -1305,6 +1408,8 @@ class AmaniQAgent:
                 "completed_at": state.get("completed_at"),
                 "total_latency_ms": total_latency_ms,
                 "token_usage": state.get("token_usage", {}),
+                "llm_ttft_ms": state.get("llm_ttft_ms", {}),
+                "llm_latency_ms": state.get("llm_latency_ms", {}),
                 "tool_success_rate": state.get("tool_success_rate", 0),
                 "iteration_count": state.get("iteration_count", 0),
             },
@@ -1317,6 +1422,7 @@ class AmaniQAgent:
         return {
             "node_latencies": snapshot.node_latencies,
             "tool_latencies": snapshot.tool_latencies,
+            "ttft": snapshot.ttft,
             "cache_hit_rate": f"{snapshot.cache_hit_rate:.1%}",
             "prefetch_hit_rate": f"{snapshot.prefetch_hit_rate:.1%}",
             "tool_timeout_rate": f"{snapshot.tool_timeout_rate:.1%}",
@@ -0,0 +1,647 @@
+"""
+Bounded Checkpoint Store for AmaniQ v2
+======================================
+
+LangGraph checkpointers that keep conversation state compact and bounded:
+
+- Only the latest `max_checkpoints` checkpoints are kept per thread
+  (older ones and their pending writes are pruned on every put)
+- Checkpoints expire after `ttl_seconds` without activity
+- Each checkpoint is stored as one zlib-compressed, serde-encoded record
+  (channel values included), so no per-channel blob history accumulates
+
+Backends:
+- SQLiteCheckpointSaver: local file (AmaniQConfig.checkpoint_path), WAL mode
+- RedisCheckpointSaver: shared across workers, expiry handled by Redis
+
+Both do their I/O in a worker thread for the async API used by
+`graph.ainvoke`/`graph.astream`, so the event loop never blocks on disk or
+network.
+
+Usage:
+    checkpointer = create_checkpointer(config.checkpoint_path)  # config: AmaniQConfig
+    graph = workflow.compile(checkpointer=checkpointer)
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from loguru import logger
+
+try:
+    from langgraph.checkpoint.base import (
+        WRITES_IDX_MAP,
+        BaseCheckpointSaver,
+        ChannelVersions,
+        Checkpoint,
+        CheckpointMetadata,
+        CheckpointTuple,
+        get_checkpoint_id,
+        get_checkpoint_metadata,
+    )
+    CHECKPOINT_BASE_AVAILABLE = True
+except ImportError:
+    BaseCheckpointSaver = object
+    CHECKPOINT_BASE_AVAILABLE = False
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    redis = None
+    REDIS_AVAILABLE = False
+
+
+CHECKPOINT_MAX_PER_THREAD = int(os.getenv("CHECKPOINT_MAX_PER_THREAD", "5"))
+CHECKPOINT_TTL_SECONDS = int(os.getenv("CHECKPOINT_TTL_SECONDS", str(7 * 24 * 3600)))  # 7 days
+CHECKPOINT_PURGE_EVERY = 500  # SQLite: purge expired rows every N puts
+
+# (checkpoint_id, parent_checkpoint_id, checkpoint blob, metadata blob)
+CheckpointRow = Tuple[str, Optional[str], bytes, bytes]
+# (task_id, idx, channel, value blob, task_path)
+WriteRow = Tuple[str, int, str, bytes, str]
+
+
+class BoundedCheckpointSaver(BaseCheckpointSaver):
+    """
+    LangGraph checkpointer base keeping the latest N compressed checkpoints per thread.
+
+    Subclasses implement the storage primitives (`_load_checkpoint`,
+    `_list_checkpoints`, `_save_checkpoint`, `_load_writes`, `_save_writes`,
+    `_delete_thread`).
+    """
+
+    def __init__(
+        self,
+        max_checkpoints: int = CHECKPOINT_MAX_PER_THREAD,
+        ttl_seconds: int = CHECKPOINT_TTL_SECONDS,
+        compress_level: int = 6,
+        serde: Any = None,
+    ):
+        """
+        Args:
+            max_checkpoints: Checkpoints kept per (thread, namespace)
+            ttl_seconds: Seconds before an inactive thread's checkpoints expire (0 disables)
+            compress_level: zlib compression level for stored records
+            serde: Optional LangGraph serializer (defaults to JsonPlusSerializer)
+        """
+        if not CHECKPOINT_BASE_AVAILABLE:
+            raise RuntimeError("langgraph not installed. Run: pip install langgraph")
+        super().__init__(serde=serde)
+        self.max_checkpoints = max(1, max_checkpoints)
+        self.ttl_seconds = ttl_seconds
+        self.compress_level = compress_level
+
+    # ------------------------------------------------------------------
+    # Encoding
+    # ------------------------------------------------------------------
+
+    def _encode(self, obj: Any) -> bytes:
+        type_, data = self.serde.dumps_typed(obj)
+        return zlib.compress(type_.encode() + b"\0" + data, self.compress_level)
+
+    def _decode(self, blob: bytes) -> Any:
+        type_, _, data = zlib.decompress(blob).partition(b"\0")
+        return self.serde.loads_typed((type_.decode(), data))
+
+    # ------------------------------------------------------------------
+    # Storage primitives
+    # ------------------------------------------------------------------
+
+    def _load_checkpoint(self, thread_id: str, checkpoint_ns: str, checkpoint_id: Optional[str]) -> Optional[CheckpointRow]:
+        raise NotImplementedError
+
+    def _list_checkpoints(
+        self,
+        thread_id: Optional[str],
+        checkpoint_ns: Optional[str],
+        before_id: Optional[str],
+    ) -> Iterator[Tuple[str, str, CheckpointRow]]:
+        """Yield (thread_id, checkpoint_ns, row), newest first per thread"""
+        raise NotImplementedError
+
+    def _save_checkpoint(self, thread_id: str, checkpoint_ns: str, row: CheckpointRow) -> None:
+        raise NotImplementedError
+
+    def _load_writes(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> List[WriteRow]:
+        raise NotImplementedError
+
+    def _save_writes(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str, rows: List[WriteRow], replace: bool) -> None:
+        raise NotImplementedError
+
+    def _delete_thread(self, thread_id: str) -> None:
+        raise NotImplementedError
+
+    # ------------------------------------------------------------------
+    # LangGraph checkpointer API
+    # ------------------------------------------------------------------
+
+    def _to_tuple(self, thread_id: str, checkpoint_ns: str, row: CheckpointRow) -> "CheckpointTuple":
+        checkpoint_id, parent_id, checkpoint_blob, metadata_blob = row
+        writes = sorted(
+            self._load_writes(thread_id, checkpoint_ns, checkpoint_id),
+            key=lambda w: (w[4], w[0], w[1]),
+        )
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint=self._decode(checkpoint_blob),
+            metadata=self._decode(metadata_blob),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_id,
+                    }
+                }
+                if parent_id
+                else None
+            ),
+            pending_writes=[(task_id, channel, self._decode(value)) for task_id, _, channel, value, _ in writes],
+        )
+
+    def get_tuple(self, config: Dict[str, Any]) -> Optional["CheckpointTuple"]:
+        """Get the requested (or latest) checkpoint for a thread"""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        row = self._load_checkpoint(thread_id, checkpoint_ns, get_checkpoint_id(config))
+        if row is None:
+            return None
+        return self._to_tuple(thread_id, checkpoint_ns, row)
+
+    def list(
+        self,
+        config: Optional[Dict[str, Any]],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator["CheckpointTuple"]:
+        """List stored checkpoints, newest first"""
+        thread_id = config["configurable"]["thread_id"] if config else None
+        checkpoint_ns = config["configurable"].get("checkpoint_ns") if config else None
+        config_checkpoint_id = get_checkpoint_id(config) if config else None
+        before_id = get_checkpoint_id(before) if before else None
+
+        for row_thread, row_ns, row in self._list_checkpoints(thread_id, checkpoint_ns, before_id):
+            if config_checkpoint_id and row[0] != config_checkpoint_id:
+                continue
+            if filter:
+                metadata = self._decode(row[3])
+                if not all(metadata.get(key) == value for key, value in filter.items()):
+                    continue
+            if limit is not None:
+                if limit <= 0:
+                    break
+                limit -= 1
+            yield self._to_tuple(row_thread, row_ns, row)
+
+    def put(
+        self,
+        config: Dict[str, Any],
+        checkpoint: "Checkpoint",
+        metadata: "CheckpointMetadata",
+        new_versions: "ChannelVersions",
+    ) -> Dict[str, Any]:
+        """Store a checkpoint and prune the thread to the newest N"""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        row = (
+            checkpoint["id"],
+            config["configurable"].get("checkpoint_id"),
+            self._encode(checkpoint),
+            self._encode(get_checkpoint_metadata(config, metadata)),
+        )
+        self._save_checkpoint(thread_id, checkpoint_ns, row)
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: Dict[str, Any],
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Store intermediate writes linked to a checkpoint"""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        # Special channels (errors, interrupts, ...) overwrite; regular writes are idempotent
+        replace = all(channel in WRITES_IDX_MAP for channel, _ in writes)
+        rows = [
+            (task_id, WRITES_IDX_MAP.get(channel, idx), channel, self._encode(value), task_path)
+            for idx, (channel, value) in enumerate(writes)
+        ]
+        self._save_writes(thread_id, checkpoint_ns, checkpoint_id, rows, replace)
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Delete all checkpoints and writes of a thread"""
+        self._delete_thread(thread_id)
+
+    async def aget_tuple(self, config: Dict[str, Any]) -> Optional["CheckpointTuple"]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[Dict[str, Any]],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator["CheckpointTuple"]:
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: Dict[str, Any],
+        checkpoint: "Checkpoint",
+        metadata: "CheckpointMetadata",
+        new_versions: "ChannelVersions",
+    ) -> Dict[str, Any]:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: Dict[str, Any],
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def get_next_version(self, current: Optional[Any], channel: Any = None) -> int:
+        """Monotonic integer channel versions"""
+        if current is None:
+            return 1
+        if isinstance(current, str):
+            current = int(current.split(".")[0])
+        return current + 1
+
+
+class SQLiteCheckpointSaver(BoundedCheckpointSaver):
+    """Bounded checkpointer backed by a local SQLite file"""
+
+    def __init__(self, path: str, **kwargs):
+        """
+        Args:
+            path: SQLite database file (created with its directory if missing)
+            **kwargs: BoundedCheckpointSaver options
+        """
+        super().__init__(**kwargs)
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        self._puts = 0
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS checkpoints (
+                    thread_id TEXT NOT NULL,
+                    checkpoint_ns TEXT NOT NULL DEFAULT '',
+                    checkpoint_id TEXT NOT NULL,
+                    parent_checkpoint_id TEXT,
+                    checkpoint BLOB NOT NULL,
+                    metadata BLOB NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+                );
+                CREATE INDEX IF NOT EXISTS idx_checkpoints_updated ON checkpoints (updated_at);
+                CREATE TABLE IF NOT EXISTS checkpoint_writes (
+                    thread_id TEXT NOT NULL,
+                    checkpoint_ns TEXT NOT NULL DEFAULT '',
+                    checkpoint_id TEXT NOT NULL,
+                    task_id TEXT NOT NULL,
+                    idx INTEGER NOT NULL,
+                    channel TEXT NOT NULL,
+                    value BLOB NOT NULL,
+                    task_path TEXT NOT NULL DEFAULT '',
+                    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+                );
+                """
+            )
+        logger.info(f"SQLite checkpoint store at {path} (keep {self.max_checkpoints}/thread, TTL {self.ttl_seconds}s)")
+
+    def _fresh_after(self) -> float:
+        return time.time() - self.ttl_seconds if self.ttl_seconds else 0.0
+
+    def _load_checkpoint(self, thread_id, checkpoint_ns, checkpoint_id):
+        query = (
+            "SELECT checkpoint_id, parent_checkpoint_id, checkpoint, metadata FROM checkpoints "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND updated_at >= ?"
+        )
+        params: List[Any] = [thread_id, checkpoint_ns, self._fresh_after()]
+        if checkpoint_id:
+            query += " AND checkpoint_id = ?"
+            params.append(checkpoint_id)
+        else:
+            query += " ORDER BY checkpoint_id DESC LIMIT 1"
+        with self._lock:
+            return self._conn.execute(query, params).fetchone()
+
+    def _list_checkpoints(self, thread_id, checkpoint_ns, before_id):
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, checkpoint, metadata "
+            "FROM checkpoints WHERE updated_at >= ?"
+        )
+        params: List[Any] = [self._fresh_after()]
+        if thread_id is not None:
+            query += " AND thread_id = ?"
+            params.append(thread_id)
+        if checkpoint_ns is not None:
+            query += " AND checkpoint_ns = ?"
+            params.append(checkpoint_ns)
+        if before_id:
+            query += " AND checkpoint_id < ?"
+            params.append(before_id)
+        query += " ORDER BY thread_id, checkpoint_id DESC"
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        for row in rows:
+            yield row[0], row[1], tuple(row[2:])
+
+    def _save_checkpoint(self, thread_id, checkpoint_ns, row):
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (thread_id, checkpoint_ns, *row, now),
+                )
+                # Touch the thread so retained checkpoints share its TTL
+                self._conn.execute(
+                    "UPDATE checkpoints SET updated_at = ? WHERE thread_id = ? AND checkpoint_ns = ?",
+                    (now, thread_id, checkpoint_ns),
+                )
+                stale = self._conn.execute(
+                    "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+                    "ORDER BY checkpoint_id DESC LIMIT -1 OFFSET ?",
+                    (thread_id, checkpoint_ns, self.max_checkpoints),
+                ).fetchall()
+                if stale:
+                    ids = [(thread_id, checkpoint_ns, r[0]) for r in stale]
+                    self._conn.executemany(
+                        "DELETE FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?", ids
+                    )
+                    self._conn.executemany(
+                        "DELETE FROM checkpoint_writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?", ids
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+            self._puts += 1
+            if self.ttl_seconds and self._puts % CHECKPOINT_PURGE_EVERY == 0:
+                self._purge_expired_locked()
+
+    def _load_writes(self, thread_id, checkpoint_ns, checkpoint_id):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT task_id, idx, channel, value, task_path FROM checkpoint_writes "
+                "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                (thread_id, checkpoint_ns, checkpoint_id),
+            ).fetchall()
+
+    def _save_writes(self, thread_id, checkpoint_ns, checkpoint_id, rows, replace):
+        verb = "INSERT OR REPLACE" if replace else "INSERT OR IGNORE"
+        with self._lock:
+            self._conn.executemany(
+                f"{verb} INTO checkpoint_writes VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(thread_id, checkpoint_ns, checkpoint_id, *row) for row in rows],
+            )
+
+    def _delete_thread(self, thread_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+            self._conn.execute("DELETE FROM checkpoint_writes WHERE thread_id = ?", (thread_id,))
+
+    def _purge_expired_locked(self) -> int:
+        cutoff = self._fresh_after()
+        deleted = self._conn.execute("DELETE FROM checkpoints WHERE updated_at < ?", (cutoff,)).rowcount
+        self._conn.execute(
+            "DELETE FROM checkpoint_writes WHERE NOT EXISTS ("
+            "SELECT 1 FROM checkpoints c WHERE c.thread_id = checkpoint_writes.thread_id "
+            "AND c.checkpoint_ns = checkpoint_writes.checkpoint_ns "
+            "AND c.checkpoint_id = checkpoint_writes.checkpoint_id)"
+        )
+        if deleted:
+            logger.info(f"Purged {deleted} expired checkpoints")
+        return deleted
+
+    def purge_expired(self) -> int:
+        """Delete checkpoints past their TTL; returns the number removed"""
+        if not self.ttl_seconds:
+            return 0
+        with self._lock:
+            return self._purge_expired_locked()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class RedisCheckpointSaver(BoundedCheckpointSaver):
+    """
+    Bounded checkpointer backed by Redis (shared across API workers)
+
+    Keys (all expire after ttl_seconds of thread inactivity):
+        {prefix}:idx:{thread}:{ns}          sorted set of checkpoint ids
+        {prefix}:cp:{thread}:{ns}:{id}      hash: parent, checkpoint, metadata
+        {prefix}:w:{thread}:{ns}:{id}       hash: "{task_id}|{idx}" -> packed write
+        {prefix}:ns:{thread}                set of namespaces used by the thread
+    """
+
+    def __init__(self, url: str, prefix: str = "amq:v2:ckpt", **kwargs):
+        """
+        Args:
+            url: Redis URL
+            prefix: Key prefix
+            **kwargs: BoundedCheckpointSaver options
+        """
+        if not REDIS_AVAILABLE:
+            raise RuntimeError("redis not installed. Run: pip install redis")
+        super().__init__(**kwargs)
+        self.prefix = prefix
+        self._redis = redis.Redis.from_url(url, decode_responses=False)
+        self._redis.ping()
+        logger.info(f"Redis checkpoint store (keep {self.max_checkpoints}/thread, TTL {self.ttl_seconds}s)")
+
+    def _key(self, kind: str, *parts: str) -> str:
+        return ":".join((self.prefix, kind) + parts)
+
+    def _expire(self, pipe, *keys: str) -> None:
+        if self.ttl_seconds:
+            for key in keys:
+                pipe.expire(key, self.ttl_seconds)
+
+    @staticmethod
+    def _text(value) -> str:
+        return value.decode() if isinstance(value, bytes) else value
+
+    def _load_checkpoint(self, thread_id, checkpoint_ns, checkpoint_id):
+        if not checkpoint_id:
+            latest = self._redis.zrevrange(self._key("idx", thread_id, checkpoint_ns), 0, 0)
+            if not latest:
+                return None
+            checkpoint_id = self._text(latest[0])
+        data = self._redis.hgetall(self._key("cp", thread_id, checkpoint_ns, checkpoint_id))
+        if not data:
+            return None
+        parent = data.get(b"parent") or b""
+        return checkpoint_id, self._text(parent) or None, data[b"checkpoint"], data[b"metadata"]
+
+    def _list_checkpoints(self, thread_id, checkpoint_ns, before_id):
+        if thread_id is None:
+            threads = {
+                self._text(key).rsplit(":", 1)[-1]
+                for key in self._redis.scan_iter(match=self._key("ns", "*"))
+            }
+        else:
+            threads = {thread_id}
+
+        for thread in sorted(threads):
+            namespaces = (
+                [checkpoint_ns]
+                if checkpoint_ns is not None
+                else sorted(self._text(ns) for ns in self._redis.smembers(self._key("ns", thread)))
+            )
+            for ns in namespaces:
+                for checkpoint_id in self._redis.zrevrange(self._key("idx", thread, ns), 0, -1):
+                    checkpoint_id = self._text(checkpoint_id)
+                    if before_id and checkpoint_id >= before_id:
+                        continue
+                    row = self._load_checkpoint(thread, ns, checkpoint_id)
+                    if row is not None:
+                        yield thread, ns, row
+
+    def _save_checkpoint(self, thread_id, checkpoint_ns, row):
+        checkpoint_id, parent_id, checkpoint_blob, metadata_blob = row
+        idx_key = self._key("idx", thread_id, checkpoint_ns)
+        ns_key = self._key("ns", thread_id)
+        cp_key = self._key("cp", thread_id, checkpoint_ns, checkpoint_id)
+
+        pipe = self._redis.pipeline()
+        pipe.hset(cp_key, mapping={
+            "parent": parent_id or "",
+            "checkpoint": checkpoint_blob,
+            "metadata": metadata_blob,
+        })
+        # Checkpoint ids are time-ordered, so lexical order is creation order
+        pipe.zadd(idx_key, {checkpoint_id: 0})
+        pipe.sadd(ns_key, checkpoint_ns)
+        pipe.zrange(idx_key, 0, -(self.max_checkpoints + 1))
+        results = pipe.execute()
+
+        stale = [self._text(c) for c in results[-1]]
+        retained = [
+            self._text(c) for c in self._redis.zrange(idx_key, -self.max_checkpoints, -1)
+        ]
+
+        pipe = self._redis.pipeline()
+        if stale:
+            pipe.zrem(idx_key, *stale)
+            for old_id in stale:
+                pipe.delete(
+                    self._key("cp", thread_id, checkpoint_ns, old_id),
+                    self._key("w", thread_id, checkpoint_ns, old_id),
+                )
+        self._expire(pipe, idx_key, ns_key, *(
+            self._key(kind, thread_id, checkpoint_ns, c) for c in retained for kind in ("cp", "w")
+        ))
+        pipe.execute()
+
+    def _load_writes(self, thread_id, checkpoint_ns, checkpoint_id):
+        rows = []
+        stored = self._redis.hgetall(self._key("w", thread_id, checkpoint_ns, checkpoint_id))
+        for field, packed in stored.items():
+            task_id, _, idx = self._text(field).rpartition("|")
+            header, _, value = packed.partition(b"\0\0")
+            channel, _, task_path = header.decode().partition("\0")
+            rows.append((task_id, int(idx), channel, value, task_path))
+        return rows
+
+    def _save_writes(self, thread_id, checkpoint_ns, checkpoint_id, rows, replace):
+        key = self._key("w", thread_id, checkpoint_ns, checkpoint_id)
+        pipe = self._redis.pipeline()
+        for task_id, idx, channel, value, task_path in rows:
+            field = f"{task_id}|{idx}"
+            packed = f"{channel}\0{task_path}".encode() + b"\0\0" + value
+            if replace:
+                pipe.hset(key, field, packed)
+            else:
+                pipe.hsetnx(key, field, packed)
+        self._expire(pipe, key)
+        pipe.execute()
+
+    def _delete_thread(self, thread_id):
+        ns_key = self._key("ns", thread_id)
+        keys = [ns_key]
+        for ns in self._redis.smembers(ns_key):
+            ns = self._text(ns)
+            idx_key = self._key("idx", thread_id, ns)
+            keys.append(idx_key)
+            for checkpoint_id in self._redis.zrange(idx_key, 0, -1):
+                checkpoint_id = self._text(checkpoint_id)
+                keys.append(self._key("cp", thread_id, ns, checkpoint_id))
+                keys.append(self._key("w", thread_id, ns, checkpoint_id))
+        self._redis.delete(*keys)
+
+
+def create_checkpointer(
+    checkpoint_path: Optional[str] = None,
+    max_checkpoints: int = CHECKPOINT_MAX_PER_THREAD,
+    ttl_seconds: int = CHECKPOINT_TTL_SECONDS,
+) -> Optional[BoundedCheckpointSaver]:
+    """
+    Create the bounded checkpointer configured for this deployment.
+
+    CHECKPOINT_BACKEND selects "redis" (CHECKPOINT_REDIS_URL / REDIS_URL) or
+    "sqlite" (the default, at checkpoint_path).
+
+    Returns:
+        A checkpointer, or None if the backend could not be initialized
+    """
+    backend = os.getenv("CHECKPOINT_BACKEND", "sqlite").lower()
+    try:
+        if backend == "redis":
+            url = os.getenv("CHECKPOINT_REDIS_URL") or os.getenv("REDIS_URL", "redis://localhost:6379/0")
+            return RedisCheckpointSaver(url, max_checkpoints=max_checkpoints, ttl_seconds=ttl_seconds)
+        return SQLiteCheckpointSaver(
+            checkpoint_path or "./checkpoints/amaniq_v2.db",
+            max_checkpoints=max_checkpoints,
+            ttl_seconds=ttl_seconds,
+        )
+    except Exception as e:
+        logger.warning(f"Bounded checkpoint store ({backend}) failed to initialize: {e}")
+        return None
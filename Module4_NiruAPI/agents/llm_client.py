@@ -0,0 +1,217 @@
+"""
+Async LLM Client Layer for AmaniQ v2
+====================================
+
+Graph nodes are `async def`, so LLM calls must not block the event loop.
+This module provides:
+
+- A pooled `AsyncOpenAI` client per event loop (keep-alive connections are
+  reused across requests instead of a new TLS handshake per call)
+- `chat_completion()` for one-shot calls (supervisor, profiling)
+- `stream_chat_completion()` which yields tokens as they arrive and reports
+  time-to-first-token (TTFT) per node; one-shot calls report latency only
+
+Usage:
+    response = await chat_completion(config, "supervisor", model=..., messages=...)
+
+    async for token in stream_chat_completion(config, "responder", stats, model=..., messages=...):
+        writer({"type": "token", "content": token})
+"""
+
+import asyncio
+import os
+import time
+import weakref
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+from loguru import logger
+
+from Module3_NiruDB.request_tracing import span, record_span
+
+try:
+    import httpx
+    from openai import AsyncOpenAI
+    ASYNC_OPENAI_AVAILABLE = True
+except ImportError:
+    httpx = None
+    AsyncOpenAI = None
+    ASYNC_OPENAI_AVAILABLE = False
+
+
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+LLM_MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "10"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "120"))
+
+
+@dataclass
+class StreamStats:
+    """Timing and usage collected while streaming a completion"""
+
+    node: str
+    ttft_ms: Optional[float] = None
+    latency_ms: float = 0.0
+    chunks: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    finish_reason: Optional[str] = None
+    text: str = ""
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "node": self.node,
+            "ttft_ms": self.ttft_ms,
+            "latency_ms": self.latency_ms,
+            "chunks": self.chunks,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "finish_reason": self.finish_reason,
+        }
+
+
+class AsyncLLMClientPool:
+    """
+    One pooled AsyncOpenAI client per (event loop, endpoint).
+
+    httpx connection pools are bound to the loop they were created on, so
+    clients are keyed by loop; they are dropped with the loop.
+    """
+
+    _clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[str, str], Any]]" = (
+        weakref.WeakKeyDictionary()
+    )
+
+    @classmethod
+    def get_client(cls, api_key: str, base_url: str) -> "AsyncOpenAI":
+        """Get or create the pooled async client for the running loop"""
+        if not ASYNC_OPENAI_AVAILABLE:
+            raise RuntimeError("openai/httpx not installed. Run: pip install openai httpx")
+
+        loop = asyncio.get_running_loop()
+        per_loop = cls._clients.setdefault(loop, {})
+        key = (base_url, api_key)
+
+        client = per_loop.get(key)
+        if client is None:
+            http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=LLM_MAX_CONNECTIONS,
+                    max_keepalive_connections=LLM_MAX_KEEPALIVE,
+                ),
+                timeout=httpx.Timeout(LLM_TIMEOUT_SECONDS, connect=10.0),
+            )
+            client = AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=http_client)
+            per_loop[key] = client
+            logger.info(f"Async LLM client pool initialized: {base_url} (max {LLM_MAX_CONNECTIONS} connections)")
+        return client
+
+    @classmethod
+    async def close(cls) -> None:
+        """Close the clients owned by the running loop"""
+        loop = asyncio.get_running_loop()
+        for client in cls._clients.pop(loop, {}).values():
+            try:
+                await client.close()
+            except Exception as e:
+                logger.debug(f"Error closing LLM client: {e}")
+
+
+def _client_for(config) -> "AsyncOpenAI":
+    """Resolve the pooled client for an AmaniQConfig-like object"""
+    return AsyncLLMClientPool.get_client(config.moonshot_api_key, config.moonshot_base_url)
+
+
+def _record_ttft(node: str, ttft_ms: float) -> None:
+    from .prefetch import TelemetryMetrics
+    TelemetryMetrics.record_ttft(node, ttft_ms)
+
+
+def _record_latency(node: str, latency_ms: float) -> None:
+    from .prefetch import get_metrics_collector
+    get_metrics_collector().record_node_latency(f"llm:{node}", latency_ms)
+
+
+async def chat_completion(config, node: str, **kwargs) -> Any:
+    """
+    Non-streaming chat completion on the pooled async client.
+
+    Args:
+        config: AmaniQConfig (API key and base URL)
+        node: Graph node name, used for latency reporting
+        **kwargs: Passed to `chat.completions.create`
+
+    Returns:
+        The completion response
+    """
+    client = _client_for(config)
+    start = time.perf_counter()
+    with span(f"llm:{node}", model=kwargs.get("model")):
+        response = await client.chat.completions.create(**kwargs)
+    # Not a TTFT sample: without streaming this is the whole completion
+    _record_latency(node, (time.perf_counter() - start) * 1000)
+    return response
+
+
+async def stream_chat_completion(
+    config,
+    node: str,
+    stats: Optional[StreamStats] = None,
+    **kwargs,
+) -> AsyncIterator[str]:
+    """
+    Stream a chat completion token by token.
+
+    Args:
+        config: AmaniQConfig (API key and base URL)
+        node: Graph node name, used for TTFT reporting
+        stats: Optional StreamStats filled in while streaming (text, TTFT, usage)
+        **kwargs: Passed to `chat.completions.create` (stream is forced on)
+
+    Yields:
+        Content deltas as they arrive
+    """
+    stats = stats if stats is not None else StreamStats(node=node)
+    client = _client_for(config)
+    start = time.perf_counter()
+
+    stream = await client.chat.completions.create(stream=True, **kwargs)
+    parts = []
+    try:
+        async for chunk in stream:
+            usage = getattr(chunk, "usage", None)
+            if usage:
+                stats.prompt_tokens = usage.prompt_tokens or 0
+                stats.completion_tokens = usage.completion_tokens or 0
+
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            if choice.finish_reason:
+                stats.finish_reason = choice.finish_reason
+            # Moonshot reports usage on the final choice
+            choice_usage = getattr(choice, "usage", None)
+            if isinstance(choice_usage, dict):
+                stats.prompt_tokens = choice_usage.get("prompt_tokens", stats.prompt_tokens)
+                stats.completion_tokens = choice_usage.get("completion_tokens", stats.completion_tokens)
+
+            content = choice.delta.content if choice.delta else None
+            if not content:
+                continue
+
+            if stats.ttft_ms is None:
+                stats.ttft_ms = (time.perf_counter() - start) * 1000
+                _record_ttft(node, stats.ttft_ms)
+            stats.chunks += 1
+            parts.append(content)
+            yield content
+    finally:
+        stats.text = "".join(parts)
+        stats.latency_ms = (time.perf_counter() - start) * 1000
+        # Generators can't hold a span open across yields, so record it afterwards
+        record_span(f"llm:{node}", start, model=kwargs.get("model"), stream=True, ttft_ms=stats.ttft_ms)
+        close = getattr(stream, "close", None)
+        if close is not None:
+            try:
+                await close()
+            except Exception:
+                pass
@@ -1,10 +1,28 @@
 """
 Agent Memory Manager - Manages short-term, long-term, episodic, and semantic memory
+
+Short-term episodes are indexed by the embedding of their query, kept
+normalized in one matrix, so recall is a single matrix product. Query
+embeddings come from the vector store's embedding cache, which the main
+retrieval fills, or can be passed in directly. Episodes beyond the
+short-term capacity are written to long-term storage by a background
+thread, into the EPISODIC_NAMESPACE namespace, and recalled with a
+namespace/category filter in the vector store query; hits from both tiers
+are ranked together by cosine similarity. The namespace is one of
+VectorStore.PRIVATE_NAMESPACES, so episodes (users' raw queries) never show
+up in corpus searches or metadata statistics.
 """
-from typing import Dict, Any, List, Optional
+import os
+import queue
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 from loguru import logger
 
+import numpy as np
+
 import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
@@ -12,6 +30,22 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
 from Module3_NiruDB.chat_manager import ChatDatabaseManager
 from Module3_NiruDB.vector_store import VectorStore
 
+# Long-term episodes live apart from the document corpus, in a private
+# namespace (listed in VectorStore.PRIVATE_NAMESPACES)
+EPISODIC_NAMESPACE = "agent_episodes"
+EPISODIC_CATEGORY = "episodic"
+
+
+def _normalize(embedding: Any) -> Optional[np.ndarray]:
+    """Flatten to a unit-length float32 vector (None for empty or zero input)"""
+    if embedding is None:
+        return None
+    vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+    norm = float(np.linalg.norm(vector)) if vector.size else 0.0
+    if norm == 0.0:
+        return None
+    return vector / norm
+
 
 class AgentMemoryManager:
     """
@@ -22,31 +56,115 @@ class AgentMemoryManager:
     - Semantic: Facts and rules
     """
     
+    INITIAL_ROWS = 128
+    
     def __init__(
         self,
         chat_manager: Optional[ChatDatabaseManager] = None,
-        vector_store: Optional[VectorStore] = None
+        vector_store: Optional[VectorStore] = None,
+        short_term_capacity: Optional[int] = None,
+        min_similarity: float = 0.5,
+        spill_batch_size: int = 100
     ):
         """
         Initialize memory manager
         
         Args:
             chat_manager: Chat manager for conversation history
-            vector_store: Vector store for semantic memory
+            vector_store: Vector store for semantic memory; share the RAG
+                pipeline's store so recall reuses its cached query embeddings
+            short_term_capacity: Episodes kept in process (env
+                AGENT_EPISODIC_CAPACITY, default 100); older ones are spilled
+                to long-term storage
+            min_similarity: Lowest cosine similarity for a short-term episode
+                to be recalled
+            spill_batch_size: Most episodes written per add_documents call
         """
         self.chat_manager = chat_manager or ChatDatabaseManager()
         self.vector_store = vector_store or VectorStore()
+        self.short_term_capacity = short_term_capacity or int(os.getenv("AGENT_EPISODIC_CAPACITY", "100"))
+        self.min_similarity = min_similarity
+        self.spill_batch_size = spill_batch_size
         
         # Short-term memory (in-memory)
         self.working_memory: Dict[str, Any] = {}
         self.episodic_memory: List[Dict[str, Any]] = []
+        
+        # Episode index: episodic_memory[i] is row _head + i (zero row if
+        # the query could not be embedded)
+        self._lock = threading.RLock()
+        self._dim: Optional[int] = None
+        self._vectors: Optional[np.ndarray] = None
+        self._head = 0
+        
+        # Spilled episodes stay recallable until the writer has stored them
+        self._pending: "OrderedDict[str, Tuple[Dict[str, Any], Optional[np.ndarray]]]" = OrderedDict()
+        self._spill_queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._spill_thread: Optional[threading.Thread] = None
+        self._closed = False
+        
+        # Statistics
+        self.episodes_spilled = 0
+        self.spill_batches = 0
+        self.spill_failures = 0
+    
+    # ------------------------------------------------------------------
+    # Episode index
+    # ------------------------------------------------------------------
+    
+    def _embed(self, text: str) -> Optional[np.ndarray]:
+        """Normalized query embedding, from the vector store's embedding cache"""
+        try:
+            return _normalize(self.vector_store._get_query_embedding(text))
+        except Exception as e:
+            logger.warning(f"Could not embed episodic memory query: {e}")
+            return None
+    
+    def _append_vector(self, vector: Optional[np.ndarray]):
+        """Store the row for the episode just appended to episodic_memory"""
+        if vector is not None and self._dim is None:
+            # Episodes stored before the first embedding get zero rows
+            self._dim = vector.shape[0]
+            rows = max(self.INITIAL_ROWS, 2 * len(self.episodic_memory))
+            self._vectors = np.zeros((rows, self._dim), dtype=np.float32)
+            self._head = 0
+        if self._vectors is None:
+            return
+        if vector is not None and vector.shape[0] != self._dim:
+            logger.warning(f"Episode embedding has dimension {vector.shape[0]}, expected {self._dim}")
+            vector = None
+        
+        count = len(self.episodic_memory) - 1
+        if self._head + count >= len(self._vectors):
+            if self._head > 0:
+                # Move live rows to the front before growing
+                self._vectors[:count] = self._vectors[self._head:self._head + count]
+                self._head = 0
+            if count >= len(self._vectors):
+                grown = np.zeros((len(self._vectors) * 2, self._dim), dtype=np.float32)
+                grown[:count] = self._vectors[:count]
+                self._vectors = grown
+        
+        row = self._head + count
+        self._vectors[row] = vector if vector is not None else 0.0
+    
+    def _short_term_matrix(self) -> Optional[np.ndarray]:
+        """Rows for episodic_memory, in order (a view, read under the lock)"""
+        if self._vectors is None:
+            return None
+        return self._vectors[self._head:self._head + len(self.episodic_memory)]
+    
+    # ------------------------------------------------------------------
+    # Episodic memory
+    # ------------------------------------------------------------------
     
     def store_episode(
         self,
         query: str,
         actions: List[Dict[str, Any]],
         tools: List[Dict[str, Any]],
-        reflection: Optional[str] = None
+        reflection: Optional[str] = None,
+        query_embedding: Optional[List[float]] = None
     ):
         """
         Store an episodic memory (who, what, when, how)
@@ -56,8 +174,11 @@ class AgentMemoryManager:
             actions: Actions taken
             tools: Tools used
             reflection: Reflection on the process
+            query_embedding: Embedding of the query from retrieval (looked up
+                in the vector store's embedding cache if omitted)
         """
         episode = {
+            'episode_id': uuid.uuid4().hex,
             'timestamp': datetime.utcnow().isoformat(),
             'query': query,
             'actions': actions,
@@ -65,41 +186,126 @@ class AgentMemoryManager:
             'reflection': reflection,
             'type': 'episodic'
         }
+        vector = _normalize(query_embedding) if query_embedding is not None else self._embed(query)
         
-        self.episodic_memory.append(episode)
+        with self._lock:
+            self.episodic_memory.append(episode)
+            self._append_vector(vector)
+            
+            # Keep only the last short_term_capacity episodes in short-term
+            spilled = []
+            overflow = len(self.episodic_memory) - self.short_term_capacity
+            if overflow > 0:
+                matrix = self._short_term_matrix()
+                for i, old in enumerate(self.episodic_memory[:overflow]):
+                    old_vector = matrix[i].copy() if matrix is not None and matrix[i].any() else None
+                    self._pending[old['episode_id']] = (old, old_vector)
+                    spilled.append(old['episode_id'])
+                del self.episodic_memory[:overflow]
+                if self._vectors is not None:
+                    self._head += overflow
         
-        # Keep only last 100 episodes in short-term
-        if len(self.episodic_memory) > 100:
-            # Move older episodes to long-term storage
-            old_episodes = self.episodic_memory[:-100]
-            self._store_episodes_long_term(old_episodes)
-            self.episodic_memory = self.episodic_memory[-100:]
+        if spilled:
+            # Move older episodes to long-term storage off the request path
+            self._spill(spilled)
         
         logger.debug(f"Stored episodic memory: {query[:50]}...")
     
-    def _store_episodes_long_term(self, episodes: List[Dict[str, Any]]):
-        """Store episodes in long-term storage"""
+    def _spill(self, episode_ids: List[str]):
+        """Queue pending episodes for the writer thread"""
+        with self._lock:
+            closed = self._closed
+            if not closed and self._spill_thread is None:
+                self._spill_thread = threading.Thread(
+                    target=self._run_spill, name="agent-memory-spill", daemon=True
+                )
+                self._spill_thread.start()
+        if closed:
+            # Write on the caller's thread rather than lose episodes
+            self._store_episodes_long_term(episode_ids)
+            return
+        for episode_id in episode_ids:
+            self._spill_queue.put(episode_id)
+    
+    def _run_spill(self):
+        while True:
+            episode_id = self._spill_queue.get()
+            if episode_id is None:
+                self._spill_queue.task_done()
+                return
+            batch = [episode_id]
+            stop = False
+            # Drain whatever else is queued into one write
+            while len(batch) < self.spill_batch_size:
+                try:
+                    next_id = self._spill_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if next_id is None:
+                    stop = True
+                    break
+                batch.append(next_id)
+            try:
+                self._store_episodes_long_term(batch)
+            finally:
+                for _ in range(len(batch) + int(stop)):
+                    self._spill_queue.task_done()
+            if stop:
+                return
+    
+    def _store_episodes_long_term(self, episode_ids: List[str]):
+        """Store pending episodes in long-term storage"""
+        with self._lock:
+            entries = [self._pending[i] for i in episode_ids if i in self._pending]
+        
         try:
-            # Store in vector store for semantic search
-            texts = []
-            metadatas = []
-            
-            for episode in episodes:
-                text = f"Query: {episode['query']}\nReflection: {episode.get('reflection', '')}"
-                metadata = {
-                    'type': 'episodic',
-                    'timestamp': episode['timestamp'],
+            # Store in vector store for semantic search, reusing the index vectors
+            chunks = []
+            for episode, vector in entries:
+                if vector is None:
+                    vector = self._embed(episode['query'])
+                if vector is None:
+                    logger.warning(f"Skipping episode {episode['episode_id']} - no embedding")
+                    continue
+                chunks.append({
+                    'chunk_id': f"episode_{episode['episode_id']}",
+                    'text': f"Query: {episode['query']}\nReflection: {episode.get('reflection') or ''}",
+                    'embedding': vector.tolist(),
+                    'title': episode['query'],
+                    'category': EPISODIC_CATEGORY,
+                    'source_name': 'agent_memory',
+                    'publication_date': episode['timestamp'],
+                    'namespace': EPISODIC_NAMESPACE,
                     'actions_count': len(episode.get('actions', [])),
                     'tools_count': len(episode.get('tools', []))
-                }
-                
-                texts.append(text)
-                metadatas.append(metadata)
+                })
             
-            if texts:
-                self.vector_store.add_documents(texts=texts, metadatas=metadatas)
+            if chunks:
+                self.vector_store.add_documents(chunks, namespace=EPISODIC_NAMESPACE)
+            self.episodes_spilled += len(chunks)
+            self.spill_batches += 1
         except Exception as e:
+            self.spill_failures += 1
             logger.error(f"Error storing episodes to long-term memory: {e}")
+        finally:
+            with self._lock:
+                for episode_id in episode_ids:
+                    self._pending.pop(episode_id, None)
+    
+    def flush(self):
+        """Block until every spilled episode has been written to long-term storage"""
+        self._spill_queue.join()
+    
+    def close(self):
+        """Write queued episodes and stop the spill thread"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._spill_thread
+        if thread is not None:
+            self._spill_queue.put(None)
+            thread.join()
     
     def store_semantic(self, facts: List[Dict[str, Any]]):
         """
@@ -127,46 +333,114 @@ class AgentMemoryManager:
         except Exception as e:
             logger.error(f"Error storing semantic memory: {e}")
     
-    def recall_episodic(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+    def recall_episodic(
+        self,
+        query: str,
+        top_k: int = 5,
+        query_embedding: Optional[List[float]] = None
+    ) -> List[Dict[str, Any]]:
         """
         Recall episodic memories relevant to a query
         
         Args:
             query: Query to search for
             top_k: Number of memories to return
+            query_embedding: Embedding of the query from retrieval (looked up
+                in the vector store's embedding cache if omitted)
             
         Returns:
-            List of relevant episodic memories
+            List of relevant episodic memories from both tiers, most similar
+            first, each with 'score' and 'source' ('short_term' or 'long_term')
         """
-        # Search in short-term memory first
-        relevant = []
-        query_lower = query.lower()
+        vector = _normalize(query_embedding) if query_embedding is not None else self._embed(query)
+        if vector is None:
+            return self._recall_by_substring(query, top_k)
         
-        for episode in self.episodic_memory:
-            if query_lower in episode['query'].lower():
-                relevant.append(episode)
+        # Short-term memory (including episodes still being spilled)
+        relevant = self._search_short_term(vector, top_k)
+        seen = {(episode['query'], episode['timestamp']) for episode in relevant}
         
-        # If not enough in short-term, search long-term
-        if len(relevant) < top_k:
-            try:
-                long_term_results = self.vector_store.search(
-                    query,
-                    top_k=top_k - len(relevant),
-                    filter={'type': 'episodic'}
-                )
-                
-                for result in long_term_results:
-                    relevant.append({
-                        'query': result.get('metadata', {}).get('query', ''),
-                        'timestamp': result.get('metadata', {}).get('timestamp', ''),
-                        'type': 'episodic',
-                        'source': 'long_term'
-                    })
-            except Exception as e:
-                logger.error(f"Error recalling long-term episodic memory: {e}")
+        # Long-term memory: one namespace/category filtered vector query
+        try:
+            long_term_results = self.vector_store.query_by_vector(
+                vector.tolist(),
+                n_results=top_k,
+                filter={'category': EPISODIC_CATEGORY},
+                namespace=EPISODIC_NAMESPACE,
+                with_vectors=True
+            )
+            
+            for result in long_term_results:
+                metadata = result.get('metadata', {}) or {}
+                key = (metadata.get('title', ''), metadata.get('publication_date', ''))
+                stored = _normalize(result.get('embedding'))
+                # Backends report different score scales; rescore by cosine
+                score = float(stored @ vector) if stored is not None and stored.shape == vector.shape \
+                    else float(result.get('score', 0.0))
+                if key in seen or score < self.min_similarity:
+                    continue
+                seen.add(key)
+                relevant.append({
+                    'query': key[0],
+                    'timestamp': key[1],
+                    'text': result.get('text', ''),
+                    'type': 'episodic',
+                    'source': 'long_term',
+                    'score': score
+                })
+        except Exception as e:
+            logger.error(f"Error recalling long-term episodic memory: {e}")
         
+        relevant.sort(key=lambda episode: episode['score'], reverse=True)
         return relevant[:top_k]
     
+    def _search_short_term(self, vector: np.ndarray, top_k: int) -> List[Dict[str, Any]]:
+        """Top-k in-process episodes by cosine similarity to the query vector"""
+        with self._lock:
+            matrix = self._short_term_matrix()
+            if matrix is None or vector.shape[0] != self._dim:
+                return []
+            episodes = list(self.episodic_memory)
+            scores = matrix @ vector
+            pending = [(e, v) for e, v in self._pending.values() if v is not None]
+        
+        if pending:
+            episodes += [e for e, _ in pending]
+            scores = np.concatenate([scores, np.stack([v for _, v in pending]) @ vector])
+        if not episodes:
+            return []
+        
+        k = min(top_k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [
+            {**episodes[i], 'score': float(scores[i]), 'source': 'short_term'}
+            for i in top if scores[i] >= self.min_similarity
+        ]
+    
+    def _recall_by_substring(self, query: str, top_k: int) -> List[Dict[str, Any]]:
+        """Fallback when the query cannot be embedded"""
+        query_lower = query.lower()
+        with self._lock:
+            episodes = list(self.episodic_memory)
+        return [
+            {**episode, 'source': 'short_term'}
+            for episode in episodes if query_lower in episode['query'].lower()
+        ][:top_k]
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get episodic memory statistics"""
+        with self._lock:
+            return {
+                'short_term_episodes': len(self.episodic_memory),
+                'short_term_capacity': self.short_term_capacity,
+                'pending_spill': len(self._pending),
+                'episodes_spilled': self.episodes_spilled,
+                'spill_batches': self.spill_batches,
+                'spill_failures': self.spill_failures,
+                'embedding_dim': self._dim
+            }
+    
     def recall_semantic(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
         """
         Recall semantic memories (facts) relevant to a query
@@ -32,6 +32,8 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
 
+from Module3_NiruDB.request_tracing import span
+
 
 # =============================================================================
 # CONFIGURATION
@@ -185,19 +187,25 @@ class RedisCache:
     
     async def get(self, key: str) -> Optional[str]:
         """Get value from cache"""
-        if self._redis:
-            try:
-                return await self._redis.get(key)
-            except Exception as e:
-                logger.debug(f"Redis get error: {e}")
-        
-        # Memory fallback
-        if key in self._memory_fallback:
-            value, expiry = self._memory_fallback[key]
-            if time.time() < expiry:
-                return value
-            del self._memory_fallback[key]
-        return None
+        with span("cache.redis") as cache_span:
+            if self._redis:
+                try:
+                    value = await self._redis.get(key)
+                    cache_span.set_attribute("hit", value is not None)
+                    return value
+                except Exception as e:
+                    logger.debug(f"Redis get error: {e}")
+            
+            # Memory fallback
+            cache_span.set_attribute("backend", "memory")
+            if key in self._memory_fallback:
+                value, expiry = self._memory_fallback[key]
+                if time.time() < expiry:
+                    cache_span.set_attribute("hit", True)
+                    return value
+                del self._memory_fallback[key]
+            cache_span.set_attribute("hit", False)
+            return None
     
     async def set(self, key: str, value: str, ttl: int) -> bool:
         """Set value with TTL"""
@@ -217,6 +225,39 @@ class RedisCache:
                 del self._memory_fallback[k]
         return True
     
+    async def add(self, key: str, value: str, ttl: int) -> bool:
+        """Set value with TTL only if the key does not exist (SET NX)"""
+        if self._redis:
+            try:
+                return bool(await self._redis.set(key, value, ex=ttl, nx=True))
+            except Exception as e:
+                logger.debug(f"Redis add error: {e}")
+        
+        # Memory fallback (no await between check and write)
+        entry = self._memory_fallback.get(key)
+        if entry is not None and time.time() < entry[1]:
+            return False
+        self._memory_fallback[key] = (value, time.time() + ttl)
+        return True
+    
+    async def incr(self, key: str, ttl: int, amount: int = 1) -> int:
+        """Atomically add to an integer counter (missing counts as 0) and refresh its TTL"""
+        if self._redis:
+            try:
+                async with self._redis.pipeline(transaction=True) as pipe:
+                    pipe.incrby(key, amount)
+                    pipe.expire(key, ttl)
+                    value, _ = await pipe.execute()
+                return int(value)
+            except Exception as e:
+                logger.debug(f"Redis incr error: {e}")
+        
+        # Memory fallback (no await between read and write)
+        value, expiry = self._memory_fallback.get(key, ("0", 0.0))
+        value = (int(value) if time.time() < expiry else 0) + amount
+        self._memory_fallback[key] = (str(value), time.time() + ttl)
+        return value
+    
     async def delete(self, key: str) -> bool:
         """Delete key"""
         if self._redis:
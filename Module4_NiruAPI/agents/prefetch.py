@@ -31,6 +31,8 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
 
+from Module3_NiruDB.request_tracing import span as request_span
+
 
 # =============================================================================
 # CONFIGURATION
@@ -91,6 +93,7 @@ class TelemetryMetrics:
     _node_latency = None
     _tool_latency = None
     _token_usage = None
+    _ttft = None
     
     # Counters
     _cache_hits = None
@@ -156,6 +159,12 @@ class TelemetryMetrics:
                 unit="tokens",
             )
             
+            cls._ttft = cls._meter.create_histogram(
+                name="amaniq.llm.ttft",
+                description="Time to first LLM token per node in milliseconds",
+                unit="ms",
+            )
+            
             # Create counters
             cls._cache_hits = cls._meter.create_counter(
                 name="amaniq.cache.hits",
@@ -210,35 +219,36 @@ class TelemetryMetrics:
         start = time.time()
         span = None
         
-        try:
-            if cls._tracer:
-                from opentelemetry import trace
-                span = cls._tracer.start_span(
-                    f"node.{node_name}",
-                    attributes={"node.name": node_name, **(attributes or {})}
-                )
-                span.__enter__()
+        with request_span(f"node:{node_name}", **(attributes or {})):
+            try:
+                if cls._tracer:
+                    from opentelemetry import trace
+                    span = cls._tracer.start_span(
+                        f"node.{node_name}",
+                        attributes={"node.name": node_name, **(attributes or {})}
+                    )
+                    span.__enter__()
             
-            yield span
+                yield span
             
-        except Exception as e:
-            if span:
-                span.set_status(trace.Status(trace.StatusCode.ERROR, str(e)))
-                span.record_exception(e)
-            raise
+            except Exception as e:
+                if span:
+                    span.set_status(trace.Status(trace.StatusCode.ERROR, str(e)))
+                    span.record_exception(e)
+                raise
         
-        finally:
-            latency_ms = (time.time() - start) * 1000
+            finally:
+                latency_ms = (time.time() - start) * 1000
             
-            # Record metrics
-            if cls._node_latency:
-                cls._node_latency.record(latency_ms, {"node": node_name})
+                # Record metrics
+                if cls._node_latency:
+                    cls._node_latency.record(latency_ms, {"node": node_name})
             
-            if span:
-                span.set_attribute("latency_ms", latency_ms)
-                span.__exit__(None, None, None)
+                if span:
+                    span.set_attribute("latency_ms", latency_ms)
+                    span.__exit__(None, None, None)
             
-            logger.debug(f"Node {node_name}: {latency_ms:.1f}ms")
+                logger.debug(f"Node {node_name}: {latency_ms:.1f}ms")
     
     @classmethod
     @asynccontextmanager
@@ -248,44 +258,45 @@ class TelemetryMetrics:
         start = time.time()
         span = None
         
-        try:
-            if cls._tracer:
-                from opentelemetry import trace
-                span = cls._tracer.start_span(
-                    f"tool.{tool_name}",
-                    attributes={
-                        "tool.name": tool_name,
-                        "tool.query": query[:100],
-                    }
-                )
-                span.__enter__()
+        with request_span(f"tool:{tool_name}"):
+            try:
+                if cls._tracer:
+                    from opentelemetry import trace
+                    span = cls._tracer.start_span(
+                        f"tool.{tool_name}",
+                        attributes={
+                            "tool.name": tool_name,
+                            "tool.query": query[:100],
+                        }
+                    )
+                    span.__enter__()
             
-            yield span
+                yield span
             
-        except asyncio.TimeoutError:
-            if cls._tool_timeouts:
-                cls._tool_timeouts.add(1, {"tool": tool_name})
-            if span:
-                from opentelemetry import trace
-                span.set_status(trace.Status(trace.StatusCode.ERROR, "timeout"))
-            raise
+            except asyncio.TimeoutError:
+                if cls._tool_timeouts:
+                    cls._tool_timeouts.add(1, {"tool": tool_name})
+                if span:
+                    from opentelemetry import trace
+                    span.set_status(trace.Status(trace.StatusCode.ERROR, "timeout"))
+                raise
         
-        except Exception as e:
-            if span:
-                from opentelemetry import trace
-                span.set_status(trace.Status(trace.StatusCode.ERROR, str(e)))
-                span.record_exception(e)
-            raise
-        
-        finally:
-            latency_ms = (time.time() - start) * 1000
+            except Exception as e:
+                if span:
+                    from opentelemetry import trace
+                    span.set_status(trace.Status(trace.StatusCode.ERROR, str(e)))
+                    span.record_exception(e)
+                raise
+        
+            finally:
+                latency_ms = (time.time() - start) * 1000
             
-            if cls._tool_latency:
-                cls._tool_latency.record(latency_ms, {"tool": tool_name})
+                if cls._tool_latency:
+                    cls._tool_latency.record(latency_ms, {"tool": tool_name})
             
-            if span:
-                span.set_attribute("latency_ms", latency_ms)
-                span.__exit__(None, None, None)
+                if span:
+                    span.set_attribute("latency_ms", latency_ms)
+                    span.__exit__(None, None, None)
     
     @classmethod
     def record_tokens(cls, prompt_tokens: int, completion_tokens: int, node: str = "unknown"):
@@ -300,6 +311,15 @@ class TelemetryMetrics:
         
         logger.debug(f"Tokens ({node}): {prompt_tokens} prompt + {completion_tokens} completion = {total}")
     
+    @classmethod
+    def record_ttft(cls, node: str, ttft_ms: float):
+        """Record time to first token for an LLM call"""
+        cls.initialize()
+        if cls._ttft:
+            cls._ttft.record(ttft_ms, {"node": node})
+        get_metrics_collector().record_ttft(node, ttft_ms)
+        logger.debug(f"TTFT ({node}): {ttft_ms:.0f}ms")
+    
     @classmethod
     def record_cache_hit(cls, cache_type: str = "answer"):
         """Record cache hit"""
@@ -707,6 +727,7 @@ class PerformanceSnapshot:
     # Latencies (p50, p95, p99)
     node_latencies: Dict[str, Dict[str, float]] = field(default_factory=dict)
     tool_latencies: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    ttft: Dict[str, Dict[str, float]] = field(default_factory=dict)
     
     # Rates
     cache_hit_rate: float = 0.0
@@ -731,6 +752,7 @@ class MetricsCollector:
         # In-memory metrics for when OTEL isn't available
         self._node_latencies: Dict[str, List[float]] = {}
         self._tool_latencies: Dict[str, List[float]] = {}
+        self._ttft: Dict[str, List[float]] = {}
         self._cache_hits = 0
         self._cache_misses = 0
         self._prefetch_hits = 0
@@ -756,6 +778,13 @@ class MetricsCollector:
         if len(self._tool_latencies[tool]) > 1000:
             self._tool_latencies[tool] = self._tool_latencies[tool][-1000:]
     
+    def record_ttft(self, node: str, ttft_ms: float):
+        """Record time to first token"""
+        samples = self._ttft.setdefault(node, [])
+        samples.append(ttft_ms)
+        if len(samples) > 1000:
+            self._ttft[node] = samples[-1000:]
+    
     def record_cache_result(self, hit: bool):
         """Record cache hit/miss"""
         if hit:
@@ -813,6 +842,14 @@ class MetricsCollector:
                 "p99": self._percentile(latencies, 99),
             }
         
+        # Calculate time to first token
+        for node, samples in self._ttft.items():
+            snapshot.ttft[node] = {
+                "p50": self._percentile(samples, 50),
+                "p95": self._percentile(samples, 95),
+                "p99": self._percentile(samples, 99),
+            }
+        
         # Calculate rates
         total_cache = self._cache_hits + self._cache_misses
         snapshot.cache_hit_rate = (
@@ -45,6 +45,7 @@ from .responder_prompt import (
     get_responder_config,
     extract_analysis,
     validate_citations,
+    AnalysisStreamFilter,
 )
 
 __all__ = [
@@ -71,5 +72,6 @@ __all__ = [
     "format_tool_data",
     "get_responder_config",
     "extract_analysis",
+    "AnalysisStreamFilter",
     "validate_citations",
 ]
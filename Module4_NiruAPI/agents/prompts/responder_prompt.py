@@ -419,6 +419,70 @@ def extract_analysis(response: str) -> tuple[str, str]:
     return "", response
 
 
+class AnalysisStreamFilter:
+    """
+    Incremental counterpart of extract_analysis for streamed responses.
+    
+    Feed tokens as they arrive; text inside <analysis>...</analysis> is
+    withheld (tags may be split across tokens) and the rest is returned
+    for display.
+    """
+    
+    OPEN_TAG = "<analysis>"
+    CLOSE_TAG = "</analysis>"
+    
+    def __init__(self):
+        self._buffer = ""
+        self._in_analysis = False
+        self._started = False
+    
+    def _partial_tag_length(self, text: str, tag: str) -> int:
+        """Length of the longest suffix of text that is a prefix of tag"""
+        for size in range(min(len(tag) - 1, len(text)), 0, -1):
+            if text.endswith(tag[:size]):
+                return size
+        return 0
+    
+    def _emit(self, text: str) -> str:
+        if not self._started:
+            text = text.lstrip()
+            self._started = bool(text)
+        return text
+    
+    def feed(self, token: str) -> str:
+        """Add a token and return the text that can be shown"""
+        self._buffer += token
+        output = []
+        
+        while self._buffer:
+            if self._in_analysis:
+                end = self._buffer.find(self.CLOSE_TAG)
+                if end < 0:
+                    keep = self._partial_tag_length(self._buffer, self.CLOSE_TAG)
+                    self._buffer = self._buffer[len(self._buffer) - keep:] if keep else ""
+                    break
+                self._buffer = self._buffer[end + len(self.CLOSE_TAG):]
+                self._in_analysis = False
+            else:
+                start = self._buffer.find(self.OPEN_TAG)
+                if start < 0:
+                    keep = self._partial_tag_length(self._buffer, self.OPEN_TAG)
+                    output.append(self._buffer[:len(self._buffer) - keep])
+                    self._buffer = self._buffer[len(self._buffer) - keep:]
+                    break
+                output.append(self._buffer[:start])
+                self._buffer = self._buffer[start + len(self.OPEN_TAG):]
+                self._in_analysis = True
+        
+        return self._emit("".join(output))
+    
+    def flush(self) -> str:
+        """Return any held-back text once the stream has ended"""
+        remaining = "" if self._in_analysis else self._buffer
+        self._buffer = ""
+        return self._emit(remaining)
+
+
 def validate_citations(response: str) -> List[str]:
     """Check if response contains proper citations"""
     warnings = []
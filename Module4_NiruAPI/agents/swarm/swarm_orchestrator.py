@@ -1,9 +1,17 @@
 """
 Swarm Intelligence Orchestrator
 Coordinates multiple LLMs for consensus building and division of labor
+
+Consensus queries retrieve once and generate many: retrieval and context
+packing run a single time through the RAG pipeline, then only the generation
+step fans out to the providers (each on its own async client with a deadline).
+Once a quorum of providers has answered, the stragglers are cancelled.
 """
 from typing import List, Dict, Any, Optional
 import asyncio
+import os
+import time
+import weakref
 from datetime import datetime
 from loguru import logger
 
@@ -11,7 +19,18 @@ import sys
 from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
 
-from Module4_NiruAPI.rag_pipeline import RAGPipeline
+from Module4_NiruAPI.rag_pipeline import RAGPipeline, DEFAULT_SYSTEM_PROMPT
+
+try:
+    from anthropic import AsyncAnthropic
+    ANTHROPIC_ASYNC_AVAILABLE = True
+except ImportError:
+    AsyncAnthropic = None
+    ANTHROPIC_ASYNC_AVAILABLE = False
+
+
+SWARM_PROVIDER_TIMEOUT = float(os.getenv("SWARM_PROVIDER_TIMEOUT", "20"))
+SWARM_QUORUM = int(os.getenv("SWARM_QUORUM", "2"))
 
 
 class SwarmOrchestrator:
@@ -40,9 +59,18 @@ class SwarmOrchestrator:
             "openai": {"model": "gpt-4", "requires_key": "OPENAI_API_KEY"},
             "anthropic": {"model": "claude-3-opus-20240229", "requires_key": "ANTHROPIC_API_KEY"},
             "gemini": {"model": "gemini-2.5-flash", "requires_key": "GEMINI_API_KEY"},  # Updated to 2.5-flash
-            "moonshot": {"model": "moonshot-v1-8k", "requires_key": "MOONSHOT_API_KEY"}
+            "moonshot": {
+                "model": "moonshot-v1-8k",
+                "requires_key": "MOONSHOT_API_KEY",
+                "base_url": os.getenv("MOONSHOT_BASE_URL", "https://api.moonshot.ai/v1"),
+            },
         }
         
+        # Async generation clients, per event loop (HTTP pools are loop-bound)
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, Any]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        
         # Filter providers based on available API keys
         self.available_providers = self._filter_available_providers()
         
@@ -64,80 +92,303 @@ class SwarmOrchestrator:
         
         return available
     
-    async def query_parallel(self, query: str, context: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    async def query_parallel(
+        self,
+        query: str,
+        context: Optional[Dict[str, Any]] = None,
+        providers: Optional[List[str]] = None,
+        quorum: Optional[int] = None,
+        timeout: Optional[float] = None,
+        top_k: int = 5,
+    ) -> List[Dict[str, Any]]:
         """
-        Query all available LLMs in parallel (consensus mode)
+        Query available LLMs in parallel (consensus mode)
         
         Args:
             query: Query to process
             context: Optional context
+            providers: Providers to ask (default: all available)
+            quorum: Return once this many providers answered (default: SWARM_QUORUM)
+            timeout: Per-provider generation deadline in seconds
+            top_k: Documents to retrieve
             
         Returns:
             List of responses from each LLM
         """
-        if not self.available_providers:
-            logger.warning("No LLM providers available")
-            return []
-        
-        tasks = []
-        for provider in self.available_providers:
-            task = self._query_provider(provider, query, context)
-            tasks.append(task)
-        
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Filter out exceptions
-        valid_results = []
-        for i, result in enumerate(results):
-            if isinstance(result, Exception):
-                logger.error(f"Error querying {self.available_providers[i]}: {result}")
-            else:
-                valid_results.append(result)
+        result = await self.query_swarm(
+            query, providers=providers, quorum=quorum, timeout=timeout, top_k=top_k
+        )
+        return result["responses"]
+    
+    async def query_swarm(
+        self,
+        query: str,
+        providers: Optional[List[str]] = None,
+        quorum: Optional[int] = None,
+        timeout: Optional[float] = None,
+        top_k: int = 5,
+        temperature: float = 0.7,
+        max_tokens: int = 1500,
+        max_context_length: int = 3000,
+        category: Optional[str] = None,
+        source: Optional[str] = None,
+        session_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Retrieve once, generate with many providers, synthesize at quorum
         
-        return valid_results
+        Args:
+            query: User question
+            providers: Providers to ask (default: all available)
+            quorum: Successful answers needed before the rest are cancelled
+            timeout: Per-provider generation deadline in seconds
+            top_k: Documents to retrieve
+            temperature: LLM temperature
+            max_tokens: Maximum tokens per provider answer
+            max_context_length: Maximum packed context length
+            category: Filter by category
+            source: Filter by source
+            session_id: Optional session for session-document retrieval
+            
+        Returns:
+            Dictionary with synthesized answer, per-provider responses, sources and timings
+        """
+        start = time.perf_counter()
+        selected = [p for p in (providers or self.available_providers) if p in self.available_providers]
+        if not selected:
+            logger.warning("No LLM providers available")
+            return {"answer": "No responses available", "responses": [], "sources": [], "timings": {}}
+        
+        retrieval = await self._retrieve(query, top_k, max_context_length, category, source, session_id)
+        retrieval_ms = (time.perf_counter() - start) * 1000
+        
+        responses = await self._generate_many(
+            selected,
+            query,
+            retrieval.get("context", ""),
+            quorum=quorum,
+            timeout=timeout,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            sources=retrieval.get("sources", []),
+        )
+        
+        return {
+            "answer": self.synthesize_responses(responses),
+            "responses": responses,
+            "sources": retrieval.get("sources", []),
+            "retrieved_chunks": len(retrieval.get("docs", [])),
+            "providers_asked": selected,
+            "timings": {
+                "retrieval_ms": retrieval_ms,
+                "total_ms": (time.perf_counter() - start) * 1000,
+            },
+        }
     
-    async def _query_provider(self, provider: str, query: str, context: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        """Query a single provider"""
+    async def _retrieve(
+        self,
+        query: str,
+        top_k: int,
+        max_context_length: int,
+        category: Optional[str] = None,
+        source: Optional[str] = None,
+        session_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Run retrieval and context packing once (blocking work goes to a thread)"""
+        if not self.rag_pipeline:
+            return {"docs": [], "context": "", "sources": []}
         try:
-            if self.rag_pipeline:
-                # Use RAG pipeline with specific provider
-                import asyncio
-                
-                # Run synchronous query in executor to make it async-compatible
-                loop = asyncio.get_event_loop()
-                original_provider = self.rag_pipeline.llm_provider
-                self.rag_pipeline.llm_provider = provider
-                
-                # Execute query in thread pool to avoid blocking
-                response = await loop.run_in_executor(
-                    None,
-                    lambda: self.rag_pipeline.query(query=query, top_k=5)
-                )
-                
-                self.rag_pipeline.llm_provider = original_provider
-                
-                return {
-                    'provider': provider,
-                    'response': response.get('answer', ''),
-                    'sources': response.get('sources', []),
-                    'timestamp': datetime.utcnow().isoformat()
-                }
-            else:
-                # Direct LLM query (simplified)
-                return {
-                    'provider': provider,
-                    'response': f"Response from {provider}",
-                    'sources': [],
-                    'timestamp': datetime.utcnow().isoformat()
-                }
+            return await asyncio.to_thread(
+                self.rag_pipeline.retrieve_context,
+                query,
+                top_k=top_k,
+                category=category,
+                source=source,
+                max_context_length=max_context_length,
+                session_id=session_id,
+            )
         except Exception as e:
-            logger.error(f"Error querying {provider}: {e}")
+            logger.error(f"Swarm retrieval failed: {e}")
+            return {"docs": [], "context": "", "sources": []}
+    
+    async def _generate_many(
+        self,
+        providers: List[str],
+        query: str,
+        context: str,
+        quorum: Optional[int] = None,
+        timeout: Optional[float] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1500,
+        sources: Optional[List[Dict[str, Any]]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Fan generation out to providers; stop once a quorum has answered"""
+        quorum = max(1, min(quorum or SWARM_QUORUM, len(providers)))
+        timeout = timeout or SWARM_PROVIDER_TIMEOUT
+        
+        tasks = {
+            asyncio.create_task(
+                self._query_provider(
+                    provider, query, context=context, timeout=timeout,
+                    temperature=temperature, max_tokens=max_tokens, sources=sources,
+                )
+            ): provider
+            for provider in providers
+        }
+        
+        responses = []
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result = task.result()
+                    if not result.get("error"):
+                        responses.append(result)
+                if len(responses) >= quorum:
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+        
+        if pending:
+            logger.info(
+                f"Swarm quorum reached ({len(responses)}/{len(providers)}); "
+                f"cancelled {[tasks[t] for t in pending]}"
+            )
+        return responses
+    
+    async def _query_provider(
+        self,
+        provider: str,
+        query: str,
+        context: Optional[str] = None,
+        timeout: Optional[float] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 1500,
+        sources: Optional[List[Dict[str, Any]]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Generate an answer with a single provider
+        
+        The provider is an explicit argument; nothing on the shared RAG
+        pipeline is touched, so concurrent swarm queries do not interfere.
+        When no packed context is given, retrieval runs first.
+        """
+        start = time.perf_counter()
+        try:
+            if context is None:
+                retrieval = await self._retrieve(query, 5, 3000)
+                context = retrieval.get("context", "")
+                sources = retrieval.get("sources", [])
+            
+            raw_answer = await asyncio.wait_for(
+                self._generate(provider, query, context, temperature, max_tokens),
+                timeout=timeout or SWARM_PROVIDER_TIMEOUT,
+            )
+            parsed = RAGPipeline.parse_answer(raw_answer)
             return {
                 'provider': provider,
-                'response': '',
-                'error': str(e),
+                'response': parsed.get('answer', ''),
+                'sources': sources or [],
+                'latency_ms': (time.perf_counter() - start) * 1000,
                 'timestamp': datetime.utcnow().isoformat()
             }
+        except asyncio.TimeoutError:
+            error = f"timed out after {timeout or SWARM_PROVIDER_TIMEOUT:g}s"
+        except Exception as e:
+            error = str(e)
+        
+        logger.error(f"Error querying {provider}: {error}")
+        return {
+            'provider': provider,
+            'response': '',
+            'error': error,
+            'latency_ms': (time.perf_counter() - start) * 1000,
+            'timestamp': datetime.utcnow().isoformat()
+        }
+    
+    def _build_prompts(self, query: str, context: str):
+        """Generation prompts shared by every provider"""
+        if self.rag_pipeline:
+            return self.rag_pipeline.build_prompts(query, context)
+        user_prompt = f"Context from relevant documents:\n\n{context}\n\nQuestion: {query}" if context else query
+        return DEFAULT_SYSTEM_PROMPT, user_prompt
+    
+    def _get_client(self, provider: str) -> Any:
+        """Get the async client for a provider on the running loop"""
+        loop = asyncio.get_running_loop()
+        clients = self._clients.setdefault(loop, {})
+        if provider in clients:
+            return clients[provider]
+        
+        config = self.provider_configs[provider]
+        api_key = os.getenv(config["requires_key"])
+        
+        if provider in ("openai", "moonshot"):
+            from Module4_NiruAPI.agents.llm_client import AsyncLLMClientPool
+            client = AsyncLLMClientPool.get_client(
+                api_key, config.get("base_url", "https://api.openai.com/v1")
+            )
+        elif provider == "anthropic":
+            if not ANTHROPIC_ASYNC_AVAILABLE:
+                raise RuntimeError("anthropic package not installed")
+            client = AsyncAnthropic(api_key=api_key)
+        elif provider == "gemini":
+            import google.generativeai as genai
+            genai.configure(api_key=api_key)
+            client = genai.GenerativeModel(config["model"])
+        else:
+            raise ValueError(f"Unsupported provider: {provider}")
+        
+        clients[provider] = client
+        return client
+    
+    async def _generate(
+        self,
+        provider: str,
+        query: str,
+        context: str,
+        temperature: float,
+        max_tokens: int,
+    ) -> str:
+        """Run the generation step only, on the provider's async client"""
+        system_prompt, user_prompt = self._build_prompts(query, context)
+        client = self._get_client(provider)
+        model = self.provider_configs[provider]["model"]
+        
+        if provider in ("openai", "moonshot"):
+            response = await client.chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt},
+                ],
+                temperature=temperature,
+                max_tokens=max_tokens,
+            )
+            return response.choices[0].message.content
+        
+        if provider == "anthropic":
+            response = await client.messages.create(
+                model=model,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                system=system_prompt,
+                messages=[{"role": "user", "content": user_prompt}],
+            )
+            return response.content[0].text
+        
+        # Gemini
+        import google.generativeai as genai
+        response = await client.generate_content_async(
+            f"{system_prompt}\n\n{user_prompt}",
+            generation_config=genai.types.GenerationConfig(
+                temperature=temperature,
+                max_output_tokens=max_tokens,
+            ),
+        )
+        return response.text
     
     def synthesize_responses(self, responses: List[Dict[str, Any]]) -> str:
         """
@@ -291,17 +542,15 @@ class SwarmOrchestrator:
         
         # Execute in parallel
         async def execute():
-            tasks = []
-            for subtask, provider in assignments.items():
-                task = self._query_provider(provider, f"{query}\n\nSubtask: {subtask}")
-                tasks.append((subtask, task))
-            
-            results = {}
-            for subtask, task in tasks:
-                result = await task
-                results[subtask] = result.get('response', '')
-            
-            return results
+            subtask_list = list(assignments)
+            results = await asyncio.gather(*(
+                self._query_provider(assignments[subtask], f"{query}\n\nSubtask: {subtask}")
+                for subtask in subtask_list
+            ))
+            return {
+                subtask: result.get('response', '')
+                for subtask, result in zip(subtask_list, results)
+            }
         
         # Run synchronously (in production, this would be async)
         import asyncio
@@ -0,0 +1,299 @@
+"""
+User Profiling - Persisted, incrementally refreshed user profiles
+=================================================================
+
+Profiles are built by the LLM from a user's interaction history, but never on
+the request path. Each computed profile is stored with a version and an
+interaction watermark, next to a counter of interactions since the last build:
+
+    amq:v2:profile:{user_id} -> {
+        "profile": {...},
+        "version": 3,
+        "watermark": "ISO timestamp of the newest interaction profiled",
+        "computed_at": "ISO timestamp"
+    }
+    amq:v2:profile:{user_id}:pending -> 4     (atomic INCR per turn)
+    amq:v2:profile:{user_id}:refresh         (refresh lease, SET NX)
+
+The entry node reads the stored profile (one cache GET) and counts the turn.
+Once `PROFILE_REFRESH_INTERACTIONS` new interactions have accumulated (or no
+profile exists yet) a background task recomputes it. The refresh lease keeps
+one refresh per user across workers; a refresh that fails or finds no history
+leaves the lease to expire, so the next attempt waits
+`PROFILE_REFRESH_BACKOFF` seconds instead of retrying on every turn.
+
+Storage goes through the shared RedisCache, so it falls back to process
+memory when Redis is unavailable.
+"""
+
+import asyncio
+import json
+import os
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+from loguru import logger
+
+from .optimization import RedisCache, get_cache
+
+
+PROFILE_PREFIX = "amq:v2:profile"
+PROFILE_TTL = int(os.getenv("PROFILE_CACHE_TTL", str(30 * 24 * 3600)))  # 30 days
+PROFILE_REFRESH_INTERACTIONS = int(os.getenv("PROFILE_REFRESH_INTERACTIONS", "20"))
+PROFILE_REFRESH_BACKOFF = int(os.getenv("PROFILE_REFRESH_BACKOFF", "300"))  # seconds
+PROFILE_HISTORY_LIMIT = 100
+PROFILE_MODEL = "moonshot-v1-8k"
+
+DEFAULT_TASK_GROUPS = "general legal research, case law lookup, constitutional queries, news tracking"
+
+
+@dataclass
+class ProfileRecord:
+    """A computed user profile with its refresh bookkeeping"""
+
+    user_id: str
+    profile: Dict[str, Any] = field(default_factory=dict)
+    version: int = 0
+    watermark: Optional[str] = None
+    computed_at: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ProfileRecord":
+        return cls(**{k: v for k, v in data.items() if k in cls.__dataclass_fields__})
+
+
+def build_profile_prompt(
+    user_id: str,
+    history: List[Dict[str, Any]],
+    clusters: List[Dict[str, Any]],
+) -> str:
+    """Build the LLM prompt that turns interaction history into a profile"""
+    cluster_names = [c["cluster_name"] for c in clusters]
+    cluster_descriptions = "\n".join(
+        f"- {c['cluster_name']}: {c['description']}" for c in clusters
+    ) or "No clusters available"
+
+    return f"""
+    Build a user profile from the last {len(history)} interactions of user {user_id}.
+
+    Return a JSON object with EXACTLY these keys:
+    - "expertise_level": (layperson / lawyer / researcher / journalist)
+    - "task_groups": [list of top 3 task groups from: {cluster_names if cluster_names else DEFAULT_TASK_GROUPS}]
+    - "preferred_answer_style": (concise / detailed / bullet_points / kenya_law_format)
+    - "frequent_topics": [list of frequently tracked bills or topics]
+
+    Available task clusters:
+    {cluster_descriptions}
+
+    Interactions:
+    {json.dumps(history[-20:], default=str)}
+    """
+
+
+class UserProfileService:
+    """
+    Serve stored user profiles and refresh them in the background.
+
+    Usage:
+        service = await get_profile_service()
+        profile = await service.get_profile(user_id)  # never calls the LLM
+    """
+
+    def __init__(
+        self,
+        cache: RedisCache,
+        refresh_interactions: int = PROFILE_REFRESH_INTERACTIONS,
+        ttl: int = PROFILE_TTL,
+        refresh_backoff: int = PROFILE_REFRESH_BACKOFF,
+    ):
+        """
+        Args:
+            cache: Shared Redis cache (memory fallback when Redis is down)
+            refresh_interactions: New interactions before a profile is recomputed
+            ttl: Seconds a stored profile is kept
+            refresh_backoff: Seconds before a failed or abandoned refresh is retried
+        """
+        self.cache = cache
+        self.refresh_interactions = max(1, refresh_interactions)
+        self.ttl = ttl
+        self.refresh_backoff = max(1, refresh_backoff)
+        self._refreshing: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    def _make_key(self, user_id: str) -> str:
+        return f"{PROFILE_PREFIX}:{user_id}"
+
+    def _pending_key(self, user_id: str) -> str:
+        return f"{PROFILE_PREFIX}:{user_id}:pending"
+
+    def _refresh_key(self, user_id: str) -> str:
+        return f"{PROFILE_PREFIX}:{user_id}:refresh"
+
+    async def load(self, user_id: str) -> Optional[ProfileRecord]:
+        """Read the stored profile record"""
+        raw = await self.cache.get(self._make_key(user_id))
+        if not raw:
+            return None
+        try:
+            return ProfileRecord.from_dict(json.loads(raw))
+        except (json.JSONDecodeError, TypeError) as e:
+            logger.debug(f"Discarding unreadable profile for {user_id}: {e}")
+            return None
+
+    async def save(self, record: ProfileRecord) -> bool:
+        """Write a profile record"""
+        return await self.cache.set(self._make_key(record.user_id), json.dumps(record.to_dict()), self.ttl)
+
+    async def pending_interactions(self, user_id: str) -> int:
+        """Interactions counted since the last profile build"""
+        raw = await self.cache.get(self._pending_key(user_id))
+        try:
+            return max(0, int(raw)) if raw else 0
+        except ValueError:
+            return 0
+
+    async def get_profile(self, user_id: str, record_interaction: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Get a user's stored profile, scheduling a refresh when it is due.
+
+        Args:
+            user_id: User identifier
+            record_interaction: Count this call as a new interaction
+
+        Returns:
+            The last computed profile, or None if none has been built yet
+        """
+        record = await self.load(user_id)
+
+        if record_interaction:
+            # Atomic, so concurrent turns (and workers) never lose a count
+            pending = await self.cache.incr(self._pending_key(user_id), self.ttl)
+        else:
+            pending = await self.pending_interactions(user_id)
+
+        if record is None or record.version == 0 or pending >= self.refresh_interactions:
+            self.schedule_refresh(user_id)
+
+        return record.profile if record and record.profile else None
+
+    def schedule_refresh(self, user_id: str) -> bool:
+        """
+        Recompute a profile in the background (at most one task per user in
+        this process; the refresh lease covers other workers).
+
+        Returns:
+            True if a new refresh task was started
+        """
+        if user_id in self._refreshing:
+            return False
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+
+        self._refreshing.add(user_id)
+        task = loop.create_task(self.refresh(user_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        task.add_done_callback(lambda _: self._refreshing.discard(user_id))
+        return True
+
+    async def refresh(self, user_id: str) -> Optional[ProfileRecord]:
+        """
+        Recompute a profile if there are interactions past its watermark.
+
+        DB reads and the (sync) LLM call run in a worker thread. Skipped while
+        another refresh holds the lease; the lease is released only on
+        success, so failures back off for `refresh_backoff` seconds.
+        """
+        if not await self.cache.add(self._refresh_key(user_id), datetime.utcnow().isoformat(), self.refresh_backoff):
+            return None
+
+        done = False
+        try:
+            record = await self.load(user_id) or ProfileRecord(user_id=user_id)
+            counted = await self.pending_interactions(user_id)
+            history, clusters = await asyncio.to_thread(self._load_inputs, user_id)
+            if not history:
+                return None
+
+            newest = history[-1].get("created_at")
+            if record.version and newest and record.watermark and newest <= record.watermark:
+                # Nothing new since the last build; just reset the counter
+                await self.cache.incr(self._pending_key(user_id), self.ttl, -counted)
+                done = True
+                return record
+
+            profile = await asyncio.to_thread(self._compute_profile, user_id, history, clusters)
+            if profile is None:
+                return None
+
+            record = ProfileRecord(
+                user_id=user_id,
+                profile=profile,
+                version=record.version + 1,
+                watermark=newest,
+                computed_at=datetime.utcnow().isoformat(),
+            )
+            await self.save(record)
+            # Interactions counted while the build was running stay pending
+            await self.cache.incr(self._pending_key(user_id), self.ttl, -counted)
+            done = True
+            logger.info(f"Refreshed profile for {user_id} (v{record.version}, {len(history)} interactions)")
+            return record
+        except Exception as e:
+            logger.warning(f"Failed to refresh user profile for {user_id}: {e}")
+            return None
+        finally:
+            if done:
+                await self.cache.delete(self._refresh_key(user_id))
+
+    def _load_inputs(self, user_id: str):
+        """Fetch interaction history and current task clusters (blocking)"""
+        from Module3_NiruDB.chat_manager_v2 import get_chat_manager
+
+        chat_manager = get_chat_manager()
+        history = chat_manager.get_user_interaction_history(user_id, limit=PROFILE_HISTORY_LIMIT)
+        if not history:
+            return [], []
+
+        try:
+            from Module4_NiruAPI.agents.task_clustering import ClusterAnalyzer
+            clusters = ClusterAnalyzer().get_current_clusters(limit=12)
+        except Exception as e:
+            logger.warning(f"Could not fetch clusters: {e}")
+            clusters = []
+        return history, clusters
+
+    def _compute_profile(
+        self,
+        user_id: str,
+        history: List[Dict[str, Any]],
+        clusters: List[Dict[str, Any]],
+    ) -> Optional[Dict[str, Any]]:
+        """Ask the LLM for a profile (blocking)"""
+        from .amaniq_v2 import AmaniQConfig, MoonshotClient
+
+        client = MoonshotClient.get_client(AmaniQConfig())
+        response = client.chat.completions.create(
+            model=PROFILE_MODEL,
+            messages=[{"role": "user", "content": build_profile_prompt(user_id, history, clusters)}],
+            response_format={"type": "json_object"},
+        )
+        return json.loads(response.choices[0].message.content)
+
+
+# Global instance
+_profile_service: Optional[UserProfileService] = None
+
+
+async def get_profile_service() -> UserProfileService:
+    """Get or create the global profile service"""
+    global _profile_service
+    if _profile_service is None:
+        _profile_service = UserProfileService(await get_cache())
+    return _profile_service
@@ -0,0 +1,790 @@
+"""
+AmaniBench Runner - Latency and throughput benchmark for AmaniQuery
+===================================================================
+
+Replays the AmaniBench suite (see amanibench_generator.py) against one of:
+
+- rag:   RAGPipeline.aquery
+- graph: the AmaniQ v2 LangGraph agent
+- http:  a running API (POST /api/v1/query)
+
+at several concurrency levels and writes a machine-readable JSON report with
+p50/p95/p99 latency, throughput, per-stage timings (embed, retrieve, rerank,
+generate, or per graph node) and cache hit ratios.
+
+The rag and graph targets run in-process against local stand-ins so results
+measure our code rather than provider jitter:
+- a fake OpenAI-compatible LLM server with configurable latency
+- an in-memory vector store built from the benchmark's golden facts
+- the RedisCache in-memory fallback instead of Redis
+- a memory-only generation cache, cleared between levels
+
+Usage:
+    python -m Module4_NiruAPI.amanibench_runner --target rag --concurrency 1 8 32 \\
+        --output bench/rag.json
+
+    # Compare against a previous run; exits 1 on regression
+    python -m Module4_NiruAPI.amanibench_runner --target rag --compare bench/rag.json
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from loguru import logger
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from Module4_NiruAPI.amanibench_generator import generate_amanibench
+
+
+REPORT_SCHEMA = "amanibench-perf/1"
+DEFAULT_TOLERANCE = 0.15
+
+
+# =============================================================================
+# MEASUREMENT
+# =============================================================================
+
+def percentile(samples: List[float], p: float) -> float:
+    """Nearest-rank percentile (0 for no samples)"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    idx = int(len(ordered) * p / 100)
+    return ordered[min(idx, len(ordered) - 1)]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds"""
+    return {
+        "count": len(samples),
+        "mean": round(sum(samples) / len(samples), 3) if samples else 0.0,
+        "p50": round(percentile(samples, 50), 3),
+        "p95": round(percentile(samples, 95), 3),
+        "p99": round(percentile(samples, 99), 3),
+        "max": round(max(samples), 3) if samples else 0.0,
+    }
+
+
+class StageRecorder:
+    """Thread-safe per-stage timing samples (milliseconds)"""
+
+    def __init__(self):
+        self._samples: Dict[str, List[float]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, elapsed_ms: float) -> None:
+        with self._lock:
+            self._samples[stage].append(elapsed_ms)
+
+    @contextmanager
+    def time(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, (time.perf_counter() - start) * 1000)
+
+    def wrap(self, obj: Any, method: str, stage: str) -> None:
+        """Replace `obj.method` with a version that records its duration"""
+        original = getattr(obj, method)
+
+        if asyncio.iscoroutinefunction(original):
+            async def timed(*args, **kwargs):
+                with self.time(stage):
+                    return await original(*args, **kwargs)
+        else:
+            def timed(*args, **kwargs):
+                with self.time(stage):
+                    return original(*args, **kwargs)
+
+        setattr(obj, method, timed)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._samples.clear()
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {stage: summarize(samples) for stage, samples in sorted(self._samples.items())}
+
+
+@dataclass
+class CacheCounter:
+    """Cache lookups seen by a target"""
+
+    hits: int = 0
+    misses: int = 0
+    generation_hits: int = 0
+    generation_misses: int = 0
+
+    def record(self, hit: bool) -> None:
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def record_generation(self, hit: bool) -> None:
+        if hit:
+            self.generation_hits += 1
+        else:
+            self.generation_misses += 1
+
+    def reset(self) -> None:
+        self.hits = self.misses = 0
+        self.generation_hits = self.generation_misses = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        generation_total = self.generation_hits + self.generation_misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else None,
+            "generation_hits": self.generation_hits,
+            "generation_misses": self.generation_misses,
+            "generation_hit_ratio": round(self.generation_hits / generation_total, 4) if generation_total else None,
+        }
+
+
+# =============================================================================
+# LOCAL STAND-INS
+# =============================================================================
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    """OpenAI-compatible /chat/completions (JSON or SSE) with simulated latency"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _answer(self, body: Dict[str, Any]) -> str:
+        if (body.get("response_format") or {}).get("type") == "json_object":
+            # Supervisor-shaped decision routed straight to the responder
+            return json.dumps({
+                "intent": "GENERAL_CHAT",
+                "confidence": 0.9,
+                "reasoning": "Benchmark stand-in routes every query to the responder.",
+                "direct_response": "Benchmark response.",
+                "detected_language": "en",
+            })
+        question = ""
+        for message in reversed(body.get("messages") or []):
+            if message.get("role") == "user":
+                question = str(message.get("content", ""))[-200:]
+                break
+        words = self.server.answer_words
+        return " ".join(["Kwa mujibu wa Katiba ya Kenya"] + [f"jibu{i}" for i in range(words)]) + f" ({len(question)})"
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+        answer = self._answer(body)
+        usage = {"prompt_tokens": 100, "completion_tokens": len(answer.split()), "total_tokens": 100 + len(answer.split())}
+
+        time.sleep(self.server.latency_s)
+
+        if not body.get("stream"):
+            payload = json.dumps({
+                "id": "cmpl-bench",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "bench"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": answer},
+                    "finish_reason": "stop",
+                }],
+                "usage": usage,
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        tokens = answer.split(" ")
+        for i, token in enumerate(tokens):
+            chunk = {
+                "id": "cmpl-bench",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model", "bench"),
+                "choices": [{
+                    "index": 0,
+                    "delta": {"content": token + (" " if i < len(tokens) - 1 else "")},
+                    "finish_reason": "stop" if i == len(tokens) - 1 else None,
+                }],
+            }
+            if i == len(tokens) - 1:
+                chunk["usage"] = usage
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+            if self.server.token_delay_s:
+                time.sleep(self.server.token_delay_s)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+        self.close_connection = True
+
+
+class FakeLLMServer(ThreadingHTTPServer):
+    """Local OpenAI-compatible endpoint for the in-process targets"""
+
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, latency_ms: float = 50.0, token_delay_ms: float = 0.0, answer_words: int = 60):
+        super().__init__(("127.0.0.1", 0), FakeLLMHandler)
+        self.latency_s = latency_ms / 1000
+        self.token_delay_s = token_delay_ms / 1000
+        self.answer_words = answer_words
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+    def start(self) -> "FakeLLMServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+class FakeVectorStore:
+    """
+    In-memory vector store over the benchmark's golden facts.
+
+    Embeddings are hashed bag-of-words vectors; optional sleeps stand in for
+    the embedding model and the network round-trip to the vector database.
+    """
+
+    def __init__(
+        self,
+        questions: List[Dict[str, Any]],
+        recorder: StageRecorder,
+        dim: int = 384,
+        embed_latency_ms: float = 0.0,
+        search_latency_ms: float = 0.0,
+    ):
+        self.recorder = recorder
+        self.dim = dim
+        self.embed_latency_s = embed_latency_ms / 1000
+        self.search_latency_s = search_latency_ms / 1000
+
+        self.docs: List[Dict[str, Any]] = []
+        for i, question in enumerate(questions):
+            for j, fact in enumerate(question.get("golden_answer_facts", [])):
+                text = f"{fact}. Reference material on {fact} for the question: {question['query']}"
+                self.docs.append({
+                    "id": f"bench-{i}-{j}",
+                    "text": text,
+                    "metadata": {
+                        "title": fact,
+                        "category": question["category"],
+                        "source_name": "AmaniBench",
+                        "source_url": f"https://example.org/amanibench/{i}",
+                    },
+                })
+        self.matrix = np.stack([self._embed(doc["text"]) for doc in self.docs]) if self.docs else np.zeros((0, dim))
+
+    def _embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in re.findall(r"\w+", text.lower()):
+            vector[int(hashlib.md5(token.encode()).hexdigest()[:8], 16) % self.dim] += 1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def query(
+        self,
+        query_text: str,
+        n_results: int = 5,
+        filter: Optional[Dict[str, Any]] = None,
+        namespace: Optional[Any] = None,
+        **kwargs,
+    ) -> List[Dict[str, Any]]:
+        with self.recorder.time("embed"):
+            if self.embed_latency_s:
+                time.sleep(self.embed_latency_s)
+            query_vector = self._embed(query_text)
+
+        with self.recorder.time("retrieve"):
+            if self.search_latency_s:
+                time.sleep(self.search_latency_s)
+            scores = self.matrix @ query_vector
+            results = []
+            for idx in np.argsort(-scores):
+                doc = self.docs[idx]
+                if filter and any(doc["metadata"].get(k) != v for k, v in filter.items()):
+                    continue
+                results.append({**doc, "score": float(scores[idx]), "distance": 1.0 - float(scores[idx])})
+                if len(results) >= n_results:
+                    break
+            return results
+
+
+def use_memory_cache() -> None:
+    """Make the shared RedisCache use its in-memory fallback (no Redis needed)"""
+    from Module4_NiruAPI.agents import optimization
+
+    cache = optimization.RedisCache()
+    cache._initialized = True
+    optimization._cache = cache
+
+
+def use_memory_generation_cache(counter: CacheCounter):
+    """
+    Install a memory-only generation cache as the global one (no answers
+    carried over from a local Redis) and count its lookups in `counter`
+    """
+    from Module3_NiruDB import generation_cache
+
+    cache = generation_cache.GenerationCache(use_redis=False, enabled=True)
+    original_get = cache.get
+
+    def counted_get(key):
+        # aget goes through get as well
+        cached = original_get(key)
+        counter.record_generation(cached is not None)
+        return cached
+
+    cache.get = counted_get
+    generation_cache._generation_cache = cache
+    return cache
+
+
+# =============================================================================
+# TARGETS
+# =============================================================================
+
+class BenchTarget:
+    """A system under test"""
+
+    name = "base"
+
+    def __init__(self):
+        self.recorder = StageRecorder()
+        self.cache = CacheCounter()
+
+    async def setup(self) -> None:
+        pass
+
+    async def run(self, question: Dict[str, Any]) -> Any:
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        """Clear stage samples, cache counters and warm caches between levels"""
+        self.recorder.reset()
+        self.cache.reset()
+
+    async def close(self) -> None:
+        pass
+
+
+class RAGTarget(BenchTarget):
+    """RAGPipeline.aquery against the fake vector store and LLM"""
+
+    name = "rag"
+
+    def __init__(self, questions: List[Dict[str, Any]], llm_url: str, args: argparse.Namespace):
+        super().__init__()
+        self.questions = questions
+        self.llm_url = llm_url
+        self.args = args
+        self.pipeline = None
+
+    async def setup(self) -> None:
+        os.environ["MOONSHOT_API_KEY"] = "amanibench"
+        os.environ["MOONSHOT_BASE_URL"] = self.llm_url
+        self.generation_cache = use_memory_generation_cache(self.cache)
+        from Module4_NiruAPI.rag_pipeline import RAGPipeline
+
+        vector_store = FakeVectorStore(
+            self.questions,
+            self.recorder,
+            embed_latency_ms=self.args.embed_latency_ms,
+            search_latency_ms=self.args.search_latency_ms,
+        )
+        pipeline = RAGPipeline(vector_store=vector_store, llm_provider="moonshot", model="amanibench")
+        pipeline.generation_cache = self.generation_cache
+        if pipeline.reranker is not None:
+            # Keep reranking on the stand-in LLM instead of downloading a cross-encoder
+            pipeline.reranker.cross_encoder = None
+            self.recorder.wrap(pipeline.reranker, "rerank", "rerank")
+        self.recorder.wrap(pipeline, "_generate_answer", "generate")
+
+        original_get_cache = pipeline._get_cache
+
+        def counted_get_cache(key):
+            cached = original_get_cache(key)
+            self.cache.record(cached is not None)
+            return cached
+
+        pipeline._get_cache = counted_get_cache
+        self.pipeline = pipeline
+
+    async def run(self, question: Dict[str, Any]) -> Any:
+        return await self.pipeline.aquery(question["query"], use_reranking=not self.args.no_rerank)
+
+    def reset(self) -> None:
+        super().reset()
+        self.pipeline.cache.clear()
+        self.generation_cache.clear()
+
+
+class GraphTarget(BenchTarget):
+    """AmaniQ v2 graph against the fake LLM; stages are graph nodes"""
+
+    name = "graph"
+
+    def __init__(self, llm_url: str):
+        super().__init__()
+        self.llm_url = llm_url
+        self.graph = None
+
+    async def setup(self) -> None:
+        os.environ["MOONSHOT_API_KEY"] = "amanibench"
+        os.environ["MOONSHOT_BASE_URL"] = self.llm_url
+        use_memory_cache()
+        self.generation_cache = use_memory_generation_cache(self.cache)
+        from Module4_NiruAPI.agents.amaniq_v2 import create_amaniq_v2_graph
+
+        self.graph = create_amaniq_v2_graph()
+
+    async def run(self, question: Dict[str, Any]) -> Any:
+        thread_id = f"amanibench-{time.monotonic_ns()}"
+        state = {
+            "thread_id": thread_id,
+            "messages": [{"role": "user", "content": question["query"]}],
+            "current_query": question["query"],
+            "original_question": question["query"],
+        }
+        config = {"configurable": {"thread_id": thread_id}}
+        last = time.perf_counter()
+        from_cache = False
+        async for update in self.graph.astream(state, config, stream_mode="updates"):
+            now = time.perf_counter()
+            for node, values in update.items():
+                self.recorder.record(f"node:{node}", (now - last) * 1000)
+                if node == "entry" and isinstance(values, dict):
+                    from_cache = bool(values.get("from_cache"))
+            last = now
+        self.cache.record(from_cache)
+
+    def reset(self) -> None:
+        super().reset()
+        use_memory_cache()
+        self.generation_cache.clear()
+
+    async def close(self) -> None:
+        if self.graph is None:
+            return
+        from Module4_NiruAPI.agents.llm_client import AsyncLLMClientPool
+        await AsyncLLMClientPool.close()
+
+
+class HTTPTarget(BenchTarget):
+    """A running API (server-side stages and cache are not visible)"""
+
+    name = "http"
+
+    def __init__(self, base_url: str, timeout: float = 120.0):
+        super().__init__()
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.client = None
+
+    async def setup(self) -> None:
+        import httpx
+        self.client = httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout)
+
+    async def run(self, question: Dict[str, Any]) -> Any:
+        with self.recorder.time("http"):
+            response = await self.client.post("/api/v1/query", json={"query": question["query"]})
+        response.raise_for_status()
+        return response.json()
+
+    async def close(self) -> None:
+        if self.client is not None:
+            await self.client.aclose()
+
+
+# =============================================================================
+# RUNNER
+# =============================================================================
+
+@dataclass
+class LevelResult:
+    """Results for one concurrency level"""
+
+    concurrency: int
+    requests: int = 0
+    errors: int = 0
+    wall_time_s: float = 0.0
+    latency_ms: Dict[str, float] = field(default_factory=dict)
+    stages_ms: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    cache: Dict[str, Any] = field(default_factory=dict)
+    by_category_p95_ms: Dict[str, float] = field(default_factory=dict)
+    error_samples: List[str] = field(default_factory=list)
+
+    @property
+    def throughput_rps(self) -> float:
+        ok = self.requests - self.errors
+        return ok / self.wall_time_s if self.wall_time_s > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "concurrency": self.concurrency,
+            "requests": self.requests,
+            "errors": self.errors,
+            "wall_time_s": round(self.wall_time_s, 3),
+            "throughput_rps": round(self.throughput_rps, 3),
+            "latency_ms": self.latency_ms,
+            "stages_ms": self.stages_ms,
+            "cache": self.cache,
+            "by_category_p95_ms": self.by_category_p95_ms,
+            "error_samples": self.error_samples,
+        }
+
+
+async def run_level(
+    target: BenchTarget,
+    questions: List[Dict[str, Any]],
+    concurrency: int,
+    repeat: int = 1,
+) -> LevelResult:
+    """Replay the suite `repeat` times with at most `concurrency` requests in flight"""
+    target.reset()
+    result = LevelResult(concurrency=concurrency)
+    latencies: List[float] = []
+    by_category: Dict[str, List[float]] = defaultdict(list)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(question: Dict[str, Any]) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await target.run(question)
+            except Exception as e:
+                result.errors += 1
+                if len(result.error_samples) < 5:
+                    result.error_samples.append(f"{type(e).__name__}: {e}"[:300])
+                return
+            elapsed = (time.perf_counter() - start) * 1000
+            latencies.append(elapsed)
+            by_category[question["category"]].append(elapsed)
+
+    work = [q for _ in range(repeat) for q in questions]
+    result.requests = len(work)
+    start = time.perf_counter()
+    await asyncio.gather(*(one(q) for q in work))
+    result.wall_time_s = time.perf_counter() - start
+
+    result.latency_ms = summarize(latencies)
+    result.stages_ms = target.recorder.summary()
+    result.cache = target.cache.to_dict()
+    result.by_category_p95_ms = {cat: round(percentile(s, 95), 3) for cat, s in sorted(by_category.items())}
+    return result
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, timeout=5, cwd=Path(__file__).parent,
+        ).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def build_report(target: str, levels: List[LevelResult], config: Dict[str, Any]) -> Dict[str, Any]:
+    """Assemble the JSON report"""
+    return {
+        "schema": REPORT_SCHEMA,
+        "target": target,
+        "created_at": datetime.utcnow().isoformat() + "Z",
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": config,
+        "levels": [level.to_dict() for level in levels],
+    }
+
+
+def compare_reports(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    tolerance: float = DEFAULT_TOLERANCE,
+) -> List[str]:
+    """
+    Compare two reports level by level.
+
+    Returns:
+        Regression descriptions (empty when within tolerance)
+    """
+    regressions = []
+    base_levels = {level["concurrency"]: level for level in baseline.get("levels", [])}
+
+    for level in current.get("levels", []):
+        base = base_levels.get(level["concurrency"])
+        if base is None:
+            continue
+        label = f"c={level['concurrency']}"
+
+        for metric in ("p50", "p95", "p99"):
+            old, new = base["latency_ms"].get(metric, 0), level["latency_ms"].get(metric, 0)
+            if old and new > old * (1 + tolerance):
+                regressions.append(f"{label} latency {metric}: {old:.1f}ms -> {new:.1f}ms (+{(new / old - 1) * 100:.0f}%)")
+
+        old, new = base.get("throughput_rps", 0), level.get("throughput_rps", 0)
+        if old and new < old * (1 - tolerance):
+            regressions.append(f"{label} throughput: {old:.2f} -> {new:.2f} rps ({(new / old - 1) * 100:.0f}%)")
+
+        for stage, stats in level.get("stages_ms", {}).items():
+            old = base.get("stages_ms", {}).get(stage, {}).get("p95", 0)
+            new = stats.get("p95", 0)
+            if old and new > old * (1 + tolerance):
+                regressions.append(f"{label} stage {stage} p95: {old:.1f}ms -> {new:.1f}ms")
+
+        if level.get("errors", 0) > base.get("errors", 0):
+            regressions.append(f"{label} errors: {base.get('errors', 0)} -> {level['errors']}")
+
+    return regressions
+
+
+def load_questions(path: Optional[str] = None, categories: Optional[List[str]] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Load AmaniBench questions from NDJSON (or generate them)"""
+    if path:
+        with open(path, encoding="utf-8") as f:
+            questions = [json.loads(line) for line in f if line.strip()]
+    else:
+        questions = generate_amanibench()
+    if categories:
+        questions = [q for q in questions if q["category"] in categories]
+    return questions[:limit] if limit else questions
+
+
+def print_level(target: str, level: LevelResult) -> None:
+    lat = level.latency_ms
+    cache = level.cache.get("hit_ratio")
+    print(
+        f"[{target}] c={level.concurrency:<4} n={level.requests:<5} err={level.errors:<3} "
+        f"p50={lat.get('p50', 0):8.1f}ms p95={lat.get('p95', 0):8.1f}ms p99={lat.get('p99', 0):8.1f}ms "
+        f"{level.throughput_rps:8.2f} rps  cache={'-' if cache is None else f'{cache:.0%}'}"
+    )
+    for stage, stats in level.stages_ms.items():
+        print(f"    {stage:<22} n={stats['count']:<6} p50={stats['p50']:8.2f}ms p95={stats['p95']:8.2f}ms")
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run the configured target at every concurrency level"""
+    questions = load_questions(args.questions, args.categories, args.limit)
+    server = None
+    if args.target in ("rag", "graph"):
+        server = FakeLLMServer(args.llm_latency_ms, args.token_delay_ms).start()
+
+    if args.target == "rag":
+        target: BenchTarget = RAGTarget(questions, server.base_url, args)
+    elif args.target == "graph":
+        target = GraphTarget(server.base_url)
+    else:
+        target = HTTPTarget(args.base_url)
+
+    levels = []
+    try:
+        await target.setup()
+        for concurrency in args.concurrency:
+            level = await run_level(target, questions, concurrency, args.repeat)
+            print_level(args.target, level)
+            levels.append(level)
+    finally:
+        await target.close()
+        if server is not None:
+            server.stop()
+
+    config = {
+        "questions": len(questions),
+        "repeat": args.repeat,
+        "concurrency": args.concurrency,
+        "categories": args.categories,
+        "llm_latency_ms": args.llm_latency_ms if server else None,
+        "token_delay_ms": args.token_delay_ms if server else None,
+        "embed_latency_ms": args.embed_latency_ms,
+        "search_latency_ms": args.search_latency_ms,
+        "reranking": not args.no_rerank,
+        "base_url": args.base_url if args.target == "http" else None,
+    }
+    return build_report(args.target, levels, config)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="AmaniBench latency/throughput runner")
+    parser.add_argument("--target", choices=["rag", "graph", "http"], default="rag")
+    parser.add_argument("--questions", help="AmaniBench NDJSON (default: generated suite)")
+    parser.add_argument("--categories", nargs="+", help="Only run these categories")
+    parser.add_argument("--limit", type=int, help="Use the first N questions")
+    parser.add_argument("--repeat", type=int, default=2, help="Passes over the suite per level (>1 exercises caches)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0, help="Fake LLM time to first byte")
+    parser.add_argument("--token-delay-ms", type=float, default=0.0, help="Fake LLM delay per streamed token")
+    parser.add_argument("--embed-latency-ms", type=float, default=0.0, help="Simulated embedding model latency")
+    parser.add_argument("--search-latency-ms", type=float, default=0.0, help="Simulated vector DB latency")
+    parser.add_argument("--no-rerank", action="store_true", help="Disable reranking (rag target)")
+    parser.add_argument("--base-url", default="http://localhost:8000", help="API base URL (http target)")
+    parser.add_argument("--output", help="Write the JSON report here")
+    parser.add_argument("--compare", help="Baseline report to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level=os.getenv("AMANIBENCH_LOG_LEVEL", "WARNING"))
+
+    report = asyncio.run(run_benchmark(args))
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_reports(baseline, report, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) vs {args.compare} (tolerance {args.tolerance:.0%}):")
+            for regression in regressions:
+                print(f"  - {regression}")
+            return 1
+        print(f"\nNo regressions vs {args.compare} (tolerance {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -31,6 +31,7 @@ from Module4_NiruAPI.sms_service import AfricasTalkingSMSService
 from Module3_NiruDB.chat_manager import ChatDatabaseManager
 from Module3_NiruDB.vector_store import VectorStore
 from Module3_NiruDB.metadata_manager import MetadataManager
+from Module3_NiruDB.request_tracing import TracingMiddleware
 
 # Models
 from Module4_NiruAPI.models import (
@@ -260,6 +261,13 @@ async def lifespan(app: FastAPI):
         if vector_store:
             metadata_manager = MetadataManager(vector_store)
             logger.info("Metadata manager initialized")
+            
+            # Count documents indexed before metadata facets were maintained
+            if os.getenv("METADATA_FACETS_BACKFILL_ON_STARTUP", "true").lower() == "true":
+                facet_backfill_thread = threading.Thread(
+                    target=metadata_manager.backfill_facets, daemon=True, name="metadata-facet-backfill"
+                )
+                facet_backfill_thread.start()
         else:
             metadata_manager = None
     except Exception as e:
@@ -327,11 +335,12 @@ async def lifespan(app: FastAPI):
     try:
         if vector_store and rag_pipeline:
             from Module7_NiruHybrid.integration.rag_integration import HybridRAGPipeline
-            from Module7_NiruHybrid.hybrid_encoder import HybridEncoder
+            from Module7_NiruHybrid.encoder_runtime import load_encoder
             from Module7_NiruHybrid.retention.adaptive_retriever import AdaptiveRetriever
             from Module7_NiruHybrid.config import default_config
             
-            hybrid_encoder = HybridEncoder(config=default_config.encoder)
+            # Prebuilt artifact (HYBRID_ENCODER_ARTIFACT) or eager modules
+            hybrid_encoder = load_encoder(config=default_config.encoder)
             adaptive_retriever = AdaptiveRetriever(
                 hybrid_encoder=hybrid_encoder,
                 vector_store=vector_store,
@@ -641,6 +650,16 @@ async def lifespan(app: FastAPI):
     
     # Shutdown cleanup
     logger.info("Shutting down AmaniQuery API")
+    if vision_rag_service is not None and getattr(vision_rag_service, "index_path", None):
+        try:
+            vision_rag_service.save_index()
+        except Exception as e:
+            logger.warning(f"Failed to save image embedding index: {e}")
+    try:
+        from Module4_NiruAPI.agents.llm_client import AsyncLLMClientPool
+        await AsyncLLMClientPool.close()
+    except Exception as e:
+        logger.warning(f"Failed to close LLM client pool: {e}")
     logger.info("AmaniQuery API shutdown complete")
 
 
@@ -777,6 +796,10 @@ if os.getenv("ENABLE_AUTH", "false").lower() == "true":
     app.include_router(blog_router)
     app.include_router(phone_verification_router)
 
+# Request tracing wraps everything else (added last, so it runs first);
+# see /api/admin/traces
+app.add_middleware(TracingMiddleware)
+
 # ============================================================
 # Include Routers
 # ============================================================
@@ -987,6 +1010,20 @@ async def get_stats():
         
         # Run blocking operations in thread pool
         loop = asyncio.get_event_loop()
+
+        # Exact counts from materialized metadata facets when available
+        meta_manager = metadata_manager or MetadataManager(vector_store)
+        exact_stats = await loop.run_in_executor(None, meta_manager.get_exact_statistics)
+        if exact_stats:
+            result = StatsResponse(
+                total_chunks=exact_stats["total_documents"],
+                categories=exact_stats["categories"],
+                sources=sorted(src for src in exact_stats["sources"] if src != "Unknown"),
+            )
+            if cache_manager:
+                await cache_manager.set(cache_key, result.model_dump(), ttl=60)
+            return result
+
         stats = await loop.run_in_executor(None, vector_store.get_stats)
         
         # Ensure stats is a dict and has expected keys
@@ -22,6 +22,8 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from Module3_NiruDB.vector_store import VectorStore
 from Module3_NiruDB.metadata_manager import MetadataManager
+from Module3_NiruDB.request_tracing import span, traced, bind_context
+from Module3_NiruDB.generation_cache import get_generation_cache
 
 # Reranker and Query Optimizer
 try:
@@ -48,6 +50,102 @@ class StreamingConfig:
     enable_typing_indicator: bool = True
     max_buffer_size: int = 1000  # Max characters to buffer
 
+
+# System prompt with Impact Agent instructions (widgets and legal diffs)
+DEFAULT_SYSTEM_PROMPT = """You are AmaniQuery, an AI assistant specialized in Kenyan law, parliamentary proceedings, and current affairs.
+
+CRITICAL INSTRUCTION: DETECT QUANTITATIVE POLICY QUERIES
+If the user's query involves calculating costs, levies, taxes, fines, or statutory deductions (Housing Levy, NSSF, NHIF/SHIF, PAYE, Fuel Levy, Parking Fees, etc.), you MUST output a JSON response containing an interactive widget definition.
+
+CRITICAL INSTRUCTION: DETECT LEGAL AMENDMENTS (GIT-DIFF)
+If the user's query asks about changes, amendments, new bills, or comparisons (e.g., "changed from X to Y", "amendment to section", "what is new in the bill"), you MUST output a JSON response containing a `github_diff` object.
+
+OUTPUT FORMAT:
+If a widget or diff is needed, output ONLY a JSON object with this structure:
+{
+  "answer": "Brief text explanation...",
+  "interactive_widgets": [ ... ],
+  "github_diff": {
+    "old_text": "Original legal text...",
+    "new_text": "Amended legal text...",
+    "title": "Bill Name → Section/Clause",
+    "highlight_type": "side_by_side"
+  }
+}
+
+If NO widget or diff is needed, output a standard text response.
+
+FEW-SHOT EXAMPLES FOR WIDGETS:
+... (keep existing widget examples) ...
+
+FEW-SHOT EXAMPLES FOR LEGAL DIFFS:
+
+Example 1: Housing Levy Change
+User: "How did the housing levy change in the new Finance Bill?"
+Response:
+{
+  "answer": "The Affordable Housing Levy was amended to clarify the deduction rate and matching contribution. The rate remains 1.5%, but the text now explicitly mandates the employer's matching contribution.",
+  "github_diff": {
+    "title": "Finance Bill 2024 → Clause 31B",
+    "old_text": "An employer shall pay the levy deducted under this section to the collector...",
+    "new_text": "An employer shall pay the levy deducted under this section and an equal amount as the employer's contribution to the collector...",
+    "highlight_type": "side_by_side"
+  }
+}
+
+Example 2: SHIF Rates
+User: "What is the new SHIF rate compared to NHIF?"
+Response:
+{
+  "answer": "The Social Health Insurance Fund (SHIF) introduces a flat 2.75% rate on gross household income, replacing the graduated NHIF scale.",
+  "github_diff": {
+    "title": "Social Health Insurance Act → Contribution Rate",
+    "old_text": "Contributions shall be paid at the rates specified in the Schedule (Graduated Scale: KES 150 - KES 1,700)",
+    "new_text": "Every household shall contribute to the Fund at a rate of 2.75% of the gross household income.",
+    "highlight_type": "side_by_side"
+  }
+}
+
+Example 3: VAT on Fuel
+User: "Did they increase VAT on fuel?"
+Response:
+{
+  "answer": "Yes, the Finance Act 2023 increased the VAT on petroleum products from 8% to 16%.",
+  "github_diff": {
+    "title": "Finance Act 2023 → VAT Act Amendment",
+    "old_text": "The tax shall be charged at the rate of 8 percent on the supply of petroleum products...",
+    "new_text": "The tax shall be charged at the rate of 16 percent on the supply of petroleum products...",
+    "highlight_type": "side_by_side"
+  }
+}
+
+Example 4: Traffic Fines Amendment
+User: "Amendment to traffic fines for speeding"
+Response:
+{
+  "answer": "The Traffic (Amendment) Bill proposes increasing the maximum fine for speeding offenses.",
+  "github_diff": {
+    "title": "Traffic (Amendment) Bill → Section 42",
+    "old_text": "Any person who contravenes this section shall be liable to a fine not exceeding twenty thousand shillings...",
+    "new_text": "Any person who contravenes this section shall be liable to a fine not exceeding one hundred thousand shillings...",
+    "highlight_type": "side_by_side"
+  }
+}
+
+Example 5: Excise Duty on Betting
+User: "Change in excise duty for betting"
+Response:
+{
+  "answer": "The excise duty on betting stakes was increased from 7.5% to 12.5%.",
+  "github_diff": {
+    "title": "Excise Duty Act → Betting Tax",
+    "old_text": "Excise duty on betting shall be at the rate of 7.5 percent of the amount wagered or staked.",
+    "new_text": "Excise duty on betting shall be at the rate of 12.5 percent of the amount wagered or staked.",
+    "highlight_type": "side_by_side"
+  }
+}"""
+
+
 class RAGPipeline:
     """Blazing fast RAG pipeline with streaming, parallel retrieval, and advanced caching"""
     
@@ -81,6 +179,7 @@ class RAGPipeline:
         self.semantic_cache = {}  # Semantic similarity cache
         self.query_cache = {}  # Query pattern cache
         self.response_cache = {}  # Full response cache
+        self.generation_cache = get_generation_cache()  # Answers keyed by evidence set
         
         # Streaming configuration
         self.streaming_config = StreamingConfig()
@@ -359,6 +458,7 @@ class RAGPipeline:
         key_str = json.dumps(key_data, sort_keys=True)
         return hashlib.md5(key_str.encode()).hexdigest()
     
+    @traced("cache.answer")
     def _get_cache(self, key: str) -> Optional[Dict]:
         """Get cached result if exists"""
         if key in self.cache:
@@ -709,8 +809,11 @@ class RAGPipeline:
             except Exception as e:
                 logger.warning(f"Streaming failed, falling back to regular generation: {e}")
         
-        # Fallback to regular generation
-        result = self._generate_answer(query, context, temperature, max_tokens)
+        # Fallback to regular generation (off the event loop)
+        loop = asyncio.get_event_loop()
+        result = await loop.run_in_executor(
+            None, bind_context(self._generate_answer, query, context, temperature, max_tokens)
+        )
         if isinstance(result, dict):
             answer = result.get("answer", "")
         else:
@@ -732,7 +835,7 @@ class RAGPipeline:
         """Async version of namespace determination"""
         loop = asyncio.get_event_loop()
         return await loop.run_in_executor(
-            None, self._determine_namespaces, query, category, source
+            None, bind_context(self._determine_namespaces, query, category, source)
         )
     
     async def _retrieve_session_docs_async(
@@ -768,7 +871,7 @@ class RAGPipeline:
                 logger.warning(f"Session retrieval failed: {e}")
             return []
         
-        return await loop.run_in_executor(None, _sync_retrieve)
+        return await loop.run_in_executor(None, bind_context(_sync_retrieve))
     
     def query(
         self,
@@ -836,7 +939,36 @@ class RAGPipeline:
     ) -> Dict:
         """Optimized query with parallel retrieval and smart caching"""
         
-        # Parallel namespace determination and retrieval
+        docs = self._retrieve_docs(query, top_k, category, source, session_id)
+        if docs:
+            return self._generate_answer_from_docs(
+                query, docs, temperature, max_tokens,
+                max_context_length, start_time, cache_key=self._get_cache_key(query, top_k, category, source)
+            )
+        
+        # Fallback to ensemble if no documents found
+        if len(self.ensemble_clients) > 0:
+            logger.info("Using ensemble fallback")
+            return self._query_with_ensemble(query, temperature, max_tokens, start_time)
+        
+        return {
+            "answer": "I couldn't find any relevant information to answer your question.",
+            "sources": [],
+            "query_time": time.time() - start_time,
+            "retrieved_chunks": 0,
+            "model_used": self.model,
+            "cached": False
+        }
+    
+    def _retrieve_docs(
+        self,
+        query: str,
+        top_k: int,
+        category: Optional[str] = None,
+        source: Optional[str] = None,
+        session_id: Optional[str] = None,
+    ) -> List[Dict]:
+        """Parallel retrieval (quick local search first, then namespaces and session docs)"""
         filter_dict = {}
         if category:
             filter_dict["category"] = category
@@ -847,10 +979,7 @@ class RAGPipeline:
         quick_results = self._quick_local_search_sync(query, min(top_k, 3), filter_dict)
         if quick_results:
             logger.info(f"[INFO] Quick search found {len(quick_results)} results")
-            return self._generate_answer_from_docs(
-                query, quick_results, temperature, max_tokens, 
-                max_context_length, start_time, cache_key=self._get_cache_key(query, top_k, category, source)
-            )
+            return quick_results
         
         # Parallel comprehensive search
         namespaces = self._determine_namespaces(query, category, source)
@@ -883,26 +1012,36 @@ class RAGPipeline:
             except Exception as e:
                 logger.warning(f"Retrieval failed: {e}")
         
-        # Sort by relevance and process
-        if all_docs:
-            all_docs.sort(key=lambda x: x.get("score", 0), reverse=True)
-            return self._generate_answer_from_docs(
-                query, all_docs[:top_k], temperature, max_tokens,
-                max_context_length, start_time, cache_key=self._get_cache_key(query, top_k, category, source)
-            )
+        # Sort by relevance
+        all_docs.sort(key=lambda x: x.get("score", 0), reverse=True)
+        return all_docs[:top_k]
+    
+    def retrieve_context(
+        self,
+        query: str,
+        top_k: int = 5,
+        category: Optional[str] = None,
+        source: Optional[str] = None,
+        max_context_length: int = 3000,
+        session_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Run retrieval and context packing only (no generation)
         
-        # Fallback to ensemble if no documents found
-        if len(self.ensemble_clients) > 0:
-            logger.info("Using ensemble fallback")
-            return self._query_with_ensemble(query, temperature, max_tokens, start_time)
+        Lets callers that fan generation out to several models (swarm mode)
+        pay for embedding, retrieval and packing once.
         
+        Returns:
+            Dictionary with docs, packed context, formatted sources and timing
+        """
+        start_time = time.time()
+        docs = self._retrieve_docs(query, top_k, category, source, session_id)
         return {
-            "answer": "I couldn't find any relevant information to answer your question.",
-            "sources": [],
-            "query_time": time.time() - start_time,
-            "retrieved_chunks": 0,
-            "model_used": self.model,
-            "cached": False
+            "docs": docs,
+            "context": self._prepare_context(docs, max_context_length),
+            "sources": self._format_sources(docs),
+            "context_limited": self._is_context_limited(docs),
+            "retrieval_time": time.time() - start_time,
         }
     
     def _standard_query(
@@ -997,7 +1136,7 @@ class RAGPipeline:
         
         # Prepare context and generate answer
         context = self._prepare_context(retrieved_docs, max_context_length)
-        answer = self._generate_answer(query, context, temperature, max_tokens)
+        answer = self._generate_answer(query, context, temperature, max_tokens, evidence=retrieved_docs)
         sources = self._format_sources(retrieved_docs)
         
         query_time = time.time() - start_time
@@ -1183,11 +1322,12 @@ class RAGPipeline:
         # INTELLIGENT RE-RANKING
         if use_reranking and self.reranker and len(retrieved_docs) > top_k:
             logger.info(f"Re-ranking {len(retrieved_docs)} documents")
-            retrieved_docs = await self.reranker.rerank(
-                query=query,
-                documents=retrieved_docs,
-                top_k=top_k
-            )
+            with span("rerank", candidates=len(retrieved_docs)):
+                retrieved_docs = await self.reranker.rerank(
+                    query=query,
+                    documents=retrieved_docs,
+                    top_k=top_k
+                )
             logger.info(f"After reranking: {len(retrieved_docs)} documents")
         else:
             # Fallback: sort by score and take top_k
@@ -1207,9 +1347,14 @@ class RAGPipeline:
         # Prepare context
         context = self._prepare_context(retrieved_docs, max_context_length)
         
-        # Generate answer (still sync, could be made async)
+        # Generate answer in the executor: the generation-cache lookup and the
+        # LLM call are both blocking
         logger.info("Generating answer with LLM")
-        answer = self._generate_answer(query, context, temperature, max_tokens)
+        loop = asyncio.get_event_loop()
+        answer = await loop.run_in_executor(
+            None,
+            bind_context(self._generate_answer, query, context, temperature, max_tokens, evidence=retrieved_docs),
+        )
         
         # Format sources
         sources = self._format_sources(retrieved_docs)
@@ -1245,17 +1390,18 @@ class RAGPipeline:
         
         def _sync_retrieve():
             try:
-                return self.vector_store.query(
-                    query_text=query,
-                    n_results=n_results,
-                    filter=filter_dict if filter_dict else None,
-                    namespace=namespace
-                )
+                with span("retrieve", namespace=namespace):
+                    return self.vector_store.query(
+                        query_text=query,
+                        n_results=n_results,
+                        filter=filter_dict if filter_dict else None,
+                        namespace=namespace
+                    )
             except Exception as e:
                 logger.warning(f"Failed to query namespace {namespace}: {e}")
                 return []
         
-        return await loop.run_in_executor(None, _sync_retrieve)
+        return await loop.run_in_executor(None, bind_context(_sync_retrieve))
     
     def _determine_namespaces(self, query: str, category: Optional[str] = None, source: Optional[str] = None) -> List[str]:
         """Determine which namespaces to search based on query content and filters"""
@@ -1692,7 +1838,7 @@ Combined Response:"""
             
             # 3. Generate answer with streaming (always provide response)
             logger.info("Generating streaming answer with LLM")
-            answer_stream = self._generate_answer_stream(query, context, temperature, max_tokens)
+            answer_stream = self._generate_answer_stream(query, context, temperature, max_tokens, evidence=retrieved_docs)
             
             # 4. Format sources
             sources = self._format_sources(retrieved_docs)
@@ -1720,6 +1866,7 @@ Combined Response:"""
                 "stream": False,
             }
     
+    @traced("context")
     def _prepare_context(self, docs: List[Dict], max_context_length: int = 3000) -> str:
         """Prepare context from retrieved documents with Prompt Pruning"""
         context_parts = []
@@ -1752,111 +1899,16 @@ Combined Response:"""
         
         return "\n".join(context_parts)
     
-    def _generate_answer(
+    def build_prompts(
         self,
         query: str,
         context: str,
-        temperature: float,
-        max_tokens: int,
         system_prompt: Optional[str] = None,
-    ) -> Dict[str, Any]:
-        """Generate answer using LLM, potentially with interactive widgets"""
-        
-        # System prompt with Impact Agent instructions (default if not provided)
+    ) -> tuple:
+        """Build the (system, user) prompts used for answer generation"""
         if system_prompt is None:
-            system_prompt = """You are AmaniQuery, an AI assistant specialized in Kenyan law, parliamentary proceedings, and current affairs.
-
-CRITICAL INSTRUCTION: DETECT QUANTITATIVE POLICY QUERIES
-If the user's query involves calculating costs, levies, taxes, fines, or statutory deductions (Housing Levy, NSSF, NHIF/SHIF, PAYE, Fuel Levy, Parking Fees, etc.), you MUST output a JSON response containing an interactive widget definition.
-
-CRITICAL INSTRUCTION: DETECT LEGAL AMENDMENTS (GIT-DIFF)
-If the user's query asks about changes, amendments, new bills, or comparisons (e.g., "changed from X to Y", "amendment to section", "what is new in the bill"), you MUST output a JSON response containing a `github_diff` object.
-
-OUTPUT FORMAT:
-If a widget or diff is needed, output ONLY a JSON object with this structure:
-{
-  "answer": "Brief text explanation...",
-  "interactive_widgets": [ ... ],
-  "github_diff": {
-    "old_text": "Original legal text...",
-    "new_text": "Amended legal text...",
-    "title": "Bill Name → Section/Clause",
-    "highlight_type": "side_by_side"
-  }
-}
-
-If NO widget or diff is needed, output a standard text response.
-
-FEW-SHOT EXAMPLES FOR WIDGETS:
-... (keep existing widget examples) ...
-
-FEW-SHOT EXAMPLES FOR LEGAL DIFFS:
-
-Example 1: Housing Levy Change
-User: "How did the housing levy change in the new Finance Bill?"
-Response:
-{
-  "answer": "The Affordable Housing Levy was amended to clarify the deduction rate and matching contribution. The rate remains 1.5%, but the text now explicitly mandates the employer's matching contribution.",
-  "github_diff": {
-    "title": "Finance Bill 2024 → Clause 31B",
-    "old_text": "An employer shall pay the levy deducted under this section to the collector...",
-    "new_text": "An employer shall pay the levy deducted under this section and an equal amount as the employer's contribution to the collector...",
-    "highlight_type": "side_by_side"
-  }
-}
-
-Example 2: SHIF Rates
-User: "What is the new SHIF rate compared to NHIF?"
-Response:
-{
-  "answer": "The Social Health Insurance Fund (SHIF) introduces a flat 2.75% rate on gross household income, replacing the graduated NHIF scale.",
-  "github_diff": {
-    "title": "Social Health Insurance Act → Contribution Rate",
-    "old_text": "Contributions shall be paid at the rates specified in the Schedule (Graduated Scale: KES 150 - KES 1,700)",
-    "new_text": "Every household shall contribute to the Fund at a rate of 2.75% of the gross household income.",
-    "highlight_type": "side_by_side"
-  }
-}
-
-Example 3: VAT on Fuel
-User: "Did they increase VAT on fuel?"
-Response:
-{
-  "answer": "Yes, the Finance Act 2023 increased the VAT on petroleum products from 8% to 16%.",
-  "github_diff": {
-    "title": "Finance Act 2023 → VAT Act Amendment",
-    "old_text": "The tax shall be charged at the rate of 8 percent on the supply of petroleum products...",
-    "new_text": "The tax shall be charged at the rate of 16 percent on the supply of petroleum products...",
-    "highlight_type": "side_by_side"
-  }
-}
-
-Example 4: Traffic Fines Amendment
-User: "Amendment to traffic fines for speeding"
-Response:
-{
-  "answer": "The Traffic (Amendment) Bill proposes increasing the maximum fine for speeding offenses.",
-  "github_diff": {
-    "title": "Traffic (Amendment) Bill → Section 42",
-    "old_text": "Any person who contravenes this section shall be liable to a fine not exceeding twenty thousand shillings...",
-    "new_text": "Any person who contravenes this section shall be liable to a fine not exceeding one hundred thousand shillings...",
-    "highlight_type": "side_by_side"
-  }
-}
-
-Example 5: Excise Duty on Betting
-User: "Change in excise duty for betting"
-Response:
-{
-  "answer": "The excise duty on betting stakes was increased from 7.5% to 12.5%.",
-  "github_diff": {
-    "title": "Excise Duty Act → Betting Tax",
-    "old_text": "Excise duty on betting shall be at the rate of 7.5 percent of the amount wagered or staked.",
-    "new_text": "Excise duty on betting shall be at the rate of 12.5 percent of the amount wagered or staked.",
-    "highlight_type": "side_by_side"
-  }
-}"""
-
+            system_prompt = DEFAULT_SYSTEM_PROMPT
+        
         # User prompt
         user_prompt = f"""Context from relevant documents:
 
@@ -1865,6 +1917,68 @@ Response:
 Question: {query}
 
 Provide a concise answer. If the query is quantitative (taxes/levies), output JSON with `interactive_widgets`. If it asks about amendments/changes, output JSON with `github_diff`. Otherwise, output standard text."""
+        return system_prompt, user_prompt
+    
+    @staticmethod
+    def parse_answer(raw_answer: Optional[str]) -> Dict[str, Any]:
+        """Parse a raw LLM answer (plain text or widget/diff JSON)"""
+        if not raw_answer or not raw_answer.strip():
+            logger.warning("LLM returned empty or whitespace-only response")
+            return {"answer": "I apologize, but I was unable to generate a response. Please try rephrasing your question."}
+
+        # Try to parse as JSON
+        try:
+            # Clean up potential markdown code blocks
+            clean_answer = raw_answer.strip()
+            if clean_answer.startswith("```json"):
+                clean_answer = clean_answer[7:]
+            if clean_answer.endswith("```"):
+                clean_answer = clean_answer[:-3]
+            
+            parsed_json = json.loads(clean_answer)
+            
+            # If valid JSON with answer and widgets/diff
+            if isinstance(parsed_json, dict) and "answer" in parsed_json:
+                return {
+                    "answer": parsed_json["answer"],
+                    "interactive_widgets": parsed_json.get("interactive_widgets"),
+                    "github_diff": parsed_json.get("github_diff")
+                }
+            # JSON but not our expected format, treat as text
+            return {"answer": raw_answer}
+        except json.JSONDecodeError:
+            # Not JSON, treat as standard text response
+            return {"answer": raw_answer}
+    
+    @traced("generate")
+    def _generate_answer(
+        self,
+        query: str,
+        context: str,
+        temperature: float,
+        max_tokens: int,
+        system_prompt: Optional[str] = None,
+        evidence: Optional[List[Dict]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Generate answer using LLM, potentially with interactive widgets
+        
+        When `evidence` (the retrieved docs behind `context`) is given, the
+        same question over the same chunks is served from the generation cache.
+        """
+        
+        system_prompt, user_prompt = self.build_prompts(query, context, system_prompt)
+        
+        cache_entry = None
+        if evidence:
+            cache_entry = self.generation_cache.make_key(
+                query, evidence, self.model, temperature, template=f"{system_prompt}|{max_tokens}"
+            )
+            if cache_entry:
+                cached = self.generation_cache.get(cache_entry[0])
+                if cached is not None:
+                    logger.info("Generation cache hit - skipping LLM call")
+                    return dict(cached)
 
         try:
             raw_answer = ""
@@ -1916,36 +2030,11 @@ Provide a concise answer. If the query is quantitative (taxes/levies), output JS
             else:
                 return {"answer": "LLM provider not supported"}
 
-            # Parse response
             logger.info(f"LLM response length: {len(raw_answer) if raw_answer else 0}")
-            if not raw_answer or not raw_answer.strip():
-                logger.warning("LLM returned empty or whitespace-only response")
-                return {"answer": "I apologize, but I was unable to generate a response. Please try rephrasing your question."}
-
-            # Try to parse as JSON
-            try:
-                # Clean up potential markdown code blocks
-                clean_answer = raw_answer.strip()
-                if clean_answer.startswith("```json"):
-                    clean_answer = clean_answer[7:]
-                if clean_answer.endswith("```"):
-                    clean_answer = clean_answer[:-3]
-                
-                parsed_json = json.loads(clean_answer)
-                
-                # If valid JSON with answer and widgets/diff
-                if isinstance(parsed_json, dict) and "answer" in parsed_json:
-                    return {
-                        "answer": parsed_json["answer"],
-                        "interactive_widgets": parsed_json.get("interactive_widgets"),
-                        "github_diff": parsed_json.get("github_diff")
-                    }
-                else:
-                    # JSON but not our expected format, treat as text
-                    return {"answer": raw_answer}
-            except json.JSONDecodeError:
-                # Not JSON, treat as standard text response
-                return {"answer": raw_answer}
+            result = self.parse_answer(raw_answer)
+            if cache_entry and raw_answer and raw_answer.strip():
+                self.generation_cache.set(cache_entry[0], result, cache_entry[1])
+            return result
                 
         except Exception as e:
             error_msg = str(e)
@@ -1958,6 +2047,7 @@ Provide a concise answer. If the query is quantitative (taxes/levies), output JS
         context: str,
         temperature: float,
         max_tokens: int,
+        evidence: Optional[List[Dict]] = None,
     ):
         """Generate answer using LLM with streaming"""
         # NOTE: For Impact Agent (widgets), we currently prioritize correctness over streaming.
@@ -1965,7 +2055,7 @@ Provide a concise answer. If the query is quantitative (taxes/levies), output JS
         # This ensures widgets are generated if needed, even if we can't stream them yet.
         
         # Generate full response using the widget-aware method
-        response = self._generate_answer(query, context, temperature, max_tokens)
+        response = self._generate_answer(query, context, temperature, max_tokens, evidence=evidence)
         
         # If it's a dict (standard response), extract answer
         if isinstance(response, dict):
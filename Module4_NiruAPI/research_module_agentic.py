@@ -53,8 +53,8 @@ class AgenticResearchModule:
                 self.tool_registry = ToolRegistry()
                 logger.warning("Creating new tool registry (slow path)")
             
-            # Initialize memory manager
-            self.memory_manager = AgentMemoryManager()
+            # Initialize memory manager on the pipeline's vector store (shares its query embedding cache)
+            self.memory_manager = AgentMemoryManager(vector_store=self.rag_pipeline.vector_store)
             
             # Initialize agentic research system
             self.agentic_system = AgenticResearchSystem(
@@ -161,6 +161,11 @@ def verify_session_ownership(session_id: str, user_id: Optional[str], chat_manag
     return session.user_id == user_id
 
 
+async def _db(fn, *args, **kwargs):
+    """Run a blocking chat database call in a worker thread"""
+    return await asyncio.to_thread(fn, *args, **kwargs)
+
+
 # =============================================================================
 # ENDPOINTS
 # =============================================================================
@@ -174,9 +179,8 @@ async def create_chat_session(session: ChatSessionCreate, request: Request):
         # Get user_id from auth context if available
         user_id = get_current_user_id(request) or session.user_id
         
-        session_id = chat_manager.create_session(session.title, user_id)
-        session_data = chat_manager.get_session(session_id)
-        return session_data
+        session_id = await _db(chat_manager.create_session, session.title, user_id)
+        return await _db(chat_manager.get_session, session_id)
     except Exception as e:
         logger.error(f"Error creating chat session: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -189,7 +193,7 @@ async def list_chat_sessions(request: Request, limit: int = 50):
     
     try:
         user_id = get_current_user_id(request)
-        return chat_manager.list_sessions(user_id, limit)
+        return await _db(chat_manager.list_sessions, user_id, limit)
     except Exception as e:
         logger.error(f"Error listing chat sessions: {e}")
         return []
@@ -202,10 +206,10 @@ async def get_chat_session(session_id: str, request: Request):
     
     try:
         user_id = get_current_user_id(request)
-        if not verify_session_ownership(session_id, user_id, chat_manager):
+        if not await _db(verify_session_ownership, session_id, user_id, chat_manager):
             raise HTTPException(status_code=403, detail="Access denied")
         
-        session = chat_manager.get_session(session_id)
+        session = await _db(chat_manager.get_session, session_id)
         if not session:
             raise HTTPException(status_code=404, detail="Session not found")
         return session
@@ -223,10 +227,10 @@ async def delete_chat_session(session_id: str, request: Request):
     
     try:
         user_id = get_current_user_id(request)
-        if not verify_session_ownership(session_id, user_id, chat_manager):
+        if not await _db(verify_session_ownership, session_id, user_id, chat_manager):
             raise HTTPException(status_code=403, detail="Access denied")
         
-        chat_manager.delete_session(session_id)
+        await _db(chat_manager.delete_session, session_id)
         return {"message": "Session deleted successfully"}
     except HTTPException:
         raise
@@ -242,16 +246,14 @@ async def rename_chat_session(session_id: str, payload: Dict[str, str], request:
     
     try:
         user_id = get_current_user_id(request)
-        if not verify_session_ownership(session_id, user_id, chat_manager):
+        if not await _db(verify_session_ownership, session_id, user_id, chat_manager):
             raise HTTPException(status_code=403, detail="Access denied")
         
         title = payload.get("title")
         if not title:
             raise HTTPException(status_code=400, detail="Title is required")
             
-        chat_manager.update_session_title(session_id, title)
-        session = chat_manager.get_session(session_id)
-        return session
+        return await _db(chat_manager.update_session_title, session_id, title)
     except HTTPException:
         raise
     except Exception as e:
@@ -266,10 +268,10 @@ async def add_chat_message(session_id: str, message: ChatMessageCreate, request:
     
     try:
         user_id = get_current_user_id(request)
-        if not verify_session_ownership(session_id, user_id, chat_manager):
+        if not await _db(verify_session_ownership, session_id, user_id, chat_manager):
             raise HTTPException(status_code=403, detail="Access denied")
         
-        session = chat_manager.get_session(session_id)
+        session = await _db(chat_manager.get_session, session_id)
         if not session:
             raise HTTPException(status_code=404, detail="Session not found")
         
@@ -299,16 +301,15 @@ async def add_chat_message(session_id: str, message: ChatMessageCreate, request:
                 )
         else:
             # Non-user message (e.g., system)
-            attachments_data = _get_attachments(message.attachment_ids, session_id, chat_manager)
+            attachments_data = await _get_attachments(message.attachment_ids, session_id, chat_manager)
             
-            msg_id = chat_manager.add_message(
+            return await _db(
+                chat_manager.add_message_record,
                 session_id=session_id,
                 content=message.content,
                 role=message.role,
                 attachments=attachments_data
             )
-            messages = chat_manager.get_messages(session_id, limit=1)
-            return messages[-1] if messages else None
             
     except HTTPException:
         raise
@@ -317,11 +318,94 @@ async def add_chat_message(session_id: str, message: ChatMessageCreate, request:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _sse(data: Dict[str, Any]) -> str:
+    """Format one server-sent event"""
+    return f"data: {json.dumps(data)}\n\n"
+
+
+def _rag_stream_fallback(query: str, session_id: str) -> Dict[str, Any]:
+    """Emergency fallback to the standard RAG pipeline when AmaniQ v2 fails"""
+    logger.warning("[RAG] Emergency fallback to standard RAG pipeline")
+    if _state.rag_pipeline is None:
+        raise HTTPException(status_code=503, detail="No query service available")
+    return _state.rag_pipeline.query_stream(
+        query=query,
+        top_k=3,
+        max_tokens=1000,
+        temperature=0.7,
+        session_id=session_id,
+    )
+
+
+def _iter_answer_chunks(result: Dict[str, Any]):
+    """Yield answer text from a pipeline result (token stream or full answer)"""
+    if "answer_stream" in result and result["answer_stream"] is not None:
+        for chunk in result["answer_stream"]:
+            if isinstance(chunk, str):
+                content = chunk
+            elif hasattr(chunk, 'choices') and chunk.choices:
+                delta = chunk.choices[0].delta
+                content = delta.content if hasattr(delta, 'content') else ""
+            elif hasattr(chunk, 'text'):
+                content = chunk.text
+            else:
+                content = ""
+            if content:
+                yield content
+    elif "answer" in result:
+        yield str(result["answer"])
+
+
+async def _stream_amaniq_graph(graph, initial_state: Dict[str, Any], config: Dict[str, Any], result: Dict[str, Any]):
+    """
+    Run the AmaniQ v2 graph, yielding responder stream events as they are
+    generated: {"type": "content"} tokens and a {"type": "reset"} if the
+    responder fails after some tokens went out.
+    
+    Events arrive as LangGraph custom stream events; the final state is
+    written into `result` in the usual chat result shape.
+    """
+    final_state: Dict[str, Any] = {}
+    async for mode, chunk in graph.astream(initial_state, config=config, stream_mode=["custom", "values"]):
+        if mode == "custom" and isinstance(chunk, dict):
+            if chunk.get("type") == "token" and chunk.get("content"):
+                yield {"type": "content", "content": chunk["content"]}
+            elif chunk.get("type") == "reset":
+                yield {"type": "reset", "error": chunk.get("error")}
+        elif mode == "values":
+            final_state = chunk
+    
+    sources = final_state.get("citations", [])
+    persona = final_state.get("supervisor_decision", {}).get("persona")
+    result.update({
+        "answer": final_state.get("final_response", ""),
+        "sources": sources,
+        "retrieved_chunks": len(sources),
+        "model_used": f"AmaniQ-v2-{persona or 'wanjiku'}",
+        "structured_data": {
+            "confidence": final_state.get("response_confidence", 0.0),
+            "persona": persona,
+            "intent": final_state.get("intent"),
+            "ttft_ms": final_state.get("llm_ttft_ms", {}),
+            "llm_latency_ms": final_state.get("llm_latency_ms", {}),
+        },
+    })
+    logger.info(f"[Chat] AmaniQ v2 completed with confidence {final_state.get('response_confidence', 0.0):.2f}")
+
+
 async def _handle_streaming_message(
     session_id: str, session, message: ChatMessageCreate, chat_manager,
     use_vision_rag: bool, session_images: list, user_id: Optional[str] = None
 ):
-    """Handle streaming message response"""
+    """
+    Handle streaming message response
+    
+    AmaniQ v2 answers are streamed token by token while the responder
+    generates them; their sources frame follows the content because
+    citations are only known once the graph finishes.
+    """
+    amaniq_run = None
+    
     # Process query
     if use_vision_rag:
         if _state.vision_rag_service is None or not hasattr(_state.vision_rag_service, "query"):
@@ -329,6 +413,7 @@ async def _handle_streaming_message(
         result = _state.vision_rag_service.query(
             question=message.content,
             session_images=session_images,
+            session_id=session_id,
             top_k=3,
             temperature=0.7,
             max_tokens=1000,
@@ -346,14 +431,15 @@ async def _handle_streaming_message(
             })
         result["sources"] = vision_sources
     else:
-        # Use AmaniQ v2 graph directly for all non-vision queries (REQUIRED)
+        # Use AmaniQ v2 graph directly for all non-vision queries (REQUIRED);
+        # it runs inside the SSE generator so responder tokens stream live
         logger.info("[Chat] Using AmaniQ v2 graph (System Brain)")
         try:
             # Get the AmaniQ v2 compiled graph directly
             graph = get_amaniq_v2_graph()
             
             # Get conversation history
-            messages = chat_manager.get_messages(session_id, limit=5)
+            messages = await _db(chat_manager.get_recent_messages, session_id, limit=5)
             conversation_history = [
                 {"role": msg.role, "content": msg.content}
                 for msg in messages
@@ -367,54 +453,17 @@ async def _handle_streaming_message(
                 "thread_id": session_id,
                 "user_id": user_id,
             }
-            
-            # Execute graph directly (THE BRAIN)
             config = {"configurable": {"thread_id": session_id}}
-            final_state = await graph.ainvoke(initial_state, config=config)
-            
-            # Extract result from final state
-            amaniq_result = {
-                "answer": final_state.get("final_response", ""),
-                "sources": final_state.get("citations", []),
-                "confidence": final_state.get("response_confidence", 0.0),
-                "persona": final_state.get("supervisor_decision", {}).get("persona"),
-                "intent": final_state.get("intent"),
-            }
-            
-            # Format for chat response
-            result = {
-                "answer": amaniq_result.get("answer", ""),
-                "sources": amaniq_result.get("sources", []),
-                "retrieved_chunks": len(amaniq_result.get("sources", [])),
-                "model_used": f"AmaniQ-v2-{amaniq_result.get('persona', 'wanjiku')}",
-                "structured_data": {
-                    "confidence": amaniq_result.get("confidence", 0.0),
-                    "persona": amaniq_result.get("persona"),
-                    "intent": amaniq_result.get("intent"),
-                },
-                "answer_stream": None  # Non-streaming for now
-            }
-            logger.info(f"[Chat] AmaniQ v2 completed with confidence {amaniq_result.get('confidence', 0):.2f}")
+            amaniq_run = (graph, initial_state, config)
+            result = {"sources": [], "retrieved_chunks": 0, "model_used": "AmaniQ-v2", "answer_stream": None}
         except Exception as e:
-            # ONLY on error: Fall back to standard RAG pipeline
             logger.error(f"[Chat] AmaniQ v2 CRITICAL ERROR: {e}")
-            import traceback
-            logger.error(traceback.format_exc())
-            logger.warning("[RAG] Emergency fallback to standard RAG pipeline")
-            if _state.rag_pipeline is not None:
-                result = _state.rag_pipeline.query_stream(
-                    query=message.content,
-                    top_k=3,
-                    max_tokens=1000,
-                    temperature=0.7,
-                    session_id=session_id,
-                )
-            else:
-                raise HTTPException(status_code=503, detail="No query service available")
+            result = _rag_stream_fallback(message.content, session_id)
     
     # Add user message
-    attachments_data = _get_attachments(message.attachment_ids, session_id, chat_manager)
-    chat_manager.add_message(
+    attachments_data = await _get_attachments(message.attachment_ids, session_id, chat_manager)
+    await _db(
+        chat_manager.add_message,
         session_id=session_id,
         content=message.content,
         role="user",
@@ -424,45 +473,50 @@ async def _handle_streaming_message(
     # Auto-generate title if needed
     if not session.title or session.title == "New Chat":
         try:
-            new_title = chat_manager.generate_session_title(session_id)
+            new_title = await _db(chat_manager.generate_session_title, session_id)
             logger.info(f"Auto-generated title: {new_title}")
         except Exception as e:
             logger.warning(f"Failed to auto-generate session title: {e}")
     
     async def generate_stream():
+        nonlocal result
         full_answer = ""
         try:
-            # Send sources first
+            if amaniq_run is not None:
+                try:
+                    async for event in _stream_amaniq_graph(*amaniq_run, result):
+                        if event["type"] == "reset":
+                            # The responder's fallback answer is sent whole below
+                            full_answer = ""
+                        else:
+                            full_answer += event["content"]
+                        yield _sse(event)
+                    if full_answer:
+                        full_answer = result.get("answer") or full_answer
+                except Exception as e:
+                    if full_answer:
+                        # Tell the client to drop the partial answer before the fallback's
+                        full_answer = ""
+                        yield _sse({"type": "reset", "error": str(e)})
+                    logger.error(f"[Chat] AmaniQ v2 CRITICAL ERROR: {e}")
+                    import traceback
+                    logger.error(traceback.format_exc())
+                    result = _rag_stream_fallback(message.content, session_id)
+            
+            # Send sources
             sources_data = {
                 "type": "sources",
                 "sources": result.get("sources", []),
                 "retrieved_chunks": result.get("retrieved_chunks", 0),
                 "model_used": result.get("model_used", "unknown")
             }
-            yield f"data: {json.dumps(sources_data)}\n\n"
+            yield _sse(sources_data)
             
-            # Stream the answer
-            if "answer_stream" in result and result["answer_stream"] is not None:
-                for chunk in result["answer_stream"]:
-                    if isinstance(chunk, str):
-                        content = chunk
-                    elif hasattr(chunk, 'choices') and chunk.choices:
-                        delta = chunk.choices[0].delta
-                        content = delta.content if hasattr(delta, 'content') else ""
-                    elif hasattr(chunk, 'text'):
-                        content = chunk.text
-                    else:
-                        content = ""
-                    
-                    if content:
-                        full_answer += content
-                        chunk_data = {"type": "content", "content": content}
-                        yield f"data: {json.dumps(chunk_data)}\n\n"
-            elif "answer" in result:
-                content = str(result["answer"])
-                full_answer = content
-                chunk_data = {"type": "content", "content": content}
-                yield f"data: {json.dumps(chunk_data)}\n\n"
+            # Stream the answer (unless the graph already streamed it)
+            if not full_answer:
+                for content in _iter_answer_chunks(result):
+                    full_answer += content
+                    yield _sse({"type": "content", "content": content})
             
             # Send completion
             completion_data = {
@@ -470,7 +524,7 @@ async def _handle_streaming_message(
                 "full_answer": full_answer,
                 "structured_data": result.get("structured_data")
             }
-            yield f"data: {json.dumps(completion_data)}\n\n"
+            yield _sse(completion_data)
             
         except Exception as e:
             logger.error(f"Error in streaming: {e}")
@@ -478,7 +532,8 @@ async def _handle_streaming_message(
         finally:
             # Save assistant message
             if full_answer.strip():
-                chat_manager.add_message(
+                await _db(
+                    chat_manager.add_message,
                     session_id=session_id,
                     content=full_answer,
                     role="assistant",
@@ -503,6 +558,7 @@ async def _handle_regular_message(
         result = _state.vision_rag_service.query(
             question=message.content,
             session_images=session_images,
+            session_id=session_id,
             top_k=3,
             temperature=0.7,
             max_tokens=1000,
@@ -524,7 +580,7 @@ async def _handle_regular_message(
         logger.info("[Chat] Using AmaniQ v2 agent (System Brain)")
         try:
             # Get conversation history
-            messages = chat_manager.get_messages(session_id, limit=5)
+            messages = await _db(chat_manager.get_recent_messages, session_id, limit=5)
             conversation_history = [
                 {"role": msg.role, "content": msg.content}
                 for msg in messages
@@ -568,8 +624,9 @@ async def _handle_regular_message(
                 raise HTTPException(status_code=503, detail="No query service available")
     
     # Add user message
-    attachments_data = _get_attachments(message.attachment_ids, session_id, chat_manager)
-    chat_manager.add_message(
+    attachments_data = await _get_attachments(message.attachment_ids, session_id, chat_manager)
+    await _db(
+        chat_manager.add_message,
         session_id=session_id,
         content=message.content,
         role="user",
@@ -582,7 +639,8 @@ async def _handle_regular_message(
     if result.get("reasoning_content"):
         final_content = f"<reasoning>{result['reasoning_content']}</reasoning>\n\n{final_content}"
 
-    chat_manager.add_message(
+    assistant_message = await _db(
+        chat_manager.add_message_record,
         session_id=session_id,
         content=final_content,
         role="assistant",
@@ -591,28 +649,19 @@ async def _handle_regular_message(
         sources=result.get("sources", [])
     )
     
-    # Generate title if needed
-    session = chat_manager.get_session(session_id)
-    if session and not session.title:
-        title = chat_manager.generate_session_title(session_id)
-        chat_manager.update_session_title(session_id, title)
+    # Generate title if needed (the session was loaded by the caller)
+    if not session.title:
+        await _db(chat_manager.generate_session_title, session_id)
     
-    messages = chat_manager.get_messages(session_id, limit=1)
-    return messages[-1] if messages else None
+    return assistant_message
 
 
-def _get_attachments(attachment_ids: Optional[List[str]], session_id: str, chat_manager) -> Optional[List[Dict]]:
-    """Retrieve attachment metadata from session messages"""
+async def _get_attachments(attachment_ids: Optional[List[str]], session_id: str, chat_manager) -> Optional[List[Dict]]:
+    """Resolve attachment IDs to their stored metadata"""
     if not attachment_ids:
         return None
     
-    session_messages = chat_manager.get_messages(session_id)
-    attachments_data = []
-    for msg in session_messages:
-        if msg.attachments:
-            for att in msg.attachments:
-                if att.get("id") in attachment_ids:
-                    attachments_data.append(att)
+    attachments_data = await _db(chat_manager.get_attachments, session_id, attachment_ids)
     return attachments_data if attachments_data else None
 
 
@@ -623,10 +672,10 @@ async def get_chat_messages(session_id: str, request: Request, limit: int = 100)
     
     try:
         user_id = get_current_user_id(request)
-        if not verify_session_ownership(session_id, user_id, chat_manager):
+        if not await _db(verify_session_ownership, session_id, user_id, chat_manager):
             raise HTTPException(status_code=403, detail="Access denied")
         
-        return chat_manager.get_messages(session_id, limit)
+        return await _db(chat_manager.get_messages, session_id, limit)
     except HTTPException:
         raise
     except Exception as e:
@@ -647,10 +696,10 @@ async def upload_chat_attachment(
         raise HTTPException(status_code=503, detail="Vector store not initialized")
     
     user_id = get_current_user_id(request)
-    if not verify_session_ownership(session_id, user_id, chat_manager):
+    if not await _db(verify_session_ownership, session_id, user_id, chat_manager):
         raise HTTPException(status_code=403, detail="Access denied")
     
-    session = chat_manager.get_session(session_id)
+    session = await _db(chat_manager.get_session, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
     
@@ -695,6 +744,8 @@ async def upload_chat_attachment(
                 _state.vision_storage[session_id] = []
             _state.vision_storage[session_id].extend(vision_data["images"])
         
+        await _db(chat_manager.save_attachment, session_id, result["attachment"])
+        
         return {
             "attachment": result["attachment"],
             "message": "File processed successfully",
@@ -712,7 +763,7 @@ async def get_vision_content(session_id: str, request: Request):
     chat_manager = get_chat_manager()
     
     user_id = get_current_user_id(request)
-    if not verify_session_ownership(session_id, user_id, chat_manager):
+    if not await _db(verify_session_ownership, session_id, user_id, chat_manager):
         raise HTTPException(status_code=403, detail="Access denied")
     
     session_images = _state.vision_storage.get(session_id, [])
@@ -774,7 +825,8 @@ async def submit_feedback(
             )
         
         # Add feedback
-        feedback_id = chat_manager.add_feedback(
+        feedback_id = await _db(
+            chat_manager.add_feedback,
             message_id=message_id,
             feedback_type=feedback.feedback_type,
             comment=feedback.comment,
@@ -832,14 +884,15 @@ async def submit_general_feedback(
         
         # Validate message exists
         logger.info(f"Checking message_id: {feedback.message_id}")
-        messages = chat_manager.get_messages_by_message_id(feedback.message_id)
+        messages = await _db(chat_manager.get_messages_by_message_id, feedback.message_id)
         logger.info(f"Found {len(messages)} messages for message_id: {feedback.message_id}")
         if not messages:
             logger.warning(f"Message not found: {feedback.message_id}")
             raise HTTPException(status_code=404, detail="Message not found")
         
         # Add feedback
-        feedback_id = chat_manager.add_feedback(
+        feedback_id = await _db(
+            chat_manager.add_feedback,
             message_id=feedback.message_id,
             feedback_type=feedback.feedback_type,
             comment=feedback.comment
@@ -889,7 +942,7 @@ async def get_feedback_stats():
     chat_manager = get_chat_manager()
     
     try:
-        return chat_manager.get_feedback_stats()
+        return await _db(chat_manager.get_feedback_stats)
     except Exception as e:
         logger.error(f"Error getting feedback stats: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -902,10 +955,10 @@ async def share_chat_session(session_id: str, request: Request, share_type: str
     
     try:
         user_id = get_current_user_id(request)
-        if not verify_session_ownership(session_id, user_id, chat_manager):
+        if not await _db(verify_session_ownership, session_id, user_id, chat_manager):
             raise HTTPException(status_code=403, detail="Access denied")
         
-        session = chat_manager.get_session(session_id)
+        session = await _db(chat_manager.get_session, session_id)
         if not session:
             raise HTTPException(status_code=404, detail="Session not found")
         
@@ -930,11 +983,11 @@ async def get_shared_session(session_id: str):
     chat_manager = get_chat_manager()
     
     try:
-        session = chat_manager.get_session(session_id)
+        session = await _db(chat_manager.get_session, session_id)
         if not session:
             raise HTTPException(status_code=404, detail="Session not found")
             
-        messages = chat_manager.get_messages(session_id)
+        messages = await _db(chat_manager.get_messages, session_id)
         
         return {
             "title": session.title,
@@ -507,6 +507,9 @@ async def delete_media_session(session_id: str, request: Request):
     if not success:
         raise HTTPException(status_code=404, detail="Session not found")
     
+    if _state.vision_rag_service is not None:
+        _state.vision_rag_service.image_index.remove_session(session_id)
+    
     return {"message": "Session deleted successfully"}
 
 
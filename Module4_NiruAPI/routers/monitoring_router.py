@@ -5,8 +5,11 @@ import os
 from datetime import datetime
 from typing import Optional
 from fastapi import APIRouter, HTTPException, Request, Depends
+from fastapi.responses import PlainTextResponse
 from loguru import logger
 
+from Module3_NiruDB.request_tracing import get_trace_store
+
 router = APIRouter(prefix="/api/admin", tags=["Admin", "Agent Monitoring"])
 
 
@@ -274,3 +277,78 @@ async def initiate_retrain(
     except Exception as e:
         logger.error(f"Error initiating retrain: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+# =============================================================================
+# REQUEST TRACES
+# =============================================================================
+
+def _render_waterfall(waterfall: dict, width: int = 60) -> str:
+    """Render a trace waterfall as fixed-width text bars"""
+    total = max(waterfall["duration_ms"], 0.001)
+    lines = [f"{waterfall['name']}  {waterfall['duration_ms']:.1f}ms  trace={waterfall['trace_id']}  status={waterfall['status']}"]
+    for row in waterfall["spans"]:
+        start = int(row["offset_ms"] / total * width)
+        length = max(1, int(row["duration_ms"] / total * width))
+        bar = " " * start + "█" * min(length, width - start)
+        label = ("  " * row["depth"] + row["name"])[:32]
+        lines.append(f"{label:<32} |{bar:<{width}}| {row['offset_ms']:9.1f} +{row['duration_ms']:8.1f}ms")
+    return "\n".join(lines) + "\n"
+
+
+@router.get("/traces")
+async def list_traces(
+    request: Request,
+    admin=Depends(_admin_dependency),
+    limit: int = 50,
+    path: Optional[str] = None,
+    min_ms: float = 0.0
+):
+    """List recent request traces (newest first) with per-stage totals"""
+    store = get_trace_store()
+    traces = store.recent(limit=limit, name_prefix=path, min_duration_ms=min_ms)
+    return {
+        **store.stats(),
+        "traces": [trace.to_summary() for trace in traces],
+    }
+
+
+@router.get("/traces/stages")
+async def get_stage_histograms(
+    request: Request,
+    admin=Depends(_admin_dependency),
+    buckets: bool = False
+):
+    """Streaming latency histograms (count, mean, p50-p99, max) per stage"""
+    store = get_trace_store()
+    return {
+        **store.stats(),
+        "stages": store.stage_summary(include_buckets=buckets),
+    }
+
+
+@router.post("/traces/reset")
+async def reset_traces(
+    request: Request,
+    admin=Depends(_admin_dependency)
+):
+    """Clear buffered traces and stage histograms"""
+    get_trace_store().reset()
+    return {"message": "Trace buffer and stage histograms cleared"}
+
+
+@router.get("/traces/{trace_id}")
+async def get_trace_waterfall(
+    trace_id: str,
+    request: Request,
+    admin=Depends(_admin_dependency),
+    format: str = "json"
+):
+    """Latency waterfall for one request (`format=text` renders bars)"""
+    trace = get_trace_store().get_trace(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found (it may have left the ring buffer)")
+    waterfall = trace.to_waterfall()
+    if format == "text":
+        return PlainTextResponse(_render_waterfall(waterfall))
+    return waterfall
@@ -3,6 +3,7 @@ News Aggregation API Router
 """
 from fastapi import APIRouter, Query, HTTPException, Depends
 from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 from typing import Optional, List
 from datetime import datetime, timedelta
 from pydantic import BaseModel
@@ -38,6 +39,7 @@ class NewsListResponse(BaseModel):
     total: int
     page: int
     page_size: int
+    next_cursor: Optional[str] = None
 
 
 class NewsSearchRequest(BaseModel):
@@ -50,6 +52,7 @@ class NewsSearchRequest(BaseModel):
     date_to: Optional[str] = None
     limit: int = 20
     offset: int = 0
+    cursor: Optional[str] = None
 
 
 @router.get("/", response_model=NewsListResponse)
@@ -60,32 +63,38 @@ async def list_news(
     categories: Optional[str] = Query(None, description="Comma-separated categories"),
     min_quality_score: Optional[float] = Query(None, ge=0.0, le=1.0),
     days: int = Query(7, ge=1, le=30, description="Number of days to look back"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page (overrides page)"),
 ):
     """List news articles with filtering"""
     try:
-        from Module4_NiruAPI.services.news_service import NewsService
-        service = NewsService()
+        from Module4_NiruAPI.services.news_service import get_news_service
+        service = get_news_service()
         
         source_list = sources.split(",") if sources else None
         category_list = categories.split(",") if categories else None
         
         date_from = (datetime.utcnow() - timedelta(days=days)).isoformat()
         
-        articles, total = service.get_articles(
+        result = await run_in_threadpool(
+            service.get_articles_page,
             sources=source_list,
             categories=category_list,
             min_quality_score=min_quality_score,
             date_from=date_from,
             limit=page_size,
-            offset=(page - 1) * page_size
+            offset=(page - 1) * page_size,
+            cursor=cursor
         )
         
         return NewsListResponse(
-            articles=articles,
-            total=total,
+            articles=result.articles,
+            total=result.total,
             page=page,
-            page_size=page_size
+            page_size=page_size,
+            next_cursor=result.next_cursor
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error listing news: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -95,8 +104,8 @@ async def list_news(
 async def get_article(article_id: str):
     """Get a single article by ID"""
     try:
-        from Module4_NiruAPI.services.news_service import NewsService
-        service = NewsService()
+        from Module4_NiruAPI.services.news_service import get_news_service
+        service = get_news_service()
         
         article = service.get_article_by_id(article_id)
         if not article:
@@ -114,10 +123,11 @@ async def get_article(article_id: str):
 async def search_news(request: NewsSearchRequest):
     """Search news articles semantically"""
     try:
-        from Module4_NiruAPI.services.news_service import NewsService
-        service = NewsService()
+        from Module4_NiruAPI.services.news_service import get_news_service
+        service = get_news_service()
         
-        articles, total = service.search_articles(
+        result = await run_in_threadpool(
+            service.search_articles_page,
             query=request.query,
             sources=request.sources,
             categories=request.categories,
@@ -125,15 +135,19 @@ async def search_news(request: NewsSearchRequest):
             date_from=request.date_from,
             date_to=request.date_to,
             limit=request.limit,
-            offset=request.offset
+            offset=request.offset,
+            cursor=request.cursor
         )
         
         return NewsListResponse(
-            articles=articles,
-            total=total,
+            articles=result.articles,
+            total=result.total,
             page=(request.offset // request.limit) + 1,
-            page_size=request.limit
+            page_size=request.limit,
+            next_cursor=result.next_cursor
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error searching news: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -143,8 +157,8 @@ async def search_news(request: NewsSearchRequest):
 async def list_sources():
     """List all available news sources"""
     try:
-        from Module4_NiruAPI.services.news_service import NewsService
-        service = NewsService()
+        from Module4_NiruAPI.services.news_service import get_news_service
+        service = get_news_service()
         
         sources = service.get_sources()
         return {"sources": sources}
@@ -157,8 +171,8 @@ async def list_sources():
 async def list_categories():
     """List all available categories"""
     try:
-        from Module4_NiruAPI.services.news_service import NewsService
-        service = NewsService()
+        from Module4_NiruAPI.services.news_service import get_news_service
+        service = get_news_service()
         
         categories = service.get_categories()
         return {"categories": categories}
@@ -183,6 +183,7 @@ async def query(request: QueryRequest):
                 result = _state.vision_rag_service.query(
                     question=request.query,
                     session_images=session_images,
+                    session_id=request.session_id,
                     top_k=min(request.top_k, 3),
                     temperature=request.temperature,
                     max_tokens=request.max_tokens,
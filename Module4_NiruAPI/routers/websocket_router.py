@@ -1,8 +1,16 @@
 """
 WebSocket Router for Real-time News Updates
+
+Broadcasts go through a hub that:
+- serializes each message once
+- matches articles only to sockets subscribed to their category/source
+- hands the payload to per-connection bounded queues drained by writer tasks,
+  so a slow client never delays the others (slow consumers drop messages and
+  are disconnected after too many drops)
+- accepts thread-safe publishes from sync code into the running event loop
 """
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from typing import List
+from typing import Dict, Iterable, List, Optional, Set
 from loguru import logger
 import json
 import asyncio
@@ -16,42 +24,256 @@ sys.path.insert(0, str(project_root))
 router = APIRouter()
 
 
+def _normalize_filters(values: Optional[Iterable[str]]) -> Set[str]:
+    """Normalize subscription filter values for matching"""
+    if not values:
+        return set()
+    if isinstance(values, str):
+        values = [values]
+    return {str(value).strip().lower() for value in values if str(value).strip()}
+
+
+class ClientConnection:
+    """A connected WebSocket with its send queue and subscription filters"""
+
+    def __init__(self, websocket: WebSocket, queue_size: int):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.categories: Set[str] = set()
+        self.sources: Set[str] = set()
+        self.dropped = 0
+        self.consecutive_drops = 0
+        self.sent = 0
+        self.writer_task: Optional[asyncio.Task] = None
+
+
 class ConnectionManager:
-    """Manages WebSocket connections"""
-    
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
-    
+    """Manages WebSocket connections and filtered, non-blocking fan-out"""
+
+    def __init__(
+        self,
+        queue_size: int = 100,
+        max_consecutive_drops: int = 50,
+    ):
+        """
+        Initialize connection manager
+
+        A client whose send is stuck stops draining its queue, so it starts
+        dropping messages and is disconnected after max_consecutive_drops.
+
+        Args:
+            queue_size: Messages buffered per connection before dropping
+            max_consecutive_drops: Disconnect a client after this many drops in a row
+        """
+        self.queue_size = queue_size
+        self.max_consecutive_drops = max_consecutive_drops
+
+        self.connections: Dict[WebSocket, ClientConnection] = {}
+
+        # Subscription indexes: clients without a filter live in the "any" sets
+        self._any_category: Set[ClientConnection] = set()
+        self._any_source: Set[ClientConnection] = set()
+        self._by_category: Dict[str, Set[ClientConnection]] = {}
+        self._by_source: Dict[str, Set[ClientConnection]] = {}
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.stats = {"published": 0, "delivered": 0, "dropped": 0, "slow_disconnects": 0}
+
+    @property
+    def active_connections(self) -> List[WebSocket]:
+        """Currently connected WebSockets"""
+        return list(self.connections)
+
     async def connect(self, websocket: WebSocket):
-        """Accept a new WebSocket connection"""
+        """Accept a new WebSocket connection and start its writer"""
         await websocket.accept()
-        self.active_connections.append(websocket)
-        logger.info(f"WebSocket connected. Total connections: {len(self.active_connections)}")
-    
+        self._loop = asyncio.get_running_loop()
+
+        client = ClientConnection(websocket, self.queue_size)
+        self.connections[websocket] = client
+        self._any_category.add(client)
+        self._any_source.add(client)
+        client.writer_task = asyncio.create_task(self._writer(client))
+
+        logger.info(f"WebSocket connected. Total connections: {len(self.connections)}")
+
     def disconnect(self, websocket: WebSocket):
         """Remove a WebSocket connection"""
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
-        logger.info(f"WebSocket disconnected. Total connections: {len(self.active_connections)}")
-    
-    async def broadcast(self, message: dict):
-        """Broadcast message to all connected clients"""
-        if not self.active_connections:
-            return
-        
-        message_json = json.dumps(message)
-        disconnected = []
-        
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message_json)
-            except Exception as e:
-                logger.error(f"Error sending message to WebSocket: {e}")
-                disconnected.append(connection)
-        
-        # Remove disconnected connections
-        for conn in disconnected:
-            self.disconnect(conn)
+        client = self.connections.pop(websocket, None)
+        if client is not None:
+            self._unindex(client)
+            if client.writer_task and client.writer_task is not asyncio.current_task():
+                client.writer_task.cancel()
+        logger.info(f"WebSocket disconnected. Total connections: {len(self.connections)}")
+
+    def _unindex(self, client: ClientConnection) -> None:
+        """Remove a client from the subscription indexes"""
+        self._any_category.discard(client)
+        self._any_source.discard(client)
+        for category in client.categories:
+            members = self._by_category.get(category)
+            if members is not None:
+                members.discard(client)
+                if not members:
+                    del self._by_category[category]
+        for source in client.sources:
+            members = self._by_source.get(source)
+            if members is not None:
+                members.discard(client)
+                if not members:
+                    del self._by_source[source]
+
+    def subscribe(
+        self,
+        websocket: WebSocket,
+        categories: Optional[Iterable[str]] = None,
+        sources: Optional[Iterable[str]] = None,
+    ) -> Dict[str, List[str]]:
+        """
+        Replace a connection's subscription filters
+
+        An empty filter list means "everything" for that dimension.
+
+        Returns:
+            The normalized filters now in effect
+        """
+        client = self.connections.get(websocket)
+        if client is None:
+            return {"categories": [], "sources": []}
+
+        self._unindex(client)
+        client.categories = _normalize_filters(categories)
+        client.sources = _normalize_filters(sources)
+
+        if client.categories:
+            for category in client.categories:
+                self._by_category.setdefault(category, set()).add(client)
+        else:
+            self._any_category.add(client)
+
+        if client.sources:
+            for source in client.sources:
+                self._by_source.setdefault(source, set()).add(client)
+        else:
+            self._any_source.add(client)
+
+        return {"categories": sorted(client.categories), "sources": sorted(client.sources)}
+
+    def _match(self, category: Optional[str], source: Optional[str]) -> Set[ClientConnection]:
+        """Find clients whose filters accept an article"""
+        by_category = self._any_category
+        if category:
+            by_category = by_category | self._by_category.get(category.strip().lower(), set())
+        by_source = self._any_source
+        if source:
+            by_source = by_source | self._by_source.get(source.strip().lower(), set())
+
+        if len(by_category) > len(by_source):
+            by_category, by_source = by_source, by_category
+        return by_category & by_source
+
+    def _enqueue(self, client: ClientConnection, payload: str) -> None:
+        """Queue a payload for a client without waiting"""
+        try:
+            client.queue.put_nowait(payload)
+            client.consecutive_drops = 0
+        except asyncio.QueueFull:
+            client.dropped += 1
+            client.consecutive_drops += 1
+            self.stats["dropped"] += 1
+            if client.consecutive_drops >= self.max_consecutive_drops:
+                logger.warning("Disconnecting slow WebSocket consumer")
+                self.stats["slow_disconnects"] += 1
+                self.disconnect(client.websocket)
+                asyncio.ensure_future(self._close(client.websocket))
+
+    async def _close(self, websocket: WebSocket) -> None:
+        """Close a socket, ignoring errors from already-closed sockets"""
+        try:
+            await websocket.close(code=1008)
+        except Exception:
+            pass
+
+    async def _writer(self, client: ClientConnection) -> None:
+        """Drain one client's queue; a failed send drops the client"""
+        try:
+            while True:
+                payload = await client.queue.get()
+                await client.websocket.send_text(payload)
+                client.sent += 1
+                self.stats["delivered"] += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error sending message to WebSocket: {e}")
+            self.disconnect(client.websocket)
+
+    def _fanout(self, payload: str, category: Optional[str], source: Optional[str]) -> int:
+        """Enqueue a serialized message for every matching client (loop thread only)"""
+        if not self.connections:
+            return 0
+        if category is None and source is None:
+            targets = list(self.connections.values())
+        else:
+            targets = list(self._match(category, source))
+
+        self.stats["published"] += 1
+        for client in targets:
+            self._enqueue(client, payload)
+        return len(targets)
+
+    async def send_personal(self, websocket: WebSocket, message: dict) -> None:
+        """Queue a message for one client (keeps all sends on its writer task)"""
+        client = self.connections.get(websocket)
+        if client is not None:
+            self._enqueue(client, json.dumps(message))
+
+    async def broadcast(
+        self,
+        message: dict,
+        category: Optional[str] = None,
+        source: Optional[str] = None,
+    ) -> int:
+        """
+        Broadcast message to connected clients
+
+        Args:
+            message: JSON-serializable message
+            category: Article category used for subscription matching
+            source: Article source used for subscription matching
+
+        Returns:
+            Number of clients the message was queued for
+        """
+        return self._fanout(json.dumps(message), category, source)
+
+    def publish_threadsafe(
+        self,
+        message: dict,
+        category: Optional[str] = None,
+        source: Optional[str] = None,
+    ) -> bool:
+        """
+        Publish from any thread (e.g. sync crawlers/pipelines) into the running loop
+
+        Returns:
+            True if the message was handed to the event loop
+        """
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return False
+
+        payload = json.dumps(message)
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        if running is loop:
+            self._fanout(payload, category, source)
+        else:
+            loop.call_soon_threadsafe(self._fanout, payload, category, source)
+        return True
 
 
 # Global connection manager
@@ -62,38 +284,43 @@ connection_manager = ConnectionManager()
 async def news_stream(websocket: WebSocket):
     """WebSocket endpoint for real-time news updates"""
     await connection_manager.connect(websocket)
-    
+
     try:
         # Send welcome message
-        await websocket.send_json({
+        await connection_manager.send_personal(websocket, {
             "type": "connected",
             "message": "Connected to news stream"
         })
-        
+
         # Keep connection alive and listen for messages
         while True:
             try:
                 # Wait for client message (ping/pong or subscription)
                 data = await asyncio.wait_for(websocket.receive_text(), timeout=30.0)
-                
+
                 try:
                     message = json.loads(data)
                     if message.get("type") == "ping":
-                        await websocket.send_json({"type": "pong"})
+                        await connection_manager.send_personal(websocket, {"type": "pong"})
                     elif message.get("type") == "subscribe":
                         # Handle subscription to specific sources/categories
-                        await websocket.send_json({
+                        filters = connection_manager.subscribe(
+                            websocket,
+                            categories=message.get("categories", []),
+                            sources=message.get("sources", []),
+                        )
+                        await connection_manager.send_personal(websocket, {
                             "type": "subscribed",
-                            "sources": message.get("sources", []),
-                            "categories": message.get("categories", [])
+                            "sources": filters["sources"],
+                            "categories": filters["categories"]
                         })
                 except json.JSONDecodeError:
                     pass
-                    
+
             except asyncio.TimeoutError:
                 # Send keepalive
-                await websocket.send_json({"type": "keepalive"})
-                
+                await connection_manager.send_personal(websocket, {"type": "keepalive"})
+
     except WebSocketDisconnect:
         connection_manager.disconnect(websocket)
         logger.info("WebSocket client disconnected")
@@ -102,24 +329,22 @@ async def news_stream(websocket: WebSocket):
         connection_manager.disconnect(websocket)
 
 
-def broadcast_new_article(article: dict):
-    """Broadcast a new article to all connected WebSocket clients"""
+def broadcast_new_article(article: dict) -> bool:
+    """
+    Broadcast a new article to subscribed WebSocket clients
+
+    Safe to call from sync code and from other threads; the message is
+    scheduled on the API event loop instead of creating a new loop.
+    """
     message = {
         "type": "new_article",
         "article": article
     }
-    # Run in event loop if available
-    try:
-        loop = asyncio.get_event_loop()
-        if loop.is_running():
-            asyncio.create_task(connection_manager.broadcast(message))
-        else:
-            loop.run_until_complete(connection_manager.broadcast(message))
-    except:
-        # Fallback: try to get or create event loop
-        try:
-            loop = asyncio.get_event_loop()
-            loop.run_until_complete(connection_manager.broadcast(message))
-        except:
-            logger.warning("Could not broadcast article to WebSocket clients")
-
+    published = connection_manager.publish_threadsafe(
+        message,
+        category=article.get("category"),
+        source=article.get("source_name"),
+    )
+    if not published:
+        logger.debug("No running WebSocket hub; article not broadcast")
+    return published
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Adaptive retrieval benchmark
+Runs AdaptiveRetriever.retrieve against an in-memory vector store (exact
+cosine search over random unit vectors, hashing embedding model) and
+reports queries/second and embedding-model calls per query for:
+- legacy: coarse stage queries the store by text (one extra query
+  embedding), fine stage scores candidates one at a time and encodes every
+  candidate without a stored vector on its own
+- engine: query_by_vector with stored vectors, one matrix product, and
+  batched, chunk-ID cached encoding of candidates without vectors
+
+Candidates without a stored vector are controlled by --missing. Also checks
+that both rank the same candidates when given the same coarse results.
+"""
+import sys
+import time
+import zlib
+import argparse
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import numpy as np
+import torch
+from loguru import logger
+
+from Module7_NiruHybrid.retention.adaptive_retriever import AdaptiveRetriever
+
+WORDS = (
+    "finance bill housing levy county budget parliament court ruling tax "
+    "constitution article rights land election senate governor health"
+).split()
+
+
+class HashEmbeddingModel:
+    """Bag-of-words hashing model standing in for the sentence encoder"""
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.calls = 0
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def _embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in text.split():
+            rng = np.random.default_rng(zlib.crc32(word.encode()))
+            vector += rng.standard_normal(self.dim).astype(np.float32)
+        return vector / max(np.linalg.norm(vector), 1e-8)
+
+    def encode(self, texts):
+        self.calls += 1
+        if isinstance(texts, str):
+            return self._embed(texts)
+        return np.stack([self._embed(text) for text in texts])
+
+
+class InMemoryStore:
+    """Exact cosine search; a fraction of documents returned without vectors"""
+
+    def __init__(self, docs: int, dim: int, missing: float, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        self.embedding_model = HashEmbeddingModel(dim)
+        self.texts = [" ".join(rng.choice(WORDS, size=12)) for _ in range(docs)]
+        self.vectors = self.embedding_model.encode(self.texts)
+        self.embedding_model.calls = 0
+        self.without_vector = rng.random(docs) < missing
+
+    def _results(self, query_embedding, n_results: int, with_vectors: bool) -> list:
+        scores = self.vectors @ np.asarray(query_embedding, dtype=np.float32)
+        results = []
+        for i in np.argsort(-scores)[:n_results]:
+            result = {"id": f"chunk_{i}", "text": self.texts[i], "score": float(scores[i]),
+                      "metadata": {"chunk_id": f"chunk_{i}"}}
+            if with_vectors and not self.without_vector[i]:
+                result["embedding"] = self.vectors[i].tolist()
+            results.append(result)
+        return results
+
+    def query(self, query_text: str, n_results: int = 5, filter=None, namespace=None) -> list:
+        return self._results(self.embedding_model.encode(query_text), n_results, with_vectors=False)
+
+    def query_by_vector(self, query_embedding, n_results: int = 5, filter=None, namespace=None,
+                        with_vectors: bool = False) -> list:
+        return self._results(query_embedding, n_results, with_vectors)
+
+
+# =============================================================================
+# LEGACY FINE STAGE (one candidate at a time)
+# =============================================================================
+
+class LegacyRetriever(AdaptiveRetriever):
+    def coarse_retrieval(self, query_embeddings, top_k=None, query_text=None):
+        # Text query as before, but with the real text so the results are comparable
+        return self.vector_store.query(query_text=query_text, n_results=top_k or self.coarse_top_k)
+
+    def fine_retrieval(self, query_embeddings, coarse_results, top_k=None, threshold=None):
+        top_k = top_k or self.fine_top_k
+        threshold = threshold or self.similarity_threshold
+        scored_results = []
+        for result in coarse_results:
+            if "embedding" in result:
+                doc_emb = torch.tensor(result["embedding"])
+            elif "text" in result:
+                doc_emb = self.encode_query(result["text"], use_hybrid=False)
+            else:
+                continue
+            similarity = torch.nn.functional.cosine_similarity(
+                query_embeddings.unsqueeze(0), doc_emb.unsqueeze(0)
+            ).item()
+            if similarity >= threshold:
+                result["similarity"] = similarity
+                scored_results.append(result)
+        scored_results.sort(key=lambda x: x.get("similarity", 0.0), reverse=True)
+        return scored_results[:top_k]
+
+
+def run(retriever: AdaptiveRetriever, queries: list) -> tuple:
+    """(seconds, model calls, result IDs per query)"""
+    model = retriever.vector_store.embedding_model
+    model.calls = 0
+    start = time.perf_counter()
+    ids = [[r["id"] for r in retriever.retrieve(q, use_hybrid=False, adaptive=False)] for q in queries]
+    return time.perf_counter() - start, model.calls, ids
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Adaptive retrieval benchmark")
+    parser.add_argument("--docs", type=int, default=20_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--coarse-top-k", type=int, default=50)
+    parser.add_argument("--missing", type=float, nargs="+", default=[0.0, 0.2, 1.0],
+                        help="Fraction of candidates returned without a stored vector")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    rng = np.random.default_rng(1)
+    queries = [" ".join(rng.choice(WORDS, size=4)) for _ in range(args.queries)]
+
+    ok = True
+    for missing in args.missing:
+        store = InMemoryStore(args.docs, args.dim, missing)
+        options = dict(vector_store=store, coarse_top_k=args.coarse_top_k, fine_top_k=5, similarity_threshold=0.1)
+        legacy_s, legacy_calls, legacy_ids = run(LegacyRetriever(**options), queries)
+        engine = AdaptiveRetriever(**options)
+        engine_s, engine_calls, engine_ids = run(engine, queries)
+        # Second pass: candidates without vectors now come from the chunk-ID cache
+        warm_s, warm_calls, _ = run(engine, queries)
+
+        identical = legacy_ids == engine_ids
+        ok &= identical
+        print(
+            f"  missing {missing:4.0%}  legacy {len(queries) / legacy_s:7.0f} q/s {legacy_calls / len(queries):5.1f} enc/q"
+            f"   engine {len(queries) / engine_s:7.0f} q/s {engine_calls / len(queries):4.1f} enc/q"
+            f"   warm {len(queries) / warm_s:7.0f} q/s {warm_calls / len(queries):4.1f} enc/q"
+            f"   {'same ranking' if identical else 'MISMATCH'}"
+        )
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
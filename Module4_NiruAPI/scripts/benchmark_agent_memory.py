@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Agent episodic memory benchmark
+Stores episodes in an AgentMemoryManager backed by an in-memory vector store
+(exact cosine search, hashing embedding model, fixed write latency) and
+reports, as the number of stored episodes grows:
+- store: milliseconds per store_episode, including episodes that overflow
+  short-term memory and are spilled to long-term storage
+- recall: milliseconds and embedding-model calls per recall_episodic
+
+"legacy" is the previous behaviour: substring scan of short-term episodes,
+long-term search by query text (one more query embedding) with episodes
+filtered out of the results afterwards, and spills written inside
+store_episode.
+
+Also checks that every episode, short-term or long-term, is recalled first
+when queried by its own query text.
+"""
+import sys
+import time
+import zlib
+import argparse
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import numpy as np
+from loguru import logger
+
+from Module4_NiruAPI.agents.memory.memory_manager import AgentMemoryManager
+
+WORDS = (
+    "finance bill housing levy county budget parliament court ruling tax "
+    "constitution article rights land election senate governor health"
+).split()
+
+
+class HashEmbeddingModel:
+    """Bag-of-words hashing model standing in for the sentence encoder"""
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.calls = 0
+
+    def encode(self, text: str) -> np.ndarray:
+        self.calls += 1
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in text.split():
+            rng = np.random.default_rng(zlib.crc32(word.encode()))
+            vector += rng.standard_normal(self.dim).astype(np.float32)
+        return vector / max(np.linalg.norm(vector), 1e-8)
+
+
+class InMemoryStore:
+    """Exact cosine search over one corpus shared by every namespace"""
+
+    def __init__(self, dim: int, corpus: int, write_latency: float, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        self.embedding_model = HashEmbeddingModel(dim)
+        self.write_latency = write_latency
+        self._embedding_cache = {}
+        self._indexes = {}
+        self.chunks = [
+            {"chunk_id": f"doc_{i}", "text": " ".join(rng.choice(WORDS, size=12)), "category": "legal"}
+            for i in range(corpus)
+        ]
+        self.vectors = [self.embedding_model.encode(chunk["text"]) for chunk in self.chunks]
+        self.embedding_model.calls = 0
+
+    def _get_query_embedding(self, text: str) -> list:
+        if text not in self._embedding_cache:
+            self._embedding_cache[text] = self.embedding_model.encode(text).tolist()
+        return self._embedding_cache[text]
+
+    def add_documents(self, chunks, batch_size: int = 100, namespace: str = None):
+        time.sleep(self.write_latency)
+        for chunk in chunks:
+            self.chunks.append(dict(chunk, namespace=namespace))
+            self.vectors.append(np.asarray(chunk["embedding"], dtype=np.float32))
+        self._indexes.clear()
+
+    def _search(self, query_embedding, n_results: int, namespace=None, filter=None, every: bool = False) -> list:
+        # Cached matrix per filter, standing in for the backend's indexed filtering
+        key = (every, namespace, tuple(sorted((filter or {}).items())))
+        if key not in self._indexes:
+            rows = [
+                i for i, chunk in enumerate(self.chunks)
+                if every or (chunk.get("namespace") == namespace
+                             and all(str(chunk.get(k)) == str(v) for k, v in (filter or {}).items()))
+            ]
+            self._indexes[key] = (rows, np.stack([self.vectors[i] for i in rows]) if rows else None)
+        rows, matrix = self._indexes[key]
+        if not rows:
+            return []
+        scores = matrix @ np.asarray(query_embedding, dtype=np.float32)
+        top = np.argpartition(-scores, min(n_results, len(rows)) - 1)[:n_results]
+        return [
+            {"id": self.chunks[rows[j]]["chunk_id"], "text": self.chunks[rows[j]]["text"],
+             "score": float(scores[j]), "metadata": self.chunks[rows[j]]}
+            for j in top[np.argsort(-scores[top], kind="stable")]
+        ]
+
+    def query_by_vector(self, query_embedding, n_results: int = 5, filter=None, namespace: str = None,
+                        with_vectors: bool = False) -> list:
+        results = self._search(query_embedding, n_results, namespace, filter)
+        if with_vectors:
+            for result in results:
+                result["embedding"] = result["metadata"]["embedding"]
+        return results
+
+    def query(self, query_text: str, n_results: int = 5, filter=None, namespace: str = None) -> list:
+        # No query cache: each text search embeds the query again
+        return self._search(self.embedding_model.encode(query_text), n_results, every=True)
+
+
+# =============================================================================
+# LEGACY MANAGER (substring scan, text search, spills inside the request)
+# =============================================================================
+
+class LegacyAgentMemoryManager(AgentMemoryManager):
+    def _embed(self, text):
+        return None
+
+    def _spill(self, episode_ids):
+        self._store_episodes_long_term(episode_ids)
+
+    def _store_episodes_long_term(self, episode_ids):
+        entries = [self._pending.pop(i) for i in episode_ids]
+        chunks = [
+            {"chunk_id": f"episode_{e['episode_id']}", "text": f"Query: {e['query']}",
+             "title": e["query"], "category": "episodic",
+             "embedding": self.vector_store.embedding_model.encode(e["query"])}
+            for e, _ in entries
+        ]
+        self.vector_store.add_documents(chunks)
+
+    def recall_episodic(self, query, top_k=5, query_embedding=None):
+        relevant = self._recall_by_substring(query, top_k)
+        if len(relevant) < top_k:
+            # Over-fetch and drop non-episodes afterwards
+            results = self.vector_store.query(query, n_results=(top_k - len(relevant)) * 10)
+            episodes = [r for r in results if r["metadata"].get("category") == "episodic"]
+            relevant += [{"query": r["metadata"]["title"], "source": "long_term"} for r in episodes]
+        return relevant[:top_k]
+
+
+def unique_query(i: int) -> str:
+    """A query text no other episode shares"""
+    rng = np.random.default_rng(10_000 + i)
+    return " ".join(rng.choice(WORDS, size=6)) + f" case{i} ref{i * 7919 % 10007}"
+
+
+def run(cls, sizes, args) -> dict:
+    store = InMemoryStore(args.dim, args.corpus, args.write_latency / 1000)
+    manager = cls(chat_manager=SimpleNamespace(), vector_store=store, short_term_capacity=args.capacity)
+    rows, stored, ok = [], 0, True
+
+    for size in sizes:
+        new_queries = [unique_query(i) for i in range(stored, size)]
+        for query in new_queries:
+            # Main retrieval has already embedded the query
+            store._get_query_embedding(query)
+        start = time.perf_counter()
+        for i, query in enumerate(new_queries, stored):
+            manager.store_episode(query, actions=[{"step": i}], tools=[], reflection="done")
+        store_ms = (time.perf_counter() - start) / max(1, size - stored) * 1000
+        stored = size
+        manager.flush()
+
+        picks = np.random.default_rng(size).choice(size, size=min(args.queries, size), replace=False)
+        queries = [unique_query(int(i)) for i in picks]
+        calls_before = store.embedding_model.calls
+        start = time.perf_counter()
+        recalled = [manager.recall_episodic(query, top_k=5) for query in queries]
+        recall_ms = (time.perf_counter() - start) / len(queries) * 1000
+        calls = (store.embedding_model.calls - calls_before) / len(queries)
+        hits = sum(bool(r) and r[0]["query"] == query for query, r in zip(queries, recalled))
+        ok &= hits == len(queries)
+        rows.append((size, store_ms, recall_ms, calls, hits, len(queries)))
+
+    manager.close()
+    return {"rows": rows, "ok": ok}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Agent episodic memory benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1_000, 5_000])
+    parser.add_argument("--capacity", type=int, default=100, help="Short-term episodes")
+    parser.add_argument("--corpus", type=int, default=2_000, help="Non-episode documents in the store")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--write-latency", type=float, default=20.0, help="Milliseconds per add_documents call")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    print(f"short-term capacity {args.capacity}, {args.corpus:,} corpus documents, "
+          f"write latency {args.write_latency:.0f} ms, dim {args.dim}")
+
+    results = {name: run(cls, args.sizes, args)
+               for name, cls in (("legacy", LegacyAgentMemoryManager), ("engine", AgentMemoryManager))}
+    for (size, *legacy), (_, *engine) in zip(results["legacy"]["rows"], results["engine"]["rows"]):
+        print(f"{size:,} episodes")
+        for name, (store_ms, recall_ms, calls, hits, total) in (("legacy", legacy), ("engine", engine)):
+            print(f"  {name:<7} store {store_ms:7.2f} ms   recall {recall_ms:7.2f} ms   "
+                  f"{calls:4.1f} extra embeddings/recall   recalled {hits}/{total}")
+
+    ok = results["engine"]["ok"]
+    print("PASSED" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
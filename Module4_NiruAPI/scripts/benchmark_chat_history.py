@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Load test for chat turns in long sessions
+Seeds sessions with 1k+ messages and counts the SQL statements and time per
+turn for the old full-history attachment scan / read-back flow versus indexed
+attachment lookup and write APIs that return the persisted row.
+
+Requires a database (DATABASE_URL); the benchmark sessions are deleted afterwards.
+"""
+import sys
+import time
+import uuid
+import argparse
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import event
+
+from Module3_NiruDB.chat_manager_v2 import ChatDatabaseManagerV2
+
+
+class StatementCounter:
+    """Counts SQL statements executed on an engine"""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args, **kwargs):
+        self.count += 1
+
+
+def seed_session(manager: ChatDatabaseManagerV2, messages: int, attachments: int) -> tuple:
+    """Create a session with `messages` messages; early messages carry attachments"""
+    session_id = manager.create_session("benchmark", None)
+    attachment_ids = []
+    batch = []
+    for i in range(messages):
+        atts = None
+        if i < attachments:
+            att = {"id": str(uuid.uuid4()), "filename": f"doc_{i}.pdf", "file_type": "pdf", "file_size": 1024}
+            manager.save_attachment(session_id, att)
+            attachment_ids.append(att["id"])
+            atts = [att]
+        batch.append({
+            "session_id": session_id,
+            "role": "user" if i % 2 == 0 else "assistant",
+            "content": f"Message {i} about the Finance Bill " * 4,
+            "attachments": atts,
+        })
+        if len(batch) == 500:
+            manager.add_messages_batch(batch)
+            batch = []
+    if batch:
+        manager.add_messages_batch(batch)
+    return session_id, attachment_ids
+
+
+def legacy_turn(manager, session_id: str, attachment_ids: list) -> None:
+    """Previous router flow: scan all messages for attachments, read back after writing"""
+    found = []
+    for msg in manager.get_messages(session_id, limit=None):
+        for att in msg.attachments or []:
+            if att.get("id") in attachment_ids:
+                found.append(att)
+    manager.get_messages(session_id, limit=5)
+    manager.add_message(session_id, "question", "user", attachments=found or None)
+    manager.add_message(session_id, "answer", "assistant")
+    manager.get_session(session_id)
+    manager.get_messages(session_id, limit=1)
+
+
+def indexed_turn(manager, session_id: str, attachment_ids: list) -> None:
+    """Current router flow"""
+    found = manager.get_attachments(session_id, attachment_ids)
+    manager.get_recent_messages(session_id, limit=5)
+    manager.add_message(session_id, "question", "user", attachments=found or None)
+    manager.add_message_record(session_id, "answer", "assistant")
+
+
+def run(name: str, turn, manager, counter: StatementCounter, session_id: str, attachment_ids: list, turns: int) -> None:
+    counter.count = 0
+    start = time.perf_counter()
+    for _ in range(turns):
+        turn(manager, session_id, attachment_ids[:2])
+    elapsed = (time.perf_counter() - start) / turns * 1000
+    print(f"  {name:<8} {counter.count / turns:5.1f} statements/turn  {elapsed:8.1f} ms/turn")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Chat history load test")
+    parser.add_argument("--messages", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--attachments", type=int, default=10)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    manager = ChatDatabaseManagerV2(args.database_url)
+    counter = StatementCounter(manager.engine)
+
+    for size in args.messages:
+        session_id, attachment_ids = seed_session(manager, size, args.attachments)
+        print(f"Session with {size} messages:")
+        try:
+            run("legacy", legacy_turn, manager, counter, session_id, attachment_ids, args.turns)
+            run("indexed", indexed_turn, manager, counter, session_id, attachment_ids, args.turns)
+        finally:
+            manager.delete_session(session_id)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Soak test for AmaniQ v2 checkpointers
+Runs a small conversation graph across thousands of threads and reports memory
+growth (tracemalloc) and on-disk size for MemorySaver vs the bounded SQLite store
+"""
+import sys
+import time
+import argparse
+import operator
+import tempfile
+import tracemalloc
+from pathlib import Path
+from typing import Annotated, TypedDict
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from langgraph.graph import StateGraph, END
+from langgraph.checkpoint.memory import MemorySaver
+
+from Module4_NiruAPI.agents.checkpoint_store import SQLiteCheckpointSaver
+
+
+class SoakState(TypedDict, total=False):
+    messages: Annotated[list, operator.add]
+    final_response: str
+
+
+def build_graph(checkpointer):
+    """Two-node graph shaped like an AmaniQ turn (entry -> responder)"""
+
+    def entry(state: SoakState) -> dict:
+        return {"messages": [{"role": "user", "content": "Je, Katiba inasema nini kuhusu haki? " * 8}]}
+
+    def responder(state: SoakState) -> dict:
+        answer = "Article 27 guarantees equality and freedom from discrimination. " * 20
+        return {"messages": [{"role": "assistant", "content": answer}], "final_response": answer}
+
+    workflow = StateGraph(SoakState)
+    workflow.add_node("entry", entry)
+    workflow.add_node("responder", responder)
+    workflow.set_entry_point("entry")
+    workflow.add_edge("entry", "responder")
+    workflow.add_edge("responder", END)
+    return workflow.compile(checkpointer=checkpointer)
+
+
+def soak(name: str, checkpointer, threads: int, turns: int) -> None:
+    graph = build_graph(checkpointer)
+    tracemalloc.start()
+    start = time.perf_counter()
+
+    for t in range(threads):
+        config = {"configurable": {"thread_id": f"soak-{t}"}}
+        for _ in range(turns):
+            graph.invoke({"messages": []}, config)
+        if (t + 1) % max(1, threads // 4) == 0:
+            current, _ = tracemalloc.get_traced_memory()
+            print(f"  {name:<8} {t + 1:>6} threads  heap {current / 1e6:8.1f} MB")
+
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    invocations = threads * turns
+    print(f"  {name:<8} done: {invocations / elapsed:,.0f} turns/s, heap {current / 1e6:.1f} MB (peak {peak / 1e6:.1f} MB)")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Checkpoint store soak test")
+    parser.add_argument("--threads", type=int, default=2000)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--keep", type=int, default=5, help="Checkpoints kept per thread")
+    args = parser.parse_args()
+
+    print(f"Soak: {args.threads} threads x {args.turns} turns")
+    soak("memory", MemorySaver(), args.threads, args.turns)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "amaniq_v2.db"
+        saver = SQLiteCheckpointSaver(str(path), max_checkpoints=args.keep)
+        soak("sqlite", saver, args.threads, args.turns)
+
+        rows = saver._conn.execute("SELECT COUNT(*) FROM checkpoints").fetchone()[0]
+        size = sum(p.stat().st_size for p in Path(tmp).iterdir())
+        print(f"  sqlite   {rows} checkpoints stored ({rows / args.threads:.1f}/thread), {size / 1e6:.1f} MB on disk")
+        saver.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Continual learning serving-isolation benchmark
+A serving thread encodes one query at a time (closed loop with think time)
+while a continual-learning update runs, and reports serving latency
+(p50/p95/p99) for:
+- idle: no training
+- inline: ContinualLearner.update_model() trains the serving encoder in
+  place, on another thread (as trigger_retention_update does from a request)
+- background: update_model() queues the samples; the worker trains a shadow
+  copy, validates it and hot-swaps the weights
+
+Every served query also encodes a fixed probe input. The number of distinct
+probe outputs counts the weight states serving saw. Background training must
+show at most one per published version, with no partially updated weights.
+"""
+import sys
+import time
+import argparse
+import tempfile
+import threading
+import warnings
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import numpy as np
+import torch
+from loguru import logger
+
+from Module7_NiruHybrid.hybrid_encoder import HybridEncoder
+from Module7_NiruHybrid.retention.continual_learner import ContinualLearner
+
+VOCAB_SIZE = 1000
+
+
+class ServingLoop:
+    """Closed-loop encode calls on a thread, recording latency and probe outputs"""
+
+    def __init__(self, encoder: HybridEncoder, seq_len: int, think_time: float):
+        self.encoder = encoder
+        self.seq_len = seq_len
+        self.think_time = think_time
+        self.probe = torch.randint(1, VOCAB_SIZE, (1, seq_len), generator=torch.Generator().manual_seed(0))
+        self.latencies = []
+        self.probe_outputs = set()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            query = torch.randint(1, VOCAB_SIZE, (1, self.seq_len))
+            start = time.perf_counter()
+            self.encoder.encode(input_ids=query)
+            self.latencies.append(time.perf_counter() - start)
+            probe = self.encoder.encode(input_ids=self.probe)
+            self.probe_outputs.add(probe.numpy().tobytes())
+            time.sleep(self.think_time)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def report(name: str, serving: ServingLoop, seconds: float, extra: str = "") -> None:
+    ms = np.array(serving.latencies) * 1000
+    print(
+        f"  {name:<11} p50 {np.percentile(ms, 50):7.1f} ms   p95 {np.percentile(ms, 95):7.1f} ms"
+        f"   p99 {np.percentile(ms, 99):7.1f} ms   {len(ms):4d} queries   training {seconds:5.1f} s"
+        f"   weight states {len(serving.probe_outputs)}{extra}"
+    )
+
+
+def build_learner(encoder: HybridEncoder, checkpoint_dir: Path, background: bool) -> ContinualLearner:
+    return ContinualLearner(
+        hybrid_encoder=encoder, learning_rate=1e-4, gradient_accumulation_steps=2,
+        update_frequency=10**9, checkpoint_dir=checkpoint_dir, background_training=background,
+        max_validation_regression=1.0
+    )
+
+
+def add_samples(learner: ContinualLearner, count: int, seq_len: int, embed_dim: int) -> None:
+    generator = torch.Generator().manual_seed(1)
+    for _ in range(count):
+        learner.add_generated_sample(embeddings=torch.randn(seq_len, embed_dim, generator=generator))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Continual learning serving-isolation benchmark")
+    parser.add_argument("--layers", type=int, default=2)
+    parser.add_argument("--embed-dim", type=int, default=384)
+    parser.add_argument("--seq-len", type=int, default=64)
+    parser.add_argument("--samples", type=int, default=64, help="Generated samples per update")
+    parser.add_argument("--think-time", type=float, default=0.02, help="Seconds between served queries")
+    parser.add_argument("--idle", type=float, default=3.0, help="Seconds of idle baseline")
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore")
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    torch.manual_seed(0)
+
+    def build_encoder() -> HybridEncoder:
+        torch.manual_seed(0)
+        return HybridEncoder(
+            vocab_size=VOCAB_SIZE, embed_dim=args.embed_dim, output_dim=args.embed_dim, num_layers=args.layers,
+            max_seq_length=max(128, args.seq_len), chunk_size=max(128, args.seq_len), quantize=False
+        ).eval()
+
+    print(f"threads {torch.get_num_threads()}, {args.layers} layers, seq_len {args.seq_len}, "
+          f"{args.samples} samples per update")
+    ok = True
+
+    with tempfile.TemporaryDirectory() as tmp:
+        encoder = build_encoder()
+        with ServingLoop(encoder, args.seq_len, args.think_time) as serving:
+            time.sleep(args.idle)
+        report("idle", serving, 0.0)
+
+        # Inline: training mutates the weights serving reads
+        encoder = build_encoder()
+        learner = build_learner(encoder, Path(tmp), background=False)
+        add_samples(learner, args.samples, args.seq_len, args.embed_dim)
+        with ServingLoop(encoder, args.seq_len, args.think_time) as serving:
+            time.sleep(0.5)
+            trainer = threading.Thread(target=learner.update_model)
+            start = time.perf_counter()
+            trainer.start()
+            trainer.join()
+            seconds = time.perf_counter() - start
+        report("inline", serving, seconds)
+
+        # Background: shadow copy, validation, hot swap
+        encoder = build_encoder()
+        learner = build_learner(encoder, Path(tmp), background=True)
+        add_samples(learner, args.samples, args.seq_len, args.embed_dim)
+        with ServingLoop(encoder, args.seq_len, args.think_time) as serving:
+            time.sleep(0.5)
+            start = time.perf_counter()
+            learner.update_model()
+            learner.wait_for_updates()
+            seconds = time.perf_counter() - start
+            time.sleep(0.5)
+        worker = learner.get_stats()["worker"]
+        cycle = worker["last_cycle"]
+        report("background", serving, seconds,
+               f"   version {worker['version']} ({cycle['reason']}, swap {cycle['swap_ms']:.2f} ms)")
+        learner.close()
+
+        # One state before the swap and one after, nothing in between
+        ok &= len(serving.probe_outputs) <= worker["version"] + 1
+        ok &= encoder.encode(input_ids=serving.probe).numpy().tobytes() in serving.probe_outputs
+
+    print("PASSED" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Embedding job benchmark
+Writes a synthetic *_processed.jsonl file (chunks without embeddings) and
+embeds it with a hashing embedder, reporting time and peak Python memory
+(tracemalloc) for:
+- legacy: load every chunk missing an embedding, embed them all, then
+  re-read and rewrite the whole file with the results merged in
+- engine: EmbeddingJob streaming bounded batches into the append-only
+  embedding store
+
+Then checks restartability: a run killed after a few batches, plus a torn
+write left at the end of the log, must resume without re-embedding
+committed chunks and end with every chunk's embedding readable through
+EmbeddingStore.attach (as populate_db reads them).
+"""
+import sys
+import json
+import time
+import zlib
+import argparse
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import numpy as np
+from loguru import logger
+
+from Module1_NiruSpider.scheduler.embedding_job import EmbeddingJob
+from Module3_NiruDB.embedding_store import EmbeddingStore
+
+WORDS = (
+    "finance bill housing levy county budget parliament court ruling tax "
+    "constitution article rights land election senate governor health"
+).split()
+
+
+class Killed(Exception):
+    """Stands in for a worker killed mid-run"""
+
+
+class HashEmbedder:
+    """Deterministic embedder with TextEmbedder's embed_batch interface"""
+
+    def __init__(self, dim: int, fail_after: int = None):
+        self.dim = dim
+        self.fail_after = fail_after
+        self.calls = 0
+        self.texts = 0
+
+    def embed_batch(self, texts):
+        if self.fail_after is not None and self.calls >= self.fail_after:
+            raise Killed()
+        self.calls += 1
+        self.texts += len(texts)
+        seeds = [zlib.crc32(text.encode()) for text in texts]
+        vectors = np.stack([np.random.default_rng(seed).standard_normal(self.dim) for seed in seeds])
+        return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+    def embed_chunks(self, chunks):
+        for chunk, vector in zip(chunks, self.embed_batch([c.get("text", "") for c in chunks])):
+            chunk["embedding"] = vector.tolist()
+        return chunks
+
+
+def write_processed_file(path: Path, count: int, text_words: int):
+    rng = np.random.default_rng(0)
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(count):
+            chunk = {
+                "chunk_id": f"doc_{i // 10}_chunk_{i % 10}",
+                "text": " ".join(rng.choice(WORDS, size=text_words)) + f" section {i}",
+                "title": f"Document {i // 10}",
+                "category": "Kenyan Law",
+                "source_url": f"https://example.org/doc/{i // 10}",
+            }
+            f.write(json.dumps(chunk) + "\n")
+
+
+def legacy_generate_embeddings(jsonl_file: Path, embedder: HashEmbedder):
+    """The previous generate_embeddings loop body"""
+    chunks = []
+    with open(jsonl_file, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                chunk = json.loads(line)
+                if "embedding" not in chunk or chunk.get("embedding") is None:
+                    chunks.append(chunk)
+    if chunks:
+        embedded_chunks = embedder.embed_chunks(chunks)
+        all_chunks = []
+        with open(jsonl_file, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    all_chunks.append(json.loads(line))
+        embedded_by_id = {c.get("chunk_id"): c for c in embedded_chunks}
+        for i, chunk in enumerate(all_chunks):
+            if chunk.get("chunk_id") in embedded_by_id:
+                all_chunks[i] = embedded_by_id[chunk.get("chunk_id")]
+        with open(jsonl_file, "w", encoding="utf-8") as f:
+            for chunk in all_chunks:
+                f.write(json.dumps(chunk, ensure_ascii=False, default=str) + "\n")
+
+
+def measured(fn, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(*args)
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak / 1e6
+
+
+def all_attached(jsonl_file: Path, store_root: Path, embedder: HashEmbedder, batch_size: int = 500) -> bool:
+    """Every chunk gets its own embedding back from the store"""
+    store = EmbeddingStore.for_file(jsonl_file, readonly=True, root=store_root)
+    if store is None:
+        return False
+    ok = True
+    with open(jsonl_file, "r", encoding="utf-8") as f, store:
+        lines = [line for line in f if line.strip()]
+        for i in range(0, len(lines), batch_size):
+            batch = [json.loads(line) for line in lines[i:i + batch_size]]
+            ok &= store.attach(batch) == len(batch)
+            expected = embedder.embed_batch([c["text"] for c in batch])
+            ok &= bool(np.allclose(np.array([c["embedding"] for c in batch]), expected, atol=1e-6))
+    return ok
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Embedding job benchmark")
+    parser.add_argument("--chunks", type=int, default=20_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--text-words", type=int, default=120)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--kill-after", type=int, default=5, help="Batches before the simulated kill")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    ok = True
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        source = tmp / "processed" / "kenyan_law" / "bench_processed.jsonl"
+        source.parent.mkdir(parents=True)
+        write_processed_file(source, args.chunks, args.text_words)
+        print(f"{args.chunks:,} chunks, dim {args.dim}, {source.stat().st_size / 1e6:.1f} MB processed file")
+
+        legacy_file = tmp / "legacy_processed.jsonl"
+        legacy_file.write_bytes(source.read_bytes())
+        _, seconds, peak = measured(legacy_generate_embeddings, legacy_file, HashEmbedder(args.dim))
+        print(f"  legacy   {seconds:6.2f} s   peak {peak:8.1f} MB   (file rewritten: "
+              f"{legacy_file.stat().st_size / 1e6:.1f} MB)")
+
+        root = tmp / "embeddings"
+        job = EmbeddingJob(HashEmbedder(args.dim), batch_size=args.batch_size, store_root=root)
+        progress, seconds, peak = measured(job.run, [source])
+        ok &= progress["embedded"] == args.chunks
+        print(f"  engine   {seconds:6.2f} s   peak {peak:8.1f} MB   ({progress['batches']} batches, "
+              f"{progress['embedded']:,} embedded)")
+
+        # Re-run over a fully embedded file: nothing to embed
+        embedder = HashEmbedder(args.dim)
+        progress, seconds, _ = measured(EmbeddingJob(embedder, batch_size=args.batch_size, store_root=root).run, [source])
+        ok &= embedder.texts == 0 and progress["skipped"] == args.chunks
+        print(f"  re-run   {seconds:6.2f} s   {progress['skipped']:,} skipped, {embedder.texts} embedded")
+
+        # Kill after a few batches, tear the log tail, then resume
+        root = tmp / "embeddings_restart"
+        killed = HashEmbedder(args.dim, fail_after=args.kill_after)
+        try:
+            EmbeddingJob(killed, batch_size=args.batch_size, store_root=root).run([source])
+        except Killed:
+            pass
+        log_path = next(root.rglob("*.embeddings.jsonl"))
+        with open(log_path, "ab") as f:
+            f.write(b'{"chunk_id":"doc_0_chunk_0","digest":"torn","embed')
+
+        resumed = HashEmbedder(args.dim)
+        progress = EmbeddingJob(resumed, batch_size=args.batch_size, store_root=root).run([source])
+        committed = killed.texts
+        ok &= resumed.texts == args.chunks - committed and progress["skipped"] == committed
+        print(f"  restart  killed after {committed:,} chunks, resumed with {resumed.texts:,} "
+              f"({progress['skipped']:,} skipped)")
+
+        attached = all_attached(source, root, HashEmbedder(args.dim))
+        ok &= attached
+        print(f"  readback {'all embeddings attached' if attached else 'MISMATCH'}")
+
+    print("PASSED" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
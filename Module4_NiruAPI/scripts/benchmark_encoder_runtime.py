@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Hybrid encoder inference runtime benchmark
+Encodes fixed-length batches on CPU and reports latency per batch (p50) and
+encodes/second at batch sizes 1 to 64 for:
+- eager: HybridEncoder.encode in FP32
+- torchscript-fp32 / torchscript-int8: frozen, fused TorchScript artifacts
+- onnx-fp32 / onnx-int8: onnxruntime artifacts (when onnxruntime is installed)
+
+Also reports artifact size, load time and parity (min cosine) against eager.
+"""
+import sys
+import time
+import argparse
+import tempfile
+import warnings
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import torch
+from loguru import logger
+
+from Module7_NiruHybrid.hybrid_encoder import HybridEncoder
+from Module7_NiruHybrid.encoder_runtime import ONNXRUNTIME_AVAILABLE, EncoderRuntime, export_encoder
+
+
+def time_encode(encode, input_ids: torch.Tensor, budget: float, min_repeats: int = 3) -> float:
+    """Median seconds per call, repeating until the time budget is spent"""
+    encode(input_ids)  # warm-up
+    samples = []
+    deadline = time.perf_counter() + budget
+    while len(samples) < min_repeats or time.perf_counter() < deadline:
+        start = time.perf_counter()
+        encode(input_ids)
+        samples.append(time.perf_counter() - start)
+    return sorted(samples)[len(samples) // 2]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Hybrid encoder inference runtime benchmark")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--seq-len", type=int, default=64)
+    parser.add_argument("--layers", type=int, default=6)
+    parser.add_argument("--vocab-size", type=int, default=50257)
+    parser.add_argument("--budget", type=float, default=1.0, help="Seconds of timing per configuration")
+    parser.add_argument("--eager-quantize", action="store_true",
+                        help="Eager encoder with QuantizedLinear layers (re-quantized every forward)")
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore")
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    torch.manual_seed(0)
+    encoder = HybridEncoder(
+        vocab_size=args.vocab_size, num_layers=args.layers, max_seq_length=max(128, args.seq_len),
+        chunk_size=max(128, args.seq_len), quantize=args.eager_quantize
+    ).eval()
+
+    variants = {"eager": lambda ids: encoder.encode(input_ids=ids)}
+    formats = [("torchscript", ".pt")] + ([("onnx", ".onnx")] if ONNXRUNTIME_AVAILABLE else [])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"threads {torch.get_num_threads()}, {args.layers} layers, seq_len {args.seq_len}")
+        for format, suffix in formats:
+            for quantize in (False, True):
+                name = f"{format}-{'int8' if quantize else 'fp32'}"
+                path = Path(tmp) / f"encoder_{name}{suffix}"
+                metadata = export_encoder(encoder, path, format=format, quantize=quantize)
+                start = time.perf_counter()
+                runtime = EncoderRuntime(path)
+                load_ms = (time.perf_counter() - start) * 1000
+                variants[name] = runtime.encode
+                print(
+                    f"  {name:<17} {path.stat().st_size / 1e6:6.1f} MB   load {load_ms:6.0f} ms"
+                    f"   export {metadata['export_seconds']:5.1f} s   min cosine {metadata['parity']['min_cosine']:.5f}"
+                )
+
+        print()
+        print(f"  {'batch':>5}  " + "".join(f"{name:>19}" for name in variants))
+        for batch_size in args.batch_sizes:
+            input_ids = torch.randint(1, args.vocab_size, (batch_size, args.seq_len))
+            cells = []
+            for encode in variants.values():
+                seconds = time_encode(encode, input_ids, args.budget)
+                cells.append(f"{seconds * 1000:7.1f}ms {batch_size / seconds:6.0f}/s")
+            print(f"  {batch_size:>5}  " + "".join(f"{cell:>19}" for cell in cells))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
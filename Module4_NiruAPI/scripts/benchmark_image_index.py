@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark Vision RAG image search
+Compares the per-image Python cosine loop with the vectorized ImageEmbeddingIndex
+at 1k-100k images, plus binary (.npz) vs JSON persistence
+"""
+import sys
+import json
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import numpy as np
+
+from Module4_NiruAPI.services.image_embedding_index import ImageEmbeddingIndex
+
+
+def loop_search(query: np.ndarray, embeddings: list, top_k: int) -> list:
+    """Reference implementation: one cosine similarity per image"""
+    results = []
+    for i, emb in enumerate(embeddings):
+        denom = np.linalg.norm(query) * np.linalg.norm(emb)
+        results.append((i, float(np.dot(query, emb) / denom) if denom else 0.0))
+    results.sort(key=lambda x: x[1], reverse=True)
+    return results[:top_k]
+
+
+def timed(fn, repeats: int) -> float:
+    """Average milliseconds per call"""
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark image embedding search")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Comma-separated index sizes")
+    parser.add_argument("--dimension", type=int, default=1024)
+    parser.add_argument("--sessions", type=int, default=100, help="Sessions the images are spread over")
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--skip-loop-above", type=int, default=20000, help="Skip the slow loop beyond this size")
+    args = parser.parse_args()
+    
+    rng = np.random.default_rng(0)
+    
+    print(f"{'images':>8} {'loop ms':>9} {'global ms':>10} {'session ms':>11} {'npz MB':>7} {'json MB':>8} {'load ms':>8}")
+    print("-" * 68)
+    for size in (int(s) for s in args.sizes.split(",")):
+        embeddings = rng.standard_normal((size, args.dimension)).astype(np.float32)
+        query = rng.standard_normal(args.dimension).astype(np.float32)
+        
+        index = ImageEmbeddingIndex(dimension=args.dimension, initial_capacity=size)
+        for i in range(size):
+            index.add(f"img_{i}", embeddings[i], session_id=f"s{i % args.sessions}", source="image")
+        
+        if size <= args.skip_loop_above:
+            rows = list(embeddings)
+            loop_ms = f"{timed(lambda: loop_search(query, rows, args.top_k), max(1, args.repeats // 10)):9.2f}"
+        else:
+            loop_ms = f"{'-':>9}"
+        global_ms = timed(lambda: index.search(query, args.top_k), args.repeats)
+        session_ms = timed(lambda: index.search(query, args.top_k, session_id="s1"), args.repeats)
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            npz_path = Path(tmp) / "index.npz"
+            index.save(npz_path)
+            load_ms = timed(lambda: ImageEmbeddingIndex.load(npz_path), 1)
+            npz_mb = npz_path.stat().st_size / 1e6
+            json_mb = len(json.dumps(embeddings[: min(size, 2000)].tolist())) / 1e6 * size / min(size, 2000)
+        
+        print(f"{size:>8} {loop_ms} {global_ms:>10.2f} {session_ms:>11.3f} {npz_mb:>7.1f} {json_mb:>8.1f} {load_ms:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
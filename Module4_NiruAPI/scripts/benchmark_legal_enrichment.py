@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Legal metadata enrichment throughput benchmark
+Generates constitution-style chunks ("Article 43 - Economic and social
+rights" with numbered clauses) and bill-style chunks (parts, clauses and
+headings) and reports chunks/second for:
+- legacy: one regex scan per reference kind, the article title pattern
+  compiled per chunk and nested keyword loops per subject
+- engine: LegalMetadataEnricher.enrich_batch (literal-anchored reference
+  scans and keyword index)
+
+Every run also checks that both produce identical metadata.
+"""
+import sys
+import time
+import copy
+import random
+import argparse
+import re
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from loguru import logger
+
+from Module2_NiruParser.enrichers.legal_metadata_enricher import LegalMetadataEnricher
+
+WORDS = (
+    "every person has the right to life and the state shall not deprive any "
+    "citizen of property except in accordance with law national government "
+    "county assembly shall ensure public finance budget revenue levy housing "
+    "health education security energy trade the cabinet secretary may by order"
+).split()
+HEADINGS = ["Economic and social rights", "Protection of right to property", "Citizenship by birth",
+            "Devolved government", "Imposition of tax", "Freedom of expression"]
+
+
+def generate_chunks(count: int, kind: str, seed: int = 1) -> list:
+    """Constitution or bill chunks of roughly 1.5 KB"""
+    rng = random.Random(seed)
+    chunks = []
+    for i in range(count):
+        lines = []
+        if kind == "constitution":
+            lines.append(f"Article {rng.randint(1, 264)}{rng.choice(['', 'A'])} - {rng.choice(HEADINGS)}")
+            for clause in range(1, rng.randint(3, 7)):
+                lines.append(f"({clause}) " + " ".join(rng.choices(WORDS, k=rng.randint(20, 40))))
+            title, url = "Constitution of Kenya 2010", "https://kenyalaw.org/constitution"
+        else:
+            lines.append(rng.choice(HEADINGS).upper())
+            lines.append(f"PART {rng.choice(['I', 'II', 'III', 'IV', 'V'])}")
+            for _ in range(rng.randint(3, 6)):
+                lines.append(f"Clause {rng.randint(1, 120)} " + " ".join(rng.choices(WORDS, k=rng.randint(20, 40))))
+                if rng.random() < 0.5:
+                    lines.append(f"Section {rng.randint(1, 90)}({rng.randint(1, 5)}) of the principal Act is amended")
+            title, url = f"The Finance Bill {rng.randint(2018, 2025)}", "https://parliament.go.ke/bills"
+        chunks.append({"text": "\n".join(lines), "title": title, "source_url": url, "chunk_index": i})
+    return chunks
+
+
+# =============================================================================
+# LEGACY ENRICHMENT (one scan per reference kind)
+# =============================================================================
+
+def _legacy_heading(text):
+    for line in text.split('\n')[:5]:
+        line = line.strip()
+        if line.isupper() and 5 < len(line) < 100:
+            return line.title()
+        if re.match(r'^[A-Z][^.!?]*$', line) and 5 < len(line) < 100:
+            return line
+    return None
+
+
+def _legacy_subjects(text, title, subject_keywords):
+    text_lower = (text + " " + title).lower()
+    return [s for s, keywords in subject_keywords.items() if any(k in text_lower for k in keywords)]
+
+
+def legacy_enrich(chunk: dict) -> dict:
+    text, title = chunk.get("text", ""), chunk.get("title", "")
+    if "constitution" in title.lower() or "constitution" in chunk.get("source_url", "").lower():
+        match = re.compile(r'Article\s+(\d+[A-Z]?)', re.IGNORECASE).search(text)
+        if match:
+            chunk["article_number"] = match.group(1)
+        title_match = re.compile(r'Article\s+\d+[A-Z]?\s*[-–—]\s*([^\n\r]+)', re.IGNORECASE).search(text)
+        if title_match:
+            chunk["article_title"] = title_match.group(1).strip()
+        elif "article_title" not in chunk:
+            chunk["article_title"] = _legacy_heading(text)
+        clauses = re.compile(r'\((\d+[a-z]?)\)').findall(text)
+        if clauses:
+            chunk["clause"], chunk["all_clauses"] = clauses[0], clauses
+        match = re.compile(r'Section\s+(\d+)', re.IGNORECASE).search(text)
+        if match:
+            chunk["section"] = match.group(1)
+        chunk["legal_subjects"] = _legacy_subjects(text, title, {
+            "rights": ["right", "rights", "freedom", "liberty"],
+            "economic_rights": ["property", "housing", "economic", "social"],
+            "governance": ["government", "parliament", "executive", "judiciary"],
+            "taxation": ["tax", "levy", "revenue", "finance"],
+            "land": ["land", "property", "ownership"],
+            "citizenship": ["citizen", "citizenship", "nationality"],
+            "devolution": ["county", "devolution", "local government"],
+            "bill_of_rights": ["bill of rights", "fundamental rights"],
+            "elections": ["election", "electoral", "vote", "voting"],
+            "public_finance": ["public finance", "budget", "appropriation"],
+        })
+        chunk["category"] = chunk["document_type"] = "Constitution"
+        logger.debug(f"Enriched Constitution chunk: Article {chunk.get('article_number', 'N/A')}")
+        return chunk
+
+    match = re.compile(r'Clause\s+(\d+)', re.IGNORECASE).search(text)
+    if match:
+        chunk["clause_number"] = match.group(1)
+    match = re.compile(r'PART\s+([IVX]+|[0-9]+)', re.IGNORECASE).search(text)
+    if match:
+        chunk["part"] = match.group(1)
+    subject = _legacy_heading(text)
+    if subject:
+        chunk["subject"] = subject
+    chunk["bill_title"] = title
+    chunk["category"] = chunk["document_type"] = "Bill"
+    match = re.search(r'(20\d{2})', title)
+    if match:
+        chunk["year"] = match.group(1)
+    chunk["legal_subjects"] = _legacy_subjects(text, title, {
+        "taxation": ["tax", "levy", "duty", "revenue"],
+        "finance": ["finance", "budget", "appropriation", "expenditure"],
+        "housing": ["housing", "shelter", "residential"],
+        "health": ["health", "medical", "healthcare"],
+        "education": ["education", "school", "university"],
+        "agriculture": ["agriculture", "farming", "crop"],
+        "trade": ["trade", "commerce", "business"],
+        "security": ["security", "police", "defense"],
+        "energy": ["energy", "power", "electricity"],
+        "environment": ["environment", "conservation", "climate"],
+    })
+    logger.debug(f"Enriched Bill chunk: Clause {chunk.get('clause_number', 'N/A')}")
+    return chunk
+
+
+def timed(fn, chunks: list, repeats: int):
+    """Best-of-N seconds and the output of the last run"""
+    best, output = float("inf"), None
+    for _ in range(repeats):
+        batch = copy.deepcopy(chunks)
+        start = time.perf_counter()
+        output = fn(batch)
+        best = min(best, time.perf_counter() - start)
+    return best, output
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Legal metadata enrichment throughput benchmark")
+    parser.add_argument("--chunks", type=int, default=20_000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    # Benchmark the enrichment itself, not log sinks
+    logger.remove()
+    logger.add(sys.stderr, level="INFO")
+
+    enricher = LegalMetadataEnricher()
+    ok = True
+    for kind in ("constitution", "bill"):
+        chunks = generate_chunks(args.chunks, kind)
+        legacy_s, legacy_out = timed(lambda batch: [legacy_enrich(c) for c in batch], chunks, args.repeats)
+        engine_s, engine_out = timed(enricher.enrich_batch, chunks, args.repeats)
+        identical = legacy_out == engine_out
+        ok &= identical
+        print(
+            f"  {kind:<13} legacy {len(chunks) / legacy_s:9.0f} chunks/s   engine {len(chunks) / engine_s:9.0f} chunks/s"
+            f"   x{legacy_s / engine_s:5.1f}   {'identical' if identical else 'MISMATCH'}"
+        )
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
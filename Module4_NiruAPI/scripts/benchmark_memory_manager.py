@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Memory manager benchmark
+Fills a MemoryManager with random patterns and reports, at 10k and 100k
+patterns:
+- add past capacity: microseconds per add_pattern when every add evicts,
+  for the lru, lfu and importance policies
+- search: milliseconds per search_similar query
+- save/load: seconds and file size for the binary format and legacy JSON
+
+"legacy" is the previous implementation: a scan of the whole buffer per
+eviction, one cosine similarity per pattern per query, and JSON files.
+Also checks that both evict the same patterns and return the same search
+results.
+"""
+import sys
+import json
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import torch
+from loguru import logger
+
+from Module7_NiruHybrid.retention.memory_manager import MemoryManager, MemoryPattern
+
+
+# =============================================================================
+# LEGACY MANAGER (no embedding matrix or eviction heap)
+# =============================================================================
+
+class LegacyMemoryManager(MemoryManager):
+    def _normalized(self, embeddings):
+        return None
+
+    def _store_vector(self, pattern_id, vector):
+        pass
+
+    def _remove(self, pattern_id):
+        del self.memory_buffer[pattern_id]
+        self.total_patterns_evicted += 1
+
+    def _push_heap(self, pattern):
+        pass
+
+    def _rebuild_heap(self):
+        pass
+
+    def _evict_pattern(self):
+        if not self.memory_buffer:
+            return
+        if self.eviction_policy == "lru":
+            self._remove(next(iter(self.memory_buffer)))
+            return
+        key = (lambda p: p.access_count) if self.eviction_policy == "lfu" else (lambda p: p.importance_score)
+        lowest = min(key(p) for p in self.memory_buffer.values())
+        for pattern_id, pattern in self.memory_buffer.items():
+            if key(pattern) == lowest:
+                self._remove(pattern_id)
+                break
+
+    def search_similar(self, query_embeddings, top_k=10, threshold=None):
+        results = []
+        for pattern in self.memory_buffer.values():
+            similarity = torch.nn.functional.cosine_similarity(
+                query_embeddings.unsqueeze(0), pattern.embeddings.unsqueeze(0)
+            ).item()
+            if threshold is None or similarity >= threshold:
+                results.append((pattern, similarity))
+        results.sort(key=lambda x: x[1], reverse=True)
+        return results[:top_k]
+
+    def save(self, filepath):
+        data = {"patterns": [p.to_dict() for p in self.memory_buffer.values()], "stats": self.get_stats()}
+        with open(filepath, 'w') as f:
+            json.dump(data, f, indent=2)
+
+    def load(self, filepath):
+        with open(filepath, 'r') as f:
+            data = json.load(f)
+        self.memory_buffer.clear()
+        for pattern_dict in data["patterns"]:
+            pattern = MemoryPattern.from_dict(pattern_dict)
+            self.memory_buffer[pattern.id] = pattern
+
+
+def fill(manager: MemoryManager, embeddings: torch.Tensor, accesses: torch.Tensor, start: int = 0) -> MemoryManager:
+    """Add one new pattern per row, then replay the same accesses"""
+    for i, embedding in enumerate(embeddings, start):
+        manager.add_pattern(f"pattern_{i}", embedding, {"source": "benchmark", "index": i})
+    for i in accesses.tolist():
+        manager.get_pattern(f"pattern_{i}")
+    return manager
+
+
+def timed(fn, *args) -> float:
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Memory manager benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--evictions", type=int, default=200, help="Adds past capacity per policy")
+    parser.add_argument("--queries", type=int, default=10)
+    parser.add_argument("--legacy-io-max", type=int, default=10_000,
+                        help="Largest buffer to save/load as legacy JSON (slow and large)")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    ok = True
+
+    for size in args.sizes:
+        torch.manual_seed(size)
+        embeddings = torch.randn(size + args.evictions, args.dim)
+        accesses = torch.randint(0, size, (size // 2,))
+        queries = torch.randn(args.queries, args.dim)
+        print(f"{size:,} patterns, dim {args.dim}")
+
+        for policy in ("lru", "lfu", "importance"):
+            managers = {}
+            cells = []
+            for name, cls in (("legacy", LegacyMemoryManager), ("engine", MemoryManager)):
+                manager = fill(cls(buffer_size=size, eviction_policy=policy), embeddings[:size], accesses)
+                seconds = timed(fill, manager, embeddings[size:], torch.zeros(0, dtype=torch.long), size)
+                managers[name] = manager
+                cells.append(f"{name} {seconds / args.evictions * 1e6:9.1f} us/add")
+            same = list(managers["legacy"].memory_buffer) == list(managers["engine"].memory_buffer)
+            ok &= same
+            print(f"  evict {policy:<10}  " + "   ".join(cells) + f"   {'same patterns' if same else 'MISMATCH'}")
+
+        legacy, engine = managers["legacy"], managers["engine"]
+        timings = {}
+        for name, manager in (("legacy", legacy), ("engine", engine)):
+            start = time.perf_counter()
+            results = [manager.search_similar(query, top_k=10) for query in queries]
+            timings[name] = (time.perf_counter() - start) / len(queries)
+            timings[name + "_ids"] = [[p.id for p, _ in result] for result in results]
+        same = timings["legacy_ids"] == timings["engine_ids"]
+        ok &= same
+        print(f"  search            legacy {timings['legacy'] * 1000:9.1f} ms/q     "
+              f"engine {timings['engine'] * 1000:9.2f} ms/q     {'same results' if same else 'MISMATCH'}")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            runs = [("binary", engine, MemoryManager(eviction_policy="importance"), Path(tmp) / "memory.npz")]
+            if size <= args.legacy_io_max:
+                runs.insert(0, ("json", legacy, LegacyMemoryManager(eviction_policy="importance"), Path(tmp) / "memory.json"))
+            for name, source, target, path in runs:
+                save_s = timed(source.save, path)
+                load_s = timed(target.load, path)
+                restored = list(target.memory_buffer) == list(source.memory_buffer)
+                ok &= restored
+                print(f"  {name:<6}  save {save_s:7.2f} s   load {load_s:7.2f} s   "
+                      f"{path.stat().st_size / 1e6:8.1f} MB   {'round trip ok' if restored else 'MISMATCH'}")
+            if size > args.legacy_io_max:
+                print("  json    skipped (raise --legacy-io-max to include)")
+        print()
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+News search latency benchmark
+Seeds raw_documents with synthetic news articles and compares, per search:
+- hydration of vector-ranked hits: one query per hit (legacy) vs one batched
+  source_url IN (...) query that keeps ranking order
+- lexical fallback: ILIKE scan (legacy) vs PostgreSQL full-text search on the
+  GIN index
+- deep pages: OFFSET vs keyset cursors
+
+Vector ranking is simulated by sampling seeded URLs, so only the database
+side is measured. Requires DATABASE_URL (PostgreSQL for the full-text path);
+seeded rows are deleted afterwards.
+"""
+import sys
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy import or_
+
+from Module3_NiruDB.database_storage import DatabaseStorage, RawDocument
+from Module4_NiruAPI.services.news_service import NewsService
+
+URL_PREFIX = "https://bench.amaniquery.local/news/"
+WORDS = (
+    "finance bill parliament county budget tax court ruling election senate "
+    "governor health education strike inflation shilling treasury police "
+    "corruption tender housing levy nairobi mombasa kisumu drought maize"
+).split()
+
+
+def seed(storage: DatabaseStorage, articles: int, batch_size: int = 5000) -> None:
+    """Insert synthetic articles in bulk"""
+    rng = random.Random(42)
+    start = datetime(2020, 1, 1)
+    with storage.get_db_session() as db:
+        batch = []
+        for i in range(articles):
+            batch.append({
+                "source_url": f"{URL_PREFIX}{i}",
+                "title": " ".join(rng.choices(WORDS, k=8)).title(),
+                "category": "Kenyan News",
+                "source_name": f"Bench Source {i % 12}",
+                "publication_date": start + timedelta(minutes=37 * i),
+                "content_type": "html",
+                "raw_content": " ".join(rng.choices(WORDS, k=300)),
+                "metadata_json": {"quality_score": rng.random()},
+                "processed": True,
+            })
+            if len(batch) == batch_size:
+                db.bulk_insert_mappings(RawDocument, batch)
+                db.commit()
+                batch = []
+        if batch:
+            db.bulk_insert_mappings(RawDocument, batch)
+            db.commit()
+
+
+def cleanup(storage: DatabaseStorage) -> None:
+    with storage.get_db_session() as db:
+        db.query(RawDocument).filter(RawDocument.source_url.like(f"{URL_PREFIX}%")).delete(synchronize_session=False)
+        db.commit()
+
+
+def legacy_text_search(service: NewsService, query: str, limit: int, offset: int) -> list:
+    """Previous fallback: ILIKE over title and content"""
+    db = service.db_storage.get_db_session()
+    try:
+        results = db.query(RawDocument).filter(
+            or_(RawDocument.title.ilike(f"%{query}%"), RawDocument.raw_content.ilike(f"%{query}%"))
+        )
+        results.count()
+        return [service._doc_to_article(doc) for doc in results.offset(offset).limit(limit).all()]
+    finally:
+        db.close()
+
+
+def timed(fn, repeats: int) -> tuple:
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2], samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+
+def report(name: str, fn, repeats: int) -> None:
+    p50, p95 = timed(fn, repeats)
+    print(f"  {name:<34} p50 {p50:8.2f} ms   p95 {p95:8.2f} ms")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="News search latency benchmark")
+    parser.add_argument("--articles", type=int, default=100_000)
+    parser.add_argument("--hits", type=int, default=20, help="Vector hits hydrated per search")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--query", default="finance bill")
+    parser.add_argument("--deep-page", type=int, default=200, help="Page number for the deep pagination test")
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--keep", action="store_true", help="Keep seeded rows")
+    args = parser.parse_args()
+
+    storage = DatabaseStorage(args.database_url)
+    service = NewsService.__new__(NewsService)
+    service.db_storage = storage
+    service.vector_store = None
+
+    print(f"Seeding {args.articles} articles...")
+    start = time.perf_counter()
+    seed(storage, args.articles)
+    print(f"  seeded in {time.perf_counter() - start:.1f}s (dialect: {storage.engine.dialect.name})")
+
+    rng = random.Random(7)
+    try:
+        print(f"Hydrating {args.hits} ranked hits:")
+        urls = lambda: [f"{URL_PREFIX}{rng.randrange(args.articles)}" for _ in range(args.hits)]
+        report("legacy (query per hit)", lambda: [service.get_article_by_id(u) for u in urls()], args.repeats)
+        report("batched (one IN query)", lambda: service._hydrate(urls(), None, None, None, None), args.repeats)
+
+        print(f"Lexical search for {args.query!r}:")
+        report("legacy ILIKE", lambda: legacy_text_search(service, args.query, 20, 0), args.repeats)
+        report("full-text search", lambda: service._text_search(args.query, None, None, 20, 0), args.repeats)
+
+        print(f"Listing page {args.deep_page} (20 per page):")
+        report("offset", lambda: service.get_articles_page(limit=20, offset=(args.deep_page - 1) * 20), args.repeats)
+        page = service.get_articles_page(limit=20, offset=(args.deep_page - 2) * 20)
+        report("keyset cursor", lambda: service.get_articles_page(limit=20, cursor=page.next_cursor), args.repeats)
+    finally:
+        if not args.keep:
+            cleanup(storage)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark notification delivery against a local stub SMS server
+Compares sequential sends with the bounded-concurrency NotificationDispatcher
+and reports subscription matching cost and notifications per second
+"""
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from Module4_NiruAPI.services.talksasa_service import TalksasaNotificationService
+from Module4_NiruAPI.services.notification_dispatcher import (
+    NotificationDispatcher,
+    NotificationJob,
+    SubscriptionIndex,
+)
+
+CATEGORIES = ["Politics", "Business", "Sports", "Health", "Technology"]
+SOURCES = ["Nation", "Standard", "The Star", "Capital FM", "KBC"]
+
+
+def start_stub_server(latency: float) -> ThreadingHTTPServer:
+    """Start a Talksasa-compatible stub that answers after `latency` seconds"""
+    
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(latency)
+            body = json.dumps({"status": "success", "data": {}}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, *args):
+            pass
+    
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def make_subscriptions(count: int) -> list:
+    """Random immediate subscriptions, a third of them unfiltered"""
+    subs = []
+    for i in range(count):
+        roll = random.random()
+        subs.append(SimpleNamespace(
+            id=i,
+            phone_number=f"07{i:08d}",
+            notification_type="sms",
+            categories=random.sample(CATEGORIES, 2) if roll < 0.66 else None,
+            sources=random.sample(SOURCES, 2) if roll < 0.33 else None,
+        ))
+    return subs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark notification dispatch")
+    parser.add_argument("--subscriptions", type=int, default=20000)
+    parser.add_argument("--latency", type=float, default=0.05, help="Stub server latency per send")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rate", type=float, default=0, help="Provider rate limit (0 = unlimited)")
+    parser.add_argument("--sequential-sample", type=int, default=40, help="Sends timed in sequential mode")
+    args = parser.parse_args()
+    random.seed(0)
+    
+    server = start_stub_server(args.latency)
+    talksasa = TalksasaNotificationService(api_token="benchmark", sender_id="BENCH")
+    talksasa.base_url = f"http://127.0.0.1:{server.server_address[1]}/api/v3"
+    
+    subscriptions = make_subscriptions(args.subscriptions)
+    article = {"category": "Politics", "source_name": "Nation"}
+    
+    # Matching: linear scan vs inverted index
+    start = time.perf_counter()
+    scanned = [
+        s for s in subscriptions
+        if (not s.categories or article["category"] in s.categories)
+        and (not s.sources or article["source_name"] in s.sources)
+    ]
+    scan_ms = (time.perf_counter() - start) * 1000
+    
+    index = SubscriptionIndex()
+    index.rebuild(subscriptions)
+    start = time.perf_counter()
+    matched = index.match(article["category"], article["source_name"])
+    index_ms = (time.perf_counter() - start) * 1000
+    assert len(matched) == len(scanned)
+    print(f"matching {len(subscriptions)} subscriptions -> {len(matched)} recipients: "
+          f"scan {scan_ms:.2f} ms, index {index_ms:.2f} ms")
+    
+    jobs = [NotificationJob(s.phone_number, "benchmark", s.notification_type) for s in matched]
+    
+    sample = jobs[: args.sequential_sample]
+    start = time.perf_counter()
+    for job in sample:
+        talksasa.send_notification(job.recipient, job.message, job.notification_type)
+    sequential_rate = len(sample) / (time.perf_counter() - start)
+    print(f"sequential:  {sequential_rate:8.1f} notifications/s")
+    
+    dispatcher = NotificationDispatcher(
+        talksasa.send_notification, max_concurrency=args.concurrency, rate_per_second=args.rate
+    )
+    result = dispatcher.dispatch_sync(jobs[: args.sequential_sample * args.concurrency])
+    print(f"dispatcher:  {result.rate:8.1f} notifications/s "
+          f"(concurrency={args.concurrency}, rate limit={args.rate or 'none'}, sent={result.sent}, failed={result.failed})")
+    
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
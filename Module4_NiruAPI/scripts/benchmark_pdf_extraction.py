@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+PDF extraction throughput benchmark
+Generates a synthetic gazette-style PDF (two-column notices with a ruled table
+every few pages) and reports pages/second for:
+- legacy: serial pdfplumber over every page
+- engine cold: text layer + pdfplumber for table pages, page-range shards in
+  a process pool, empty page cache
+- engine resume: half the page cache removed, as after a crash
+- engine warm: every page cached
+
+Requires reportlab (to generate the PDF), pdfplumber and pypdfium2.
+"""
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import pdfplumber
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+from Module2_NiruParser.extractors.pdf_extractor import PDFExtractor, PageCache, file_hash
+
+WORDS = (
+    "gazette notice county government land registration act section pursuant "
+    "hereby given public trustee estate deceased petition court nairobi "
+    "tender procurement assembly bill amendment cabinet secretary order"
+).split()
+
+
+def generate_pdf(path: Path, pages: int, table_every: int) -> None:
+    """Two-column notice pages; every `table_every`-th page is a ruled table"""
+    rng = random.Random(1)
+    width, height = A4
+    pdf = canvas.Canvas(str(path), pagesize=A4)
+    for number in range(pages):
+        pdf.setFont("Helvetica", 8)
+        if table_every and number % table_every == table_every - 1:
+            rows, cols = 30, 5
+            x0, y0, cw, rh = 40, height - 60, (width - 80) / cols, 22
+            for r in range(rows + 1):
+                pdf.line(x0, y0 - r * rh, x0 + cols * cw, y0 - r * rh)
+            for c in range(cols + 1):
+                pdf.line(x0 + c * cw, y0, x0 + c * cw, y0 - rows * rh)
+            for r in range(rows):
+                for c in range(cols):
+                    pdf.drawString(x0 + c * cw + 3, y0 - r * rh - 14, " ".join(rng.choices(WORDS, k=2)))
+        else:
+            for column in range(2):
+                x = 40 + column * (width / 2 - 20)
+                for line in range(80):
+                    pdf.drawString(x, height - 50 - line * 9.5, " ".join(rng.choices(WORDS, k=7)))
+        pdf.showPage()
+    pdf.save()
+
+
+def legacy_extract(pdf_path: Path) -> int:
+    """Previous extractor: serial pdfplumber over every page"""
+    chars = 0
+    with pdfplumber.open(str(pdf_path)) as pdf:
+        for page in pdf.pages:
+            chars += len(page.extract_text(x_tolerance=3, y_tolerance=3) or "")
+    return chars
+
+
+def engine_extract(extractor: PDFExtractor, pdf_path: Path) -> int:
+    return sum(len(page.text) for page in extractor.iter_pages(str(pdf_path)))
+
+
+def report(name: str, pages: int, fn) -> None:
+    start = time.perf_counter()
+    chars = fn()
+    elapsed = time.perf_counter() - start
+    print(f"  {name:<16} {elapsed:7.2f}s  {pages / elapsed:8.1f} pages/s  ({chars} chars)")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="PDF extraction throughput benchmark")
+    parser.add_argument("--pages", type=int, nargs="+", default=[200, 600])
+    parser.add_argument("--table-every", type=int, default=8, help="Every Nth page is a ruled table (0: none)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--skip-legacy", action="store_true")
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="pdf_bench_"))
+    try:
+        for pages in args.pages:
+            pdf_path = workdir / f"gazette_{pages}.pdf"
+            generate_pdf(pdf_path, pages, args.table_every)
+            cache_dir = workdir / f"cache_{pages}"
+            extractor = PDFExtractor(workers=args.workers, cache_dir=str(cache_dir))
+
+            print(f"{pages} pages ({pdf_path.stat().st_size / 1e6:.1f} MB, {extractor.workers} workers):")
+            if not args.skip_legacy:
+                report("legacy", pages, lambda: legacy_extract(pdf_path))
+            report("engine cold", pages, lambda: engine_extract(extractor, pdf_path))
+
+            # Simulate a run that died halfway: keep the first half of the cache
+            cache = PageCache(cache_dir, file_hash(str(pdf_path)))
+            lines = cache.path.read_text(encoding="utf-8").splitlines(keepends=True)
+            cache.path.write_text("".join(lines[:len(lines) // 2]), encoding="utf-8")
+            report("engine resume", pages, lambda: engine_extract(extractor, pdf_path))
+            report("engine warm", pages, lambda: engine_extract(extractor, pdf_path))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
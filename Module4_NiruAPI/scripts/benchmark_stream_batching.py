@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Stream processor batching benchmark
+Concurrent clients submit queries of mixed length to a small HybridEncoder
+and the benchmark reports queries/second and latency (p50/p95) for:
+- per-query: process_query for every query (one forward each)
+- dynamic: submit_query with each combination of batch size and max wait
+
+Uses a randomly initialised encoder in half precision (its attention runs
+FP16 activations) and a hashing tokenizer, so only the batching and the
+forward passes are measured. Also checks that batched embeddings match
+per-query ones.
+"""
+import sys
+import time
+import random
+import argparse
+import threading
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import torch
+
+from Module7_NiruHybrid.hybrid_encoder import HybridEncoder
+from Module7_NiruHybrid.streaming.stream_processor import StreamProcessor
+
+WORDS = (
+    "finance bill housing levy county budget parliament court ruling tax "
+    "constitution article rights land election senate governor health"
+).split()
+
+
+class HashTokenizer:
+    """Word-level tokenizer hashing into the encoder vocabulary"""
+
+    eos_token_id = 0
+
+    def __init__(self, vocab_size: int):
+        self.vocab_size = vocab_size
+
+    def encode(self, text: str) -> list:
+        return [1 + hash(word) % (self.vocab_size - 1) for word in text.split()]
+
+
+def make_queries(count: int, seed: int = 3) -> list:
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(WORDS, k=rng.choice([6, 12, 24, 48, 100]))) for _ in range(count)]
+
+
+def percentile(samples: list, q: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def run_clients(fn, queries: list, clients: int) -> tuple:
+    """Run queries across client threads; (elapsed seconds, latencies ms)"""
+    latencies = []
+    lock = threading.Lock()
+    shards = [queries[i::clients] for i in range(clients)]
+
+    def client(shard):
+        for i, text in enumerate(shard):
+            start = time.perf_counter()
+            fn(f"q{i}", text)
+            with lock:
+                latencies.append((time.perf_counter() - start) * 1000)
+
+    threads = [threading.Thread(target=client, args=(shard,)) for shard in shards]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start, latencies
+
+
+def report(name: str, queries: int, elapsed: float, latencies: list, extra: str = "") -> None:
+    print(
+        f"  {name:<28} {queries / elapsed:8.1f} q/s   p50 {percentile(latencies, 0.5):7.1f} ms"
+        f"   p95 {percentile(latencies, 0.95):7.1f} ms   {extra}"
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Stream processor batching benchmark")
+    parser.add_argument("--queries", type=int, default=512)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--max-waits", type=float, nargs="+", default=[0.002, 0.01], help="Seconds")
+    parser.add_argument("--layers", type=int, default=2)
+    args = parser.parse_args()
+
+    torch.manual_seed(0)
+    torch.set_grad_enabled(False)
+    vocab_size = 8192
+    encoder = HybridEncoder(
+        vocab_size=vocab_size, embed_dim=128, hidden_dim=256, output_dim=128, num_layers=args.layers,
+        num_heads=4, conv_num_filters=64, max_seq_length=128, use_streaming=False, quantize=False
+    ).half().eval()
+    tokenizer = HashTokenizer(vocab_size)
+    queries = make_queries(args.queries)
+
+    print(f"{args.queries} queries from {args.clients} clients:")
+    baseline = StreamProcessor(hybrid_encoder=encoder, tokenizer=tokenizer, batch_size=1)
+    elapsed, latencies = run_clients(lambda qid, text: baseline.process_query(qid, text), queries, 1)
+    report("per-query (serial)", len(queries), elapsed, latencies, f"{baseline.forward_passes} forwards")
+
+    # Batched embeddings must match per-query ones
+    check = StreamProcessor(hybrid_encoder=encoder, tokenizer=tokenizer, batch_size=32)
+    batched = check.encode_texts(queries[:64])
+    single = [baseline.encode_texts([text])[0] for text in queries[:64]]
+    max_diff = max(abs(a - b) for x, y in zip(batched, single) for a, b in zip(x, y))
+    print(f"  max |batched - single| over 64 queries: {max_diff:.4f} (fp16)")
+
+    for batch_size in args.batch_sizes:
+        for max_wait in args.max_waits:
+            processor = StreamProcessor(
+                hybrid_encoder=encoder, tokenizer=tokenizer, batch_size=batch_size, max_batch_wait=max_wait
+            )
+            elapsed, latencies = run_clients(
+                lambda qid, text: processor.submit_query(qid, text).result(), queries, args.clients
+            )
+            stats = processor.get_stats()
+            processor.close()
+            report(
+                f"dynamic bs={batch_size} wait={max_wait * 1000:g}ms", len(queries), elapsed, latencies,
+                f"{stats['forward_passes']} forwards, mean batch {stats['query_batcher']['mean_batch_size']:.1f},"
+                f" padding {stats['padding_ratio']:.0%}"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
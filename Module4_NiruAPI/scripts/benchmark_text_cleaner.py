@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Text cleaner throughput benchmark
+Builds gazette-sized text (notices with ragged line breaks, blank-line runs,
+HTML entities, mojibake and the odd boilerplate line) and reports MB/second
+for the previous rule-by-rule cleaner and the compiled single-pass cleaner:
+- clean + fix_encoding (what the ingestion pipeline runs per document/page)
+- remove_boilerplate
+
+Every run also checks that both cleaners produce identical output.
+"""
+import sys
+import time
+import random
+import argparse
+import re
+import unicodedata
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from Module2_NiruParser.cleaners.text_cleaner import TextCleaner
+
+WORDS = (
+    "gazette notice county government land registration act section pursuant "
+    "hereby given public trustee estate deceased petition court nairobi "
+    "tender procurement assembly bill amendment cabinet secretary order"
+).split()
+NOISE = ["&nbsp;", "&amp;", "â€™", "â€œ", "Ã©", "\t", "  ", "\n\n\n\n", "ﬁ", "No. 1234", "Advertisement"]
+
+
+def generate_text(size_mb: float, seed: int = 1) -> str:
+    """Gazette-like notices until the text reaches size_mb"""
+    rng = random.Random(seed)
+    target = int(size_mb * 1_000_000)
+    parts, length = [], 0
+    while length < target:
+        words = rng.choices(WORDS, k=rng.randint(6, 14))
+        if rng.random() < 0.3:
+            words.insert(rng.randrange(len(words)), rng.choice(NOISE))
+        line = " ".join(words) + ("\n\n\n" if rng.random() < 0.1 else "\n")
+        parts.append(line)
+        length += len(line)
+    return "".join(parts)
+
+
+# =============================================================================
+# LEGACY CLEANER (rule by rule, as before the compiled engine)
+# =============================================================================
+
+_LEGACY_PATTERNS = {
+    "whitespace": re.compile(r'\s+'),
+    "newlines": re.compile(r'\n{3,}'),
+    "html_entities": re.compile(r'&[a-zA-Z]+;'),
+}
+
+
+def legacy_clean(text: str, aggressive: bool = False) -> str:
+    if not text:
+        return ""
+    text = unicodedata.normalize('NFKC', text)
+    text = _LEGACY_PATTERNS["html_entities"].sub(' ', text)
+    text = _LEGACY_PATTERNS["newlines"].sub('\n\n', text)
+    text = _LEGACY_PATTERNS["whitespace"].sub(' ', text)
+    lines = [line.strip() for line in text.split('\n')]
+    text = '\n'.join(line for line in lines if line)
+    if aggressive:
+        lines = [line for line in text.split('\n') if len(line) > 20]
+        text = '\n'.join(lines)
+        lines = []
+        for line in text.split('\n'):
+            alpha_ratio = sum(c.isalpha() for c in line) / max(len(line), 1)
+            if alpha_ratio > 0.5:
+                lines.append(line)
+        text = '\n'.join(lines)
+    return text.strip()
+
+
+def legacy_remove_boilerplate(text: str) -> str:
+    for phrase in ['Cookie Policy', 'Privacy Policy', 'Terms of Service', 'Subscribe to our newsletter',
+                   'Share this article', 'Follow us on', 'Advertisement']:
+        text = re.sub(phrase, '', text, flags=re.IGNORECASE)
+    return text
+
+
+def legacy_fix_encoding(text: str) -> str:
+    for wrong, right in {'â€™': "'", 'â€œ': '"', 'â€': '"', 'Ã©': 'é', 'Ã¨': 'è', 'Ã¡': 'á'}.items():
+        text = text.replace(wrong, right)
+    return text
+
+
+def timed(fn, text: str, repeats: int):
+    """Best-of-N seconds and the output of the last run"""
+    best, output = float("inf"), None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        output = fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best, output
+
+
+def compare(name: str, legacy_fn, engine_fn, text: str, repeats: int) -> bool:
+    size_mb = len(text.encode("utf-8")) / 1e6
+    legacy_s, legacy_out = timed(legacy_fn, text, repeats)
+    engine_s, engine_out = timed(engine_fn, text, repeats)
+    identical = legacy_out == engine_out
+    print(
+        f"  {name:<22} legacy {size_mb / legacy_s:8.1f} MB/s   engine {size_mb / engine_s:8.1f} MB/s"
+        f"   x{legacy_s / engine_s:5.1f}   {'identical' if identical else 'MISMATCH'}"
+    )
+    return identical
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Text cleaner throughput benchmark")
+    parser.add_argument("--size-mb", type=float, nargs="+", default=[1, 8])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    cleaner = TextCleaner()
+    ok = True
+    for size_mb in args.size_mb:
+        text = generate_text(size_mb)
+        print(f"{size_mb:g} MB gazette text:")
+        ok &= compare(
+            "clean + fix_encoding",
+            lambda t: legacy_fix_encoding(legacy_clean(t)),
+            lambda t: cleaner.fix_encoding(cleaner.clean(t)),
+            text, args.repeats,
+        )
+        ok &= compare("clean (aggressive)", lambda t: legacy_clean(t, True), lambda t: cleaner.clean(t, True), text, args.repeats)
+        ok &= compare("remove_boilerplate", legacy_remove_boilerplate, cleaner.remove_boilerplate, text, args.repeats)
+        clean_text = text.replace("Advertisement", "")
+        ok &= compare("remove_boilerplate (none)", legacy_remove_boilerplate, cleaner.remove_boilerplate, clean_text, args.repeats)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Load test for the news WebSocket broadcast hub
+Simulates thousands of sockets (a fraction of them slow) with mixed category
+subscriptions and reports delivery latency percentiles per broadcast
+"""
+import sys
+import time
+import random
+import asyncio
+import argparse
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from Module4_NiruAPI.routers.websocket_router import ConnectionManager
+
+CATEGORIES = ["politics", "business", "sports", "health", "technology", "legal"]
+SOURCES = ["nation", "standard", "the star", "capital fm", "kbc"]
+
+
+class FakeWebSocket:
+    """Minimal stand-in for a Starlette WebSocket"""
+    
+    def __init__(self, delay: float, latencies: list):
+        self.delay = delay
+        self.latencies = latencies
+        self.closed = False
+    
+    async def accept(self):
+        pass
+    
+    async def close(self, code: int = 1000):
+        self.closed = True
+    
+    async def send_text(self, payload: str):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        marker = payload.rfind('"sent_at": ')
+        if marker != -1:
+            sent_at = float(payload[marker + 11:].rstrip("}"))
+            self.latencies.append(time.perf_counter() - sent_at)
+
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+async def run(args):
+    manager = ConnectionManager(queue_size=args.queue_size, max_consecutive_drops=args.max_drops)
+    latencies: list = []
+    sockets = []
+    
+    for i in range(args.sockets):
+        slow = random.random() < args.slow_fraction
+        ws = FakeWebSocket(args.slow_delay if slow else 0.0, latencies)
+        await manager.connect(ws)
+        if random.random() < args.filtered_fraction:
+            manager.subscribe(ws, categories=random.sample(CATEGORIES, 2))
+        sockets.append(ws)
+    
+    expected = 0
+    start = time.perf_counter()
+    for i in range(args.articles):
+        category = random.choice(CATEGORIES)
+        message = {"type": "new_article", "article": {"id": i, "category": category}, "sent_at": time.perf_counter()}
+        expected += await manager.broadcast(message, category=category, source=random.choice(SOURCES))
+        await asyncio.sleep(args.interval)
+    publish_time = time.perf_counter() - start
+    
+    await asyncio.sleep(args.drain)
+    
+    print(f"sockets={args.sockets} articles={args.articles} slow={args.slow_fraction:.0%} filtered={args.filtered_fraction:.0%}")
+    print(f"publish loop: {publish_time * 1000:.1f} ms ({publish_time / args.articles * 1000:.2f} ms/article)")
+    print(f"queued: {expected}  delivered: {len(latencies)}  stats: {manager.stats}")
+    print(
+        "delivery latency ms: "
+        f"p50={percentile(latencies, 50) * 1000:.2f} "
+        f"p95={percentile(latencies, 95) * 1000:.2f} "
+        f"p99={percentile(latencies, 99) * 1000:.2f}"
+    )
+    print(f"connections remaining: {len(manager.connections)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="WebSocket fan-out load test")
+    parser.add_argument("--sockets", type=int, default=10000)
+    parser.add_argument("--articles", type=int, default=50)
+    parser.add_argument("--interval", type=float, default=0.01, help="Seconds between articles")
+    parser.add_argument("--slow-fraction", type=float, default=0.01)
+    parser.add_argument("--slow-delay", type=float, default=1.0, help="Send delay of slow sockets")
+    parser.add_argument("--filtered-fraction", type=float, default=0.5)
+    parser.add_argument("--queue-size", type=int, default=20)
+    parser.add_argument("--max-drops", type=int, default=10)
+    parser.add_argument("--drain", type=float, default=2.0, help="Seconds to wait for delivery")
+    args = parser.parse_args()
+    random.seed(0)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Export the hybrid encoder to an inference runtime artifact
+
+Builds a HybridEncoder from the encoder config, loads trained weights from a
+checkpoint (ContinualLearner checkpoints or a bare state dict) and writes a
+TorchScript or ONNX artifact plus its metadata (.json), including parity
+against eager encoding. Point HYBRID_ENCODER_ARTIFACT at the artifact so
+load_encoder() serves it instead of building the modules.
+
+Usage:
+    python Module4_NiruAPI/scripts/export_hybrid_encoder.py \\
+        --checkpoint models/checkpoints/hybrid_encoder_best.pt \\
+        --output models/hybrid/hybrid_encoder.pt
+"""
+import sys
+import json
+import argparse
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import torch
+
+from Module7_NiruHybrid.config import HybridEncoderConfig
+from Module7_NiruHybrid.hybrid_encoder import HybridEncoder
+from Module7_NiruHybrid.encoder_runtime import RUNTIME_FORMATS, export_encoder
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Export the hybrid encoder to a runtime artifact")
+    parser.add_argument("--checkpoint", type=Path, help="Trained weights (default: randomly initialised)")
+    parser.add_argument("--output", type=Path, default=Path("models/hybrid/hybrid_encoder.pt"))
+    parser.add_argument("--format", choices=RUNTIME_FORMATS, default="torchscript")
+    parser.add_argument("--no-quantize", action="store_true", help="Keep FP32 Linear layers")
+    parser.add_argument("--vocab-size", type=int, default=50257)
+    parser.add_argument("--eager-quantize", action="store_true",
+                        help="Checkpoint was trained with QuantizedLinear layers (quantize=True)")
+    args = parser.parse_args()
+
+    encoder = HybridEncoder(vocab_size=args.vocab_size, quantize=args.eager_quantize, config=HybridEncoderConfig())
+    if args.checkpoint:
+        checkpoint = torch.load(args.checkpoint, map_location="cpu")
+        encoder.load_state_dict(checkpoint.get("model_state_dict", checkpoint))
+    encoder.eval()
+
+    metadata = export_encoder(encoder, args.output, format=args.format, quantize=not args.no_quantize)
+    print(json.dumps(metadata, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
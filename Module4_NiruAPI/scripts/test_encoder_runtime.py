@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Parity tests for the hybrid encoder inference runtime
+
+Exports a small encoder (BatchNorm statistics warmed up so conv/BN folding
+is exercised) and checks that:
+- the FP32 TorchScript artifact matches eager encoding
+- the INT8 artifact stays close to eager encoding
+- dynamic axes: batch sizes 1-64 and sequence lengths up to max_seq_length
+  run from one artifact, and padded batches match unpadded rows
+- load_encoder() serves the artifact and falls back to eager modules
+- StreamProcessor produces the same embeddings with the runtime
+- ONNX artifacts (when onnxruntime is installed) match as well
+
+Usage:
+    python Module4_NiruAPI/scripts/test_encoder_runtime.py
+"""
+import sys
+import tempfile
+import warnings
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+import torch
+
+from Module7_NiruHybrid.config import HybridEncoderConfig
+from Module7_NiruHybrid.hybrid_encoder import HybridEncoder
+from Module7_NiruHybrid.encoder_runtime import (
+    ONNXRUNTIME_AVAILABLE,
+    EncoderRuntime,
+    export_encoder,
+    load_encoder,
+)
+from Module7_NiruHybrid.streaming.stream_processor import StreamProcessor
+
+VOCAB_SIZE = 1000
+
+
+class HashTokenizer:
+    eos_token_id = 0
+
+    def encode(self, text: str) -> list:
+        return [1 + hash(word) % (VOCAB_SIZE - 1) for word in text.split()]
+
+
+def build_encoder() -> HybridEncoder:
+    torch.manual_seed(0)
+    encoder = HybridEncoder(
+        vocab_size=VOCAB_SIZE, embed_dim=64, hidden_dim=128, output_dim=64, num_layers=2, num_heads=4,
+        conv_num_filters=32, max_seq_length=96, chunk_size=96, quantize=False
+    )
+    # Non-trivial BatchNorm running statistics
+    encoder.train()
+    with torch.no_grad():
+        for _ in range(3):
+            encoder(input_ids=torch.randint(1, VOCAB_SIZE, (8, 48)))
+    return encoder.eval()
+
+
+def check_parity(name: str, metadata: dict, min_cosine: float, max_abs_diff: float) -> bool:
+    parity = metadata["parity"]
+    print(f"{name}: min cosine {parity['min_cosine']:.6f}, max abs diff {parity['max_abs_diff']:.2e}")
+    return parity["min_cosine"] >= min_cosine and parity["max_abs_diff"] <= max_abs_diff
+
+
+def check_dynamic_axes(encoder: HybridEncoder, runtime: EncoderRuntime) -> bool:
+    ok = True
+    for batch_size, seq_len in [(1, 1), (1, 96), (7, 13), (64, 40), (3, 200)]:
+        input_ids = torch.randint(1, VOCAB_SIZE, (batch_size, seq_len))
+        actual = runtime.encode(input_ids=input_ids)
+        expected = encoder.encode(input_ids=input_ids[:, :encoder.max_seq_length])
+        ok &= actual.shape == (batch_size, encoder.output_dim)
+        ok &= torch.allclose(actual, expected, atol=1e-4)
+
+    # Padded batch rows equal the same sequences encoded alone
+    lengths = [5, 17, 60]
+    rows = [torch.randint(1, VOCAB_SIZE, (1, n)) for n in lengths]
+    input_ids = torch.zeros(len(rows), max(lengths), dtype=torch.long)
+    padding_mask = torch.ones(len(rows), max(lengths), dtype=torch.bool)
+    for i, row in enumerate(rows):
+        input_ids[i, :row.shape[1]] = row[0]
+        padding_mask[i, :row.shape[1]] = False
+    batched = runtime.encode(input_ids=input_ids, attention_mask=padding_mask)
+    single = torch.cat([runtime.encode(input_ids=row) for row in rows])
+    ok &= torch.allclose(batched, single, atol=1e-4)
+    print(f"dynamic axes and padding: {'ok' if ok else 'MISMATCH'}")
+    return ok
+
+
+def main() -> int:
+    warnings.simplefilter("ignore")
+    encoder = build_encoder()
+    ok = True
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+
+        fp32 = export_encoder(encoder, tmp / "encoder_fp32.pt", quantize=False)
+        ok &= check_parity("torchscript fp32", fp32, 0.99999, 1e-4)
+        runtime = EncoderRuntime(tmp / "encoder_fp32.pt")
+        ok &= check_dynamic_axes(encoder, runtime)
+
+        int8 = export_encoder(encoder, tmp / "encoder_int8.pt", quantize=True)
+        ok &= check_parity("torchscript int8", int8, 0.99, 0.5)
+
+        # load_encoder serves the artifact, or builds the modules without one
+        served = load_encoder(tmp / "encoder_int8.pt")
+        fallback = load_encoder(tmp / "missing.pt", HybridEncoderConfig(num_layers=1, num_heads=4, embedding_dim=64,
+                                                                       hidden_dim=128, output_dim=64))
+        ok &= isinstance(served, EncoderRuntime) and isinstance(fallback, HybridEncoder)
+        print(f"load_encoder: {type(served).__name__} / fallback {type(fallback).__name__}")
+
+        # StreamProcessor accepts the runtime in place of the eager encoder
+        texts = ["finance bill housing levy", "county budget " * 20, "court ruling"]
+        eager = StreamProcessor(hybrid_encoder=encoder, tokenizer=HashTokenizer()).encode_texts(texts)
+        served = StreamProcessor(hybrid_encoder=runtime, tokenizer=HashTokenizer()).encode_texts(texts)
+        diff = max(abs(a - b) for x, y in zip(eager, served) for a, b in zip(x, y))
+        print(f"StreamProcessor eager vs runtime: max abs diff {diff:.2e}")
+        ok &= diff < 1e-4
+
+        if ONNXRUNTIME_AVAILABLE:
+            onnx_fp32 = export_encoder(encoder, tmp / "encoder_fp32.onnx", format="onnx", quantize=False)
+            ok &= check_parity("onnx fp32", onnx_fp32, 0.99999, 1e-3)
+            ok &= check_dynamic_axes(encoder, EncoderRuntime(tmp / "encoder_fp32.onnx"))
+            onnx_int8 = export_encoder(encoder, tmp / "encoder_int8.onnx", format="onnx", quantize=True)
+            ok &= check_parity("onnx int8", onnx_int8, 0.99, 0.5)
+        else:
+            print("onnxruntime not installed, skipping ONNX")
+
+    print("PASSED" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
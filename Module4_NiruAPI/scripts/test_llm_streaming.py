@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Test the async LLM client layer against a local fake OpenAI-compatible server
+
+Checks that:
+- one-shot completions go through the pooled async client
+- streamed completions yield tokens incrementally (TTFT well below total latency)
+- the <analysis> section is withheld from streamed output
+- concurrent calls do not block the event loop
+
+Usage:
+    python Module4_NiruAPI/scripts/test_llm_streaming.py
+"""
+import asyncio
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from Module4_NiruAPI.agents.llm_client import (
+    AsyncLLMClientPool,
+    StreamStats,
+    chat_completion,
+    stream_chat_completion,
+)
+from Module4_NiruAPI.agents.prompts.responder_prompt import AnalysisStreamFilter, extract_analysis
+
+
+TOKENS = ["<analy", "sis>internal ", "notes</analysis>", "\n\nHabari! ", "Article 27 ", "guarantees ", "equality."]
+TOKEN_DELAY = 0.05
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """Minimal /chat/completions endpoint (JSON or SSE)"""
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.loads(self.rfile.read(length) or b"{}")
+
+        if not body.get("stream"):
+            time.sleep(TOKEN_DELAY)
+            payload = json.dumps({
+                "id": "cmpl-test",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "test"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": '{"intent": "GENERAL_CHAT"}'},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        for i, token in enumerate(TOKENS):
+            last = i == len(TOKENS) - 1
+            chunk = {
+                "id": "cmpl-test",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model", "test"),
+                "choices": [{
+                    "index": 0,
+                    "delta": {"content": token},
+                    "finish_reason": "stop" if last else None,
+                }],
+            }
+            if last:
+                chunk["usage"] = {"prompt_tokens": 10, "completion_tokens": len(TOKENS), "total_tokens": 10 + len(TOKENS)}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+            time.sleep(TOKEN_DELAY)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 64
+
+
+class FakeConfig:
+    moonshot_api_key = "test-key"
+
+    def __init__(self, base_url: str):
+        self.moonshot_base_url = base_url
+
+
+async def run_tests(config: FakeConfig) -> bool:
+    ok = True
+
+    # One-shot completion
+    response = await chat_completion(config, "supervisor", model="test", messages=[{"role": "user", "content": "hi"}])
+    content = response.choices[0].message.content
+    print(f"chat_completion: {content} (usage {response.usage.total_tokens})")
+    ok &= json.loads(content)["intent"] == "GENERAL_CHAT"
+
+    # Streaming with TTFT and analysis filtering
+    stats = StreamStats(node="responder")
+    visible = AnalysisStreamFilter()
+    shown = []
+    async for token in stream_chat_completion(config, "responder", stats, model="test", messages=[]):
+        text = visible.feed(token)
+        if text:
+            shown.append(text)
+    shown.append(visible.flush())
+    streamed = "".join(shown)
+    _, expected = extract_analysis(stats.text)
+
+    print(f"stream: TTFT {stats.ttft_ms:.0f}ms, total {stats.latency_ms:.0f}ms, {stats.chunks} chunks")
+    print(f"visible: {streamed!r}")
+    ok &= stats.ttft_ms < stats.latency_ms / 2
+    ok &= streamed == expected and "internal" not in streamed
+    ok &= stats.completion_tokens == len(TOKENS)
+
+    # Concurrency: the loop keeps ticking while requests are in flight
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    tick_task = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        chat_completion(config, "supervisor", model="test", messages=[]) for _ in range(10)
+    ))
+    elapsed = time.perf_counter() - start
+    tick_task.cancel()
+    print(f"10 concurrent completions: {elapsed * 1000:.0f}ms, loop ticks {ticks}")
+    ok &= elapsed < TOKEN_DELAY * 10 and ticks > 0
+
+    # Pool reuses the client for the same endpoint
+    a = AsyncLLMClientPool.get_client(config.moonshot_api_key, config.moonshot_base_url)
+    b = AsyncLLMClientPool.get_client(config.moonshot_api_key, config.moonshot_base_url)
+    ok &= a is b
+
+    await AsyncLLMClientPool.close()
+    return ok
+
+
+def main() -> int:
+    server = FakeOpenAIServer(("127.0.0.1", 0), FakeOpenAIHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    try:
+        ok = asyncio.run(run_tests(FakeConfig(base_url)))
+    finally:
+        server.shutdown()
+
+    print("PASSED" if ok else "FAILED")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
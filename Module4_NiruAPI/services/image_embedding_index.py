@@ -0,0 +1,416 @@
+"""
+Image Embedding Index - Vectorized similarity search for Vision RAG
+
+Provides:
+- A contiguous, pre-normalized float32 embedding matrix with slot reuse
+- Per-session row lists so session search only touches that session's rows
+- Source filtering with boolean masks
+- Top-k via a single matrix-vector product and argpartition
+- Binary persistence (.npz) instead of JSON lists of floats
+"""
+import json
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Union
+
+import numpy as np
+from loguru import logger
+
+
+class ImageEmbeddingIndex:
+    """
+    In-memory image embedding index shared by all vision sessions
+
+    Rows are stored once in a global matrix. Each session keeps the set of
+    rows it owns, so a session query scores only those rows while a global
+    query scores the whole matrix with one product.
+    """
+
+    def __init__(self, dimension: Optional[int] = None, initial_capacity: int = 1024):
+        """
+        Initialize image embedding index
+
+        Args:
+            dimension: Embedding dimension (inferred from the first add if None)
+            initial_capacity: Initial number of rows to allocate
+        """
+        self.dimension = dimension
+        self._capacity = max(1, initial_capacity)
+        self._matrix: Optional[np.ndarray] = None
+        self._alive = np.zeros(self._capacity, dtype=bool)
+        self._source_codes = np.full(self._capacity, -1, dtype=np.int32)
+        self._size = 0  # High-water mark of used rows
+        self._free_rows: List[int] = []
+
+        self._ids: List[Optional[str]] = []
+        self._sessions: List[Optional[str]] = []
+        self._metadata: List[Optional[Dict]] = []
+        self._id_to_row: Dict[str, int] = {}
+        self._session_rows: Dict[str, Set[int]] = {}
+        self._source_to_code: Dict[str, int] = {}
+
+        self._lock = threading.RLock()
+
+        if dimension:
+            self._matrix = np.zeros((self._capacity, dimension), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self._id_to_row)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._id_to_row
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        """L2-normalize rows (zero vectors stay zero)"""
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _ensure_capacity(self, rows_needed: int) -> None:
+        """Grow the matrix geometrically so appends stay amortized O(1)"""
+        if rows_needed <= self._capacity:
+            return
+        new_capacity = self._capacity
+        while new_capacity < rows_needed:
+            new_capacity *= 2
+
+        matrix = np.zeros((new_capacity, self.dimension), dtype=np.float32)
+        matrix[: self._size] = self._matrix[: self._size]
+        self._matrix = matrix
+
+        alive = np.zeros(new_capacity, dtype=bool)
+        alive[: self._size] = self._alive[: self._size]
+        self._alive = alive
+
+        codes = np.full(new_capacity, -1, dtype=np.int32)
+        codes[: self._size] = self._source_codes[: self._size]
+        self._source_codes = codes
+
+        self._capacity = new_capacity
+
+    def _source_code(self, source: Optional[str]) -> int:
+        """Map a source type to a small integer code"""
+        if source is None:
+            return -1
+        code = self._source_to_code.get(source)
+        if code is None:
+            code = len(self._source_to_code)
+            self._source_to_code[source] = code
+        return code
+
+    def _allocate_row(self) -> int:
+        """Reuse a freed row or append a new one"""
+        if self._free_rows:
+            return self._free_rows.pop()
+        self._ensure_capacity(self._size + 1)
+        row = self._size
+        self._size += 1
+        self._ids.append(None)
+        self._sessions.append(None)
+        self._metadata.append(None)
+        return row
+
+    def add(
+        self,
+        item_id: str,
+        embedding: Union[np.ndarray, List[float]],
+        session_id: Optional[str] = None,
+        source: Optional[str] = None,
+        metadata: Optional[Dict] = None,
+    ) -> int:
+        """
+        Add or replace an image embedding
+
+        Args:
+            item_id: Unique image/asset ID
+            embedding: Image embedding vector
+            session_id: Owning session (None for global-only items)
+            source: Source type used for filtering (e.g. "image", "pdf_page", "video_frame")
+            metadata: Metadata returned with search results
+
+        Returns:
+            Row number of the stored embedding
+        """
+        vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+
+        with self._lock:
+            if self.dimension is None:
+                self.dimension = vector.shape[0]
+            if vector.shape[0] != self.dimension:
+                raise ValueError(
+                    f"Embedding dimension {vector.shape[0]} does not match index dimension {self.dimension}"
+                )
+            if self._matrix is None:
+                self._matrix = np.zeros((self._capacity, self.dimension), dtype=np.float32)
+
+            row = self._id_to_row.get(item_id)
+            if row is None:
+                row = self._allocate_row()
+                self._id_to_row[item_id] = row
+            else:
+                previous_session = self._sessions[row]
+                if previous_session is not None and previous_session != session_id:
+                    self._session_rows.get(previous_session, set()).discard(row)
+
+            self._matrix[row] = self._normalize(vector)
+            self._alive[row] = True
+            self._source_codes[row] = self._source_code(source)
+            self._ids[row] = item_id
+            self._sessions[row] = session_id
+            self._metadata[row] = metadata or {}
+            if session_id is not None:
+                self._session_rows.setdefault(session_id, set()).add(row)
+            return row
+
+    def remove(self, item_ids: Iterable[str]) -> int:
+        """
+        Remove embeddings by ID (their rows are reused by later adds)
+
+        Returns:
+            Number of items removed
+        """
+        removed = 0
+        with self._lock:
+            for item_id in item_ids:
+                row = self._id_to_row.pop(item_id, None)
+                if row is None:
+                    continue
+                session_id = self._sessions[row]
+                if session_id is not None:
+                    rows = self._session_rows.get(session_id)
+                    if rows is not None:
+                        rows.discard(row)
+                        if not rows:
+                            del self._session_rows[session_id]
+                self._alive[row] = False
+                self._ids[row] = None
+                self._sessions[row] = None
+                self._metadata[row] = None
+                self._free_rows.append(row)
+                removed += 1
+        return removed
+
+    def remove_session(self, session_id: str) -> int:
+        """Remove every embedding owned by a session"""
+        with self._lock:
+            rows = self._session_rows.get(session_id, set())
+            return self.remove([self._ids[row] for row in list(rows)])
+
+    def session_ids(self, session_id: str) -> Set[str]:
+        """Get the IDs of items indexed for a session"""
+        with self._lock:
+            return {self._ids[row] for row in self._session_rows.get(session_id, ())}
+
+    def sync_session(self, session_id: str, session_images: List[Dict]) -> int:
+        """
+        Make the session's rows match a list of RAG-format images
+
+        Only images that are new (by ID) are embedded into the matrix and
+        images that disappeared from the session are dropped, so repeated
+        queries over an unchanged session do no matrix work.
+
+        Args:
+            session_id: Session ID
+            session_images: Dicts with keys {id, embedding, metadata}
+
+        Returns:
+            Number of images added
+        """
+        wanted = {}
+        for position, img_data in enumerate(session_images):
+            item_id = img_data.get("id") or f"{session_id}:{position}"
+            wanted[item_id] = img_data
+
+        with self._lock:
+            current = self.session_ids(session_id)
+            stale = current - wanted.keys()
+            if stale:
+                self.remove(stale)
+
+            added = 0
+            for item_id, img_data in wanted.items():
+                if item_id in current:
+                    continue
+                embedding = img_data.get("embedding")
+                if embedding is None:
+                    continue
+                metadata = img_data.get("metadata") or {}
+                try:
+                    self.add(
+                        item_id,
+                        embedding,
+                        session_id=session_id,
+                        source=metadata.get("source_type"),
+                        metadata={**metadata, "file_path": img_data.get("file_path")},
+                    )
+                    added += 1
+                except ValueError as e:
+                    logger.warning(f"Skipping image {item_id}: {e}")
+            return added
+
+    def search(
+        self,
+        query_embedding: Union[np.ndarray, List[float]],
+        top_k: int = 3,
+        session_id: Optional[str] = None,
+        source: Optional[str] = None,
+    ) -> List[Dict]:
+        """
+        Find the most similar images
+
+        Args:
+            query_embedding: Query vector (text or image embedding)
+            top_k: Number of results
+            session_id: Restrict to a session (None searches all images)
+            source: Restrict to a source type
+
+        Returns:
+            List of dicts with id, session_id, metadata and similarity, best first
+        """
+        query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+
+        with self._lock:
+            if self._matrix is None or not self._id_to_row or top_k <= 0:
+                return []
+            if query.shape[0] != self.dimension:
+                raise ValueError(
+                    f"Query dimension {query.shape[0]} does not match index dimension {self.dimension}"
+                )
+            query = self._normalize(query)
+
+            if session_id is not None:
+                rows = np.fromiter(self._session_rows.get(session_id, ()), dtype=np.int64)
+                if rows.size == 0:
+                    return []
+                candidates = self._matrix[rows]
+                mask = self._alive[rows]
+                codes = self._source_codes[rows]
+            else:
+                rows = None
+                candidates = self._matrix[: self._size]
+                mask = self._alive[: self._size].copy()
+                codes = self._source_codes[: self._size]
+
+            if source is not None:
+                code = self._source_to_code.get(source)
+                if code is None:
+                    return []
+                mask &= codes == code
+
+            valid = int(mask.sum())
+            if valid == 0:
+                return []
+
+            scores = candidates @ query
+            scores[~mask] = -np.inf
+
+            k = min(top_k, valid)
+            if k < scores.shape[0]:
+                top = np.argpartition(-scores, k - 1)[:k]
+            else:
+                top = np.arange(scores.shape[0])
+            top = top[np.argsort(-scores[top], kind="stable")][:k]
+
+            results = []
+            for position in top:
+                row = int(rows[position]) if rows is not None else int(position)
+                results.append({
+                    "id": self._ids[row],
+                    "session_id": self._sessions[row],
+                    "metadata": self._metadata[row],
+                    "similarity": float(scores[position]),
+                })
+            return results
+
+    def compact(self) -> None:
+        """Rebuild the matrix without freed rows"""
+        with self._lock:
+            if not self._free_rows or self._matrix is None:
+                return
+            live_rows = np.flatnonzero(self._alive[: self._size])
+            ids = [self._ids[row] for row in live_rows]
+            sessions = [self._sessions[row] for row in live_rows]
+            metadata = [self._metadata[row] for row in live_rows]
+
+            size = len(live_rows)
+            self._matrix[:size] = self._matrix[live_rows]
+            self._source_codes[:size] = self._source_codes[live_rows]
+            self._alive[:size] = True
+            self._alive[size:] = False
+
+            self._size = size
+            self._free_rows = []
+            self._ids, self._sessions, self._metadata = ids, sessions, metadata
+            self._id_to_row = {item_id: row for row, item_id in enumerate(ids)}
+            self._session_rows = {}
+            for row, session_id in enumerate(sessions):
+                if session_id is not None:
+                    self._session_rows.setdefault(session_id, set()).add(row)
+
+    def save(self, path: Union[str, Path]) -> None:
+        """
+        Persist the index in NumPy's binary .npz format
+
+        Args:
+            path: Output file path
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        with self._lock:
+            self.compact()
+            size = self._size
+            code_to_source = {code: source for source, code in self._source_to_code.items()}
+            sources = [code_to_source.get(int(code)) for code in self._source_codes[:size]]
+            header = {
+                "dimension": self.dimension,
+                "ids": self._ids[:size],
+                "sessions": self._sessions[:size],
+                "sources": sources,
+                "metadata": self._metadata[:size],
+            }
+            matrix = (
+                self._matrix[:size]
+                if self._matrix is not None
+                else np.zeros((0, self.dimension or 0), dtype=np.float32)
+            )
+
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(f, embeddings=matrix, header=np.array(json.dumps(header, default=str)))
+        tmp_path.replace(path)
+        logger.info(f"Saved image embedding index ({size} images) to {path}")
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "ImageEmbeddingIndex":
+        """
+        Load an index saved with save()
+
+        Args:
+            path: Index file path
+
+        Returns:
+            ImageEmbeddingIndex instance
+        """
+        with np.load(path, allow_pickle=False) as data:
+            matrix = data["embeddings"].astype(np.float32, copy=False)
+            header = json.loads(str(data["header"]))
+
+        index = cls(dimension=header.get("dimension"), initial_capacity=max(1024, len(matrix)))
+        if index.dimension:
+            index._matrix[: len(matrix)] = matrix
+        for row, item_id in enumerate(header["ids"]):
+            index._ids.append(item_id)
+            index._sessions.append(header["sessions"][row])
+            index._metadata.append(header["metadata"][row])
+            index._id_to_row[item_id] = row
+            index._alive[row] = True
+            index._source_codes[row] = index._source_code(header["sources"][row])
+            session_id = header["sessions"][row]
+            if session_id is not None:
+                index._session_rows.setdefault(session_id, set()).add(row)
+        index._size = len(header["ids"])
+
+        logger.info(f"Loaded image embedding index ({index._size} images) from {path}")
+        return index
@@ -1,9 +1,16 @@
 """
 News Service - Business logic for news aggregation
+
+Listing and search pages can be fetched with keyset cursors (opaque strings
+returned as `next_cursor`) instead of offsets, so deep pages cost the same
+as the first one.
 """
 import sys
+import json
+import base64
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 from loguru import logger
 import hashlib
@@ -12,6 +19,44 @@ import hashlib
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
+# Vector store namespace holding news chunks
+NEWS_NAMESPACE = "kenya_news"
+# Chunks requested per wanted article (articles span several chunks)
+VECTOR_HITS_PER_RESULT = 3
+MAX_VECTOR_HITS = 300
+
+
+def encode_cursor(position: dict) -> str:
+    """Opaque pagination cursor for a keyset position"""
+    raw = json.dumps(position, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], *keys: str) -> Optional[dict]:
+    """
+    Keyset position from a cursor
+
+    Raises:
+        ValueError: If the cursor is malformed or lacks any of `keys`
+    """
+    if not cursor:
+        return None
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(position, dict) or any(key not in position for key in keys):
+        raise ValueError("Invalid cursor")
+    return position
+
+
+@dataclass
+class ArticlePage:
+    """One page of articles"""
+    articles: List[dict] = field(default_factory=list)
+    total: int = 0
+    next_cursor: Optional[str] = None
+
 
 class NewsService:
     """Service for news article operations"""
@@ -49,64 +94,124 @@ class NewsService:
         Returns:
             Tuple of (articles list, total count)
         """
+        page = self.get_articles_page(
+            sources, categories, min_quality_score, date_from, date_to, limit=limit, offset=offset
+        )
+        return page.articles, page.total
+
+    def get_articles_page(
+        self,
+        sources: Optional[List[str]] = None,
+        categories: Optional[List[str]] = None,
+        min_quality_score: Optional[float] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        limit: int = 20,
+        offset: int = 0,
+        cursor: Optional[str] = None
+    ) -> ArticlePage:
+        """
+        Get newest-first articles with filtering
+        
+        Args:
+            cursor: `next_cursor` of the previous page; takes precedence over offset
+        
+        Raises:
+            ValueError: If the cursor is invalid
+        """
+        position = decode_cursor(cursor, "d", "id")
+        if position:
+            # Parsed up front so a bad cursor is the caller's error, not an empty page
+            try:
+                last_id = int(position["id"])
+                last_date = datetime.fromisoformat(position["d"]) if position["d"] is not None else None
+            except (TypeError, ValueError) as e:
+                raise ValueError("Invalid cursor") from e
         if not self.db_storage:
-            return [], 0
+            return ArticlePage()
+        
+        from sqlalchemy import and_, or_
+        from Module3_NiruDB.database_storage import RawDocument
         
+        db = self.db_storage.get_db_session()
         try:
-            from sqlalchemy import and_, or_
-            from Module3_NiruDB.database_storage import RawDocument
-            
-            db = self.db_storage.get_db_session()
-            
-            # Build query
-            query = db.query(RawDocument)
-            
-            # Apply filters
-            if sources:
-                query = query.filter(RawDocument.source_name.in_(sources))
-            
-            if categories:
-                query = query.filter(RawDocument.category.in_(categories))
-            
-            if date_from:
-                try:
-                    date_from_dt = datetime.fromisoformat(date_from.replace('Z', '+00:00'))
-                    query = query.filter(RawDocument.publication_date >= date_from_dt)
-                except:
-                    pass
-            
-            if date_to:
-                try:
-                    date_to_dt = datetime.fromisoformat(date_to.replace('Z', '+00:00'))
-                    query = query.filter(RawDocument.publication_date <= date_to_dt)
-                except:
-                    pass
+            query = self._apply_filters(db.query(RawDocument), sources, categories, date_from, date_to)
             
             # Get total count
             total = query.count()
             
-            # Apply ordering and pagination
-            query = query.order_by(RawDocument.publication_date.desc())
-            query = query.offset(offset).limit(limit)
-            
-            # Convert to dicts
-            articles = []
-            for doc in query.all():
-                article = self._doc_to_article(doc)
-                if article:
-                    # Filter by quality score if specified
-                    if min_quality_score is not None:
-                        quality_score = article.get("quality_score")
-                        if quality_score is None or quality_score < min_quality_score:
-                            continue
-                    articles.append(article)
-            
-            db.close()
-            return articles, total
+            # Keyset pagination over (publication_date, id), backed by ix_raw_documents_pub_date_desc_id
+            query = query.order_by(RawDocument.publication_date.desc().nullslast(), RawDocument.id.desc())
+            if position:
+                if last_date is None:
+                    query = query.filter(RawDocument.publication_date.is_(None), RawDocument.id < last_id)
+                else:
+                    query = query.filter(or_(
+                        RawDocument.publication_date < last_date,
+                        and_(RawDocument.publication_date == last_date, RawDocument.id < last_id),
+                        RawDocument.publication_date.is_(None),
+                    ))
+            else:
+                query = query.offset(offset)
+            docs = query.limit(limit).all()
+            
+            next_cursor = None
+            if len(docs) == limit:
+                last = docs[-1]
+                next_cursor = encode_cursor({
+                    "d": last.publication_date.isoformat() if last.publication_date else None,
+                    "id": last.id,
+                })
+            
+            return ArticlePage(self._to_articles(docs, min_quality_score), total, next_cursor)
             
         except Exception as e:
             logger.error(f"Error getting articles: {e}")
-            return [], 0
+            return ArticlePage()
+        finally:
+            db.close()
+    
+    def _apply_filters(self, query, sources: Optional[List[str]], categories: Optional[List[str]],
+                       date_from: Optional[str], date_to: Optional[str]):
+        """Apply source, category and publication date filters to a RawDocument query"""
+        from Module3_NiruDB.database_storage import RawDocument
+        
+        if sources:
+            query = query.filter(RawDocument.source_name.in_(sources))
+        
+        if categories:
+            query = query.filter(RawDocument.category.in_(categories))
+        
+        if date_from:
+            try:
+                date_from_dt = datetime.fromisoformat(date_from.replace('Z', '+00:00'))
+                query = query.filter(RawDocument.publication_date >= date_from_dt)
+            except:
+                pass
+        
+        if date_to:
+            try:
+                date_to_dt = datetime.fromisoformat(date_to.replace('Z', '+00:00'))
+                query = query.filter(RawDocument.publication_date <= date_to_dt)
+            except:
+                pass
+        
+        return query
+    
+    def _to_articles(self, docs, min_quality_score: Optional[float] = None) -> List[dict]:
+        """Convert documents to articles, dropping those below min_quality_score"""
+        articles = []
+        for doc in docs:
+            article = self._doc_to_article(doc)
+            if not article:
+                continue
+            # Filter by quality score if specified
+            if min_quality_score is not None:
+                quality_score = article.get("quality_score")
+                if quality_score is None or quality_score < min_quality_score:
+                    continue
+            articles.append(article)
+        return articles
     
     def get_article_by_id(self, article_id: str) -> Optional[dict]:
         """Get article by ID (URL hash)"""
@@ -156,77 +261,185 @@ class NewsService:
         Returns:
             Tuple of (articles list, total count)
         """
-        if not self.vector_store:
-            # Fallback to text search
-            return self._text_search(query, sources, categories, limit, offset)
+        page = self.search_articles_page(
+            query, sources, categories, min_quality_score, date_from, date_to, limit=limit, offset=offset
+        )
+        return page.articles, page.total
+
+    def search_articles_page(
+        self,
+        query: str,
+        sources: Optional[List[str]] = None,
+        categories: Optional[List[str]] = None,
+        min_quality_score: Optional[float] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        limit: int = 20,
+        offset: int = 0,
+        cursor: Optional[str] = None
+    ) -> ArticlePage:
+        """
+        Search articles semantically, falling back to full-text search
         
+        Args:
+            cursor: `next_cursor` of the previous page; takes precedence over offset
+        
+        Raises:
+            ValueError: If the cursor is invalid
+        """
+        position = decode_cursor(cursor, "m")
+        if self.vector_store and (position is None or position["m"] == "v"):
+            try:
+                page = self._vector_search(
+                    query, sources, categories, min_quality_score, date_from, date_to, limit, offset, position
+                )
+                if page.total or position:
+                    return page
+                # Nothing indexed for news yet: lexical search instead
+            except ValueError:
+                raise
+            except Exception as e:
+                logger.error(f"Error searching articles: {e}")
+                # A vector cursor cannot continue in lexical order
+                position = None
+        
+        return self._text_search(
+            query, sources, categories, limit, offset,
+            position=position, date_from=date_from, date_to=date_to, min_quality_score=min_quality_score
+        )
+    
+    def _vector_search(self, query: str, sources: Optional[List[str]], categories: Optional[List[str]],
+                       min_quality_score: Optional[float], date_from: Optional[str], date_to: Optional[str],
+                       limit: int, offset: int, position: Optional[dict]) -> ArticlePage:
+        """Rank articles by vector similarity and hydrate them in a single query"""
         try:
-            # Use vector store for semantic search
-            results = self.vector_store.search(query, top_k=limit + offset)
-            
-            # Get article IDs from results
-            article_urls = [r.get("source_url") for r in results[offset:offset+limit] if r.get("source_url")]
-            
-            # Fetch full articles
-            articles = []
-            for url in article_urls:
-                article = self.get_article_by_id(url)
-                if article:
-                    # Apply filters
-                    if sources and article.get("source_name") not in sources:
-                        continue
-                    if categories and article.get("category") not in categories:
-                        continue
-                    if min_quality_score:
-                        quality_score = article.get("quality_score")
-                        if quality_score is None or quality_score < min_quality_score:
-                            continue
-                    
-                    articles.append(article)
-            
-            return articles, len(results)
-            
-        except Exception as e:
-            logger.error(f"Error searching articles: {e}")
-            return self._text_search(query, sources, categories, limit, offset)
+            start = int(position["pos"]) if position and "pos" in position else offset
+        except (TypeError, ValueError) as e:
+            raise ValueError("Invalid cursor") from e
+        
+        hits = self.vector_store.query(
+            query,
+            n_results=min(MAX_VECTOR_HITS, (start + limit) * VECTOR_HITS_PER_RESULT),
+            namespace=NEWS_NAMESPACE
+        )
+        
+        # Unique article URLs in ranking order (an article has several chunks)
+        ranked_urls = list(dict.fromkeys(
+            url for url in (hit.get("source_url") or hit.get("metadata", {}).get("source_url") for hit in hits) if url
+        ))
+        candidates = ranked_urls[start:]
+        docs = self._hydrate(candidates, sources, categories, date_from, date_to)
+        
+        articles = []
+        consumed = start
+        for url in candidates:
+            consumed += 1
+            doc = docs.get(url)
+            if doc is None:
+                continue
+            articles.extend(self._to_articles([doc], min_quality_score))
+            if len(articles) == limit:
+                break
+        
+        next_cursor = encode_cursor({"m": "v", "pos": consumed}) if consumed < len(ranked_urls) else None
+        return ArticlePage(articles, len(ranked_urls), next_cursor)
+    
+    def _hydrate(self, urls: List[str], sources: Optional[List[str]], categories: Optional[List[str]],
+                 date_from: Optional[str], date_to: Optional[str]) -> Dict[str, object]:
+        """
+        Load the documents for ranked URLs with one query
+        
+        Returns:
+            source_url -> RawDocument for URLs that exist and pass the filters;
+            callers iterate their own ranked list to keep vector order
+        """
+        if not urls or not self.db_storage:
+            return {}
+        
+        from Module3_NiruDB.database_storage import RawDocument
+        
+        db = self.db_storage.get_db_session()
+        try:
+            query = db.query(RawDocument).filter(RawDocument.source_url.in_(urls))
+            query = self._apply_filters(query, sources, categories, date_from, date_to)
+            return {doc.source_url: doc for doc in query.all()}
+        finally:
+            db.close()
     
     def _text_search(self, query: str, sources: Optional[List[str]], categories: Optional[List[str]], 
-                    limit: int, offset: int) -> Tuple[List[dict], int]:
-        """Fallback text search"""
+                    limit: int, offset: int, position: Optional[dict] = None, date_from: Optional[str] = None,
+                    date_to: Optional[str] = None, min_quality_score: Optional[float] = None) -> ArticlePage:
+        """
+        Fallback lexical search
+        
+        PostgreSQL uses the GIN full-text index (ranked by ts_rank_cd); other
+        databases fall back to ILIKE matching, newest rows first.
+        """
         if not self.db_storage:
-            return [], 0
+            return ArticlePage()
+        
+        from sqlalchemy import and_, or_, func, cast, literal_column, Integer
+        from Module3_NiruDB.database_storage import RawDocument, RAW_DOCUMENT_SEARCH_VECTOR
         
+        postgresql = self.db_storage.engine.dialect.name == "postgresql"
+        if position is not None:
+            if position.get("m") != "t" or "id" not in position or (postgresql and "r" not in position):
+                raise ValueError("Invalid cursor")
+            try:
+                last_id = int(position["id"])
+                last_rank = int(position["r"]) if postgresql else None
+            except (TypeError, ValueError) as e:
+                raise ValueError("Invalid cursor") from e
+        
+        db = self.db_storage.get_db_session()
         try:
-            from Module3_NiruDB.database_storage import RawDocument
-            
-            db = self.db_storage.get_db_session()
-            
-            # Simple text search in title and content
-            query_lower = query.lower()
-            results = db.query(RawDocument).filter(
-                or_(
-                    RawDocument.title.ilike(f"%{query}%"),
-                    RawDocument.raw_content.ilike(f"%{query}%")
+            results = self._apply_filters(db.query(RawDocument), sources, categories, date_from, date_to)
+            
+            if postgresql:
+                document = literal_column(RAW_DOCUMENT_SEARCH_VECTOR)
+                tsquery = func.websearch_to_tsquery("english", query)
+                # Integer rank so cursor comparisons are exact
+                rank = cast(func.ts_rank_cd(document, tsquery) * 1000000, Integer)
+                
+                results = results.filter(document.op("@@")(tsquery))
+                total = results.count()
+                
+                ranked = results.add_columns(rank.label("rank")).order_by(rank.desc(), RawDocument.id.desc())
+                if position:
+                    ranked = ranked.filter(or_(
+                        rank < last_rank,
+                        and_(rank == last_rank, RawDocument.id < last_id),
+                    ))
+                else:
+                    ranked = ranked.offset(offset)
+                rows = ranked.limit(limit).all()
+                docs = [doc for doc, _ in rows]
+                last_position = {"m": "t", "r": rows[-1][1], "id": rows[-1][0].id} if rows else None
+            else:
+                results = results.filter(
+                    or_(
+                        RawDocument.title.ilike(f"%{query}%"),
+                        RawDocument.raw_content.ilike(f"%{query}%")
+                    )
                 )
-            )
-            
-            if sources:
-                results = results.filter(RawDocument.source_name.in_(sources))
-            
-            if categories:
-                results = results.filter(RawDocument.category.in_(categories))
-            
-            total = results.count()
-            results = results.offset(offset).limit(limit)
-            
-            articles = [self._doc_to_article(doc) for doc in results.all() if self._doc_to_article(doc)]
-            db.close()
-            
-            return articles, total
+                total = results.count()
+                
+                results = results.order_by(RawDocument.id.desc())
+                if position:
+                    results = results.filter(RawDocument.id < last_id)
+                else:
+                    results = results.offset(offset)
+                docs = results.limit(limit).all()
+                last_position = {"m": "t", "id": docs[-1].id} if docs else None
+            
+            next_cursor = encode_cursor(last_position) if len(docs) == limit else None
+            return ArticlePage(self._to_articles(docs, min_quality_score), total, next_cursor)
             
         except Exception as e:
             logger.error(f"Error in text search: {e}")
-            return [], 0
+            return ArticlePage()
+        finally:
+            db.close()
     
     def get_sources(self) -> List[dict]:
         """Get list of all news sources"""
@@ -298,3 +511,13 @@ class NewsService:
             logger.error(f"Error converting doc to article: {e}")
             return None
 
+
+_news_service: Optional[NewsService] = None
+
+
+def get_news_service() -> NewsService:
+    """Get the shared news service (one database engine and vector store per process)"""
+    global _news_service
+    if _news_service is None:
+        _news_service = NewsService()
+    return _news_service
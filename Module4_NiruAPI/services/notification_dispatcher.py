@@ -0,0 +1,221 @@
+"""
+Notification Dispatcher - Bounded-concurrency delivery with provider rate limits
+
+The Talksasa client is synchronous (requests), so each send runs in a worker
+thread while the dispatcher caps how many are in flight and how many start
+per second, keeping bulk sends inside the provider's limits.
+"""
+import os
+import time
+import asyncio
+import threading
+import concurrent.futures
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+from loguru import logger
+
+
+@dataclass
+class NotificationJob:
+    """A single message to deliver"""
+
+    recipient: str
+    message: str
+    notification_type: str = "whatsapp"
+    metadata: Dict = field(default_factory=dict)
+
+
+@dataclass
+class DispatchResult:
+    """Outcome of a dispatch run"""
+
+    sent: int = 0
+    failed: int = 0
+    elapsed: float = 0.0
+    errors: List[Dict] = field(default_factory=list)
+
+    @property
+    def rate(self) -> float:
+        """Notifications sent per second"""
+        return self.sent / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class AsyncTokenBucket:
+    """Token bucket limiting how many sends start per second"""
+
+    def __init__(self, rate_per_second: float, burst: Optional[int] = None):
+        self.rate = rate_per_second
+        self.capacity = float(burst or max(1, int(rate_per_second)))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a token is available"""
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class NotificationDispatcher:
+    """Deliver notification jobs concurrently through a provider send function"""
+
+    def __init__(
+        self,
+        send_fn: Callable[[str, str, str], Dict],
+        max_concurrency: Optional[int] = None,
+        rate_per_second: Optional[float] = None,
+        burst: Optional[int] = None,
+    ):
+        """
+        Initialize dispatcher
+
+        Args:
+            send_fn: Sync function (recipient, message, notification_type) -> {"status": ...}
+            max_concurrency: Sends in flight (env NOTIFICATION_MAX_CONCURRENCY, default 8)
+            rate_per_second: Provider send rate limit (env NOTIFICATION_RATE_LIMIT, default 10; 0 disables)
+            burst: Token bucket burst size (defaults to the per-second rate)
+        """
+        self.send_fn = send_fn
+        self.max_concurrency = max_concurrency or int(os.getenv("NOTIFICATION_MAX_CONCURRENCY", "8"))
+        self.rate_per_second = (
+            rate_per_second
+            if rate_per_second is not None
+            else float(os.getenv("NOTIFICATION_RATE_LIMIT", "10"))
+        )
+        self.burst = burst
+
+    async def dispatch(self, jobs: List[NotificationJob]) -> DispatchResult:
+        """
+        Send all jobs with bounded concurrency and rate limiting
+
+        Args:
+            jobs: Notification jobs
+
+        Returns:
+            DispatchResult with counts and timing
+        """
+        result = DispatchResult()
+        if not jobs:
+            return result
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        bucket = AsyncTokenBucket(self.rate_per_second, self.burst)
+        start = time.perf_counter()
+
+        async def deliver(job: NotificationJob) -> None:
+            async with semaphore:
+                await bucket.acquire()
+                try:
+                    response = await asyncio.to_thread(
+                        self.send_fn, job.recipient, job.message, job.notification_type
+                    )
+                except Exception as e:
+                    response = {"status": "error", "message": str(e)}
+
+            if response.get("status") == "success":
+                result.sent += 1
+            else:
+                result.failed += 1
+                result.errors.append({"recipient": job.recipient, "message": response.get("message")})
+                logger.warning(f"Failed to send notification to {job.recipient}: {response.get('message')}")
+
+        await asyncio.gather(*(deliver(job) for job in jobs))
+        result.elapsed = time.perf_counter() - start
+        return result
+
+    def dispatch_sync(self, jobs: List[NotificationJob]) -> DispatchResult:
+        """
+        Blocking wrapper for sync callers (storage callbacks, worker threads)
+
+        Runs the dispatch on a fresh loop, or on a helper thread when the
+        calling thread already runs an event loop.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.dispatch(jobs))
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, self.dispatch(jobs)).result()
+
+
+class SubscriptionIndex:
+    """
+    Inverted index of immediate subscriptions by category and source
+
+    Subscriptions without a category (or source) filter accept every value
+    and live in the matching "any" set, so an article is matched with a
+    couple of set unions and one intersection instead of a full scan.
+    """
+
+    def __init__(self, refresh_interval: float = 300.0):
+        """
+        Args:
+            refresh_interval: Seconds before the index is reloaded even without local
+                changes (picks up edits made by other workers)
+        """
+        self.refresh_interval = refresh_interval
+        self._subscriptions: Dict[int, object] = {}
+        self._any_category: set = set()
+        self._any_source: set = set()
+        self._by_category: Dict[str, set] = {}
+        self._by_source: Dict[str, set] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def stale(self) -> bool:
+        """Whether the index needs to be (re)loaded"""
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_interval
+
+    def invalidate(self) -> None:
+        """Force a reload on next use"""
+        self._loaded_at = None
+
+    def rebuild(self, subscriptions: List) -> None:
+        """Replace the index contents with the given subscriptions"""
+        subs, any_category, any_source = {}, set(), set()
+        by_category: Dict[str, set] = {}
+        by_source: Dict[str, set] = {}
+
+        for sub in subscriptions:
+            subs[sub.id] = sub
+            if sub.categories:
+                for category in sub.categories:
+                    by_category.setdefault(category, set()).add(sub.id)
+            else:
+                any_category.add(sub.id)
+            if sub.sources:
+                for source in sub.sources:
+                    by_source.setdefault(source, set()).add(sub.id)
+            else:
+                any_source.add(sub.id)
+
+        with self._lock:
+            self._subscriptions = subs
+            self._any_category, self._any_source = any_category, any_source
+            self._by_category, self._by_source = by_category, by_source
+            self._loaded_at = time.monotonic()
+
+    def match(self, category: Optional[str], source: Optional[str]) -> List:
+        """Get subscriptions whose filters accept an article"""
+        with self._lock:
+            by_category = self._any_category
+            if category:
+                by_category = by_category | self._by_category.get(category, set())
+            by_source = self._any_source
+            if source:
+                by_source = by_source | self._by_source.get(source, set())
+            return [self._subscriptions[sub_id] for sub_id in sorted(by_category & by_source)]
+
+    def __len__(self) -> int:
+        return len(self._subscriptions)
@@ -22,6 +22,11 @@ from Module3_NiruDB.notification_models import (
     get_db_session
 )
 from Module4_NiruAPI.services.talksasa_service import TalksasaNotificationService
+from Module4_NiruAPI.services.notification_dispatcher import (
+    NotificationDispatcher,
+    NotificationJob,
+    SubscriptionIndex,
+)
 
 
 class NotificationService:
@@ -56,6 +61,12 @@ class NotificationService:
             sender_id = config_manager.get_config("TALKSASA_SENDER_ID")
 
         self.talksasa_service = TalksasaNotificationService(api_token=api_token, sender_id=sender_id)
+        self.dispatcher = NotificationDispatcher(self.talksasa_service.send_notification)
+
+        # Inverted index of immediate subscriptions, reloaded on local changes
+        self.subscription_index = SubscriptionIndex(
+            refresh_interval=float(os.getenv("NOTIFICATION_INDEX_REFRESH_SECONDS", "300"))
+        )
         logger.info("Notification service initialized")
 
     def _get_db_session(self):
@@ -117,6 +128,8 @@ class NotificationService:
                 existing = new_sub
                 logger.info(f"Created subscription for {subscription.phone_number}")
 
+            self.subscription_index.invalidate()
+
             # Convert to response
             return self._subscription_to_response(existing)
 
@@ -147,6 +160,7 @@ class NotificationService:
                 subscription.is_active = False
                 subscription.updated_at = datetime.utcnow()
                 db.commit()
+                self.subscription_index.invalidate()
                 logger.info(f"Unsubscribed {phone_number}")
                 return True
             return False
@@ -198,6 +212,7 @@ class NotificationService:
             subscription.updated_at = datetime.utcnow()
             db.commit()
             db.refresh(subscription)
+            self.subscription_index.invalidate()
 
             logger.info(f"Updated subscription for {phone_number}")
             return self._subscription_to_response(subscription)
@@ -289,6 +304,23 @@ class NotificationService:
         finally:
             db.close()
 
+    def get_matching_subscriptions(self, article: Dict) -> List[SubscriptionResponse]:
+        """
+        Get immediate subscriptions whose filters accept an article
+
+        Uses the in-memory subscription index, reloading it from the
+        database when it was invalidated or has gone stale.
+
+        Args:
+            article: Article dict with category and source_name
+
+        Returns:
+            List of matching SubscriptionResponse
+        """
+        if self.subscription_index.stale:
+            self.subscription_index.rebuild(self.get_active_subscriptions(schedule_type="immediate"))
+        return self.subscription_index.match(article.get("category"), article.get("source_name"))
+
     def send_article_notification(self, article: Dict) -> int:
         """
         Send notification for a new article to matching subscribers
@@ -300,42 +332,50 @@ class NotificationService:
             Number of notifications sent
         """
         # Get subscribers who want immediate notifications
-        subscribers = self.get_active_subscriptions(
-            schedule_type="immediate",
-            categories=[article.get("category")] if article.get("category") else None,
-            sources=[article.get("source_name")] if article.get("source_name") else None
-        )
+        subscribers = self.get_matching_subscriptions(article)
+        if not subscribers:
+            return 0
 
-        sent_count = 0
         message = self._format_article_message(article)
+        jobs = [
+            NotificationJob(
+                recipient=subscriber.phone_number,
+                message=message,
+                notification_type=subscriber.notification_type,
+            )
+            for subscriber in subscribers
+        ]
+
+        result = self.dispatcher.dispatch_sync(jobs)
+
+        logger.info(
+            f"Sent {result.sent} article notifications for: {article.get('title', 'Unknown')} "
+            f"({result.rate:.1f}/s)"
+        )
+        return result.sent
 
-        for subscriber in subscribers:
-            # Check if article matches subscriber's filters
-            if not self._article_matches_subscription(article, subscriber):
-                continue
-
-            try:
-                result = self.talksasa_service.send_notification(
-                    recipient=subscriber.phone_number,
-                    message=message,
-                    notification_type=subscriber.notification_type
-                )
-
-                if result.get("status") == "success":
-                    sent_count += 1
-                else:
-                    logger.warning(f"Failed to send notification to {subscriber.phone_number}: {result.get('message')}")
-
-            except Exception as e:
-                logger.error(f"Error sending notification to {subscriber.phone_number}: {e}")
-
-        logger.info(f"Sent {sent_count} article notifications for: {article.get('title', 'Unknown')}")
-        return sent_count
+    def _is_digest_due(self, subscriber: SubscriptionResponse, current_time: time) -> bool:
+        """Check if it's time to send a subscriber's digest (30 minute window)"""
+        if not subscriber.digest_time:
+            return True
+        try:
+            digest_time = datetime.strptime(subscriber.digest_time, "%H:%M").time()
+            time_diff = abs(
+                (datetime.combine(datetime.today(), current_time) -
+                 datetime.combine(datetime.today(), digest_time)).total_seconds() / 60
+            )
+            return time_diff <= 30
+        except:
+            # If time parsing fails, skip this subscriber
+            return False
 
     def send_digest_notifications(self) -> int:
         """
         Send daily digest to subscribers who opted for it
 
+        Subscribers with identical source/category preferences share one
+        article query and one formatted message.
+
         Returns:
             Number of digests sent
         """
@@ -347,57 +387,56 @@ class NotificationService:
         if not subscribers:
             return 0
 
-        news_service = NewsService()
-        sent_count = 0
         current_time = datetime.utcnow().time()
 
+        # Group due subscribers by preference set
+        groups: Dict[tuple, List[SubscriptionResponse]] = {}
         for subscriber in subscribers:
-            # Check if it's time to send digest
-            if subscriber.digest_time:
-                try:
-                    # Allow 30 minute window
-                    digest_time = datetime.strptime(subscriber.digest_time, "%H:%M").time()
-                    time_diff = abs(
-                        (datetime.combine(datetime.today(), current_time) -
-                         datetime.combine(datetime.today(), digest_time)).total_seconds() / 60
-                    )
-                    if time_diff > 30:
-                        continue
-                except:
-                    # If time parsing fails, skip this subscriber
-                    continue
+            if not self._is_digest_due(subscriber, current_time):
+                continue
+            key = (tuple(sorted(subscriber.sources or [])), tuple(sorted(subscriber.categories or [])))
+            groups.setdefault(key, []).append(subscriber)
 
+        if not groups:
+            return 0
+
+        news_service = NewsService()
+        date_from = (datetime.utcnow() - timedelta(days=1)).isoformat()
+        jobs = []
+
+        for (sources, categories), members in groups.items():
             try:
-                # Get articles from last 24 hours matching subscriber filters
-                date_from = (datetime.utcnow() - timedelta(days=1)).isoformat()
+                # Get articles from last 24 hours matching the shared filters
                 articles, _ = news_service.get_articles(
-                    sources=subscriber.sources,
-                    categories=subscriber.categories,
+                    sources=list(sources) or None,
+                    categories=list(categories) or None,
                     date_from=date_from,
                     limit=10
                 )
+            except Exception as e:
+                logger.error(f"Error loading digest articles for {len(members)} subscriber(s): {e}")
+                continue
 
-                if not articles:
-                    continue
-
-                message = self._format_digest_message(articles)
+            if not articles:
+                continue
 
-                result = self.talksasa_service.send_notification(
+            message = self._format_digest_message(articles)
+            jobs.extend(
+                NotificationJob(
                     recipient=subscriber.phone_number,
                     message=message,
-                    notification_type=subscriber.notification_type
+                    notification_type=subscriber.notification_type,
                 )
+                for subscriber in members
+            )
 
-                if result.get("status") == "success":
-                    sent_count += 1
-                else:
-                    logger.warning(f"Failed to send digest to {subscriber.phone_number}: {result.get('message')}")
+        result = self.dispatcher.dispatch_sync(jobs)
 
-            except Exception as e:
-                logger.error(f"Error sending digest to {subscriber.phone_number}: {e}")
-
-        logger.info(f"Sent {sent_count} daily digest notifications")
-        return sent_count
+        logger.info(
+            f"Sent {result.sent} daily digest notifications "
+            f"({len(groups)} preference group(s), {result.rate:.1f}/s)"
+        )
+        return result.sent
 
     def _article_matches_subscription(self, article: Dict, subscription: SubscriptionResponse) -> bool:
         """Check if article matches subscription filters"""
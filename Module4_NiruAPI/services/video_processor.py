@@ -2,26 +2,36 @@
 Video Processor - Extract frames and audio from video files for RAG integration
 
 Provides utilities for:
-- Key frame extraction (fixed interval or scene-based)
+- Key frame extraction (fixed interval or single-pass scene-change detection)
 - Audio track extraction for speech-to-text
 - Video metadata extraction
 """
 import os
+import re
+import time
+import heapq
 import subprocess
 import tempfile
 import shutil
 from pathlib import Path
-from typing import List, Dict, Optional, Union, Tuple
+from typing import Any, List, Dict, Optional, Union, Tuple
 from dataclasses import dataclass, field
 from loguru import logger
 
 try:
     import cv2
+    import numpy as np
     OPENCV_AVAILABLE = True
 except ImportError:
     OPENCV_AVAILABLE = False
     logger.warning("OpenCV not available. Install with: pip install opencv-python")
 
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
 
 @dataclass
 class VideoMetadata:
@@ -54,10 +64,23 @@ class VideoMetadata:
 class ExtractedFrame:
     """Extracted video frame"""
     
-    frame_path: str  # Path to saved frame image
+    frame_path: str  # Path to saved frame image ("" if kept in memory only)
     timestamp: float  # Timestamp in seconds
     frame_number: int
     metadata: Dict = field(default_factory=dict)
+    image: Optional[Any] = field(default=None, repr=False)  # BGR array when kept in memory
+    
+    def to_pil(self) -> "Image.Image":
+        """Convert the in-memory frame to an RGB PIL image"""
+        if self.image is None:
+            raise ValueError("Frame was not kept in memory")
+        if not PIL_AVAILABLE:
+            raise ImportError("Pillow is required to convert frames. Install with: pip install Pillow")
+        return Image.fromarray(cv2.cvtColor(self.image, cv2.COLOR_BGR2RGB))
+    
+    def release(self) -> None:
+        """Drop the in-memory frame once it has been consumed"""
+        self.image = None
     
     def to_dict(self) -> Dict:
         """Convert to dictionary"""
@@ -77,6 +100,7 @@ class ExtractionResult:
     audio_path: Optional[str]  # Path to extracted audio file
     video_metadata: VideoMetadata
     output_dir: str
+    stats: Dict = field(default_factory=dict)  # Frame extraction statistics
     
     def to_dict(self) -> Dict:
         """Convert to dictionary"""
@@ -85,6 +109,7 @@ class ExtractionResult:
             "audio_path": self.audio_path,
             "video_metadata": self.video_metadata.to_dict(),
             "output_dir": self.output_dir,
+            "stats": self.stats,
         }
 
 
@@ -94,15 +119,26 @@ class VideoProcessor:
     
     Supports multiple extraction strategies:
     - Fixed interval: Extract frames at regular intervals
-    - Scene detection: Extract frames when scene changes (future enhancement)
-    - Key frames: Extract I-frames only (future enhancement)
+    - First/last: Extract the first and last frame
+    - Key frames / scene change: Single sequential decode pass that keeps a
+      frame only when it differs from the last kept frame (colour histogram
+      + difference hash), so near-identical frames are dropped
     """
     
+    # Strategies served by the single-pass scene detector
+    SCENE_STRATEGIES = ("keyframes", "scene_change")
+    
+    # Size of the thumbnail used for frame signatures
+    SIGNATURE_SIZE = 64
+    
     def __init__(
         self,
         temp_dir: Optional[str] = None,
         ffmpeg_path: Optional[str] = None,
         cleanup_on_error: bool = True,
+        sample_fps: float = 2.0,
+        scene_threshold: float = 0.3,
+        min_scene_gap: float = 1.0,
     ):
         """
         Initialize video processor
@@ -111,10 +147,17 @@ class VideoProcessor:
             temp_dir: Directory for temporary files (uses system temp if None)
             ffmpeg_path: Path to ffmpeg binary (auto-detect if None)
             cleanup_on_error: Whether to cleanup on errors
+            sample_fps: Frames per second inspected by the scene detector
+            scene_threshold: Minimum frame difference (0-1) that counts as a scene change
+            min_scene_gap: Minimum seconds between two kept scene frames
         """
         self.temp_dir = temp_dir or tempfile.gettempdir()
         self.ffmpeg_path = ffmpeg_path or self._find_ffmpeg()
         self.cleanup_on_error = cleanup_on_error
+        self.sample_fps = sample_fps
+        self.scene_threshold = scene_threshold
+        self.min_scene_gap = min_scene_gap
+        self.last_stats: Dict = {}
         
         if not OPENCV_AVAILABLE:
             logger.warning("OpenCV not available - some features may be limited")
@@ -274,6 +317,9 @@ class VideoProcessor:
         strategy: str = "fixed_interval",
         image_format: str = "jpg",
         quality: int = 85,
+        save_frames: bool = True,
+        keep_in_memory: bool = False,
+        max_dimension: Optional[int] = None,
     ) -> List[ExtractedFrame]:
         """
         Extract frames from video
@@ -281,10 +327,13 @@ class VideoProcessor:
         Args:
             video_path: Path to video file
             output_dir: Directory to save frames (creates temp if None)
-            num_frames: Number of frames to extract
-            strategy: Extraction strategy ('fixed_interval', 'first_last', 'keyframes')
+            num_frames: Number of frames to extract (upper bound for scene strategies)
+            strategy: Extraction strategy ('fixed_interval', 'first_last', 'keyframes', 'scene_change')
             image_format: Output image format ('jpg', 'png')
             quality: JPEG quality (1-100)
+            save_frames: Write selected frames to output_dir
+            keep_in_memory: Keep decoded frames on ExtractedFrame.image (OpenCV only)
+            max_dimension: Downscale frames so the longest side fits (None keeps source size)
             
         Returns:
             List of ExtractedFrame objects
@@ -302,9 +351,20 @@ class VideoProcessor:
         
         # Get video metadata
         metadata = self.get_video_metadata(video_path)
+        self.last_stats = {}
         
         logger.info(f"Extracting {num_frames} frames from {video_path.name} ({metadata.duration:.1f}s)")
         
+        if strategy in self.SCENE_STRATEGIES:
+            if OPENCV_AVAILABLE:
+                return self._extract_scene_frames_opencv(
+                    video_path, output_dir, num_frames, metadata, image_format, quality,
+                    save_frames, keep_in_memory, max_dimension,
+                )
+            return self._extract_scene_frames_ffmpeg(
+                video_path, output_dir, num_frames, metadata, image_format, quality, max_dimension,
+            )
+        
         # Calculate frame timestamps based on strategy
         if strategy == "fixed_interval":
             timestamps = self._calculate_fixed_interval_timestamps(
@@ -313,19 +373,14 @@ class VideoProcessor:
             )
         elif strategy == "first_last":
             timestamps = [0.0, metadata.duration - 0.1]
-        elif strategy == "keyframes":
-            # Future: Use scene detection
-            timestamps = self._calculate_fixed_interval_timestamps(
-                duration=metadata.duration,
-                num_frames=num_frames,
-            )
         else:
             raise ValueError(f"Unknown strategy: {strategy}")
         
         # Extract frames using OpenCV or ffmpeg
         if OPENCV_AVAILABLE:
             return self._extract_frames_opencv(
-                video_path, output_dir, timestamps, metadata, image_format, quality
+                video_path, output_dir, timestamps, metadata, image_format, quality,
+                save_frames, keep_in_memory, max_dimension,
             )
         else:
             return self._extract_frames_ffmpeg(
@@ -348,6 +403,244 @@ class VideoProcessor:
         interval = (end - start) / (num_frames - 1)
         return [start + i * interval for i in range(num_frames)]
     
+    def _resize_frame(self, frame: "np.ndarray", max_dimension: Optional[int]) -> "np.ndarray":
+        """Downscale a frame so its longest side is at most max_dimension"""
+        if not max_dimension:
+            return frame
+        height, width = frame.shape[:2]
+        scale = max_dimension / max(height, width)
+        if scale >= 1:
+            return frame
+        return cv2.resize(
+            frame,
+            (max(1, int(width * scale)), max(1, int(height * scale))),
+            interpolation=cv2.INTER_AREA,
+        )
+    
+    def _save_frame(
+        self,
+        frame: "np.ndarray",
+        frame_path: str,
+        image_format: str,
+        quality: int,
+    ) -> None:
+        """Write a frame to disk"""
+        if image_format == "jpg":
+            cv2.imwrite(frame_path, frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        else:
+            cv2.imwrite(frame_path, frame)
+    
+    def _frame_signature(self, frame: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+        """
+        Compute a cheap signature for scene comparison
+        
+        Returns:
+            Tuple of (normalized HSV histogram, 64-bit difference hash)
+        """
+        size = self.SIGNATURE_SIZE
+        thumb = cv2.resize(frame, (size, size), interpolation=cv2.INTER_AREA)
+        
+        hsv = cv2.cvtColor(thumb, cv2.COLOR_BGR2HSV)
+        hist = cv2.calcHist([hsv], [0, 1], None, [16, 16], [0, 180, 0, 256])
+        cv2.normalize(hist, hist, alpha=1.0, norm_type=cv2.NORM_L1)
+        
+        gray = cv2.cvtColor(thumb, cv2.COLOR_BGR2GRAY)
+        small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+        dhash = (small[:, 1:] > small[:, :-1]).flatten()
+        
+        return hist, dhash
+    
+    def _signature_distance(
+        self,
+        first: Tuple["np.ndarray", "np.ndarray"],
+        second: Tuple["np.ndarray", "np.ndarray"],
+    ) -> float:
+        """
+        Distance between two frame signatures in [0, 1]
+        
+        The histogram catches colour/lighting cuts (speaker changes); the hash
+        catches layout changes with similar colours (slide changes).
+        """
+        hist_distance = cv2.compareHist(first[0], second[0], cv2.HISTCMP_BHATTACHARYYA)
+        hash_distance = float(np.count_nonzero(first[1] != second[1])) / first[1].size
+        return float(max(hist_distance, hash_distance))
+    
+    def _extract_scene_frames_opencv(
+        self,
+        video_path: Path,
+        output_dir: str,
+        max_frames: int,
+        metadata: VideoMetadata,
+        image_format: str,
+        quality: int,
+        save_frames: bool,
+        keep_in_memory: bool,
+        max_dimension: Optional[int],
+    ) -> List[ExtractedFrame]:
+        """
+        Extract scene-change frames in one sequential decode pass
+        
+        Frames between samples are only grabbed (demuxed/decoded, never
+        converted), sampled frames are compared against the last kept frame,
+        and at most ``max_frames`` frames with the largest scene change are
+        retained (a bounded heap keeps memory flat for long videos).
+        """
+        cap = cv2.VideoCapture(str(video_path))
+        start_time = time.perf_counter()
+        
+        try:
+            if not cap.isOpened():
+                raise RuntimeError("Failed to open video with OpenCV")
+            
+            fps = cap.get(cv2.CAP_PROP_FPS) or metadata.fps or 25.0
+            stride = max(1, int(round(fps / self.sample_fps))) if self.sample_fps > 0 else 1
+            
+            # Min-heap of (scene_score, frame_number, frame) bounded to max_frames
+            selected: List[Tuple[float, int, "np.ndarray"]] = []
+            last_signature = None
+            last_kept_time = None
+            frame_number = 0
+            sampled = 0
+            candidates = 0
+            
+            while True:
+                if frame_number % stride:
+                    if not cap.grab():
+                        break
+                    frame_number += 1
+                    continue
+                
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                sampled += 1
+                timestamp = frame_number / fps
+                
+                signature = self._frame_signature(frame)
+                score = 1.0 if last_signature is None else self._signature_distance(last_signature, signature)
+                
+                if score >= self.scene_threshold and (
+                    last_kept_time is None or timestamp - last_kept_time >= self.min_scene_gap
+                ):
+                    candidates += 1
+                    last_signature = signature
+                    last_kept_time = timestamp
+                    entry = (score, frame_number, self._resize_frame(frame, max_dimension))
+                    if len(selected) < max_frames:
+                        heapq.heappush(selected, entry)
+                    elif score > selected[0][0]:
+                        heapq.heapreplace(selected, entry)
+                
+                frame_number += 1
+            
+            decode_time = time.perf_counter() - start_time
+            
+            frames = []
+            for i, (score, number, image) in enumerate(sorted(selected, key=lambda item: item[1])):
+                timestamp = number / fps
+                frame_path = ""
+                if save_frames:
+                    frame_filename = f"frame_{i:04d}_{timestamp:.2f}s.{image_format}"
+                    frame_path = os.path.join(output_dir, frame_filename)
+                    self._save_frame(image, frame_path, image_format, quality)
+                
+                frames.append(ExtractedFrame(
+                    frame_path=frame_path,
+                    timestamp=timestamp,
+                    frame_number=number,
+                    metadata={
+                        "source_video": str(video_path),
+                        "resolution": f"{image.shape[1]}x{image.shape[0]}",
+                        "scene_score": round(score, 4),
+                    },
+                    image=image if keep_in_memory else None,
+                ))
+            
+            self.last_stats = {
+                "strategy": "scene_change",
+                "frames_decoded": frame_number,
+                "frames_sampled": sampled,
+                "scene_candidates": candidates,
+                "frames_selected": len(frames),
+                "decode_seconds": round(decode_time, 3),
+                "decode_fps": round(frame_number / decode_time, 1) if decode_time > 0 else 0.0,
+            }
+            
+            logger.info(
+                f"Scene detection kept {len(frames)} of {frame_number} frames "
+                f"({candidates} scene changes, {self.last_stats['decode_fps']} fps)"
+            )
+            return frames
+            
+        finally:
+            cap.release()
+    
+    def _extract_scene_frames_ffmpeg(
+        self,
+        video_path: Path,
+        output_dir: str,
+        max_frames: int,
+        metadata: VideoMetadata,
+        image_format: str,
+        quality: int,
+        max_dimension: Optional[int],
+    ) -> List[ExtractedFrame]:
+        """Extract scene-change frames with ffmpeg's scene filter (single pass)"""
+        ffmpeg = self._ensure_ffmpeg()
+        start_time = time.perf_counter()
+        
+        filters = [f"select='gt(scene,{self.scene_threshold})'"]
+        if max_dimension:
+            filters.append(
+                f"scale='min({max_dimension},iw)':'min({max_dimension},ih)':force_original_aspect_ratio=decrease"
+            )
+        filters.append("showinfo")
+        
+        cmd = [
+            ffmpeg,
+            "-i", str(video_path),
+            "-vf", ",".join(filters),
+            "-vsync", "vfr",
+            "-frames:v", str(max_frames),
+            "-q:v", str(int((100 - quality) / 100 * 31 + 1)),
+            "-y",
+            os.path.join(output_dir, f"scene_%04d.{image_format}"),
+        ]
+        
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=600)
+        except subprocess.TimeoutExpired:
+            logger.warning("Timeout running ffmpeg scene detection")
+            return []
+        
+        timestamps = [float(t) for t in re.findall(r"pts_time:([\d.]+)", result.stderr)]
+        frames = []
+        for i, timestamp in enumerate(timestamps, start=1):
+            frame_path = os.path.join(output_dir, f"scene_{i:04d}.{image_format}")
+            if not os.path.exists(frame_path):
+                continue
+            frames.append(ExtractedFrame(
+                frame_path=frame_path,
+                timestamp=timestamp,
+                frame_number=int(timestamp * metadata.fps),
+                metadata={
+                    "source_video": str(video_path),
+                    "resolution": f"{metadata.width}x{metadata.height}",
+                },
+            ))
+        
+        decode_time = time.perf_counter() - start_time
+        self.last_stats = {
+            "strategy": "scene_change",
+            "frames_decoded": metadata.total_frames,
+            "frames_selected": len(frames),
+            "decode_seconds": round(decode_time, 3),
+            "decode_fps": round(metadata.total_frames / decode_time, 1) if decode_time > 0 else 0.0,
+        }
+        
+        logger.info(f"Successfully extracted {len(frames)} scene frames")
+        return frames
+    
     def _extract_frames_opencv(
         self,
         video_path: Path,
@@ -356,10 +649,14 @@ class VideoProcessor:
         metadata: VideoMetadata,
         image_format: str,
         quality: int,
+        save_frames: bool = True,
+        keep_in_memory: bool = False,
+        max_dimension: Optional[int] = None,
     ) -> List[ExtractedFrame]:
         """Extract frames using OpenCV"""
         cap = cv2.VideoCapture(str(video_path))
         frames = []
+        start_time = time.perf_counter()
         
         try:
             if not cap.isOpened():
@@ -374,14 +671,14 @@ class VideoProcessor:
                     logger.warning(f"Failed to read frame at {timestamp:.2f}s")
                     continue
                 
-                # Save frame
-                frame_filename = f"frame_{i:04d}_{timestamp:.2f}s.{image_format}"
-                frame_path = os.path.join(output_dir, frame_filename)
+                frame = self._resize_frame(frame, max_dimension)
                 
-                if image_format == "jpg":
-                    cv2.imwrite(frame_path, frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
-                else:
-                    cv2.imwrite(frame_path, frame)
+                # Save frame
+                frame_path = ""
+                if save_frames:
+                    frame_filename = f"frame_{i:04d}_{timestamp:.2f}s.{image_format}"
+                    frame_path = os.path.join(output_dir, frame_filename)
+                    self._save_frame(frame, frame_path, image_format, quality)
                 
                 frame_number = int(timestamp * metadata.fps)
                 
@@ -391,12 +688,21 @@ class VideoProcessor:
                     frame_number=frame_number,
                     metadata={
                         "source_video": str(video_path),
-                        "resolution": f"{metadata.width}x{metadata.height}",
+                        "resolution": f"{frame.shape[1]}x{frame.shape[0]}",
                     },
+                    image=frame if keep_in_memory else None,
                 ))
                 
                 logger.debug(f"Extracted frame {i+1}/{len(timestamps)} at {timestamp:.2f}s")
             
+            decode_time = time.perf_counter() - start_time
+            self.last_stats = {
+                "strategy": "seek",
+                "frames_decoded": len(timestamps),
+                "frames_selected": len(frames),
+                "decode_seconds": round(decode_time, 3),
+            }
+            
             logger.info(f"Successfully extracted {len(frames)} frames")
             return frames
             
@@ -546,6 +852,8 @@ class VideoProcessor:
         extract_audio: bool = True,
         frame_strategy: str = "fixed_interval",
         audio_format: str = "wav",
+        keep_in_memory: bool = False,
+        max_dimension: Optional[int] = None,
     ) -> ExtractionResult:
         """
         Process video: extract frames and audio
@@ -557,6 +865,8 @@ class VideoProcessor:
             extract_audio: Whether to extract audio track
             frame_strategy: Frame extraction strategy
             audio_format: Audio output format
+            keep_in_memory: Keep decoded frames on ExtractedFrame.image
+            max_dimension: Downscale frames so the longest side fits
             
         Returns:
             ExtractionResult with frames, audio path, and metadata
@@ -583,6 +893,8 @@ class VideoProcessor:
             output_dir=output_dir,
             num_frames=num_frames,
             strategy=frame_strategy,
+            keep_in_memory=keep_in_memory,
+            max_dimension=max_dimension,
         )
         
         # Extract audio
@@ -600,6 +912,7 @@ class VideoProcessor:
             audio_path=audio_path,
             video_metadata=metadata,
             output_dir=output_dir,
+            stats=dict(self.last_stats),
         )
         
         logger.info(
@@ -19,6 +19,7 @@ import io
 
 from Module2_NiruParser.embedders.vision_embedder import VisionEmbedder
 from Module4_NiruAPI.services.pdf_page_extractor import PDFPageExtractor
+from Module4_NiruAPI.services.image_embedding_index import ImageEmbeddingIndex
 
 # Video processing (optional)
 try:
@@ -62,6 +63,9 @@ class VisionRAGService:
     - Audio transcription integration for RAG
     """
     
+    # Video frames are downscaled to this size before embedding
+    VIDEO_FRAME_MAX_DIMENSION = 1024
+    
     def __init__(
         self,
         cohere_api_key: Optional[str] = None,
@@ -69,6 +73,7 @@ class VisionRAGService:
         vision_embedder: Optional[VisionEmbedder] = None,
         enable_video: bool = True,
         enable_audio: bool = True,
+        index_path: Optional[str] = None,
     ):
         """
         Initialize Vision RAG service
@@ -79,6 +84,7 @@ class VisionRAGService:
             vision_embedder: Optional pre-initialized VisionEmbedder
             enable_video: Enable video processing capabilities
             enable_audio: Enable audio transcription capabilities
+            index_path: Binary image index file (if None, reads from VISION_INDEX_PATH env var)
         """
         # Initialize vision embedder
         if vision_embedder:
@@ -113,8 +119,33 @@ class VisionRAGService:
         elif enable_audio:
             logger.warning("Audio transcription requested but not available")
         
+        # Initialize image embedding index (per-session rows in one matrix)
+        self.index_path = index_path or os.getenv("VISION_INDEX_PATH")
+        self.image_index = ImageEmbeddingIndex()
+        if self.index_path and Path(self.index_path).exists():
+            try:
+                self.image_index = ImageEmbeddingIndex.load(self.index_path)
+            except Exception as e:
+                logger.warning(f"Failed to load image index from {self.index_path}: {e}")
+        
         logger.info("Vision RAG service initialized")
     
+    def save_index(self, path: Optional[str] = None) -> Optional[str]:
+        """
+        Persist the image embedding index
+        
+        Args:
+            path: Output path (defaults to the configured index path)
+            
+        Returns:
+            Path written, or None if no path is configured
+        """
+        path = path or self.index_path
+        if not path:
+            return None
+        self.image_index.save(path)
+        return path
+    
     def _cosine_similarity(self, vec1: np.ndarray, vec2: np.ndarray) -> float:
         """Calculate cosine similarity between two vectors"""
         dot_product = np.dot(vec1, vec2)
@@ -146,24 +177,30 @@ class VisionRAGService:
             List of dicts with image info and similarity scores, sorted by relevance
         """
         try:
-            # Embed the text query
-            query_embedding = self.vision_embedder.embed_text(query_text)
-            
-            # Calculate similarities
-            results = []
-            for i, (img_emb, metadata) in enumerate(zip(image_embeddings, image_metadata)):
-                similarity = self._cosine_similarity(query_embedding, img_emb)
-                results.append({
-                    "index": i,
-                    "metadata": metadata,
-                    "similarity": similarity,
-                })
-            
-            # Sort by similarity (descending)
-            results.sort(key=lambda x: x["similarity"], reverse=True)
+            if not image_embeddings:
+                return []
             
-            # Return top_k results
-            top_results = results[:top_k]
+            # Embed the text query
+            query_embedding = np.asarray(self.vision_embedder.embed_text(query_text), dtype=np.float32)
+            
+            # Score every image with one matrix-vector product
+            matrix = np.vstack([np.asarray(emb, dtype=np.float32) for emb in image_embeddings])
+            norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query_embedding)
+            dots = matrix @ query_embedding
+            similarities = np.divide(dots, norms, out=np.zeros_like(dots), where=norms != 0)
+            
+            k = min(top_k, len(similarities))
+            top = np.argpartition(-similarities, k - 1)[:k] if k < len(similarities) else np.arange(len(similarities))
+            top = top[np.argsort(-similarities[top], kind="stable")]
+            
+            top_results = [
+                {
+                    "index": int(i),
+                    "metadata": image_metadata[i],
+                    "similarity": float(similarities[i]),
+                }
+                for i in top
+            ]
             
             logger.info(f"Found {len(top_results)} relevant images for query: {query_text[:50]}...")
             return top_results
@@ -172,6 +209,43 @@ class VisionRAGService:
             logger.error(f"Error searching images: {e}")
             return []
     
+    def search_session_images(
+        self,
+        query_text: str,
+        session_id: str,
+        session_images: Optional[List[Dict]] = None,
+        top_k: int = 3,
+        source: Optional[str] = None,
+    ) -> List[Dict]:
+        """
+        Search a session's images through the shared image index
+        
+        Args:
+            query_text: Text query/question
+            session_id: Session to search
+            session_images: Current session images; new ones are indexed, removed ones dropped
+            top_k: Number of top results to return
+            source: Optional source type filter (e.g. "video_frame")
+            
+        Returns:
+            List of dicts with id, metadata (including file_path) and similarity
+        """
+        try:
+            if session_images is not None:
+                self.image_index.sync_session(session_id, session_images)
+            
+            query_embedding = self.vision_embedder.embed_text(query_text)
+            results = self.image_index.search(
+                query_embedding, top_k=top_k, session_id=session_id, source=source
+            )
+            
+            logger.info(f"Found {len(results)} relevant images for query: {query_text[:50]}...")
+            return results
+            
+        except Exception as e:
+            logger.error(f"Error searching session images: {e}")
+            return []
+    
     def answer_visual_question(
         self,
         question: str,
@@ -313,6 +387,7 @@ Provide a detailed, accurate answer based on what you see in the image(s). If th
         temperature: float = 0.7,
         max_tokens: int = 1500,
         stream: bool = False,
+        session_id: Optional[str] = None,
     ) -> Dict:
         """
         Complete Vision RAG query: search for relevant images and answer question
@@ -323,6 +398,7 @@ Provide a detailed, accurate answer based on what you see in the image(s). If th
             top_k: Number of images to retrieve
             temperature: Generation temperature
             max_tokens: Maximum tokens in response
+            session_id: Session ID; when given, search goes through the image index
             
         Returns:
             Dict with answer, sources (images), and metadata
@@ -339,39 +415,57 @@ Provide a detailed, accurate answer based on what you see in the image(s). If th
         start_time = time.time()
         
         try:
-            # Extract embeddings and metadata
-            image_embeddings = []
-            image_metadata = []
-            
-            for img_data in session_images:
-                # Convert embedding to numpy array if it's a list
-                embedding = img_data.get("embedding")
-                if isinstance(embedding, list):
-                    embedding = np.array(embedding)
-                elif not isinstance(embedding, np.ndarray):
-                    logger.warning(f"Invalid embedding type for image {img_data.get('id')}")
-                    continue
+            if session_id:
+                # Indexed search: only new images are added to the matrix
+                search_results = self.search_session_images(
+                    query_text=question,
+                    session_id=session_id,
+                    session_images=session_images,
+                    top_k=top_k,
+                )
+                candidates = [
+                    (result["metadata"].get("file_path"), result["metadata"], result["similarity"])
+                    for result in search_results
+                ]
+            else:
+                # Extract embeddings and metadata
+                image_embeddings = []
+                image_metadata = []
+                image_positions = []
                 
-                image_embeddings.append(embedding)
-                image_metadata.append(img_data.get("metadata", {}))
-            
-            if not image_embeddings:
-                return {
-                    "answer": "No valid image embeddings found. Please re-upload your images.",
-                    "sources": [],
-                    "query_time": time.time() - start_time,
-                    "retrieved_images": 0,
-                }
-            
-            # Search for relevant images
-            search_results = self.search_images(
-                query_text=question,
-                image_embeddings=image_embeddings,
-                image_metadata=image_metadata,
-                top_k=top_k,
-            )
+                for position, img_data in enumerate(session_images):
+                    embedding = img_data.get("embedding")
+                    if not isinstance(embedding, (list, np.ndarray)):
+                        logger.warning(f"Invalid embedding type for image {img_data.get('id')}")
+                        continue
+                    
+                    image_embeddings.append(embedding)
+                    image_metadata.append(img_data.get("metadata", {}))
+                    image_positions.append(position)
+                
+                if not image_embeddings:
+                    return {
+                        "answer": "No valid image embeddings found. Please re-upload your images.",
+                        "sources": [],
+                        "query_time": time.time() - start_time,
+                        "retrieved_images": 0,
+                    }
+                
+                # Search for relevant images
+                search_results = self.search_images(
+                    query_text=question,
+                    image_embeddings=image_embeddings,
+                    image_metadata=image_metadata,
+                    top_k=top_k,
+                )
+                candidates = []
+                for result in search_results:
+                    img_data = session_images[image_positions[result["index"]]]
+                    candidates.append(
+                        (img_data.get("file_path"), img_data.get("metadata", {}), result["similarity"])
+                    )
             
-            if not search_results:
+            if not candidates:
                 return {
                     "answer": "I couldn't find any relevant images for your question.",
                     "sources": [],
@@ -383,16 +477,12 @@ Provide a detailed, accurate answer based on what you see in the image(s). If th
             top_image_paths = []
             top_image_metadata = []
             
-            for result in search_results:
-                idx = result["index"]
-                img_data = session_images[idx]
-                file_path = img_data.get("file_path")
-                
+            for file_path, metadata, similarity in candidates:
                 if file_path and Path(file_path).exists():
                     top_image_paths.append(file_path)
                     top_image_metadata.append({
-                        **img_data.get("metadata", {}),
-                        "similarity": result["similarity"],
+                        **metadata,
+                        "similarity": similarity,
                     })
             
             # Generate answer using Gemini (streaming or non-streaming)
@@ -465,21 +555,29 @@ Provide a detailed, accurate answer based on what you see in the image(s). If th
 
     # ==================== VIDEO PROCESSING ====================
     
+    def _frame_input(self, frame: "ExtractedFrame") -> Union[str, Image.Image]:
+        """Get embedder input for a frame (in-memory image when available)"""
+        if frame.image is not None:
+            return frame.to_pil()
+        return frame.frame_path
+    
     def process_video(
         self,
         video_path: Union[str, Path],
         num_frames: int = 10,
         extract_audio: bool = True,
         transcribe_audio: bool = True,
+        frame_strategy: str = "keyframes",
     ) -> Dict:
         """
         Process video for RAG: extract frames, embed them, and transcribe audio
         
         Args:
             video_path: Path to video file
-            num_frames: Number of frames to extract
+            num_frames: Maximum number of frames to extract
             extract_audio: Whether to extract audio track
             transcribe_audio: Whether to transcribe audio (requires Whisper)
+            frame_strategy: Frame extraction strategy (scene-change keyframes by default)
             
         Returns:
             Dict with embedded frames, transcription, and metadata
@@ -503,13 +601,17 @@ Provide a detailed, accurate answer based on what you see in the image(s). If th
                 video_path=video_path,
                 num_frames=num_frames,
                 extract_audio=extract_audio,
+                frame_strategy=frame_strategy,
+                keep_in_memory=True,
+                max_dimension=self.VIDEO_FRAME_MAX_DIMENSION,
             )
             
-            # Embed extracted frames
+            # Embed extracted frames straight from memory (no JPEG re-read)
             embedded_frames = []
             for frame in extraction_result.frames:
                 try:
-                    embedding = self.vision_embedder.embed_image(frame.frame_path)
+                    embedding = self.vision_embedder.embed_image(self._frame_input(frame))
+                    frame.release()
                     embedded_frames.append({
                         "file_path": frame.frame_path,
                         "timestamp": frame.timestamp,
@@ -555,6 +657,7 @@ Provide a detailed, accurate answer based on what you see in the image(s). If th
                 "audio_path": extraction_result.audio_path,
                 "video_metadata": extraction_result.video_metadata.to_dict(),
                 "output_dir": extraction_result.output_dir,
+                "extraction_stats": extraction_result.stats,
                 "processing_time": processing_time,
             }
             
@@ -581,15 +684,17 @@ Provide a detailed, accurate answer based on what you see in the image(s). If th
         num_frames: int = 10,
         extract_audio: bool = True,
         transcribe_audio: bool = True,
+        frame_strategy: str = "keyframes",
     ) -> Dict:
         """
         Process video asynchronously
         
         Args:
             video_path: Path to video file
-            num_frames: Number of frames to extract
+            num_frames: Maximum number of frames to extract
             extract_audio: Whether to extract audio track
             transcribe_audio: Whether to transcribe audio
+            frame_strategy: Frame extraction strategy (scene-change keyframes by default)
             
         Returns:
             Dict with embedded frames, transcription, and metadata
@@ -619,17 +724,21 @@ Provide a detailed, accurate answer based on what you see in the image(s). If th
                     video_path=video_path,
                     num_frames=num_frames,
                     extract_audio=extract_audio,
+                    frame_strategy=frame_strategy,
+                    keep_in_memory=True,
+                    max_dimension=self.VIDEO_FRAME_MAX_DIMENSION,
                 )
             )
             
-            # Embed frames in executor
+            # Embed frames in executor straight from memory
             embedded_frames = []
             for frame in extraction_result.frames:
                 try:
                     embedding = await loop.run_in_executor(
                         None,
-                        lambda fp=frame.frame_path: self.vision_embedder.embed_image(fp)
+                        lambda f=frame: self.vision_embedder.embed_image(self._frame_input(f))
                     )
+                    frame.release()
                     embedded_frames.append({
                         "file_path": frame.frame_path,
                         "timestamp": frame.timestamp,
@@ -674,6 +783,7 @@ Provide a detailed, accurate answer based on what you see in the image(s). If th
                 "audio_path": extraction_result.audio_path,
                 "video_metadata": extraction_result.video_metadata.to_dict(),
                 "output_dir": extraction_result.output_dir,
+                "extraction_stats": extraction_result.stats,
                 "processing_time": processing_time,
             }
             
@@ -386,6 +386,7 @@ async def generate_image(request: ImageGenerationRequest):
             color_scheme=request.color_scheme,
             width=request.width,
             height=request.height,
+            platform=request.platform,
             format=request.format,
         )
         return ImageGenerationResponse(**result)
@@ -417,6 +418,7 @@ async def generate_image_from_post(request: ImageGenerationFromPostRequest):
             color_scheme=request.color_scheme,
             width=request.width,
             height=request.height,
+            platform=request.platform,
             format=request.format,
         )
         return ImageGenerationResponse(**result)
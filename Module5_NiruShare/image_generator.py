@@ -6,6 +6,7 @@ from typing import Optional, Dict, List, Tuple
 from io import BytesIO
 import base64
 import textwrap
+import threading
 
 try:
     from PIL import Image, ImageDraw, ImageFont, ImageFilter
@@ -21,6 +22,34 @@ class ImageGenerator:
     DEFAULT_WIDTH = 1080
     DEFAULT_HEIGHT = 1080
     
+    # Native share-image sizes per platform
+    PLATFORM_DIMENSIONS = {
+        "instagram": (1080, 1080),
+        "twitter": (1200, 675),
+        "facebook": (1200, 630),
+        "linkedin": (1200, 627),
+        "threads": (1080, 1080),
+        "bluesky": (1200, 675),
+        "mastodon": (1200, 675),
+        "reddit": (1200, 628),
+        "telegram": (1280, 720),
+        "whatsapp": (1080, 1080),
+        "tiktok": (1080, 1920),
+    }
+    
+    # Vertical gradient darkens the background by this fraction at the bottom
+    GRADIENT_STRENGTH = 0.2
+    
+    # Maximum number of cached templates / measured strings
+    MAX_TEMPLATES = 64
+    MAX_GLYPH_WIDTHS = 50000
+    
+    # Fonts, backgrounds and templates are shared across instances
+    _font_cache: Dict[Tuple[int, bool], "ImageFont.FreeTypeFont"] = {}
+    _template_cache: Dict[Tuple, "Image.Image"] = {}
+    _width_cache: Dict[Tuple[Tuple, str], int] = {}
+    _cache_lock = threading.Lock()
+    
     # Color schemes
     COLOR_SCHEMES = {
         "default": {
@@ -61,10 +90,10 @@ class ImageGenerator:
         
         self.width = width
         self.height = height
-        self._fonts = {}
+        self._fonts = self._font_cache
     
     def _get_font(self, size: int, bold: bool = False) -> Optional[ImageFont.FreeTypeFont]:
-        """Get font with caching"""
+        """Get font with caching (shared by all generator instances)"""
         key = (size, bold)
         if key in self._fonts:
             return self._fonts[key]
@@ -96,8 +125,32 @@ class ImageGenerator:
             return font
         
         except Exception:
-            # Ultimate fallback
-            return ImageFont.load_default()
+            # Ultimate fallback (cached too, so its measurements stay valid)
+            font = ImageFont.load_default()
+            self._fonts[key] = font
+            return font
+    
+    @staticmethod
+    def _font_key(font: ImageFont.FreeTypeFont) -> Tuple:
+        """Stable identity of a font for the width cache"""
+        path = getattr(font, "path", None)
+        if isinstance(path, str):
+            return (path, getattr(font, "size", None))
+        # Default fonts have no file; _get_font keeps them alive, so their
+        # id() is never reused by another font
+        return ("default", id(font))
+    
+    def _text_width(self, font: ImageFont.FreeTypeFont, text: str) -> int:
+        """Measure rendered text width, caching the result per font file and size"""
+        key = (self._font_key(font), text)
+        width = self._width_cache.get(key)
+        if width is None:
+            bbox = font.getbbox(text)
+            width = bbox[2] - bbox[0]
+            if len(self._width_cache) >= self.MAX_GLYPH_WIDTHS:
+                self._width_cache.clear()
+            self._width_cache[key] = width
+        return width
     
     def _wrap_text(self, text: str, font: ImageFont.FreeTypeFont, max_width: int) -> List[str]:
         """Wrap text to fit within max_width using textwrap"""
@@ -107,14 +160,13 @@ class ImageGenerator:
         # Use textwrap to wrap text properly
         wrapper = textwrap.TextWrapper(width=50)  # Approximate character width
         wrapped_lines = wrapper.wrap(text)
+        space_width = font.getbbox(" ")[2]
         
         # Fine-tune by measuring actual width
         final_lines = []
         for line in wrapped_lines:
             # Check if line fits
-            bbox = font.getbbox(line)
-            line_width = bbox[2] - bbox[0]
-            if line_width <= max_width:
+            if self._text_width(font, line) <= max_width:
                 final_lines.append(line)
             else:
                 # Split long words
@@ -123,8 +175,7 @@ class ImageGenerator:
                 current_width = 0
                 
                 for word in words:
-                    bbox = font.getbbox(word)
-                    word_width = bbox[2] - bbox[0]
+                    word_width = self._text_width(font, word)
                     
                     if current_width + word_width > max_width and current_line:
                         final_lines.append(" ".join(current_line))
@@ -132,7 +183,7 @@ class ImageGenerator:
                         current_width = word_width
                     else:
                         current_line.append(word)
-                        current_width += word_width + (font.getbbox(" ")[2] if current_line else 0)
+                        current_width += word_width + space_width
                 
                 if current_line:
                     final_lines.append(" ".join(current_line))
@@ -140,21 +191,81 @@ class ImageGenerator:
         return final_lines
     
     def _create_gradient_background(self, width: int, height: int, colors: Dict) -> Image.Image:
-        """Create a gradient background"""
-        img = Image.new("RGB", (width, height), colors["background"])
+        """Create a vertical gradient background
         
-        # Create a simple vertical gradient
+        Only a single column of ``height`` pixels is computed; PIL then
+        stretches it horizontally in C, so the cost no longer scales with
+        ``width * height`` interpreter operations.
+        """
+        background = colors["background"]
+        column = []
         for y in range(height):
             # Interpolate between background and a slightly darker shade
-            factor = y / height
-            r = int(colors["background"][0] * (1 - factor * 0.2))
-            g = int(colors["background"][1] * (1 - factor * 0.2))
-            b = int(colors["background"][2] * (1 - factor * 0.2))
-            
-            for x in range(width):
-                img.putpixel((x, y), (r, g, b))
+            shade = 1 - (y / height) * self.GRADIENT_STRENGTH
+            column.append(tuple(int(channel * shade) for channel in background))
         
-        return img
+        strip = Image.new("RGB", (1, height))
+        strip.putdata(column)
+        return strip.resize((width, height), Image.NEAREST)
+    
+    def _get_template(
+        self,
+        width: int,
+        height: int,
+        color_scheme: str,
+        colors: Dict,
+    ) -> Image.Image:
+        """Get the cached gradient background for a size and theme
+        
+        The returned image is shared; callers must ``copy()`` it before drawing.
+        """
+        key = (width, height, color_scheme)
+        template = self._template_cache.get(key)
+        if template is not None:
+            return template
+        
+        template = self._create_gradient_background(width, height, colors)
+        
+        with self._cache_lock:
+            if len(self._template_cache) >= self.MAX_TEMPLATES:
+                self._template_cache.pop(next(iter(self._template_cache)))
+            self._template_cache[key] = template
+        return template
+    
+    def get_platform_dimensions(self, platform: Optional[str]) -> Tuple[int, int]:
+        """Get share image size for a platform (falls back to generator size)"""
+        if platform:
+            dimensions = self.PLATFORM_DIMENSIONS.get(platform.lower())
+            if dimensions:
+                return dimensions
+        return self.width, self.height
+    
+    def warm_templates(
+        self,
+        platforms: Optional[List[str]] = None,
+        color_schemes: Optional[List[str]] = None,
+    ) -> int:
+        """
+        Pre-render templates so the first share request is not slowed down
+        
+        Args:
+            platforms: Platforms to warm (default: all known platforms)
+            color_schemes: Color schemes to warm (default: all schemes)
+        
+        Returns:
+            Number of templates rendered
+        """
+        platforms = platforms or list(self.PLATFORM_DIMENSIONS)
+        color_schemes = color_schemes or list(self.COLOR_SCHEMES)
+        
+        count = 0
+        for platform in platforms:
+            width, height = self.get_platform_dimensions(platform)
+            for scheme in color_schemes:
+                colors = self.COLOR_SCHEMES.get(scheme, self.COLOR_SCHEMES["default"])
+                self._get_template(width, height, scheme, colors)
+                count += 1
+        return count
     
     def generate_image(
         self,
@@ -164,6 +275,7 @@ class ImageGenerator:
         width: Optional[int] = None,
         height: Optional[int] = None,
         padding: int = 60,
+        platform: Optional[str] = None,
     ) -> Image.Image:
         """
         Generate image from text content
@@ -172,21 +284,25 @@ class ImageGenerator:
             text: Main text content
             title: Optional title text
             color_scheme: Color scheme name
-            width: Image width (uses default if not provided)
-            height: Image height (uses default if not provided)
+            width: Image width (uses platform/default size if not provided)
+            height: Image height (uses platform/default size if not provided)
             padding: Padding in pixels
+            platform: Optional platform name used to pick the image size
         
         Returns:
             PIL Image object
         """
-        width = width or self.width
-        height = height or self.height
+        default_width, default_height = self.get_platform_dimensions(platform)
+        width = width or default_width
+        height = height or default_height
         
         # Get color scheme
-        colors = self.COLOR_SCHEMES.get(color_scheme, self.COLOR_SCHEMES["default"])
+        if color_scheme not in self.COLOR_SCHEMES:
+            color_scheme = "default"
+        colors = self.COLOR_SCHEMES[color_scheme]
         
-        # Create image with gradient background
-        img = self._create_gradient_background(width, height, colors)
+        # Start from the cached background template
+        img = self._get_template(width, height, color_scheme, colors).copy()
         draw = ImageDraw.Draw(img)
         
         # Calculate available text area
@@ -204,7 +320,7 @@ class ImageGenerator:
                 line_height = bbox[3] - bbox[1] + 10
                 
                 # Center title with shadow
-                x = (width - (bbox[2] - bbox[0])) // 2
+                x = (width - self._text_width(title_font, line)) // 2
                 # Draw shadow
                 draw.text((x + 2, y_offset + 2), line, fill=(0, 0, 0, 100), font=title_font)
                 # Draw text
@@ -228,18 +344,16 @@ class ImageGenerator:
             if y_offset + line_height > height - padding:
                 break
             
-            bbox = body_font.getbbox(line)
-            x = (width - (bbox[2] - bbox[0])) // 2  # Center text
+            x = (width - self._text_width(body_font, line)) // 2  # Center text
             # Draw shadow for better readability
             draw.text((x + 1, y_offset + 1), line, fill=(0, 0, 0, 80), font=body_font)
             draw.text((x, y_offset), line, fill=colors["text"], font=body_font)
             y_offset += line_height
         
-        # Add branding at bottom
+        # Add branding at bottom (after the text, so it stays on top)
         branding_font = self._get_font(24, bold=False)
         branding_text = "AmaniQuery"
-        bbox = branding_font.getbbox(branding_text)
-        x = (width - (bbox[2] - bbox[0])) // 2
+        x = (width - self._text_width(branding_font, branding_text)) // 2
         y = height - padding - 30
         draw.text((x, y), branding_text, fill=colors["accent"], font=branding_font)
         
@@ -96,6 +96,7 @@ class ImageGenerationRequest(BaseModel):
     color_scheme: str = Field("default", description="Color scheme (default, dark, professional, vibrant)")
     width: Optional[int] = Field(None, description="Image width in pixels")
     height: Optional[int] = Field(None, description="Image height in pixels")
+    platform: Optional[str] = Field(None, description="Target platform (sets the image size when width/height are omitted)")
     format: str = Field("PNG", description="Image format (PNG, JPEG)")
 
 
@@ -106,6 +107,7 @@ class ImageGenerationFromPostRequest(BaseModel):
     color_scheme: str = Field("default", description="Color scheme")
     width: Optional[int] = Field(None, description="Image width in pixels")
     height: Optional[int] = Field(None, description="Image height in pixels")
+    platform: Optional[str] = Field(None, description="Target platform (sets the image size when width/height are omitted)")
     format: str = Field("PNG", description="Image format (PNG, JPEG)")
 
 
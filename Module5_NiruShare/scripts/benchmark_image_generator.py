@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark share image rendering
+Reports images per second per platform for cold (empty cache) and warm renders
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from Module5_NiruShare.image_generator import ImageGenerator
+
+
+SAMPLE_TITLE = "What does the Constitution say about freedom of expression?"
+SAMPLE_TEXT = (
+    "Article 33 of the Constitution of Kenya guarantees every person the right "
+    "to freedom of expression, which includes the freedom to seek, receive or "
+    "impart information or ideas, freedom of artistic creativity, and academic "
+    "freedom and freedom of scientific research. The right does not extend to "
+    "propaganda for war, incitement to violence, hate speech or advocacy of hatred."
+)
+
+
+def clear_caches():
+    """Drop shared template and glyph caches"""
+    ImageGenerator._template_cache.clear()
+    ImageGenerator._width_cache.clear()
+
+
+def benchmark_platform(generator: ImageGenerator, platform: str, iterations: int, encode: bool):
+    """Render one platform repeatedly and return (cold_seconds, images_per_second)"""
+    clear_caches()
+    start = time.perf_counter()
+    generator.generate_image(SAMPLE_TEXT, SAMPLE_TITLE, platform=platform)
+    cold = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    for i in range(iterations):
+        scheme = list(generator.COLOR_SCHEMES)[i % len(generator.COLOR_SCHEMES)]
+        if encode:
+            generator.generate_image_bytes(SAMPLE_TEXT, SAMPLE_TITLE, scheme, platform=platform)
+        else:
+            generator.generate_image(SAMPLE_TEXT, SAMPLE_TITLE, scheme, platform=platform)
+    elapsed = time.perf_counter() - start
+    return cold, iterations / elapsed if elapsed else float("inf")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark NiruShare image generation")
+    parser.add_argument("--iterations", type=int, default=50, help="Renders per platform")
+    parser.add_argument("--platform", action="append", help="Platform to benchmark (repeatable)")
+    parser.add_argument("--encode", action="store_true", help="Include PNG encoding in timings")
+    args = parser.parse_args()
+    
+    generator = ImageGenerator()
+    platforms = args.platform or list(generator.PLATFORM_DIMENSIONS)
+    
+    print(f"{'platform':<12} {'size':>11} {'cold (ms)':>10} {'images/s':>10}")
+    print("-" * 46)
+    for platform in platforms:
+        width, height = generator.get_platform_dimensions(platform)
+        cold, rate = benchmark_platform(generator, platform, args.iterations, args.encode)
+        print(f"{platform:<12} {f'{width}x{height}':>11} {cold * 1000:>10.1f} {rate:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
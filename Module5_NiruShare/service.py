@@ -303,6 +303,7 @@ class ShareService:
         width: Optional[int] = None,
         height: Optional[int] = None,
         format: str = "PNG",
+        platform: Optional[str] = None,
     ) -> Dict:
         """Generate image from text content"""
         if not self.image_generator:
@@ -318,14 +319,16 @@ class ShareService:
                 width=width,
                 height=height,
                 format=format,
+                platform=platform,
             )
             
+            default_width, default_height = self.image_generator.get_platform_dimensions(platform)
             return {
                 "status": "success",
                 "format": format.lower(),
                 "image_base64": image_base64,
-                "width": width or self.image_generator.DEFAULT_WIDTH,
-                "height": height or self.image_generator.DEFAULT_HEIGHT,
+                "width": width or default_width,
+                "height": height or default_height,
             }
         except Exception as e:
             raise ValueError(f"Error generating image: {str(e)}") from e
@@ -353,12 +356,15 @@ class ShareService:
                 **kwargs
             )
             
+            default_width, default_height = self.image_generator.get_platform_dimensions(
+                kwargs.get("platform")
+            )
             return {
                 "status": "success",
                 "format": format.lower(),
                 "image_base64": image_base64,
-                "width": kwargs.get("width") or self.image_generator.DEFAULT_WIDTH,
-                "height": kwargs.get("height") or self.image_generator.DEFAULT_HEIGHT,
+                "width": kwargs.get("width") or default_width,
+                "height": kwargs.get("height") or default_height,
             }
         except Exception as e:
             raise ValueError(f"Error generating image from post: {str(e)}") from e
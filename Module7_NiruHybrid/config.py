@@ -38,6 +38,10 @@ class HybridEncoderConfig:
     
     # Device
     device: str = "cuda" if os.getenv("CUDA_AVAILABLE", "false").lower() == "true" else "cpu"
+    
+    # Inference runtime: exported encoder artifact loaded instead of building
+    # the modules (see encoder_runtime.py)
+    runtime_artifact: Optional[str] = os.getenv("HYBRID_ENCODER_ARTIFACT")
 
 
 @dataclass
@@ -103,6 +107,11 @@ class RetentionConfig:
     learning_rate: float = 1e-5
     gradient_accumulation_steps: int = 8
     max_grad_norm: float = 1.0
+    # Train a shadow copy on a worker thread and hot-swap validated weights
+    background_training: bool = os.getenv("CONTINUAL_LEARNING_BACKGROUND", "false").lower() == "true"
+    validation_fraction: float = 0.2  # Share of each update held out for validation
+    max_validation_regression: float = 0.05  # Reject updates whose held-out loss rises more
+    training_nice: int = 10  # Niceness of the training thread (Linux)
     
     # Memory management
     memory_buffer_size: int = 10000
@@ -130,6 +139,10 @@ class StreamingConfig:
     max_concurrent_streams: int = 10
     processing_timeout: float = 30.0  # seconds
     
+    # Dynamic batching (StreamProcessor.submit_query)
+    max_batch_wait: float = 0.005  # seconds the oldest query waits for a fuller batch
+    min_length_bucket: int = 16  # smallest padded length; buckets double up to max_seq_length
+    
     # Chunking
     query_chunk_size: int = 128
     data_chunk_size: int = 256
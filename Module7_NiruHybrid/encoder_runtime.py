@@ -0,0 +1,395 @@
+"""
+Inference Runtime for the Hybrid Encoder
+
+Exports a HybridEncoder to a self-contained artifact (TorchScript or ONNX)
+with dynamic batch and sequence axes, and serves pooled embeddings from it on
+CPU without rebuilding the conv, transformer and fusion modules.
+
+Before export the encoder is prepared for inference:
+- BatchNorm is folded into the preceding Conv1d
+- INT8 weight-quantized projections are dequantized once into plain Linear
+  layers (eager QuantizedLinear re-quantizes its weights on every forward)
+- activations run in FP32 with full attention; the streaming chunk loop is
+  Python control flow and is not exported, so outputs match eager encoding
+  for sequences up to the attention chunk size
+- optionally every Linear is dynamically quantized to INT8
+
+TorchScript graphs are frozen and passed through the JIT inference
+optimizations (constant folding, conv/linear fusion); ONNX graphs are
+quantized with onnxruntime (MatMul/Gemm and the embedding table) and optimized
+when the session is created.
+"""
+import copy
+import json
+import time
+import warnings
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import torch
+import torch.nn as nn
+from torch.nn.utils.fusion import fuse_conv_bn_eval
+from loguru import logger
+
+from .config import HybridEncoderConfig, default_config
+from .hybrid_encoder import (
+    HybridEncoder, QuantizedFeedForward, QuantizedLinear, QuantizedMultiHeadAttention, StreamingAttention
+)
+
+try:
+    import onnxruntime as ort
+    from onnxruntime.quantization import QuantType, quantize_dynamic as onnx_quantize_dynamic
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+
+RUNTIME_FORMATS = ("torchscript", "onnx")
+
+
+# =============================================================================
+# INFERENCE PREPARATION
+# =============================================================================
+
+class PooledEncoder(nn.Module):
+    """Encoder forward plus masked mean pooling, the exported graph"""
+
+    def __init__(self, encoder: HybridEncoder):
+        super().__init__()
+        self.encoder = encoder
+
+    def forward(self, input_ids: torch.Tensor, padding_mask: torch.Tensor) -> torch.Tensor:
+        """
+        Args:
+            input_ids: [batch_size, seq_len] token IDs
+            padding_mask: [batch_size, seq_len] True at padded positions
+
+        Returns:
+            embeddings: [batch_size, output_dim]
+        """
+        output = self.encoder(input_ids=input_ids, attention_mask=padding_mask)
+        keep = (~padding_mask).unsqueeze(-1)
+        return output.masked_fill(~keep, 0.0).sum(dim=1) / keep.sum(dim=1).clamp(min=1)
+
+
+def _dequantized_linear(layer: QuantizedLinear) -> nn.Linear:
+    """Plain Linear holding the weights QuantizedLinear computes with"""
+    if layer.use_bitsandbytes:
+        raise ValueError("bitsandbytes INT8 layers cannot be exported; build the encoder without bitsandbytes")
+    weight = layer.weight.detach().float()
+    if layer.bits == 8:
+        quantized, scale = layer._quantize_int8(weight)
+        weight = quantized.float() * scale
+    linear = nn.Linear(layer.in_features, layer.out_features)
+    linear.weight.data.copy_(weight)
+    linear.bias.data.copy_(layer.bias.detach().float())
+    return linear
+
+
+def prepare_for_inference(encoder: HybridEncoder, quantize: bool = True) -> nn.Module:
+    """
+    FP32 CPU copy of an encoder, fused and optionally INT8 quantized.
+
+    Args:
+        encoder: Trained encoder (left unchanged)
+        quantize: Apply dynamic INT8 quantization to every Linear
+
+    Returns:
+        PooledEncoder mapping (input_ids, padding_mask) to pooled embeddings
+    """
+    model = copy.deepcopy(encoder).float().cpu().eval()
+
+    # Fold BatchNorm into the convolutions
+    for block in model.conv_blocks:
+        block.convs = nn.ModuleList([
+            fuse_conv_bn_eval(conv, bn) for conv, bn in zip(block.convs, block.batch_norms)
+        ])
+        block.batch_norms = nn.ModuleList([nn.Identity() for _ in block.convs])
+
+    # Full attention in place of the streaming wrapper
+    for block in model.transformer_blocks:
+        if isinstance(block.attention, StreamingAttention):
+            block.attention = block.attention.attention
+
+    # Dequantize INT8 weights once instead of on every forward; FP32
+    # activations throughout
+    for parent in list(model.modules()):
+        if isinstance(parent, (QuantizedMultiHeadAttention, QuantizedFeedForward)):
+            parent.activation_dtype = torch.float32
+        for name, child in list(parent.named_children()):
+            if isinstance(child, QuantizedLinear):
+                setattr(parent, name, _dequantized_linear(child))
+
+    if quantize:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", DeprecationWarning)
+            model = torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+
+    return PooledEncoder(model).eval()
+
+
+def _full_attention_length(encoder: HybridEncoder) -> int:
+    """Longest sequence for which eager encoding uses full attention"""
+    limit = encoder.max_seq_length
+    for block in encoder.transformer_blocks:
+        if isinstance(block.attention, StreamingAttention):
+            limit = min(limit, block.attention.chunk_size)
+    return limit
+
+
+def _sample_inputs(
+    batch_size: int,
+    lengths: List[int],
+    vocab_size: int,
+    seed: int = 0
+) -> tuple:
+    """Random token IDs and padding mask with one sequence length per row"""
+    generator = torch.Generator().manual_seed(seed)
+    seq_len = max(lengths)
+    input_ids = torch.randint(1, max(vocab_size, 2), (batch_size, seq_len), generator=generator)
+    padding_mask = torch.ones(batch_size, seq_len, dtype=torch.bool)
+    for row in range(batch_size):
+        padding_mask[row, :lengths[row % len(lengths)]] = False
+    return input_ids.masked_fill(padding_mask, 0), padding_mask
+
+
+# =============================================================================
+# EXPORT
+# =============================================================================
+
+def _metadata_path(path: Path) -> Path:
+    return path.with_suffix(path.suffix + ".json")
+
+
+def export_encoder(
+    encoder: HybridEncoder,
+    path: Union[str, Path],
+    format: str = "torchscript",
+    quantize: bool = True,
+    check_parity: bool = True
+) -> Dict[str, Any]:
+    """
+    Export an encoder to a runtime artifact.
+
+    Writes the graph to `path` and its metadata (shapes, format,
+    quantization, parity against eager encoding) to `path` + ".json".
+
+    Args:
+        encoder: Trained encoder
+        path: Artifact path (.pt for TorchScript, .onnx for ONNX)
+        format: "torchscript" or "onnx"
+        quantize: Dynamic INT8 quantization of Linear layers
+        check_parity: Compare the exported graph against eager encoding
+
+    Returns:
+        metadata: Contents of the metadata file
+    """
+    if format not in RUNTIME_FORMATS:
+        raise ValueError(f"Unknown runtime format: {format}")
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    vocab_size = encoder.token_embedding.num_embeddings if encoder.token_embedding is not None else 0
+    if vocab_size == 0:
+        raise ValueError("Only encoders with a token embedding can be exported")
+
+    started = time.time()
+    sample_length = min(32, encoder.max_seq_length)
+    sample = _sample_inputs(2, [sample_length, max(1, sample_length // 2)], vocab_size)
+
+    with warnings.catch_warnings():
+        # torch.jit / torch.ao deprecation notices and tracer shape warnings
+        warnings.simplefilter("ignore")
+        if format == "torchscript":
+            graph = prepare_for_inference(encoder, quantize=quantize)
+            with torch.no_grad():
+                traced = torch.jit.trace(graph, sample, check_trace=False)
+                traced = torch.jit.optimize_for_inference(torch.jit.freeze(traced))
+            torch.jit.save(traced, str(path))
+        else:
+            if not ONNXRUNTIME_AVAILABLE:
+                raise RuntimeError("ONNX export requires onnxruntime")
+            graph = prepare_for_inference(encoder, quantize=False)
+            float_path = path.with_suffix(".fp32.onnx") if quantize else path
+            batch, seq = torch.export.Dim("batch"), torch.export.Dim("seq", max=encoder.max_seq_length)
+            with torch.no_grad():
+                torch.onnx.export(
+                    graph,
+                    sample,
+                    str(float_path),
+                    input_names=["input_ids", "padding_mask"],
+                    output_names=["embeddings"],
+                    dynamic_shapes=({0: batch, 1: seq}, {0: batch, 1: seq}),
+                    external_data=False,
+                    dynamo=True
+                )
+            if quantize:
+                # Convolutions stay FP32: ConvInteger is slower than float Conv on CPU
+                onnx_quantize_dynamic(
+                    str(float_path), str(path), weight_type=QuantType.QInt8,
+                    op_types_to_quantize=["MatMul", "Gemm", "Gather"]
+                )
+                float_path.unlink()
+
+    metadata = {
+        "format": format,
+        "quantized": quantize,
+        "vocab_size": vocab_size,
+        "output_dim": encoder.output_dim,
+        "max_seq_length": encoder.max_seq_length,
+        "full_attention_length": _full_attention_length(encoder),
+        "exported_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "export_seconds": round(time.time() - started, 2)
+    }
+    with open(_metadata_path(path), "w") as f:
+        json.dump(metadata, f, indent=2)
+
+    if check_parity:
+        metadata["parity"] = compare_with_eager(EncoderRuntime(path), encoder)
+        with open(_metadata_path(path), "w") as f:
+            json.dump(metadata, f, indent=2)
+        logger.info(
+            "Exported {} encoder to {} (min cosine vs eager {:.5f}, max abs diff {:.2e})",
+            format, path, metadata["parity"]["min_cosine"], metadata["parity"]["max_abs_diff"]
+        )
+        if metadata["parity"]["min_cosine"] < 0.99:
+            logger.warning("Exported encoder drifts from eager encoding; consider exporting with quantize=False")
+    else:
+        logger.info("Exported {} encoder to {}", format, path)
+
+    return metadata
+
+
+def compare_with_eager(
+    runtime: "EncoderRuntime",
+    encoder: HybridEncoder,
+    batch_sizes: List[int] = [1, 4, 16],
+    seed: int = 0
+) -> Dict[str, float]:
+    """
+    Pooled embeddings of a runtime against eager FP32 encoding.
+
+    Uses padded batches of mixed lengths up to the full-attention length.
+
+    Returns:
+        Dictionary with max_abs_diff and min_cosine over all rows
+    """
+    reference = copy.deepcopy(encoder).float().cpu().eval()
+    longest = _full_attention_length(encoder)
+    lengths = sorted({max(1, longest // 8), max(1, longest // 2), longest})
+
+    max_abs_diff, min_cosine = 0.0, 1.0
+    for index, batch_size in enumerate(batch_sizes):
+        input_ids, padding_mask = _sample_inputs(batch_size, lengths, runtime.vocab_size, seed=seed + index)
+        expected = reference.encode(input_ids=input_ids, attention_mask=padding_mask, return_pooled=True)
+        actual = runtime.encode(input_ids=input_ids, attention_mask=padding_mask)
+        max_abs_diff = max(max_abs_diff, (expected - actual).abs().max().item())
+        min_cosine = min(min_cosine, torch.cosine_similarity(expected, actual, dim=-1).min().item())
+
+    return {"max_abs_diff": max_abs_diff, "min_cosine": min_cosine}
+
+
+# =============================================================================
+# RUNTIME
+# =============================================================================
+
+class EncoderRuntime:
+    """
+    Pooled-embedding inference from an exported encoder artifact.
+
+    Stands in for HybridEncoder.encode(..., return_pooled=True), e.g. as the
+    StreamProcessor encoder.
+    """
+
+    device = torch.device("cpu")
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        Args:
+            path: Artifact written by export_encoder
+        """
+        self.path = Path(path)
+        with open(_metadata_path(self.path)) as f:
+            self.metadata: Dict[str, Any] = json.load(f)
+
+        self.format = self.metadata["format"]
+        self.vocab_size = self.metadata["vocab_size"]
+        self.output_dim = self.metadata["output_dim"]
+        self.max_seq_length = self.metadata["max_seq_length"]
+
+        if self.format == "torchscript":
+            self._module = torch.jit.load(str(self.path), map_location="cpu")
+            self._session = None
+        elif self.format == "onnx":
+            if not ONNXRUNTIME_AVAILABLE:
+                raise RuntimeError("ONNX artifacts require onnxruntime")
+            options = ort.SessionOptions()
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            self._session = ort.InferenceSession(str(self.path), options, providers=["CPUExecutionProvider"])
+            self._module = None
+        else:
+            raise ValueError(f"Unknown runtime format: {self.format}")
+
+        logger.info(
+            "Loaded {} encoder runtime from {} ({})",
+            self.format, self.path, "int8" if self.metadata.get("quantized") else "fp32"
+        )
+
+    def encode(
+        self,
+        input_ids: Optional[torch.Tensor] = None,
+        attention_mask: Optional[torch.Tensor] = None,
+        return_pooled: bool = True,
+        **kwargs
+    ) -> torch.Tensor:
+        """
+        Pooled embeddings for a batch of token IDs
+
+        Args:
+            input_ids: [batch_size, seq_len] token IDs, truncated to max_seq_length
+            attention_mask: [batch_size, seq_len] padding mask (True/1 at padded positions)
+            return_pooled: Must be True; the artifact only returns pooled embeddings
+
+        Returns:
+            embeddings: [batch_size, output_dim] FP32
+        """
+        if input_ids is None:
+            raise ValueError("The encoder runtime takes token IDs (input_ids)")
+        if not return_pooled:
+            raise ValueError("The encoder runtime only returns pooled embeddings")
+
+        input_ids = input_ids[:, :self.max_seq_length].cpu()
+        if attention_mask is None:
+            padding_mask = torch.zeros_like(input_ids, dtype=torch.bool)
+        else:
+            padding_mask = attention_mask[:, :self.max_seq_length].bool().cpu()
+
+        if self._module is not None:
+            with torch.no_grad():
+                return self._module(input_ids, padding_mask)
+
+        (embeddings,) = self._session.run(
+            None, {"input_ids": input_ids.numpy(), "padding_mask": padding_mask.numpy()}
+        )
+        return torch.from_numpy(embeddings)
+
+
+def load_encoder(
+    artifact_path: Optional[Union[str, Path]] = None,
+    config: Optional[HybridEncoderConfig] = None
+) -> Union[EncoderRuntime, HybridEncoder]:
+    """
+    Encoder for serving: the exported runtime when an artifact exists,
+    otherwise an eager HybridEncoder built from config.
+
+    Args:
+        artifact_path: Exported artifact (default: config.runtime_artifact,
+            from HYBRID_ENCODER_ARTIFACT)
+        config: Encoder configuration
+    """
+    config = config or default_config.encoder
+    artifact_path = artifact_path or config.runtime_artifact
+    if artifact_path and Path(artifact_path).exists():
+        return EncoderRuntime(artifact_path)
+
+    if artifact_path:
+        logger.warning("Encoder artifact {} not found, building eager HybridEncoder", artifact_path)
+    return HybridEncoder(config=config).to(config.device).eval()
@@ -9,11 +9,13 @@ import torch.nn as nn
 import torch.nn.functional as F
 from typing import Optional, Tuple, List
 import sys
+import threading
+from contextlib import contextmanager
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent))
 
-from quantization.quantized_attention import QuantizedMultiHeadAttention, QuantizedFeedForward
+from quantization.quantized_attention import QuantizedLinear, QuantizedMultiHeadAttention, QuantizedFeedForward
 from quantization.attention_streaming import StreamingAttention
 from config import HybridEncoderConfig, default_config
 
@@ -263,6 +265,56 @@ class HybridFusion(nn.Module):
         return fused
 
 
+class WeightsGuard:
+    """
+    Readers-writer guard around an encoder's weights
+    
+    Encode calls hold the read side, so any number run concurrently. A weight
+    swap holds the write side: it waits for in-flight encodes to finish and
+    holds back new ones until the swap is done, so no forward pass sees a mix
+    of old and new weights.
+    """
+    
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._writing = False
+        self._writers_waiting = 0
+    
+    @contextmanager
+    def reading(self):
+        with self._condition:
+            while self._writing or self._writers_waiting:
+                self._condition.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._readers -= 1
+                if self._readers == 0:
+                    self._condition.notify_all()
+    
+    @contextmanager
+    def writing(self):
+        with self._condition:
+            self._writers_waiting += 1
+            while self._writing or self._readers:
+                self._condition.wait()
+            self._writers_waiting -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._writing = False
+                self._condition.notify_all()
+    
+    @property
+    def active_readers(self) -> int:
+        return self._readers
+
+
 class HybridEncoder(nn.Module):
     """Hybrid Convolutional-Transformer Encoder"""
     
@@ -352,6 +404,20 @@ class HybridEncoder(nn.Module):
         self.output_projection = nn.Linear(embed_dim, output_dim)
         self.output_norm = nn.LayerNorm(output_dim)
     
+    @property
+    def weights_guard(self) -> WeightsGuard:
+        """Guard held by encode() and by weight swaps (created on first use)"""
+        guard = self.__dict__.get("_weights_guard")
+        if guard is None:
+            guard = self.__dict__.setdefault("_weights_guard", WeightsGuard())
+        return guard
+    
+    def __getstate__(self):
+        # Locks cannot be copied or pickled; copies get their own guard
+        state = dict(super().__getstate__())
+        state.pop("_weights_guard", None)
+        return state
+    
     def forward(
         self,
         input_ids: Optional[torch.Tensor] = None,
@@ -365,7 +431,9 @@ class HybridEncoder(nn.Module):
         Args:
             input_ids: [batch_size, seq_len] - Token IDs (if token_embedding is used)
             embeddings: [batch_size, seq_len, embed_dim] - Pre-computed embeddings
-            attention_mask: [batch_size, seq_len] - Attention mask
+            attention_mask: [batch_size, seq_len] - Padding mask, True/1 at padded
+                positions. Padded positions are zeroed before every layer, so the
+                outputs at real positions match encoding each sequence unpadded.
             use_streaming: Override streaming setting
         
         Returns:
@@ -397,12 +465,19 @@ class HybridEncoder(nn.Module):
             ).transpose(1, 2)
             x = x + pos_enc
         
+        pad_positions = attention_mask.bool().unsqueeze(-1) if attention_mask is not None else None
+        
         # Process through hybrid layers
         for conv_block, transformer_block, fusion_layer in zip(
             self.conv_blocks,
             self.transformer_blocks,
             self.fusion_layers
         ):
+            if pad_positions is not None:
+                # Convolutions see zeros past the end, as with their own
+                # padding; also clears NaNs from fully masked attention rows
+                x = x.masked_fill(pad_positions, 0.0)
+            
             # Convolutional path
             conv_out = conv_block(x)
             
@@ -423,7 +498,8 @@ class HybridEncoder(nn.Module):
         text: Optional[str] = None,
         embeddings: Optional[torch.Tensor] = None,
         input_ids: Optional[torch.Tensor] = None,
-        return_pooled: bool = True
+        return_pooled: bool = True,
+        attention_mask: Optional[torch.Tensor] = None
     ) -> torch.Tensor:
         """
         Encode text to embeddings
@@ -433,20 +509,28 @@ class HybridEncoder(nn.Module):
             embeddings: Pre-computed embeddings
             input_ids: Token IDs
             return_pooled: Return pooled (mean) embedding or full sequence
+            attention_mask: [batch_size, seq_len] padding mask (True/1 at padded
+                positions) for padded batches; pooling skips padded positions
         
         Returns:
             embeddings: [batch_size, output_dim] or [batch_size, seq_len, output_dim]
         """
         self.eval()
-        with torch.no_grad():
+        with torch.no_grad(), self.weights_guard.reading():
             output = self.forward(
                 input_ids=input_ids,
-                embeddings=embeddings
+                embeddings=embeddings,
+                attention_mask=attention_mask
             )
             
             if return_pooled:
-                # Mean pooling
-                output = output.mean(dim=1)
+                if attention_mask is None:
+                    # Mean pooling
+                    output = output.mean(dim=1)
+                else:
+                    # Mean over real positions only
+                    keep = (~attention_mask.bool()).unsqueeze(-1)
+                    output = output.masked_fill(~keep, 0.0).sum(dim=1) / keep.sum(dim=1).clamp(min=1)
             
             return output
 
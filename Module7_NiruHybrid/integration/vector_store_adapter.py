@@ -90,17 +90,11 @@ class HybridVectorStoreAdapter:
                         # This avoids the "Expected more than 1 value per channel" error
                         base_embeddings_tensor = base_embeddings_tensor.repeat(1, 2, 1)
                     
-                    # Pass base embeddings to hybrid encoder
-                    with torch.no_grad():
-                        hybrid_output = self.hybrid_encoder.forward(embeddings=base_embeddings_tensor)
-                        
-                        # Pool if needed (mean pooling)
-                        if hybrid_output.ndim == 3:
-                            embeddings = hybrid_output.mean(dim=1)  # [1, seq_len, dim] -> [1, dim]
-                        else:
-                            embeddings = hybrid_output
-                        
-                        embeddings_np = embeddings.cpu().numpy()
+                    # Pass base embeddings to hybrid encoder; encode() mean-pools
+                    # [1, seq_len, dim] -> [1, dim] and holds the weights guard so
+                    # a hot swap cannot land mid-forward
+                    embeddings = self.hybrid_encoder.encode(embeddings=base_embeddings_tensor, return_pooled=True)
+                    embeddings_np = embeddings.cpu().numpy()
                 else:
                     # Fallback if no embedding model
                     raise ValueError("Vector store has no embedding model for base embeddings")
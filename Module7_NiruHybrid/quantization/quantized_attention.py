@@ -53,9 +53,9 @@ class QuantizedLinear(nn.Module):
             if self.bits == 8:
                 # Quantize weights to INT8
                 w_quantized, scale = self._quantize_int8(self.weight)
-                # Dequantize for computation (FP16)
-                w_dequantized = w_quantized.float() * scale
-                return F.linear(x, w_dequantized, self.bias)
+                # Dequantize for computation in the activation dtype
+                w_dequantized = (w_quantized.float() * scale).to(x.dtype)
+                return F.linear(x, w_dequantized, self.bias.to(x.dtype))
             else:
                 return F.linear(x, self.weight, self.bias)
     
@@ -66,6 +66,19 @@ class QuantizedLinear(nn.Module):
         return quantized, scale
 
 
+def _activation_dtype(module: nn.Module, projection: nn.Module) -> torch.dtype:
+    """
+    FP16, unless overridden by module.activation_dtype (exported CPU graphs)
+    or the projection holds FP32/BF16 weights that cannot take FP16 inputs
+    """
+    if module.activation_dtype is not None:
+        return module.activation_dtype
+    weight = getattr(projection, "weight", None)
+    if isinstance(weight, torch.Tensor) and weight.is_floating_point():
+        return weight.dtype
+    return torch.float16
+
+
 class QuantizedMultiHeadAttention(nn.Module):
     """Multi-head attention with quantized weights (INT8) and FP16 activations"""
     
@@ -88,6 +101,8 @@ class QuantizedMultiHeadAttention(nn.Module):
         self.scale = 1.0 / math.sqrt(self.head_dim)
         self.quantize_weights = quantize_weights
         self.quantize_activations = quantize_activations
+        # None: FP16 activations (or the FP32/BF16 weight dtype)
+        self.activation_dtype: Optional[torch.dtype] = None
         
         # Query, Key, Value projections with quantization
         if quantize_weights:
@@ -130,13 +145,14 @@ class QuantizedMultiHeadAttention(nn.Module):
         batch_size, seq_len, _ = query.shape
         
         # Project to Q, K, V (with quantization if enabled)
-        # Convert to FP16 for activations
-        if query.dtype != torch.float16:
-            query = query.half()
-        if key.dtype != torch.float16:
-            key = key.half()
-        if value.dtype != torch.float16:
-            value = value.half()
+        # Convert to FP16 for activations (FP32 when the weights are FP32)
+        dtype = _activation_dtype(self, self.q_proj)
+        if query.dtype != dtype:
+            query = query.to(dtype)
+        if key.dtype != dtype:
+            key = key.to(dtype)
+        if value.dtype != dtype:
+            value = value.to(dtype)
         
         Q = self.q_proj(query)  # [batch_size, seq_len, embed_dim]
         K = self.k_proj(key)
@@ -208,6 +224,8 @@ class QuantizedFeedForward(nn.Module):
     ):
         super().__init__()
         self.quantize_weights = quantize_weights
+        # None: FP16 activations (or the FP32/BF16 weight dtype)
+        self.activation_dtype: Optional[torch.dtype] = None
         
         if quantize_weights:
             self.fc1 = QuantizedLinear(embed_dim, ff_dim, bits=weight_bits)
@@ -227,9 +245,10 @@ class QuantizedFeedForward(nn.Module):
     
     def forward(self, x: torch.Tensor) -> torch.Tensor:
         """Forward pass"""
-        # Convert to FP16 for activations
-        if x.dtype != torch.float16:
-            x = x.half()
+        # Convert to FP16 for activations (FP32 when the weights are FP32)
+        dtype = _activation_dtype(self, self.fc1)
+        if x.dtype != dtype:
+            x = x.to(dtype)
         
         x = self.fc1(x)
         x = self.activation(x)
@@ -5,8 +5,9 @@ Provides continual learning, memory management, and adaptive retrieval capabilit
 """
 
 from .continual_learner import ContinualLearner
+from .training_worker import ContinualTrainingWorker
 from .memory_manager import MemoryManager
 from .adaptive_retriever import AdaptiveRetriever
 
-__all__ = ["ContinualLearner", "MemoryManager", "AdaptiveRetriever"]
+__all__ = ["ContinualLearner", "ContinualTrainingWorker", "MemoryManager", "AdaptiveRetriever"]
 
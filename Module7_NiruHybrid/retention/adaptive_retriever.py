@@ -3,11 +3,18 @@ Adaptive Retriever for Context-Aware Retrieval
 
 Implements multi-stage retrieval (coarse + fine) with query-dependent
 adjustment and context-aware similarity thresholds.
+
+The coarse stage searches the vector backends with the query vector and
+asks for the stored document vectors along with the payload; the fine stage
+scores all candidates in one matrix product. Candidates without a stored
+vector are encoded in one batch and cached by chunk ID and text digest, so
+a re-indexed chunk whose text changed is encoded again.
 """
+import hashlib
 import torch
 import numpy as np
 from typing import List, Dict, Optional, Tuple, Any
-from collections import deque
+from collections import OrderedDict, deque
 from dataclasses import dataclass
 from loguru import logger
 
@@ -43,8 +50,14 @@ class AdaptiveRetriever:
         fine_top_k: int = 5,
         similarity_threshold: float = 0.5,
         context_window_size: int = 5,
+        embedding_cache_size: int = 10000,
         config: Optional[RetentionConfig] = None
     ):
+        """
+        Args:
+            embedding_cache_size: Document embeddings (encoded for candidates
+                without a stored vector) kept per chunk ID and text
+        """
         if config is not None:
             coarse_top_k = config.coarse_top_k
             fine_top_k = config.fine_top_k
@@ -64,6 +77,12 @@ class AdaptiveRetriever:
         # Adaptive thresholds (learned from context)
         self.adaptive_thresholds = {}
         self.query_type_stats = {}  # Statistics per query type
+        
+        # Document embeddings encoded here, by chunk ID (LRU)
+        self.embedding_cache_size = embedding_cache_size
+        self._doc_embeddings: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        self.doc_cache_hits = 0
+        self.docs_encoded = 0
     
     def encode_query(
         self,
@@ -82,18 +101,22 @@ class AdaptiveRetriever:
         """
         if use_hybrid and self.hybrid_encoder is not None:
             # Use hybrid encoder
-            with torch.no_grad():
-                # Tokenize if needed (simplified - would use proper tokenizer)
-                # For now, assume embeddings are provided or use simple encoding
-                embeddings = self.hybrid_encoder.encode(text=query_text, return_pooled=True)
-                return embeddings
+            try:
+                with torch.no_grad():
+                    embeddings = self.hybrid_encoder.encode(text=query_text, return_pooled=True)
+                return embeddings.float().reshape(-1)
+            except Exception as e:
+                # The encoder takes token IDs or embeddings, not raw text
+                if self.vector_store is None:
+                    raise
+                logger.debug(f"Hybrid encoder cannot encode query text ({e}), using vector store model")
+        
+        # Fallback to existing vector store embedding
+        if self.vector_store is not None:
+            embeddings = self.vector_store.embedding_model.encode(query_text)
+            return torch.as_tensor(np.asarray(embeddings), dtype=torch.float32)
         else:
-            # Fallback to existing vector store embedding
-            if self.vector_store is not None:
-                embeddings = self.vector_store.embedding_model.encode(query_text)
-                return torch.tensor(embeddings)
-            else:
-                raise ValueError("No encoder available")
+            raise ValueError("No encoder available")
     
     def get_adaptive_threshold(
         self,
@@ -142,7 +165,8 @@ class AdaptiveRetriever:
     def coarse_retrieval(
         self,
         query_embeddings: torch.Tensor,
-        top_k: Optional[int] = None
+        top_k: Optional[int] = None,
+        query_text: Optional[str] = None
     ) -> List[Dict]:
         """
         Coarse retrieval stage - fast, approximate retrieval
@@ -150,24 +174,89 @@ class AdaptiveRetriever:
         Args:
             query_embeddings: Query embeddings
             top_k: Number of results (default: coarse_top_k)
+            query_text: Used for a text query when the store cannot search by vector
         
         Returns:
-            results: List of retrieved documents
+            results: List of retrieved documents, with stored vectors ("embedding")
+                where the backend returns them
         """
         top_k = top_k or self.coarse_top_k
         
-        if self.vector_store is not None:
-            # Use existing vector store
-            query_text = ""  # Not needed for embedding-based query
-            results = self.vector_store.query(
-                query_text="",  # Will use embeddings directly if supported
-                n_results=top_k
-            )
-            return results
-        else:
+        if self.vector_store is None:
             # Fallback: return empty results
             logger.warning("No vector store available for retrieval")
             return []
+        
+        query_vector = query_embeddings.detach().float().reshape(-1).cpu().tolist()
+        if hasattr(self.vector_store, "query_by_vector") and self._matches_store_dimension(len(query_vector)):
+            return self.vector_store.query_by_vector(
+                query_vector,
+                n_results=top_k,
+                with_vectors=True
+            )
+        
+        if query_text is None:
+            logger.warning("Vector store cannot search by vector and no query text given")
+            return []
+        return self.vector_store.query(query_text=query_text, n_results=top_k)
+    
+    def _matches_store_dimension(self, dim: int) -> bool:
+        """Whether a query vector of this size can search the store's vectors"""
+        model = getattr(self.vector_store, "embedding_model", None)
+        if model is None or not hasattr(model, "get_sentence_embedding_dimension"):
+            return True
+        return model.get_sentence_embedding_dimension() == dim
+    
+    def _document_embeddings(self, candidates: List[Dict]) -> List[Optional[np.ndarray]]:
+        """
+        Embedding per candidate: the stored vector, else a cached or newly
+        encoded one (all misses encoded in one batch); None without text
+        """
+        embeddings: List[Optional[np.ndarray]] = [None] * len(candidates)
+        missing: Dict[str, List[int]] = {}  # text to encode -> candidate positions
+        keys: Dict[str, List[Tuple[str, str]]] = {}  # text to encode -> cache keys
+        
+        for i, result in enumerate(candidates):
+            metadata = result.get("metadata") or {}
+            stored = result.get("embedding")
+            if stored is None:
+                stored = metadata.get("embedding")
+            if stored is not None and not isinstance(stored, str):  # payloads may be stringified
+                embeddings[i] = np.asarray(stored, dtype=np.float32)
+                continue
+            
+            text = result.get("text")
+            if not text:
+                continue
+            chunk_id = metadata.get("chunk_id") or result.get("id")
+            key = None
+            if chunk_id is not None:
+                # A chunk re-indexed with new text must not reuse the old vector
+                key = (str(chunk_id), hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest())
+                if key in self._doc_embeddings:
+                    self._doc_embeddings.move_to_end(key)
+                    embeddings[i] = self._doc_embeddings[key]
+                    self.doc_cache_hits += 1
+                    continue
+            missing.setdefault(text, []).append(i)
+            if key is not None:
+                keys.setdefault(text, []).append(key)
+        
+        if missing:
+            if self.vector_store is None:
+                raise ValueError("No encoder available")
+            texts = list(missing)
+            encoded = np.asarray(self.vector_store.embedding_model.encode(texts), dtype=np.float32)
+            self.docs_encoded += len(texts)
+            for text, vector in zip(texts, encoded):
+                for i in missing[text]:
+                    embeddings[i] = vector
+                for key in keys.get(text, []):
+                    self._doc_embeddings[key] = vector
+            while len(self._doc_embeddings) > self.embedding_cache_size:
+                self._doc_embeddings.popitem(last=False)
+        
+        return embeddings
     
     def fine_retrieval(
         self,
@@ -194,29 +283,26 @@ class AdaptiveRetriever:
         if not coarse_results:
             return []
         
-        # Compute similarities
+        # Document embeddings (stored, cached or batch-encoded)
+        query = query_embeddings.detach().float().reshape(-1).cpu().numpy()
+        doc_embeddings = self._document_embeddings(coarse_results)
+        rows = [
+            i for i, emb in enumerate(doc_embeddings)
+            if emb is not None and emb.reshape(-1).shape[0] == query.shape[0]
+        ]
+        if not rows:
+            return []
+        
+        # Cosine similarity of every candidate in one matrix product
+        matrix = np.stack([doc_embeddings[i].reshape(-1) for i in rows])
+        norms = np.maximum(np.linalg.norm(matrix, axis=1) * np.linalg.norm(query), 1e-8)
+        similarities = (matrix @ query) / norms
+        
+        # Filter by threshold
         scored_results = []
-        for result in coarse_results:
-            # Get document embeddings
-            if "embedding" in result:
-                doc_emb = torch.tensor(result["embedding"])
-            elif "metadata" in result and "embedding" in result["metadata"]:
-                doc_emb = torch.tensor(result["metadata"]["embedding"])
-            else:
-                # Re-encode if needed
-                if "text" in result:
-                    doc_emb = self.encode_query(result["text"], use_hybrid=False)
-                else:
-                    continue
-            
-            # Compute cosine similarity
-            similarity = torch.nn.functional.cosine_similarity(
-                query_embeddings.unsqueeze(0),
-                doc_emb.unsqueeze(0)
-            ).item()
-            
-            # Filter by threshold
+        for i, similarity in zip(rows, similarities.tolist()):
             if similarity >= threshold:
+                result = coarse_results[i]
                 result["similarity"] = similarity
                 scored_results.append(result)
         
@@ -262,7 +348,7 @@ class AdaptiveRetriever:
             threshold = self.similarity_threshold
         
         # Coarse retrieval
-        coarse_results = self.coarse_retrieval(query_embeddings, top_k=self.coarse_top_k)
+        coarse_results = self.coarse_retrieval(query_embeddings, top_k=self.coarse_top_k, query_text=query_text)
         
         # Fine retrieval
         fine_results = self.fine_retrieval(
@@ -333,6 +419,10 @@ class AdaptiveRetriever:
         self.query_history.clear()
         logger.info("Query history cleared")
     
+    def clear_embedding_cache(self):
+        """Drop cached document embeddings (e.g. after re-indexing)"""
+        self._doc_embeddings.clear()
+    
     def get_stats(self) -> Dict[str, Any]:
         """Get retriever statistics"""
         return {
@@ -343,6 +433,9 @@ class AdaptiveRetriever:
             },
             "coarse_top_k": self.coarse_top_k,
             "fine_top_k": self.fine_top_k,
-            "base_similarity_threshold": self.similarity_threshold
+            "base_similarity_threshold": self.similarity_threshold,
+            "cached_doc_embeddings": len(self._doc_embeddings),
+            "doc_cache_hits": self.doc_cache_hits,
+            "docs_encoded": self.docs_encoded
         }
 
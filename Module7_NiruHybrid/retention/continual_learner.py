@@ -2,13 +2,17 @@
 Continual Learning System
 
 Fine-tunes hybrid encoder on generated data with gradient accumulation
-and checkpoint management for streaming updates.
+and checkpoint management for streaming updates. With background training,
+updates run on a shadow copy in a worker thread (training_worker.py) and
+validated weights are hot-swapped into the serving encoder.
 """
+import os
+import threading
 import torch
 import torch.nn as nn
 import numpy as np
 from torch.utils.data import DataLoader, Dataset
-from typing import List, Dict, Optional, Tuple, Any
+from typing import Callable, List, Dict, Optional, Tuple, Any
 from pathlib import Path
 from datetime import datetime
 import json
@@ -72,13 +76,32 @@ class ContinualLearner:
         max_grad_norm: float = 1.0,
         update_frequency: int = 100,
         checkpoint_dir: Optional[Path] = None,
+        background_training: bool = False,
+        validation_fraction: float = 0.2,
+        max_validation_regression: float = 0.05,
+        training_nice: int = 10,
         config: Optional[RetentionConfig] = None
     ):
+        """
+        Args:
+            background_training: Train a shadow copy on a worker thread and
+                hot-swap validated weights, instead of training the serving
+                encoder in the calling thread
+            validation_fraction: Share of each update's samples held out to
+                validate background updates
+            max_validation_regression: Largest relative increase in held-out
+                loss a background update may have and still be published
+            training_nice: Niceness of the background training thread (Linux)
+        """
         if config is not None:
             learning_rate = config.learning_rate
             gradient_accumulation_steps = config.gradient_accumulation_steps
             max_grad_norm = config.max_grad_norm
             update_frequency = config.update_frequency
+            background_training = config.background_training
+            validation_fraction = config.validation_fraction
+            max_validation_regression = config.max_validation_regression
+            training_nice = config.training_nice
         
         self.hybrid_encoder = hybrid_encoder
         self.text_diffusion = text_diffusion
@@ -88,6 +111,10 @@ class ContinualLearner:
         self.gradient_accumulation_steps = gradient_accumulation_steps
         self.max_grad_norm = max_grad_norm
         self.update_frequency = update_frequency
+        self.background_training = background_training
+        self.validation_fraction = validation_fraction
+        self.max_validation_regression = max_validation_regression
+        self.training_nice = training_nice
         
         self.checkpoint_dir = checkpoint_dir or Path("models/checkpoints")
         self.checkpoint_dir.mkdir(parents=True, exist_ok=True)
@@ -100,9 +127,13 @@ class ContinualLearner:
         
         # Training state
         self.generated_samples_buffer = []
+        self._buffer_lock = threading.Lock()
         self.update_counter = 0
         self.total_updates = 0
         self.training_history = []
+        
+        # Background training worker (created on the first update)
+        self._worker = None
     
     def add_generated_sample(
         self,
@@ -124,43 +155,77 @@ class ContinualLearner:
             "metadata": metadata or {},
             "timestamp": datetime.now().isoformat()
         }
-        self.generated_samples_buffer.append(sample)
-        self.update_counter += 1
+        with self._buffer_lock:
+            self.generated_samples_buffer.append(sample)
+            self.update_counter += 1
+            due = self.update_counter >= self.update_frequency
+            if due:
+                self.update_counter = 0
         
         # Trigger update if frequency reached
-        if self.update_counter >= self.update_frequency:
+        if due:
             self.update_model()
-            self.update_counter = 0
     
     def update_model(self):
         """Update model weights using buffered generated samples"""
-        if len(self.generated_samples_buffer) == 0:
+        with self._buffer_lock:
+            samples = self.generated_samples_buffer
+            self.generated_samples_buffer = []
+        
+        if len(samples) == 0:
             logger.warning("No generated samples in buffer for training")
             return
         
-        logger.info(f"Updating model with {len(self.generated_samples_buffer)} generated samples")
+        if self.background_training:
+            # Hand the samples to the worker; serving is not blocked
+            self._get_worker().submit(samples)
+            logger.info(f"Queued {len(samples)} generated samples for background training")
+            return
         
-        # Prepare dataset
-        texts = [s["text"] for s in self.generated_samples_buffer if s["text"] is not None]
+        logger.info(f"Updating model with {len(samples)} generated samples")
+        
+        dataset = self.build_dataset(samples)
+        if dataset is None:
+            logger.warning("No valid data for training")
+            return
+        
+        avg_loss, _ = self.train_on_samples(self.hybrid_encoder, self.optimizer, dataset)
+        self.record_update({"loss": avg_loss}, num_samples=len(samples), published=True)
+    
+    def build_dataset(self, samples: List[Dict]) -> Optional[ContinualLearningDataset]:
+        """Dataset from buffered samples (None if nothing usable)"""
+        texts = [s["text"] for s in samples if s["text"] is not None]
         embeddings = [
-            s["embeddings"] for s in self.generated_samples_buffer
+            s["embeddings"] for s in samples
             if s["embeddings"] is not None
         ]
         
-        # Create dataset
         if texts:
-            dataset = ContinualLearningDataset(texts=texts)
+            return ContinualLearningDataset(texts=texts)
         elif embeddings:
-            embeddings_tensor = torch.stack(embeddings) if len(embeddings) > 0 else None
-            if embeddings_tensor is not None:
-                dataset = ContinualLearningDataset(embeddings=embeddings_tensor)
-            else:
-                logger.warning("No valid data for training")
-                return
-        else:
-            logger.warning("No valid data for training")
-            return
+            return ContinualLearningDataset(embeddings=torch.stack(embeddings))
+        return None
+    
+    def train_on_samples(
+        self,
+        model: HybridEncoder,
+        optimizer: torch.optim.Optimizer,
+        dataset: ContinualLearningDataset,
+        before_batch: Optional[Callable[[], None]] = None
+    ) -> Tuple[float, int]:
+        """
+        One pass over a dataset with gradient accumulation and clipping
+        
+        Args:
+            model: Encoder to train (serving encoder, or a shadow copy)
+            optimizer: Optimizer over the model's parameters
+            dataset: Dataset built from generated samples
+            before_batch: Called before each batch (background training uses
+                it to yield to in-flight encodes)
         
+        Returns:
+            (average loss, number of batches trained)
+        """
         # Create data loader
         dataloader = DataLoader(
             dataset,
@@ -170,7 +235,7 @@ class ContinualLearner:
         )
         
         # Training step
-        self.hybrid_encoder.train()
+        model.train()
         total_loss = 0.0
         num_batches = 0
         
@@ -190,8 +255,11 @@ class ContinualLearner:
             else:
                 continue
             
+            if before_batch is not None:
+                before_batch()
+            
             # Forward through encoder
-            output = self.hybrid_encoder(embeddings=input_embeddings)
+            output = model(embeddings=input_embeddings)
             
             # Loss: reconstruction loss (MSE between input and output)
             # This encourages the model to preserve important patterns
@@ -210,47 +278,97 @@ class ContinualLearner:
             if (batch_idx + 1) % self.gradient_accumulation_steps == 0:
                 # Gradient clipping
                 torch.nn.utils.clip_grad_norm_(
-                    self.hybrid_encoder.parameters(),
+                    model.parameters(),
                     self.max_grad_norm
                 )
                 
                 # Optimizer step
-                self.optimizer.step()
-                self.optimizer.zero_grad()
+                optimizer.step()
+                optimizer.zero_grad()
         
         # Final gradient step if needed
         if num_batches % self.gradient_accumulation_steps != 0:
             torch.nn.utils.clip_grad_norm_(
-                self.hybrid_encoder.parameters(),
+                model.parameters(),
                 self.max_grad_norm
             )
-            self.optimizer.step()
-            self.optimizer.zero_grad()
+            optimizer.step()
+            optimizer.zero_grad()
         
         avg_loss = total_loss / num_batches if num_batches > 0 else 0.0
+        return avg_loss, num_batches
+    
+    def evaluate_loss(self, model: HybridEncoder, samples: List[Dict]) -> Optional[float]:
+        """
+        Reconstruction loss on held-out samples, without updating the model
+        
+        Returns:
+            loss: Mean loss, or None if no sample has embeddings
+        """
+        embeddings = [s["embeddings"] for s in samples if s["embeddings"] is not None]
+        if not embeddings:
+            return None
+        
+        model.eval()
+        total_loss = 0.0
+        num_batches = 0
+        with torch.no_grad():
+            for batch in torch.stack(embeddings).split(4):
+                total_loss += nn.MSELoss()(model(embeddings=batch), batch).item()
+                num_batches += 1
+        return total_loss / num_batches
+    
+    def record_update(self, result: Dict[str, Any], num_samples: int, published: bool):
+        """Record a finished update; checkpoints every 10 published updates"""
+        loss = result.get("train_loss", result.get("loss", 0.0))
         
         # Record training history
-        self.training_history.append({
+        entry = {
             "update": self.total_updates,
-            "loss": avg_loss,
-            "num_samples": len(self.generated_samples_buffer),
+            "loss": loss,
+            "num_samples": num_samples,
             "timestamp": datetime.now().isoformat()
-        })
+        }
+        if self.background_training:
+            entry.update({k: v for k, v in result.items() if k != "train_loss"})
+        self.training_history.append(entry)
+        
+        if not published:
+            return
         
         logger.info(
-            f"Model updated: loss={avg_loss:.4f}, "
-            f"samples={len(self.generated_samples_buffer)}, "
+            f"Model updated: loss={loss:.4f}, "
+            f"samples={num_samples}, "
             f"total_updates={self.total_updates}"
         )
-        
-        # Clear buffer
-        self.generated_samples_buffer.clear()
         self.total_updates += 1
         
         # Save checkpoint periodically
         if self.total_updates % 10 == 0:
             self.save_checkpoint()
     
+    def _get_worker(self):
+        """Background training worker, started on first use"""
+        if self._worker is None:
+            from .training_worker import ContinualTrainingWorker
+            self._worker = ContinualTrainingWorker(
+                self,
+                validation_fraction=self.validation_fraction,
+                max_validation_regression=self.max_validation_regression,
+                nice=self.training_nice
+            )
+        return self._worker
+    
+    def wait_for_updates(self):
+        """Block until queued background updates have finished"""
+        if self._worker is not None:
+            self._worker.join()
+    
+    def close(self, wait: bool = True):
+        """Stop the background training worker (queued updates still run)"""
+        if self._worker is not None:
+            self._worker.close(wait=wait)
+    
     def generate_training_data(
         self,
         query_context: Optional[str] = None,
@@ -332,9 +450,14 @@ class ContinualLearner:
         
         checkpoint_path = self.checkpoint_dir / f"hybrid_encoder_{suffix}.pt"
         
+        # Background training keeps its optimizer state with the shadow copy
+        optimizer = self._worker.optimizer if self._worker is not None else self.optimizer
+        with self.hybrid_encoder.weights_guard.reading():
+            model_state_dict = self.hybrid_encoder.state_dict()
+        
         checkpoint = {
-            "model_state_dict": self.hybrid_encoder.state_dict(),
-            "optimizer_state_dict": self.optimizer.state_dict(),
+            "model_state_dict": model_state_dict,
+            "optimizer_state_dict": optimizer.state_dict(),
             "total_updates": self.total_updates,
             "training_history": self.training_history,
             "config": {
@@ -345,15 +468,26 @@ class ContinualLearner:
             }
         }
         
-        torch.save(checkpoint, checkpoint_path)
+        # Write then rename, so readers never see a partial checkpoint
+        tmp_path = checkpoint_path.with_name(checkpoint_path.name + ".tmp")
+        torch.save(checkpoint, tmp_path)
+        os.replace(tmp_path, checkpoint_path)
         logger.info(f"Saved checkpoint to {checkpoint_path}")
     
     def load_checkpoint(self, checkpoint_path: Path):
         """Load model checkpoint"""
         checkpoint = torch.load(checkpoint_path, map_location=self.hybrid_encoder.device if hasattr(self.hybrid_encoder, 'device') else 'cpu')
         
-        self.hybrid_encoder.load_state_dict(checkpoint["model_state_dict"])
-        self.optimizer.load_state_dict(checkpoint["optimizer_state_dict"])
+        # Queued background updates would otherwise publish over the loaded weights
+        self.wait_for_updates()
+        
+        with self.hybrid_encoder.weights_guard.writing():
+            self.hybrid_encoder.load_state_dict(checkpoint["model_state_dict"])
+        if self._worker is not None:
+            self._worker.reset()
+            self._worker.optimizer.load_state_dict(checkpoint["optimizer_state_dict"])
+        else:
+            self.optimizer.load_state_dict(checkpoint["optimizer_state_dict"])
         self.total_updates = checkpoint.get("total_updates", 0)
         self.training_history = checkpoint.get("training_history", [])
         
@@ -366,6 +500,8 @@ class ContinualLearner:
             "buffer_size": len(self.generated_samples_buffer),
             "update_frequency": self.update_frequency,
             "update_counter": self.update_counter,
+            "background_training": self.background_training,
+            "worker": self._worker.get_stats() if self._worker is not None else None,
             "recent_losses": [
                 h["loss"] for h in self.training_history[-10:]
             ] if self.training_history else [],
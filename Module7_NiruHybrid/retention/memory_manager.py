@@ -3,7 +3,16 @@ Memory Manager for Selective Pattern Retention
 
 Manages memory buffer with importance scoring and eviction policies
 for retaining important patterns while discarding less relevant ones.
+
+Pattern embeddings are also kept L2-normalised in one contiguous matrix
+(rows reused after eviction), so similarity search is a single
+matrix-vector product and top-k. LFU and importance eviction use min-heaps
+with lazy invalidation: updates push a new entry and stale entries are
+dropped when they reach the top. The buffer is saved in a binary .npz
+format; JSON files written by earlier versions still load.
 """
+import heapq
+import math
 import torch
 import numpy as np
 from typing import List, Dict, Optional, Tuple, Any
@@ -55,9 +64,21 @@ class MemoryPattern:
         return pattern
 
 
+def _as_vector(embeddings: Any) -> np.ndarray:
+    """Flatten embeddings (tensor, array or list) to a float32 vector"""
+    if isinstance(embeddings, torch.Tensor):
+        embeddings = embeddings.detach().to(device="cpu", dtype=torch.float32).numpy()
+    return np.asarray(embeddings, dtype=np.float32).reshape(-1)
+
+
 class MemoryManager:
     """Manages memory buffer with selective retention"""
     
+    # Initial rows in the embedding matrix (doubles when full)
+    INITIAL_CAPACITY = 1024
+    # Binary save format version
+    FORMAT_VERSION = 1
+    
     def __init__(
         self,
         buffer_size: int = 10000,
@@ -83,11 +104,129 @@ class MemoryManager:
         else:
             self.memory_buffer = {}
         
+        self._reset_index()
+        
         # Statistics
         self.total_patterns_added = 0
         self.total_patterns_evicted = 0
         self.total_accesses = 0
     
+    def _reset_index(self):
+        """Clear the embedding matrix and eviction heap"""
+        # Normalized embeddings; rows [0, len(buffer)) are live
+        self._dim: Optional[int] = None
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._slots: Dict[str, int] = {}  # pattern id -> matrix row
+        self._slot_ids: List[str] = []  # matrix row -> pattern id
+        
+        # Min-heap of (score, insertion seq, pattern id) for lfu/importance.
+        # Entries go stale when a pattern is evicted or its score changes;
+        # they are skipped on pop. The insertion seq breaks ties in buffer order.
+        self._heap: List[Tuple[float, int, str]] = []
+        self._seq: Dict[str, int] = {}
+        self._next_seq = 0
+    
+    # ------------------------------------------------------------------
+    # Embedding matrix
+    # ------------------------------------------------------------------
+    
+    def _normalized(self, embeddings: Any) -> np.ndarray:
+        """Unit-norm float32 vector, checked against the matrix dimension"""
+        vector = _as_vector(embeddings)
+        if self._dim is not None and self._slot_ids and vector.shape[0] != self._dim:
+            raise ValueError(
+                f"Embedding dimension {vector.shape[0]} does not match memory dimension {self._dim}"
+            )
+        return vector / max(math.sqrt(float(vector @ vector)), 1e-8)
+    
+    def _store_vector(self, pattern_id: str, vector: np.ndarray):
+        """Write a pattern's vector to its row, appending a row for new patterns"""
+        row = self._slots.get(pattern_id)
+        if row is None:
+            row = len(self._slot_ids)
+            if not self._slot_ids:
+                self._dim = vector.shape[0]
+                if self._matrix.shape[1] != self._dim:
+                    self._matrix = np.zeros((0, self._dim), dtype=np.float32)
+            if row >= self._matrix.shape[0]:
+                capacity = max(self.INITIAL_CAPACITY, 2 * self._matrix.shape[0])
+                grown = np.zeros((capacity, self._dim), dtype=np.float32)
+                grown[:row] = self._matrix[:row]
+                self._matrix = grown
+            self._slots[pattern_id] = row
+            self._slot_ids.append(pattern_id)
+        self._matrix[row] = vector
+    
+    def _build_index(self):
+        """Index every pattern in the buffer in one pass (after load)"""
+        self._slot_ids = list(self.memory_buffer.keys())
+        self._slots = {pid: row for row, pid in enumerate(self._slot_ids)}
+        self._seq = dict(self._slots)
+        self._next_seq = len(self._slot_ids)
+        
+        if self._slot_ids:
+            vectors = np.stack([_as_vector(p.embeddings) for p in self.memory_buffer.values()])
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            self._matrix = vectors / np.maximum(norms, 1e-8)
+            self._dim = self._matrix.shape[1]
+        self._rebuild_heap()
+    
+    def _release_vector(self, pattern_id: str):
+        """Free a pattern's row by moving the last live row into it"""
+        row = self._slots.pop(pattern_id)
+        last_id = self._slot_ids.pop()
+        if last_id != pattern_id:
+            last = len(self._slot_ids)
+            self._matrix[row] = self._matrix[last]
+            self._slot_ids[row] = last_id
+            self._slots[last_id] = row
+    
+    # ------------------------------------------------------------------
+    # Eviction heap
+    # ------------------------------------------------------------------
+    
+    def _heap_score(self, pattern: MemoryPattern) -> float:
+        if self.eviction_policy == "lfu":
+            return pattern.access_count
+        return pattern.importance_score
+    
+    def _push_heap(self, pattern: MemoryPattern):
+        """Record a pattern's current score (lfu/importance policies only)"""
+        if self.eviction_policy not in ("lfu", "importance"):
+            return
+        heapq.heappush(self._heap, (self._heap_score(pattern), self._seq[pattern.id], pattern.id))
+        # Drop stale entries once they dominate the heap
+        if len(self._heap) > 2 * len(self.memory_buffer) + self.INITIAL_CAPACITY:
+            self._rebuild_heap()
+    
+    def _rebuild_heap(self):
+        """Rebuild the heap from the live patterns"""
+        if self.eviction_policy not in ("lfu", "importance"):
+            return
+        self._heap = [
+            (self._heap_score(p), self._seq[pid], pid) for pid, p in self.memory_buffer.items()
+        ]
+        heapq.heapify(self._heap)
+    
+    def _pop_heap(self) -> Optional[str]:
+        """Pop the live pattern with the lowest score (earliest added on ties)"""
+        for _ in range(2):
+            while self._heap:
+                score, seq, pattern_id = heapq.heappop(self._heap)
+                pattern = self.memory_buffer.get(pattern_id)
+                if pattern is not None and self._seq[pattern_id] == seq and self._heap_score(pattern) == score:
+                    return pattern_id
+            # Scores changed outside the manager; start over from the buffer
+            self._rebuild_heap()
+        return None
+    
+    def _remove(self, pattern_id: str):
+        """Remove a pattern from the buffer and the embedding matrix"""
+        del self.memory_buffer[pattern_id]
+        self._release_vector(pattern_id)
+        self._seq.pop(pattern_id, None)
+        self.total_patterns_evicted += 1
+    
     def compute_importance_score(
         self,
         embeddings: torch.Tensor,
@@ -148,7 +287,12 @@ class MemoryManager:
         
         Returns:
             success: Whether pattern was added
+        
+        Raises:
+            ValueError: If the embedding dimension differs from stored patterns
         """
+        vector = self._normalized(embeddings)
+        
         # Compute importance score
         importance_score = self.compute_importance_score(
             embeddings, metadata, query_similarity
@@ -167,6 +311,11 @@ class MemoryManager:
             # Evict least important pattern
             self._evict_pattern()
         
+        # Replacing a pattern keeps its position in the buffer
+        if pattern_id not in self.memory_buffer:
+            self._seq[pattern_id] = self._next_seq
+            self._next_seq += 1
+        
         # Add to buffer
         if self.eviction_policy == "lru":
             self.memory_buffer[pattern_id] = pattern
@@ -175,6 +324,9 @@ class MemoryManager:
         else:
             self.memory_buffer[pattern_id] = pattern
         
+        self._store_vector(pattern_id, vector)
+        self._push_heap(pattern)
+        
         self.total_patterns_added += 1
         return True
     
@@ -199,6 +351,7 @@ class MemoryManager:
         # Move to end for LRU
         if self.eviction_policy == "lru" and isinstance(self.memory_buffer, OrderedDict):
             self.memory_buffer.move_to_end(pattern_id)
+        self._push_heap(pattern)
         
         self.total_accesses += 1
         return pattern
@@ -211,31 +364,13 @@ class MemoryManager:
         if self.eviction_policy == "lru":
             # Remove least recently used (first item)
             if isinstance(self.memory_buffer, OrderedDict):
-                pattern_id = next(iter(self.memory_buffer))
-                del self.memory_buffer[pattern_id]
-                self.total_patterns_evicted += 1
-        
-        elif self.eviction_policy == "lfu":
-            # Remove least frequently used
-            min_access_count = min(
-                p.access_count for p in self.memory_buffer.values()
-            )
-            for pattern_id, pattern in self.memory_buffer.items():
-                if pattern.access_count == min_access_count:
-                    del self.memory_buffer[pattern_id]
-                    self.total_patterns_evicted += 1
-                    break
-        
-        elif self.eviction_policy == "importance":
-            # Remove least important
-            min_importance = min(
-                p.importance_score for p in self.memory_buffer.values()
-            )
-            for pattern_id, pattern in self.memory_buffer.items():
-                if pattern.importance_score == min_importance:
-                    del self.memory_buffer[pattern_id]
-                    self.total_patterns_evicted += 1
-                    break
+                self._remove(next(iter(self.memory_buffer)))
+        
+        elif self.eviction_policy in ("lfu", "importance"):
+            # Remove least frequently used / least important
+            pattern_id = self._pop_heap()
+            if pattern_id is not None:
+                self._remove(pattern_id)
     
     def get_top_patterns(
         self,
@@ -258,13 +393,12 @@ class MemoryManager:
         if min_importance is not None:
             patterns = [p for p in patterns if p.importance_score >= min_importance]
         
+        # Top k by importance (nlargest matches a stable sort + slice)
+        if top_k is not None and top_k < len(patterns):
+            return heapq.nlargest(top_k, patterns, key=lambda p: p.importance_score)
+        
         # Sort by importance
         patterns.sort(key=lambda p: p.importance_score, reverse=True)
-        
-        # Return top k
-        if top_k is not None:
-            patterns = patterns[:top_k]
-        
         return patterns
     
     def retain_important_patterns(self) -> List[str]:
@@ -278,16 +412,17 @@ class MemoryManager:
         top_patterns = self.get_top_patterns(top_k=num_retain)
         
         retained_ids = [p.id for p in top_patterns]
+        retained = set(retained_ids)
         
         # Remove patterns not in retained list
         patterns_to_remove = [
             pid for pid in self.memory_buffer.keys()
-            if pid not in retained_ids
+            if pid not in retained
         ]
         
         for pid in patterns_to_remove:
-            del self.memory_buffer[pid]
-            self.total_patterns_evicted += 1
+            self._remove(pid)
+        self._rebuild_heap()
         
         logger.info(
             f"Retained {len(retained_ids)} patterns "
@@ -313,23 +448,31 @@ class MemoryManager:
         Returns:
             results: List of (pattern, similarity) tuples
         """
-        results = []
-        
-        for pattern in self.memory_buffer.values():
-            # Compute cosine similarity
-            similarity = torch.nn.functional.cosine_similarity(
-                query_embeddings.unsqueeze(0),
-                pattern.embeddings.unsqueeze(0)
-            ).item()
-            
-            if threshold is None or similarity >= threshold:
-                results.append((pattern, similarity))
+        if not self._slot_ids or top_k <= 0:
+            return []
+        
+        query = _as_vector(query_embeddings)
+        if query.shape[0] != self._dim:
+            raise ValueError(f"Query dimension {query.shape[0]} does not match memory dimension {self._dim}")
+        query = query / max(math.sqrt(float(query @ query)), 1e-8)
+        
+        # Cosine similarity against every live row at once
+        similarities = self._matrix[:len(self._slot_ids)] @ query
+        
+        candidates = np.arange(len(similarities))
+        if threshold is not None:
+            candidates = np.flatnonzero(similarities >= threshold)
+        if len(candidates) > top_k:
+            partition = np.argpartition(-similarities[candidates], top_k - 1)[:top_k]
+            candidates = candidates[partition]
         
         # Sort by similarity
-        results.sort(key=lambda x: x[1], reverse=True)
+        candidates = candidates[np.argsort(-similarities[candidates], kind="stable")]
         
-        # Return top k
-        return results[:top_k]
+        return [
+            (self.memory_buffer[self._slot_ids[row]], float(similarities[row]))
+            for row in candidates
+        ]
     
     def get_stats(self) -> Dict[str, Any]:
         """Get memory statistics"""
@@ -340,14 +483,33 @@ class MemoryManager:
             "total_patterns_evicted": self.total_patterns_evicted,
             "total_accesses": self.total_accesses,
             "eviction_policy": self.eviction_policy,
+            "embedding_dim": self._dim,
             "avg_importance": np.mean([p.importance_score for p in self.memory_buffer.values()]) if self.memory_buffer else 0.0,
             "avg_access_count": np.mean([p.access_count for p in self.memory_buffer.values()]) if self.memory_buffer else 0.0
         }
     
     def save(self, filepath: Path):
-        """Save memory buffer to file"""
-        data = {
-            "patterns": [p.to_dict() for p in self.memory_buffer.values()],
+        """
+        Save memory buffer to a binary (.npz) file
+        
+        Embeddings, scores and timestamps are stored as arrays; ids, metadata,
+        statistics and config go in one JSON header. Patterns are written in
+        buffer order, so LRU recency and eviction tie-breaks survive a reload.
+        """
+        patterns = list(self.memory_buffer.values())
+        vectors = [_as_vector(p.embeddings) for p in patterns]
+        
+        # Original shapes of embeddings that are not 1-D, by position
+        shapes = {
+            str(i): list(p.embeddings.shape)
+            for i, p in enumerate(patterns)
+            if isinstance(p.embeddings, torch.Tensor) and p.embeddings.dim() != 1
+        }
+        header = {
+            "format_version": self.FORMAT_VERSION,
+            "ids": [p.id for p in patterns],
+            "metadata": [p.metadata for p in patterns],
+            "shapes": shapes,
             "stats": self.get_stats(),
             "config": {
                 "buffer_size": self.buffer_size,
@@ -357,31 +519,73 @@ class MemoryManager:
             }
         }
         
-        with open(filepath, 'w') as f:
-            json.dump(data, f, indent=2)
+        # Write through a file object so numpy does not append ".npz" to the path
+        with open(filepath, 'wb') as f:
+            np.savez(
+                f,
+                header=np.frombuffer(json.dumps(header, default=str).encode("utf-8"), dtype=np.uint8),
+                embeddings=np.stack(vectors) if vectors else np.zeros((0, self._dim or 0), dtype=np.float32),
+                importance_scores=np.array([p.importance_score for p in patterns], dtype=np.float64),
+                access_counts=np.array([p.access_count for p in patterns], dtype=np.int64),
+                last_accessed=np.array([p.last_accessed for p in patterns], dtype="datetime64[us]"),
+                created_at=np.array([p.created_at for p in patterns], dtype="datetime64[us]")
+            )
         
         logger.info(f"Saved memory buffer to {filepath}")
     
     def load(self, filepath: Path):
-        """Load memory buffer from file"""
-        with open(filepath, 'r') as f:
-            data = json.load(f)
+        """Load memory buffer from file (binary, or JSON written by earlier versions)"""
+        with open(filepath, 'rb') as f:
+            is_binary = f.read(2) == b"PK"  # .npz is a zip archive
+        
+        if is_binary:
+            patterns, stats = self._read_binary(filepath)
+        else:
+            with open(filepath, 'r') as f:
+                data = json.load(f)
+            patterns = [MemoryPattern.from_dict(pattern_dict) for pattern_dict in data["patterns"]]
+            stats = data["stats"]
         
         # Clear existing buffer
         self.memory_buffer.clear()
+        self._reset_index()
         
         # Load patterns
-        for pattern_dict in data["patterns"]:
-            pattern = MemoryPattern.from_dict(pattern_dict)
-            if self.eviction_policy == "lru":
-                self.memory_buffer[pattern.id] = pattern
-            else:
-                self.memory_buffer[pattern.id] = pattern
+        for pattern in patterns:
+            self.memory_buffer[pattern.id] = pattern
+        self._build_index()
         
         # Update statistics
-        self.total_patterns_added = data["stats"].get("total_patterns_added", 0)
-        self.total_patterns_evicted = data["stats"].get("total_patterns_evicted", 0)
-        self.total_accesses = data["stats"].get("total_accesses", 0)
+        self.total_patterns_added = stats.get("total_patterns_added", 0)
+        self.total_patterns_evicted = stats.get("total_patterns_evicted", 0)
+        self.total_accesses = stats.get("total_accesses", 0)
         
         logger.info(f"Loaded {len(self.memory_buffer)} patterns from {filepath}")
-
+    
+    def _read_binary(self, filepath: Path) -> Tuple[List[MemoryPattern], Dict[str, Any]]:
+        """Read patterns and statistics written by save()"""
+        with np.load(filepath, allow_pickle=False) as data:
+            header = json.loads(data["header"].tobytes().decode("utf-8"))
+            embeddings = torch.from_numpy(data["embeddings"])
+            importance_scores = data["importance_scores"].tolist()
+            access_counts = data["access_counts"].tolist()
+            last_accessed = data["last_accessed"].tolist()
+            created_at = data["created_at"].tolist()
+        
+        shapes = header.get("shapes", {})
+        patterns = []
+        for i, pattern_id in enumerate(header["ids"]):
+            pattern_embeddings = embeddings[i]
+            if str(i) in shapes:
+                pattern_embeddings = pattern_embeddings.reshape(shapes[str(i)])
+            patterns.append(MemoryPattern(
+                id=pattern_id,
+                embeddings=pattern_embeddings,
+                metadata=header["metadata"][i],
+                importance_score=importance_scores[i],
+                access_count=access_counts[i],
+                last_accessed=last_accessed[i],
+                created_at=created_at[i]
+            ))
+        
+        return patterns, header["stats"]
@@ -0,0 +1,259 @@
+"""
+Background Training Worker for Continual Learning
+
+Trains a shadow copy of the serving hybrid encoder on a worker thread, so
+continual-learning updates neither block nor mutate the model that answers
+encode() calls. Each cycle:
+
+1. takes a batch of generated samples from the queue,
+2. holds part of it out for validation and trains the shadow copy on the rest,
+3. accepts the result only if the held-out loss did not regress, and
+4. publishes it as a new weight version by swapping tensor references into
+   the serving encoder under its weights guard (no forward pass sees a mix
+   of versions); rejected cycles roll the shadow copy back.
+
+The worker runs at a lower OS priority where supported and waits for
+in-flight encodes to finish before each training batch.
+"""
+import copy
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import torch
+from loguru import logger
+
+from ..hybrid_encoder import HybridEncoder
+
+
+def swap_weights(encoder: HybridEncoder, state_dict: Dict[str, torch.Tensor]):
+    """
+    Point the encoder's parameters and buffers at new tensors
+
+    Only references change, so the swap takes microseconds. It holds the write
+    side of the encoder's weights guard, which waits for in-flight encodes.
+
+    Args:
+        encoder: Serving encoder
+        state_dict: Tensors to publish; must not be shared with a model that
+            keeps training
+    """
+    tensors = dict(encoder.named_parameters())
+    tensors.update(encoder.named_buffers())
+    missing = [name for name in state_dict if name not in tensors]
+    if missing:
+        raise KeyError(f"Unknown weights in published state: {missing[:5]}")
+
+    with encoder.weights_guard.writing():
+        for name, value in state_dict.items():
+            tensors[name].data = value
+
+
+class ContinualTrainingWorker:
+    """Trains a shadow encoder from a sample queue and hot-swaps accepted weights"""
+
+    def __init__(
+        self,
+        learner: Any,
+        validation_fraction: float = 0.2,
+        max_validation_regression: float = 0.05,
+        max_idle_wait: float = 0.05,
+        nice: int = 10,
+        name: str = "continual-learner"
+    ):
+        """
+        Args:
+            learner: ContinualLearner whose encoder is served and whose training
+                settings (learning rate, accumulation, clipping) are used
+            validation_fraction: Share of each cycle's samples held out
+            max_validation_regression: Largest relative increase in held-out
+                loss that is still published
+            max_idle_wait: Longest time (seconds) to wait for in-flight encodes
+                before each training batch
+            nice: Niceness added to the worker thread (Linux), 0 to disable
+            name: Worker thread name
+        """
+        self.learner = learner
+        self.serving_encoder: HybridEncoder = learner.hybrid_encoder
+        self.validation_fraction = validation_fraction
+        self.max_validation_regression = max_validation_regression
+        self.max_idle_wait = max_idle_wait
+        self.nice = nice
+        self.name = name
+
+        # Shadow copy trained in place; serving weights are only ever swapped
+        with self.serving_encoder.weights_guard.reading():
+            self.shadow = copy.deepcopy(self.serving_encoder)
+        self.optimizer = torch.optim.AdamW(self.shadow.parameters(), lr=learner.learning_rate)
+
+        self._queue: "queue.Queue[Optional[List[Dict]]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+        # Statistics
+        self.version = 0
+        self.cycles = 0
+        self.rejected = 0
+        self.failed = 0
+        self.last_cycle: Dict[str, Any] = {}
+
+    def submit(self, samples: List[Dict]):
+        """Queue a batch of generated samples for one training cycle"""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError(f"{self.name} is closed")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+        self._queue.put(samples)
+
+    def join(self):
+        """Block until every queued cycle has finished"""
+        self._queue.join()
+
+    def close(self, wait: bool = True):
+        """Stop accepting samples; queued cycles still run"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._queue.put(None)
+        if wait and self._thread is not None:
+            self._thread.join()
+
+    def reset(self):
+        """Re-copy the serving weights into the shadow (e.g. after loading a checkpoint)"""
+        with self.serving_encoder.weights_guard.reading():
+            self.shadow.load_state_dict(self.serving_encoder.state_dict())
+        self.optimizer = torch.optim.AdamW(self.shadow.parameters(), lr=self.learner.learning_rate)
+
+    # ------------------------------------------------------------------
+    # Worker thread
+    # ------------------------------------------------------------------
+
+    def _run(self):
+        self._lower_priority()
+        while True:
+            samples = self._queue.get()
+            try:
+                if samples is None:
+                    return
+                self.run_cycle(samples)
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"{self.name}: training cycle failed: {e}")
+                self._rollback()
+            finally:
+                self._queue.task_done()
+
+    def _lower_priority(self):
+        if self.nice <= 0:
+            return
+        try:
+            # Linux schedules threads individually, so this only lowers the
+            # worker thread itself. Torch's intra-op pool is shared with
+            # serving and keeps its normal priority; torch.set_num_threads
+            # would cap serving too, since it is process-wide
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), self.nice)
+        except (AttributeError, OSError) as e:
+            logger.debug(f"{self.name}: could not lower thread priority: {e}")
+
+    def _yield_to_serving(self):
+        """Let in-flight encodes finish before the next training batch"""
+        guard = self.serving_encoder.weights_guard
+        deadline = time.monotonic() + self.max_idle_wait
+        while guard.active_readers and time.monotonic() < deadline:
+            time.sleep(0.001)
+
+    def _split(self, samples: List[Dict]) -> tuple:
+        """(train, validation): every k-th sample is held out"""
+        if self.validation_fraction <= 0 or len(samples) < 2:
+            return samples, []
+        every = max(2, round(1 / self.validation_fraction))
+        validation = samples[every - 1::every]
+        train = [s for i, s in enumerate(samples) if (i + 1) % every != 0]
+        return train, validation
+
+    def run_cycle(self, samples: List[Dict]) -> Dict[str, Any]:
+        """
+        Train, validate and (if accepted) publish one weight version
+
+        Returns:
+            cycle: Losses, validation outcome and timings for this cycle
+        """
+        started = time.monotonic()
+        train, validation = self._split(samples)
+
+        loss_before = self.learner.evaluate_loss(self.shadow, validation)
+        optimizer_state = copy.deepcopy(self.optimizer.state_dict())
+        dataset = self.learner.build_dataset(train)
+        train_loss, num_batches = 0.0, 0
+        if dataset is not None:
+            train_loss, num_batches = self.learner.train_on_samples(
+                self.shadow, self.optimizer, dataset, before_batch=self._yield_to_serving
+            )
+        loss_after = self.learner.evaluate_loss(self.shadow, validation)
+
+        finite = all(torch.isfinite(p).all() for p in self.shadow.parameters())
+        if num_batches == 0:
+            accepted, reason = False, "no trainable samples"
+        elif not finite:
+            accepted, reason = False, "non-finite weights"
+        elif loss_before is not None and loss_after is not None and \
+                loss_after > loss_before * (1 + self.max_validation_regression):
+            accepted, reason = False, "validation loss regressed"
+        else:
+            accepted, reason = True, "accepted"
+
+        swap_ms = 0.0
+        if accepted:
+            published = {name: tensor.detach().clone() for name, tensor in self.shadow.state_dict().items()}
+            swap_started = time.monotonic()
+            swap_weights(self.serving_encoder, published)
+            swap_ms = (time.monotonic() - swap_started) * 1000
+            self.version += 1
+        else:
+            self.rejected += 1
+            self._rollback(optimizer_state)
+
+        self.cycles += 1
+        self.last_cycle = {
+            "version": self.version,
+            "accepted": accepted,
+            "reason": reason,
+            "train_loss": train_loss,
+            "validation_loss_before": loss_before,
+            "validation_loss_after": loss_after,
+            "num_train_samples": len(train),
+            "num_validation_samples": len(validation),
+            "cycle_seconds": time.monotonic() - started,
+            "swap_ms": swap_ms
+        }
+        self.learner.record_update(self.last_cycle, num_samples=len(samples), published=accepted)
+
+        logger.info(
+            f"{self.name}: cycle {self.cycles} {reason} "
+            f"(train loss {train_loss:.4f}, version {self.version})"
+        )
+        return self.last_cycle
+
+    def _rollback(self, optimizer_state: Optional[Dict] = None):
+        """Return the shadow to the published (serving) weights"""
+        with self.serving_encoder.weights_guard.reading():
+            self.shadow.load_state_dict(self.serving_encoder.state_dict())
+        if optimizer_state is not None:
+            self.optimizer.load_state_dict(optimizer_state)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get worker statistics"""
+        return {
+            "version": self.version,
+            "cycles": self.cycles,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "queued": self._queue.qsize(),
+            "last_cycle": self.last_cycle
+        }
@@ -6,6 +6,7 @@ Provides streaming processing for queries and generated data.
 
 from .stream_processor import StreamProcessor
 from .stream_buffer import StreamBuffer
+from .dynamic_batcher import DynamicBatcher
 
-__all__ = ["StreamProcessor", "StreamBuffer"]
+__all__ = ["StreamProcessor", "StreamBuffer", "DynamicBatcher"]
 
@@ -0,0 +1,137 @@
+"""
+Dynamic Batcher for Streaming Requests
+
+Collects individually submitted requests into batches for a batch function
+(one encoder forward per batch). A batch is dispatched as soon as it is full
+or the oldest waiting request has waited `max_wait` seconds, whichever comes
+first. Each request gets a Future that resolves to its own result.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional
+
+from loguru import logger
+
+
+class DynamicBatcher:
+    """Size-or-deadline batching of requests onto a batch function"""
+
+    def __init__(
+        self,
+        process_batch: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 32,
+        max_wait: float = 0.005,
+        name: str = "batcher"
+    ):
+        """
+        Args:
+            process_batch: Maps a list of requests to a list of results in the
+                same order
+            max_batch_size: Dispatch as soon as this many requests are waiting
+            max_wait: Longest time (seconds) a request waits for a fuller batch
+            name: Worker thread name
+        """
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.name = name
+
+        # (enqueue time, request, future), oldest first
+        self._pending: deque = deque()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._worker: Optional[threading.Thread] = None
+
+        # Statistics
+        self.total_requests = 0
+        self.total_batches = 0
+        self.total_wait = 0.0
+        self.total_batch_time = 0.0
+
+    def submit(self, request: Any) -> Future:
+        """Queue a request; the returned Future resolves to its result"""
+        future: Future = Future()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError(f"{self.name} is closed")
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._worker.start()
+            self._pending.append((time.monotonic(), request, future))
+            self.total_requests += 1
+            if len(self._pending) >= self.max_batch_size or len(self._pending) == 1:
+                self._condition.notify()
+        return future
+
+    async def asubmit(self, request: Any) -> Any:
+        """Queue a request and await its result"""
+        return await asyncio.wrap_future(self.submit(request))
+
+    def close(self, wait: bool = True):
+        """Stop accepting requests; queued requests are still processed"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        if wait and self._worker is not None:
+            self._worker.join()
+
+    def _next_batch(self) -> Optional[List[tuple]]:
+        """Block until a batch is due; None once closed and drained"""
+        with self._condition:
+            while True:
+                if self._pending:
+                    if len(self._pending) >= self.max_batch_size or self._closed:
+                        break
+                    remaining = self._pending[0][0] + self.max_wait - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                elif self._closed:
+                    return None
+                else:
+                    self._condition.wait()
+
+            count = min(len(self._pending), self.max_batch_size)
+            return [self._pending.popleft() for _ in range(count)]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+
+            started = time.monotonic()
+            requests = [request for _, request, _ in batch]
+            try:
+                results = self.process_batch(requests)
+                if len(results) != len(requests):
+                    raise RuntimeError(f"{self.name}: {len(results)} results for {len(requests)} requests")
+            except Exception as e:
+                logger.error(f"{self.name}: batch of {len(requests)} failed: {e}")
+                for _, _, future in batch:
+                    future.set_exception(e)
+            else:
+                for (_, _, future), result in zip(batch, results):
+                    future.set_result(result)
+
+            finished = time.monotonic()
+            self.total_batches += 1
+            self.total_wait += sum(started - enqueued for enqueued, _, _ in batch)
+            self.total_batch_time += finished - started
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get batching statistics"""
+        dispatched = self.total_requests - len(self._pending)
+        return {
+            "pending": len(self._pending),
+            "total_requests": self.total_requests,
+            "total_batches": self.total_batches,
+            "mean_batch_size": dispatched / self.total_batches if self.total_batches else 0.0,
+            "mean_wait_ms": 1000 * self.total_wait / dispatched if dispatched else 0.0,
+            "mean_batch_ms": 1000 * self.total_batch_time / self.total_batches if self.total_batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait": self.max_wait
+        }
@@ -45,8 +45,11 @@ class StreamBuffer:
         self.timeout = timeout
         self.batch_size = batch_size
         
-        # Buffer storage
-        self.buffer = deque(maxlen=buffer_size)
+        # Buffer storage. Items are handed out in arrival order, so every
+        # processed item is older than every pending one and the two queues
+        # together hold the buffer oldest-first.
+        self.pending: deque = deque()
+        self.processed: deque = deque()
         self.lock = threading.Lock()
         
         # Statistics
@@ -74,9 +77,9 @@ class StreamBuffer:
         """
         with self.lock:
             # Check if buffer is full
-            if len(self.buffer) >= self.buffer_size:
+            if len(self.pending) + len(self.processed) >= self.buffer_size:
                 # Drop oldest item
-                self.buffer.popleft()
+                (self.processed or self.pending).popleft()
                 self.total_dropped += 1
                 logger.warning(f"Buffer full, dropped item")
             
@@ -88,7 +91,7 @@ class StreamBuffer:
             )
             
             # Add to buffer
-            self.buffer.append(item)
+            self.pending.append(item)
             self.total_items += 1
             
             return True
@@ -112,49 +115,51 @@ class StreamBuffer:
         max_items = max_items or self.batch_size
         
         with self.lock:
-            # Get unprocessed items
-            unprocessed = [item for item in self.buffer if not item.processed]
-            
-            # Take up to max_items
-            batch = unprocessed[:max_items]
-            
-            # Mark as processed
-            for item in batch:
+            # Take up to max_items unprocessed items
+            batch = []
+            while self.pending and len(batch) < max_items:
+                item = self.pending.popleft()
+                # Mark as processed
                 item.processed = True
-            
+                batch.append(item)
+            self.processed.extend(batch)
+
             self.total_processed += len(batch)
             self.last_process_time = time.time()
-            
+
             return batch
-    
+
     def get_all_unprocessed(self) -> List[StreamItem]:
         """Get all unprocessed items"""
         with self.lock:
-            unprocessed = [item for item in self.buffer if not item.processed]
-            return unprocessed
-    
+            return list(self.pending)
+
     def clear_processed(self):
         """Remove processed items from buffer"""
         with self.lock:
-            self.buffer = deque(
-                [item for item in self.buffer if not item.processed],
-                maxlen=self.buffer_size
-            )
-    
+            self.processed.clear()
+
+    @property
+    def buffer(self) -> deque:
+        """Snapshot of all buffered items, oldest first"""
+        with self.lock:
+            return deque(list(self.processed) + list(self.pending))
+
     def clear(self):
         """Clear all items from buffer"""
         with self.lock:
-            self.buffer.clear()
+            self.pending.clear()
+            self.processed.clear()
             logger.info("Buffer cleared")
     
     def get_stats(self) -> Dict[str, Any]:
         """Get buffer statistics"""
         with self.lock:
             return {
-                "buffer_size": len(self.buffer),
+                "buffer_size": len(self.pending) + len(self.processed),
                 "max_buffer_size": self.buffer_size,
-                "unprocessed": sum(1 for item in self.buffer if not item.processed),
-                "processed": sum(1 for item in self.buffer if item.processed),
+                "unprocessed": len(self.pending),
+                "processed": len(self.processed),
                 "total_items": self.total_items,
                 "total_processed": self.total_processed,
                 "total_dropped": self.total_dropped,
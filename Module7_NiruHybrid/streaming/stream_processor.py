@@ -3,15 +3,30 @@ Stream Processor for Real-time Query and Data Processing
 
 Processes streaming queries and generated data in real-time with
 async support and batch processing.
+
+Query batches are tokenized, grouped into length buckets (powers of two from
+min_length_bucket up to the encoder's max_seq_length), padded to the longest
+sequence in each bucket and encoded with one forward pass per bucket.
+submit_query() feeds a DynamicBatcher, so concurrent callers share forward
+passes and each gets its own Future.
 """
 import asyncio
+import threading
 import torch
+from concurrent.futures import Future
 from typing import List, Dict, Optional, Any, Callable, AsyncIterator
 from datetime import datetime
 import time
 from loguru import logger
 
+try:
+    from transformers import GPT2Tokenizer
+    TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    TRANSFORMERS_AVAILABLE = False
+
 from .stream_buffer import StreamBuffer, AsyncStreamBuffer, StreamItem
+from .dynamic_batcher import DynamicBatcher
 from ..config import StreamingConfig, default_config
 from ..hybrid_encoder import HybridEncoder
 from ..diffusion.text_diffusion import TextDiffusionModel
@@ -29,29 +44,127 @@ class StreamProcessor:
         batch_size: int = 32,
         max_concurrent_streams: int = 10,
         processing_timeout: float = 30.0,
+        tokenizer: Optional[Any] = None,
+        max_batch_wait: float = 0.005,
+        min_length_bucket: int = 16,
         config: Optional[StreamingConfig] = None
     ):
+        """
+        Args:
+            hybrid_encoder: HybridEncoder, or an EncoderRuntime loaded from an
+                exported artifact (see encoder_runtime.py)
+            tokenizer: Object with encode(text) -> token IDs for the encoder's
+                vocabulary (default: GPT-2 tokenizer, loaded on first use)
+            max_batch_wait: Longest time a submitted query waits for a fuller batch
+            min_length_bucket: Smallest padded sequence length bucket
+        """
         if config is not None:
             batch_size = config.batch_size
             max_concurrent_streams = config.max_concurrent_streams
             processing_timeout = config.processing_timeout
+            max_batch_wait = config.max_batch_wait
+            min_length_bucket = config.min_length_bucket
         
         self.hybrid_encoder = hybrid_encoder
         self.text_diffusion = text_diffusion
         self.embedding_diffusion = embedding_diffusion
+        self.tokenizer = tokenizer
         
         self.batch_size = batch_size
         self.max_concurrent_streams = max_concurrent_streams
         self.processing_timeout = processing_timeout
+        self.max_batch_wait = max_batch_wait
+        self.min_length_bucket = min_length_bucket
         
         # Buffers
         self.query_buffer = StreamBuffer(batch_size=batch_size)
         self.data_buffer = StreamBuffer(batch_size=batch_size)
         
+        # Dynamic batching (started on first submit_query)
+        self._query_batcher: Optional[DynamicBatcher] = None
+        self._batcher_lock = threading.Lock()
+        
         # Processing state
         self.active_streams = 0
         self.processed_queries = 0
         self.processed_data = 0
+        self.forward_passes = 0
+        self.encoded_tokens = 0
+        self.padded_tokens = 0
+    
+    # ------------------------------------------------------------------
+    # Batched encoding
+    # ------------------------------------------------------------------
+    
+    def _get_tokenizer(self):
+        if self.tokenizer is None:
+            if not TRANSFORMERS_AVAILABLE:
+                raise RuntimeError("No tokenizer given and transformers is not installed")
+            self.tokenizer = GPT2Tokenizer.from_pretrained('gpt2')
+        return self.tokenizer
+    
+    def _length_bucket(self, length: int) -> int:
+        """Smallest power-of-two bucket (from min_length_bucket) holding length"""
+        bucket = self.min_length_bucket
+        while bucket < length:
+            bucket *= 2
+        return bucket
+    
+    def encode_texts(self, texts: List[str]) -> List[List[float]]:
+        """
+        Pooled embeddings for texts, one encoder forward per length bucket.
+        
+        Texts are truncated to the encoder's max_seq_length. Within a bucket
+        sequences are padded to the longest one and masked, so each embedding
+        matches encoding that text on its own.
+        
+        Returns:
+            embeddings: One vector per text, in input order
+        """
+        if self.hybrid_encoder is None:
+            raise RuntimeError("No hybrid encoder configured")
+        tokenizer = self._get_tokenizer()
+        max_length = self.hybrid_encoder.max_seq_length
+        pad_id = getattr(tokenizer, "eos_token_id", None) or 0
+        
+        token_ids = []
+        for text in texts:
+            ids = list(tokenizer.encode(text or ""))[:max_length]
+            token_ids.append(ids or [pad_id])
+        
+        # Group by length bucket, longest first, at most batch_size per forward
+        buckets: Dict[int, List[int]] = {}
+        for index in sorted(range(len(texts)), key=lambda i: len(token_ids[i])):
+            buckets.setdefault(self._length_bucket(len(token_ids[index])), []).append(index)
+        
+        device = getattr(self.hybrid_encoder, "device", None) or next(self.hybrid_encoder.parameters()).device
+        embeddings: List[Optional[List[float]]] = [None] * len(texts)
+        for bucket in sorted(buckets, reverse=True):
+            members = buckets[bucket]
+            for start in range(0, len(members), self.batch_size):
+                group = members[start:start + self.batch_size]
+                seq_len = max(len(token_ids[i]) for i in group)
+                input_ids = torch.full((len(group), seq_len), pad_id, dtype=torch.long)
+                padding_mask = torch.ones(len(group), seq_len, dtype=torch.bool)
+                for row, index in enumerate(group):
+                    ids = token_ids[index]
+                    input_ids[row, :len(ids)] = torch.tensor(ids, dtype=torch.long)
+                    padding_mask[row, :len(ids)] = False
+                
+                with torch.no_grad():
+                    pooled = self.hybrid_encoder.encode(
+                        input_ids=input_ids.to(device),
+                        attention_mask=padding_mask.to(device),
+                        return_pooled=True
+                    )
+                for row, vector in zip(group, pooled.float().cpu().tolist()):
+                    embeddings[row] = vector
+                
+                self.forward_passes += 1
+                self.encoded_tokens += sum(len(token_ids[i]) for i in group)
+                self.padded_tokens += len(group) * seq_len
+        
+        return embeddings
     
     def process_query(
         self,
@@ -70,36 +183,9 @@ class StreamProcessor:
         Returns:
             result: Processing result
         """
-        start_time = time.time()
-        
-        try:
-            # Encode query
-            if self.hybrid_encoder is not None:
-                with torch.no_grad():
-                    query_emb = self.hybrid_encoder.encode(text=query_text, return_pooled=True)
-            else:
-                # Fallback: return text as-is
-                query_emb = None
-            
-            result = {
-                "query_id": query_id,
-                "query_text": query_text,
-                "embeddings": query_emb.cpu().tolist() if query_emb is not None else None,
-                "metadata": metadata or {},
-                "processing_time": time.time() - start_time,
-                "timestamp": datetime.now().isoformat()
-            }
-            
-            self.processed_queries += 1
-            return result
-        
-        except Exception as e:
-            logger.error(f"Error processing query {query_id}: {e}")
-            return {
-                "query_id": query_id,
-                "error": str(e),
-                "processing_time": time.time() - start_time
-            }
+        return self.process_query_batch([
+            {"id": query_id, "text": query_text, "metadata": metadata}
+        ])[0]
     
     def process_query_batch(
         self,
@@ -114,24 +200,95 @@ class StreamProcessor:
         Returns:
             results: List of processing results
         """
-        results = []
+        start_time = time.time()
+        query_ids = [query.get("id", f"query_{i}") for i, query in enumerate(queries)]
+        texts = [query.get("text", "") for query in queries]
         
-        for query in queries:
-            result = self.process_query(
-                query_id=query.get("id", f"query_{len(results)}"),
-                query_text=query.get("text", ""),
-                metadata=query.get("metadata")
-            )
-            results.append(result)
+        try:
+            # Encode queries
+            if self.hybrid_encoder is not None:
+                query_embs = self.encode_texts(texts)
+            else:
+                # Fallback: return text as-is
+                query_embs = [None] * len(queries)
+        except Exception as e:
+            logger.error(f"Error processing {len(queries)} queries: {e}")
+            return [
+                {
+                    "query_id": query_id,
+                    "error": str(e),
+                    "processing_time": time.time() - start_time
+                }
+                for query_id in query_ids
+            ]
         
+        processing_time = time.time() - start_time
+        timestamp = datetime.now().isoformat()
+        results = [
+            {
+                "query_id": query_id,
+                "query_text": text,
+                "embeddings": query_emb,
+                "metadata": query.get("metadata") or {},
+                "processing_time": processing_time,
+                "batch_size": len(queries),
+                "timestamp": timestamp
+            }
+            for query_id, text, query_emb, query in zip(query_ids, texts, query_embs, queries)
+        ]
+        
+        self.processed_queries += len(results)
         return results
     
+    def submit_query(
+        self,
+        query_id: str,
+        query_text: str,
+        metadata: Optional[Dict] = None
+    ) -> Future:
+        """
+        Queue a query for dynamic batching
+        
+        The query is encoded together with other queries submitted within
+        max_batch_wait seconds (up to batch_size per batch).
+        
+        Returns:
+            future: Resolves to the query's processing result
+        """
+        with self._batcher_lock:
+            if self._query_batcher is None:
+                self._query_batcher = DynamicBatcher(
+                    self.process_query_batch,
+                    max_batch_size=self.batch_size,
+                    max_wait=self.max_batch_wait,
+                    name="query-batcher"
+                )
+            batcher = self._query_batcher
+        return batcher.submit({"id": query_id, "text": query_text, "metadata": metadata})
+    
+    async def asubmit_query(
+        self,
+        query_id: str,
+        query_text: str,
+        metadata: Optional[Dict] = None
+    ) -> Dict[str, Any]:
+        """Async submit_query: await the batched result"""
+        return await asyncio.wrap_future(self.submit_query(query_id, query_text, metadata))
+    
+    def close(self):
+        """Finish queued queries and stop the batching worker"""
+        with self._batcher_lock:
+            batcher, self._query_batcher = self._query_batcher, None
+        if batcher is not None:
+            batcher.close()
+    
     def process_generated_data(
         self,
         data_id: str,
         data: Any,
         data_type: str = "text",  # "text" or "embedding"
-        metadata: Optional[Dict] = None
+        metadata: Optional[Dict] = None,
+        embeddings: Optional[List[float]] = None
     ) -> Dict[str, Any]:
         """
         Process generated data
@@ -141,6 +298,7 @@ class StreamProcessor:
             data: Generated data (text or embeddings)
             data_type: Type of data
             metadata: Optional metadata
+            embeddings: Text embeddings already computed in a batch
         
         Returns:
             result: Processing result
@@ -158,10 +316,10 @@ class StreamProcessor:
             }
             
             # Encode if text
-            if data_type == "text" and self.hybrid_encoder is not None:
-                with torch.no_grad():
-                    embeddings = self.hybrid_encoder.encode(text=data, return_pooled=True)
-                    result["embeddings"] = embeddings.cpu().tolist()
+            if embeddings is not None:
+                result["embeddings"] = embeddings
+            elif data_type == "text" and self.hybrid_encoder is not None:
+                result["embeddings"] = self.encode_texts([data])[0]
             
             self.processed_data += 1
             return result
@@ -223,13 +381,24 @@ class StreamProcessor:
         if not batch:
             return []
         
+        # Encode text items together instead of one forward each
+        text_items = [item for item in batch if item.data["type"] == "text"]
+        embeddings = {}
+        if text_items and self.hybrid_encoder is not None:
+            try:
+                vectors = self.encode_texts([item.data["data"] for item in text_items])
+                embeddings = {id(item): vector for item, vector in zip(text_items, vectors)}
+            except Exception as e:
+                logger.error(f"Error encoding buffered data batch: {e}")
+        
         results = []
         for item in batch:
             result = self.process_generated_data(
                 data_id=item.id,
                 data=item.data["data"],
                 data_type=item.data["type"],
-                metadata=item.data.get("metadata")
+                metadata=item.data.get("metadata"),
+                embeddings=embeddings.get(id(item))
             )
             results.append(result)
         
@@ -282,8 +451,11 @@ class StreamProcessor:
             "processed_queries": self.processed_queries,
             "processed_data": self.processed_data,
             "active_streams": self.active_streams,
+            "forward_passes": self.forward_passes,
+            "padding_ratio": 1 - self.encoded_tokens / self.padded_tokens if self.padded_tokens else 0.0,
             "query_buffer": self.query_buffer.get_stats(),
-            "data_buffer": self.data_buffer.get_stats()
+            "data_buffer": self.data_buffer.get_stats(),
+            "query_batcher": self._query_batcher.get_stats() if self._query_batcher else None
         }
 
 
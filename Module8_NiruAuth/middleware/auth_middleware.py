@@ -20,6 +20,7 @@ from ..providers.jwt_provider import JWTProvider
 from ..providers.session_provider import SessionProvider
 from ..config import config
 from Module3_NiruDB.chat_models import create_database_engine, get_db_session
+from Module3_NiruDB.request_tracing import span
 
 
 class AuthMiddleware(BaseHTTPMiddleware):
@@ -89,7 +90,7 @@ class AuthMiddleware(BaseHTTPMiddleware):
         
         try:
             # Use context manager for database session
-            with get_db_session(self.engine) as db:
+            with span("auth"), get_db_session(self.engine) as db:
                 # Ensure we have a fresh database session
                 db.expire_all()
                 
@@ -771,6 +771,14 @@ ${researchProcess.tools_used && researchProcess.tools_used.length > 0
                               ? { ...msg, content: accumulatedContent }
                               : msg
                           ))
+                        } else if (parsed.type === 'reset') {
+                          // Generation failed part-way; the fallback answer follows
+                          accumulatedContent = ''
+                          setMessages(prev => prev.map(msg => 
+                            msg.id === assistantMessageId 
+                              ? { ...msg, content: '' }
+                              : msg
+                          ))
                         } else if (parsed.type === 'done') {
                           setMessages(prev => prev.map(msg => 
                             msg.id === assistantMessageId 